@@ -0,0 +1,62 @@
+'''
+RAET Examples for running RoadStacks on asyncio
+
+Requires python 3.5 or later
+'''
+import asyncio
+
+from ioflo.aid.odicting import odict
+from ioflo.base.consoling import getConsole
+
+import raet
+from raet import raeting
+from raet.raeting import AutoMode
+from raet.asyncing import AsyncStack
+
+console = getConsole()
+console.reinit(verbosity=console.Wordage.concise)
+
+
+async def until(predicate, period=0.05):
+    '''
+    Wait until predicate is true
+    '''
+    while not predicate():
+        await asyncio.sleep(period)
+
+
+async def example1():
+    '''
+    Join, allow then exchange a message between two stacks over loopback
+    '''
+    alpha = AsyncStack(raet.road.stacking.RoadStack(name='alpha',
+                                                    ha=('127.0.0.1', 7531),
+                                                    auto=AutoMode.always.value))
+
+    beta = AsyncStack(raet.road.stacking.RoadStack(name='beta',
+                                                   ha=('127.0.0.1', 7532),
+                                                   main=True,
+                                                   auto=AutoMode.always.value))
+    await alpha.open()
+    await beta.open()
+
+    remote = raet.road.estating.RemoteEstate(stack=alpha.stack, ha=beta.stack.ha)
+    alpha.stack.addRemote(remote)
+    alpha.stack.join(uid=remote.uid, cascade=True)
+    alpha.wake()
+    await until(lambda: remote.allowed)
+
+    await alpha.send(odict(content="Hello Beta"), uid=remote.uid)
+    async for msg, name in beta:
+        print("Beta received {0} from {1}\n".format(msg, name))
+        break
+
+    for runner in [alpha, beta]:
+        runner.close()  # close the UDP socket
+        runner.stack.keep.clearAllDir()  # clear persisted data
+
+    print("Finished\n")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(example1())
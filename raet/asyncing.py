@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+'''
+asyncing.py raet asyncio integration
+
+Runs a RoadStack or LaneStack on an asyncio event loop instead of polling it
+with serviceAll(). The loop watches the stack server socket for readability
+and calls stack.serviceReceives() so packets are read by the stack server
+itself, which keeps lane ring doorbells, passed file descriptors and receive
+deferral working. Time based processing, process() and optionally manage(),
+and retries of sends deferred by a busy destination are scheduled on the loop.
+While a LaneStack defers receives because .rxMsgs is too full the socket is
+not watched, so senders see busy until the consumer drains .rxMsgs.
+
+Requires python 3.5 or later so is not imported by the raet package.
+
+Example:
+
+    async def main():
+        alpha = AsyncStack(RoadStack(name='alpha', ha=('127.0.0.1', 7531)))
+        await alpha.open()
+        ...
+        await alpha.send(odict(content='Hello'), uid=remote.uid)
+        async for msg, name in alpha:
+            ...
+        alpha.close()
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import asyncio
+
+# Import raet libs
+from .abiding import *  # import globals
+from . import raeting
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+
+class AsyncStack(object):
+    '''
+    Runs a Stack instance on an asyncio event loop
+
+    Received packets are serviced as the server socket becomes readable.
+    Transactions are processed every .period seconds. When manage is True then
+    RoadStack presence is managed on the same period. Sends deferred by a busy
+    destination are retried at stack.nextDeadline(). The store stamp of the
+    stack follows the loop clock so stack timers expire in real time.
+    '''
+    Period = 0.1  # seconds between process() calls
+
+    def __init__(self, stack, loop=None, period=None, manage=False):
+        '''
+        Setup instance
+
+        stack is RoadStack or LaneStack with open server
+        loop is asyncio event loop, defaults to current event loop
+        period is seconds between time based processing
+        manage is True to call stack.manage on each period
+        '''
+        self.stack = stack
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self.period = period if period is not None else self.Period
+        self.manage = manage
+        self.sock = None  # server socket watched by the loop
+        self.reading = False  # True while loop watches .sock for readability
+        self.closed = True
+        self.scheduled = False  # service already scheduled with call_soon
+        self.ticker = None  # handle of next periodic tick
+        self.retrier = None  # handle of next retry of deferred .txes
+        self.origin = None  # loop time at store stamp of zero
+        self.received = None  # event rxMsgs not empty, created on open
+        self.acceptings = dict()  # events transmit to uid not deferring keyed by uid
+
+    async def open(self):
+        '''
+        Watch the stack server socket on the loop and start servicing
+        Raises StackError if the server has no selectable socket
+        '''
+        self.sock = getattr(self.stack.server, 'ss', None)
+        if self.sock is None:
+            emsg = "Stack {0}: server has no selectable socket".format(self.stack.name)
+            raise raeting.StackError(emsg)
+        self.received = asyncio.Event()
+        self.origin = self.loop.time() - self.stack.store.stamp
+        self.closed = False
+        self.tick()
+
+    def close(self):
+        '''
+        Stop servicing and close stack server
+        '''
+        for handle in [self.ticker, self.retrier]:
+            if handle:
+                handle.cancel()
+        self.ticker = self.retrier = None
+        if self.sock is not None:
+            self.watch(False)
+            self.stack.server.close()
+            self.sock = None
+        self.closed = True
+        self.notify()
+
+    def stamp(self):
+        '''
+        Advance stack store stamp to loop clock
+        '''
+        stamp = self.loop.time() - self.origin
+        if stamp > self.stack.store.stamp:
+            self.stack.store.changeStamp(stamp)
+
+    def watch(self, reading):
+        '''
+        Add or remove the loop reader of .sock so it matches reading
+        '''
+        if reading == self.reading:
+            return
+        if reading:
+            self.loop.add_reader(self.sock, self.readable)
+        else:
+            self.loop.remove_reader(self.sock)
+        self.reading = reading
+
+    def wake(self):
+        '''
+        Schedule service on next loop iteration if not already scheduled
+        '''
+        if not self.scheduled and not self.closed:
+            self.scheduled = True
+            self.loop.call_soon(self.service)
+
+    def readable(self):
+        '''
+        Loop reader callback, service now that .sock has data
+        '''
+        self.service(receive=True)
+
+    def tick(self):
+        '''
+        Periodic time based processing
+        '''
+        if self.closed:
+            return
+        if self.manage and hasattr(self.stack, 'manage'):
+            self.stamp()
+            self.stack.manage(cascade=True)
+        self.service()
+        self.ticker = self.loop.call_later(self.period, self.tick)
+
+    def retry(self):
+        '''
+        Service when deferred .txes are due for retry
+        '''
+        self.retrier = None
+        self.service()
+
+    def service(self, receive=False):
+        '''
+        Service all stack queues then notify waiting coroutines
+        receive is True to read the server socket first
+        '''
+        self.scheduled = False
+        if self.closed:
+            return
+        self.stamp()
+        stack = self.stack
+        if receive:
+            stack.serviceReceives()
+        stack.serviceRxes()
+        stack.process()
+        stack.serviceTxMsgs()
+        stack.serviceTxes()
+        self.watch(not stack.receivesDeferring())
+        if self.retrier:
+            self.retrier.cancel()
+            self.retrier = None
+        deadline = stack.txesDeadline()
+        if deadline is not None:
+            self.retrier = self.loop.call_later(deadline, self.retry)
+        self.notify()
+
+    def notify(self):
+        '''
+        Update events that receive and send are waiting on
+        Send to a uid waits until the stack stops deferring transmit to it
+        '''
+        if self.received is not None:
+            if self.stack.rxMsgs or self.closed:
+                self.received.set()
+            else:
+                self.received.clear()
+        for uid, accepting in list(self.acceptings.items()):
+            if self.closed or not self.stack.transmitDeferring(uid):
+                accepting.set()
+                del self.acceptings[uid]
+
+    async def send(self, msg, uid=None, **kwa):
+        '''
+        Transmit msg to remote uid waiting while transmit is deferred by
+        backpressure. Extra keyword arguments are passed to stack.transmit
+        Raises StackError if msg is invalid or stack is closed
+        '''
+        while True:
+            if self.closed:
+                raise raeting.StackError("Stack {0}: closed".format(self.stack.name))
+            accepted = self.stack.transmit(msg, uid, **kwa)
+            if accepted is None:
+                emsg = "Stack {0}: Invalid transmit of {1} to {2}".format(
+                        self.stack.name, msg, uid)
+                raise raeting.StackError(emsg)
+            if accepted:
+                self.wake()
+                return
+            accepting = self.acceptings.get(uid)
+            if accepting is None:
+                accepting = self.acceptings[uid] = asyncio.Event()
+            self.wake()
+            await accepting.wait()
+
+    async def receive(self):
+        '''
+        Returns next received duple (msg, remote name) waiting if none
+        Wakes service when draining lets deferred receives resume
+        Raises StopAsyncIteration once closed and no messages remain
+        '''
+        while not self.stack.rxMsgs:
+            if self.closed:
+                raise StopAsyncIteration
+            self.received.clear()
+            await self.received.wait()
+        msg = self.stack.rxMsgs.popleft()
+        if not self.reading and not self.stack.receivesDeferring():
+            self.wake()
+        return msg
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.receive()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+'''
+consoling.py raet level gated lazy console logging
+
+Logger wraps an ioflo Console and formats a line only when the current
+console verbosity would write it, so hot paths do not pay for building log
+lines that are thrown away. Call sites pass the format string and its
+arguments instead of a formatted string and guard arguments that are
+costly to compute with .enabled:
+
+    log = consoling.getLogger()
+    log.concise("Messenger {0}. Do Message Segment {1}\n", stack.name, sn)
+    if log.enabled(PROFUSE):
+        log.profuse("{0} received packet data\n{1}\n", name, dict(packet.data))
+
+.dump writes packets or bodies at a verbosity and samples them so high
+rates of traffic can be inspected without writing every packet.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+from ioflo.base.consoling import getConsole, Console
+
+# Import raet libs
+from .abiding import *  # import globals
+
+Wordage = Console.Wordage
+MUTE = Wordage.mute
+TERSE = Wordage.terse
+CONCISE = Wordage.concise
+VERBOSE = Wordage.verbose
+PROFUSE = Wordage.profuse
+
+
+class Logger(object):
+    '''
+    Lazy formatting writer of console lines gated by console verbosity
+    '''
+    DumpSample = 1.0  # fraction of dumps written
+    DumpSize = 1024  # most bytes of dumped data written
+
+    def __init__(self, console=None, dumpSample=None, dumpSize=None):
+        '''
+        Setup instance
+
+        console is ioflo Console defaults to the default console
+        dumpSample is fraction of .dump calls written 0.0 to 1.0
+        dumpSize is most bytes or characters of dumped data written, 0 is all
+        '''
+        self.console = console if console is not None else getConsole()
+        self.dumpSample = dumpSample if dumpSample is not None else self.DumpSample
+        self.dumpSize = dumpSize if dumpSize is not None else self.DumpSize
+        self.accrued = 0.0  # dump sample fraction accrued since last dump
+
+    def enabled(self, verbosity):
+        '''
+        Returns True if console writes lines of verbosity
+        '''
+        return verbosity <= self.console._verbosity
+
+    def write(self, verbosity, fmt, *pa, **kwa):
+        '''
+        Write fmt formatted with pa and kwa if console writes verbosity
+        '''
+        if verbosity <= self.console._verbosity:
+            self.console.write(fmt.format(*pa, **kwa) if (pa or kwa) else fmt)
+
+    def terse(self, fmt, *pa, **kwa):
+        if self.console._verbosity >= TERSE:
+            self.console.write(fmt.format(*pa, **kwa) if (pa or kwa) else fmt)
+
+    def concise(self, fmt, *pa, **kwa):
+        if self.console._verbosity >= CONCISE:
+            self.console.write(fmt.format(*pa, **kwa) if (pa or kwa) else fmt)
+
+    def verbose(self, fmt, *pa, **kwa):
+        if self.console._verbosity >= VERBOSE:
+            self.console.write(fmt.format(*pa, **kwa) if (pa or kwa) else fmt)
+
+    def profuse(self, fmt, *pa, **kwa):
+        if self.console._verbosity >= PROFUSE:
+            self.console.write(fmt.format(*pa, **kwa) if (pa or kwa) else fmt)
+
+    def sampled(self):
+        '''
+        Returns True if the next dump is written
+        '''
+        self.accrued += self.dumpSample
+        if self.accrued < 1.0:
+            return False
+        self.accrued -= 1.0
+        return True
+
+    def dump(self, verbosity, label, data, *pa):
+        '''
+        Write sampled dump of data after label formatted with pa if console
+        writes verbosity. Data is truncated to .dumpSize
+        '''
+        if verbosity > self.console._verbosity or not self.sampled():
+            return
+        if self.dumpSize and isinstance(data, (bytes, str)) and len(data) > self.dumpSize:
+            data = "{0!r}... {1} more".format(data[:self.dumpSize],
+                                              len(data) - self.dumpSize)
+        self.console.write("{0}\n{1}\n".format(label.format(*pa) if pa else label, data))
+
+
+Loggers = odict()  # Loggers keyed by console name
+
+def getLogger(name='console', **kwa):
+    '''
+    Returns Logger of console name creating it with kwa if need be
+    '''
+    logger = Loggers.get(name)
+    if logger is None:
+        logger = Logger(console=getConsole(name), **kwa)
+        Loggers[name] = logger
+    return logger
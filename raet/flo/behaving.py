@@ -17,8 +17,12 @@ raet.road.stack.local
     name host port sigkey prikey
 raet.road.stack.status
     joined allowed idle
+raet.road.stack.pressure
+    deferring txmsgs rxmsgs
 raet.road.stack.destination
     value deid
+raet.road.stack.runner
+    value StackRunner
 
 
 '''
@@ -39,6 +43,7 @@ import shutil
 # Import ioflo libs
 from ioflo.aid.odicting import odict
 from ioflo.base import deeding
+from ioflo.base.storing import Store
 
 from ioflo.base.consoling import getConsole
 console = getConsole()
@@ -51,6 +56,7 @@ from ..road.stacking import  RoadStack
 from ..lane.stacking import  LaneStack
 from ..road import packeting, estating
 from ..lane import paging, yarding
+from ..running import StackRunner
 
 class SaltRaetRoadCleanup(deeding.Deed):
     '''
@@ -263,6 +269,129 @@ class RaetRoadStackTxServicer(deeding.Deed):
         '''
         self.stack.value.serviceAllTx()
 
+class RaetRoadStackRunner(deeding.Deed):
+    '''
+    Initialize raet road stack and service it on a StackRunner thread
+    Each action only exchanges messages between the txmsgs and rxmsgs shares
+    and the runner. The stack has its own store since the runner thread
+    advances its stamp so the stack is only used through the runner.
+    FloScript:
+
+    do raet road stack runner
+
+    '''
+    Ioinits = odict(
+        inode="raet.road.stack.",
+        runner='runner',
+        txmsgs=odict(ipath='txmsgs', ival=deque()),
+        rxmsgs=odict(ipath='rxmsgs', ival=deque()),
+        local=odict(ipath='local', ival=odict(   name='master',
+                                                 basedirpath='/tmp/raet/keep',
+                                                 main=False,
+                                                 mutable=True,
+                                                 auto=AutoMode.once.value,
+                                                 uid=None,
+                                                 host='0.0.0.0',
+                                                 port=raeting.RAET_PORT,
+                                                 sigkey=None,
+                                                 prikey=None,
+                                                 manage=True)),)
+
+    def _prepare(self):
+        '''
+        Setup stack and start runner
+        '''
+        basedirpath = os.path.abspath(os.path.expanduser(self.local.data.basedirpath))
+        stack = RoadStack(store=Store(stamp=0.0),
+                          main=self.local.data.main,
+                          mutable=self.local.data.mutable,
+                          name=self.local.data.name,
+                          uid=self.local.data.uid,
+                          ha=(self.local.data.host, self.local.data.port),
+                          sigkey=self.local.data.sigkey,
+                          prikey=self.local.data.prikey,
+                          auto=self.local.data.auto,
+                          basedirpath=basedirpath, )
+        self.runner.value = StackRunner(stack, manage=self.local.data.manage)
+        self.runner.value.start()
+
+    def action(self, **kwa):
+        '''
+        Exchange messages with the runner
+        '''
+        runner = self.runner.value
+        txMsgs = self.txmsgs.value
+        while txMsgs:
+            runner.txMsgs.append(txMsgs.popleft())
+        runner.wake()
+        rxMsgs = self.rxmsgs.value
+        while runner.rxMsgs:
+            rxMsgs.append(runner.rxMsgs.popleft())
+
+class RaetRoadStackRunnerJoiner(deeding.Deed):
+    '''
+    Initiates join transaction, cascading to allow, on the runner thread with
+    zeroth remote estate (main)
+    FloScript:
+
+    do raet road stack runner joiner at enter
+
+    '''
+    Ioinits = odict(
+                     inode="raet.road.stack.",
+                     runner='runner',
+                     local=odict(
+                                 ipath='local',
+                                 ival=odict(masterhost='127.0.0.1',
+                                            masterport=raeting.RAET_PORT,
+                                            )
+                                )
+                    )
+
+    def action(self, **kwa):
+        '''
+        do raet road stack runner joiner at enter
+        '''
+        runner = self.runner.value
+        host = self.local.data.masterhost
+        if host == "" or  host == "0.0.0.0":
+            host = "127.0.0.1"
+        ha = (host, self.local.data.masterport)
+        if runner and isinstance(runner.stack, RoadStack):
+            runner.call(self.join, runner.stack, ha)
+
+    @staticmethod
+    def join(stack, ha):
+        '''
+        Add main remote at ha if no remotes then join it, runs on runner thread
+        '''
+        if not stack.remotes:
+            stack.addRemote(estating.RemoteEstate(stack=stack,
+                                                  fuid=0, # vacuous join
+                                                  sid=0, # always 0 for join
+                                                  ha=ha))
+        stack.join(uid=stack.remotes.values()[0].uid, cascade=True)
+
+class RaetRoadStackRunnerCloser(deeding.Deed):
+    '''
+    Stops road stack runner and closes its server socket connection
+    FloScript:
+
+    do raet road stack runner closer at exit
+
+    '''
+    Ioinits = odict(
+        inode=".raet.road.stack.",
+        runner='runner', )
+
+    def action(self, **kwa):
+        '''
+        Stop runner and close udp socket
+        '''
+        runner = self.runner.value
+        if runner and isinstance(runner.stack, RoadStack):
+            runner.close()
+
 class RaetRoadStackJoiner(deeding.Deed):
     '''
     Initiates join transaction with zeroth remote estate (main)
@@ -407,6 +536,38 @@ class RaetRoadStackIdled(deeding.Deed):
                 idled = True
         self.status.update(idled=idled)
 
+class RaetRoadStackPressured(deeding.Deed):
+    '''
+    Updates backpressure flags in pressure share so producers can throttle
+    deferring is true if transmit of any message would be deferred
+
+    FloScript:
+
+    do raet road stack pressured
+    go next if not deferring in .raet.road.stack.pressure
+
+    '''
+    Ioinits = odict(
+        inode=".raet.road.stack.",
+        stack='stack',
+        pressure=odict(ipath='pressure', ival=odict(deferring=False,
+                                                    txmsgs=False,
+                                                    rxmsgs=False, )))
+
+    def action(self, **kwa):
+        '''
+        Update .pressure share
+        '''
+        stack = self.stack.value
+        if stack and isinstance(stack, RoadStack):
+            stack.updatePressures()
+            txmsgs = stack.pressures.get('tx_msgs', False)
+            rxmsgs = stack.pressures.get('rx_msgs', False)
+            deferring = any(stack.pressures.values())
+            self.pressure.update(deferring=deferring,
+                                 txmsgs=txmsgs,
+                                 rxmsgs=rxmsgs)
+
 class RaetRoadStackManager(deeding.Deed):
     '''
     Runs the presence manage method of RoadStack
@@ -590,6 +751,69 @@ class RaetLaneStackCloser(deeding.Deed):
         if self.stack.value and isinstance(self.stack.value, LaneStack):
             self.stack.value.server.close()
 
+class RaetLaneStackRunner(deeding.Deed):
+    '''
+    Initialize raet lane stack and service it on a StackRunner thread
+    Each action only exchanges messages between the txmsgs and rxmsgs shares
+    and the runner
+    FloScript:
+
+    do raet lane stack runner
+
+    '''
+    Ioinits = odict(
+        inode="raet.lane.stack.",
+        runner='runner',
+        txmsgs=odict(ipath='txmsgs', ival=deque()),
+        rxmsgs=odict(ipath='rxmsgs', ival=deque()),
+        local=odict(ipath='local', ival=odict(name='minion',
+                                              lane="maple",
+                                              sockdirpath="/tmp/raet/test/lane/")),)
+
+    def _prepare(self):
+        '''
+        Setup stack and start runner
+        '''
+        stack = LaneStack(store=Store(stamp=0.0),
+                          name=self.local.data.name,
+                          sockdirpath=self.local.data.sockdirpath,
+                          lanename=self.local.data.lane, )
+        self.runner.value = StackRunner(stack)
+        self.runner.value.start()
+
+    def action(self, **kwa):
+        '''
+        Exchange messages with the runner
+        '''
+        runner = self.runner.value
+        txMsgs = self.txmsgs.value
+        while txMsgs:
+            runner.txMsgs.append(txMsgs.popleft())
+        runner.wake()
+        rxMsgs = self.rxmsgs.value
+        while runner.rxMsgs:
+            rxMsgs.append(runner.rxMsgs.popleft())
+
+class RaetLaneStackRunnerCloser(deeding.Deed):
+    '''
+    Stops lane stack runner and closes its server socket connection
+    FloScript:
+
+    do raet lane stack runner closer at exit
+
+    '''
+    Ioinits = odict(
+        inode=".raet.lane.stack.",
+        runner='runner',)
+
+    def action(self, **kwa):
+        '''
+        Stop runner and close uxd socket
+        '''
+        runner = self.runner.value
+        if runner and isinstance(runner.stack, LaneStack):
+            runner.close()
+
 class RaetLaneStackYardAdd(deeding.Deed):
     '''
     Adds yard to lane stack.
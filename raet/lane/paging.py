@@ -6,6 +6,8 @@ paging module provides classes for RAET UXD messaging management
 '''
 
 # Import python libs
+import os
+import struct
 from collections import Mapping
 try:
     import simplejson as json
@@ -26,7 +28,12 @@ console = getConsole()
 # Import raet libs
 from ..abiding import *  # import globals
 from .. import raeting
-from ..raeting import PackKind
+from .. import consoling
+from .. import serializing
+from . import passing
+from ..raeting import PackKind, HeadKind
+
+log = consoling.getLogger()
 
 class Part(object):
     '''
@@ -58,7 +65,22 @@ class Head(Part):
     '''
     RAET protocol page header class
     Manages the header portion of a page
+
+    Text heads are lines of 'field value' ended by HEAD_END. Binary heads are
+    .Binary packed fields magic, vn, pk, bi, pn, pc, fs and the sizes of si,
+    sn and dn followed by those strings. Binary heads of sequenced, sync or
+    ack pages have magic .SeqMagic and .Sequence packed fields presence
+    flags, ps, pb, pa and pw between the fields and the strings. Flag bit 3
+    adds .Size packed field rs after them
     '''
+    Magic = b'RB'  # binary head magic, text heads start with b'ri RAET'
+    SeqMagic = b'RS'  # binary head magic with sequence fields
+    Binary = struct.Struct('<2sBBIIIQBBB')
+    Sequence = struct.Struct('<BQQQI')
+    SequenceFields = ('ps', 'pb', 'pa')  # flagged by bits 0, 1, 2, pw goes with pa
+    Size = struct.Struct('<I')
+    SizeFlag = 1 << 3  # flags rs
+
     def __init__(self, **kwa):
         '''
         Setup Head instance
@@ -73,8 +95,12 @@ class TxHead(Head):
         '''
         Composes .packed, which is the packed form of this part
         '''
-        self.packed = b''
         data = self.page.data  # for speed
+        stack = self.page.stack
+        if stack and stack.hk == HeadKind.binary:
+            self.packBinary()
+            return
+        self.packed = b''
         lines = []
         for k, v in data.items():
             lines.append("{key} {val:{fmt}}".format(
@@ -82,6 +108,49 @@ class TxHead(Head):
 
         self.packed = ns2b('\n'.join(lines)) + raeting.HEAD_END
 
+    def packBinary(self):
+        '''
+        Composes .packed as binary head
+        '''
+        data = self.page.data
+        si = ns2b(data['si'])
+        sn = ns2b(data['sn'])
+        dn = ns2b(data['dn'])
+        if len(sn) > 255 or len(dn) > 255 or len(si) > 255:
+            emsg = "Yard name too long for binary page head"
+            raise raeting.PageError(emsg)
+        sequence = b''
+        magic = self.Magic
+        flags = 0
+        for i, key in enumerate(self.SequenceFields):
+            if key in data:
+                flags |= 1 << i
+        if 'rs' in data:
+            flags |= self.SizeFlag
+        if flags:
+            magic = self.SeqMagic
+        try:
+            if flags:
+                sequence = self.Sequence.pack(flags,
+                                              data.get('ps', 0),
+                                              data.get('pb', 0),
+                                              data.get('pa', 0),
+                                              data.get('pw', 0))
+                if 'rs' in data:
+                    sequence += self.Size.pack(data['rs'])
+            self.packed = self.Binary.pack(magic,
+                                           data['vn'],
+                                           data['pk'],
+                                           data['bi'],
+                                           data['pn'],
+                                           data['pc'],
+                                           data.get('fs', 0),
+                                           len(si),
+                                           len(sn),
+                                           len(dn)) + sequence + si + sn + dn
+        except struct.error as ex:
+            raise raeting.PageError("Invalid binary page head field. {0}".format(ex))
+
 
 class RxHead(Head):
     '''
@@ -101,6 +170,10 @@ class RxHead(Head):
             console.terse(emsg)
             raise raeting.PageError(emsg)
 
+        if packed[:2] in (self.Magic, self.SeqMagic):
+            self.parseBinary()
+            return
+
         if (not packed.startswith(ns2b('ri RAET\n')) or raeting.HEAD_END not in packed):
             emsg = "Unrecognized page head\n"
             console.terse(emsg)
@@ -127,6 +200,57 @@ class RxHead(Head):
 
         data.update(kit)
 
+    def parseBinary(self):
+        '''
+        Unpacks binary head and updates .page.data
+        Raises PageError if failure occurs
+        '''
+        packed = self.page.packed
+        size = self.Binary.size
+        try:
+            (magic, vn, pk, bi, pn, pc, fs,
+                    silen, snlen, dnlen) = self.Binary.unpack_from(packed)
+        except struct.error as ex:
+            raise raeting.PageError("Invalid binary page head. {0}".format(ex))
+        sequence = None
+        if magic == self.SeqMagic:
+            try:
+                sequence = self.Sequence.unpack_from(packed, size)
+            except struct.error as ex:
+                raise raeting.PageError("Invalid binary page head. {0}".format(ex))
+            size += self.Sequence.size
+            if sequence[0] & self.SizeFlag:
+                try:
+                    rs = self.Size.unpack_from(packed, size)[0]
+                except struct.error as ex:
+                    raise raeting.PageError("Invalid binary page head. {0}".format(ex))
+                size += self.Size.size
+        end = size + silen + snlen + dnlen
+        if len(packed) < end:
+            emsg = "Truncated binary page head"
+            raise raeting.PageError(emsg)
+        try:
+            si = packed[size:size + silen].decode('utf-8')
+            sn = packed[size + silen:size + silen + snlen].decode('utf-8')
+            dn = packed[size + silen + snlen:end].decode('utf-8')
+        except UnicodeDecodeError as ex:
+            raise raeting.PageError("Invalid binary page head. {0}".format(ex))
+        self.packed = packed[:end]
+        self.page.body.packed = packed[end:]
+        data = self.page.data
+        data.update(vn=vn, pk=pk, sn=sn, dn=dn, si=si, bi=bi, pn=pn, pc=pc)
+        if fs:
+            data['fs'] = fs
+        if sequence:
+            flags = sequence[0]
+            for i, key in enumerate(self.SequenceFields):
+                if flags & (1 << i):
+                    data[key] = sequence[i + 1]
+            if 'pa' in data:
+                data['pw'] = sequence[4]
+            if flags & self.SizeFlag:
+                data['rs'] = rs
+
 
 class Body(Part):
     '''
@@ -153,21 +277,13 @@ class TxBody(Body):
         self.packed = b''
         pk = self.page.data['pk']
 
-        if pk == PackKind.json:
-            if self.data:
-                self.packed = ns2b(json.dumps(self.data,
-                                         separators=(',', ':')))
-        elif pk == PackKind.pack:
-            if self.data:
-                if not msgpack:
-                    emsg = "Msgpack not installed."
-                    raise raeting.PacketError(emsg)
-                self.packed = msgpack.dumps(self.data,
-                                            encoding='utf-8')
-        else:
+        codec = serializing.lookup(PackKind, pk)
+        if codec is None:
             emsg = "Unrecognized message pack kind '{0}'\n".format(pk)
             console.terse(emsg)
             raise raeting.PageError(emsg)
+        if self.data:
+            self.packed = serializing.dumps(codec, self.data)
 
         if self.size > raeting.MAX_MESSAGE_SIZE:
             emsg = "Packed message length of {0}, exceeds max of {1}".format(
@@ -186,22 +302,17 @@ class RxBody(Body):
         self.data = odict()
         pk = self.page.data['pk']
 
-        if pk not in list(PackKind):
+        stack = self.page.stack
+        codec = serializing.lookup(PackKind, pk, stack.ordered if stack else True)
+        if codec is None:
             emsg = "Unrecognizable page body."
             raise raeting.PageError(emsg)
 
-        if pk == PackKind.json:
-            if self.packed:
-                self.data = json.loads(self.packed.decode('utf-8'),
-                                       object_pairs_hook=odict)
-        elif pk == PackKind.pack:
-            if self.packed:
-                if not msgpack:
-                    emsg = "Msgpack not installed."
-                    raise raeting.PacketError(emsg)
-                self.data = msgpack.loads(self.packed,
-                                          object_pairs_hook=odict,
-                                          encoding='utf-8')
+        if self.packed:
+            if stack and stack.lazy:
+                self.data = serializing.LazyBody(self.packed, codec)
+                return
+            self.data = codec.loads(self.packed)
 
         if not isinstance(self.data, Mapping):
             emsg = "Message body not a mapping\n"
@@ -356,14 +467,19 @@ class TxBook(Book):
         '''
         return (self.data['sn'], self.data['dn'], self.data['si'], self.data['bi'],)
 
-    def pack(self, data=None, body=None):
+    def pack(self, data=None, body=None, pageSize=None, fdSize=0):
         '''
         Convert message in .body into one or more pages
+        pageSize is max page size, None means UXD_MAX_PACKET_SIZE
+        fdSize is packed body size above which the body is passed by file
+            descriptor in a single page instead of paginated, 0 means never
         '''
         if data:
             self.data.update(data)
         if body is not None:
             self.body = body
+        if pageSize is None:
+            pageSize = raeting.UXD_MAX_PACKET_SIZE
 
         self.pages = []
         page = TxPage(  stack=self.stack,
@@ -372,18 +488,71 @@ class TxBook(Book):
 
         page.prepack()
         self.packed = page.body.packed
-        if page.size <= raeting.UXD_MAX_PACKET_SIZE:
+        if fdSize and self.size > fdSize and passing.Passable:
+            self.spool()
+        elif page.size <= pageSize:
             self.pages.append(page)
         else:
-            self.paginate(headsize=len(page.head.packed))
+            self.paginate(headsize=len(page.head.packed), pageSize=pageSize)
+
+    def stamp(self, data, ps=None):
+        '''
+        Returns list of packed pages for another destination made by updating
+        the head data of .pages with data, such as dn, si and bi, and packing
+        only the heads in front of the already packed page bodies. Passed file
+        descriptors are duplicated. Assumes pack was called with head fields
+        at least as long as data's so pages stay within the page size
+        ps is page sequence number of first page, later pages get the next
+        ones, None means pages are not sequenced
+        '''
+        packeds = []
+        for i, page in enumerate(self.pages):
+            head = page.head
+            page.data.update(data)
+            if ps is not None:
+                page.data['ps'] = ps + i
+            head.pack()
+            fd = getattr(page.packed, 'fd', None)
+            if fd is not None:
+                packeds.append(passing.FdPacked(head.packed, os.dup(fd)))
+            else:
+                packeds.append(head.packed + page.body.packed)
+        return packeds
+
+    def close(self):
+        '''
+        Close file descriptor of spooled page if any
+        '''
+        for page in self.pages:
+            if isinstance(page.packed, passing.FdPacked):
+                page.packed.close()
+
+    def spool(self):
+        '''
+        Create single page whose packed carries file descriptor of .packed
+        '''
+        dirpath = self.stack.local.dirpath if self.stack else None
+        try:
+            fd = passing.spool(self.packed, dirpath)
+        except OSError as ex:
+            raise raeting.PageError("Failed spooling page body. {0}".format(ex))
+        data = odict(self.data)
+        data['fs'] = self.size
+        page = TxPage(stack=self.stack, data=data)
+        page.head.pack()
+        page.packed = passing.FdPacked(page.head.packed, fd)
+        self.pages.append(page)
 
-    def paginate(self, headsize):
+    def paginate(self, headsize, pageSize=None):
         '''
         Create packeted segments from .packed using headsize
+        pageSize is max page size, None means UXD_MAX_PACKET_SIZE
         '''
+        if pageSize is None:
+            pageSize = raeting.UXD_MAX_PACKET_SIZE
         extrasize = 2 #need better estimate
         hotelsize = headsize + extrasize
-        secsize = raeting.UXD_MAX_PACKET_SIZE - hotelsize
+        secsize = pageSize - hotelsize
 
         seccount = (self.size // secsize) + (1 if self.size % secsize else 0)
         for i in range(seccount):
@@ -412,6 +581,7 @@ class RxBook(Book):
         super(RxBook, self).__init__(**kwa)
         self.sections = sections if sections is not None else []
         self.complete = False
+        self.trace = None  # tracing.Trace of message when sampled
 
     @property
     def index(self):
@@ -438,8 +608,8 @@ class RxBook(Book):
         #paginated so add to pages
         pc = page.data['pc'] #page count
         pn = page.data['pn']
-        console.verbose("page count={0} number={1} session id={2} book id={2}\n".format(
-                     pc, pn, page.data['si'], page.data['bi']))
+        log.verbose("page count={0} number={1} session id={2} book id={2}\n",
+                     pc, pn, page.data['si'], page.data['bi'])
 
         if not self.sections: #update data from first page received
             self.data.update(page.data)
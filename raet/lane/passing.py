@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+'''
+passing.py raet lane file descriptor passing of large message bodies
+
+A LaneStack with .fdThreshold set writes the serialized body of a message
+larger than the threshold once into a memfd, or an unlinked temporary file
+where memfd is not available, and sends a single control page whose head
+field 'fs' is the body size. The descriptor rides along with the control page
+as SCM_RIGHTS ancillary data. The receiving yard maps the descriptor and
+parses the body from it, so a multi-megabyte message costs a handful of
+syscalls instead of one datagram per page and no sections are buffered.
+
+SocketFdNb is the uxd server that sends and receives FdPacked pages. Every
+posix LaneStack uses it so any yard can receive passed bodies.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import os
+import errno
+import mmap
+import socket
+import tempfile
+from array import array
+
+# Import ioflo libs
+from ioflo.base import nonblocking
+
+# Import raet libs
+from ..abiding import *  # import globals
+from .. import raeting
+from .. import consoling
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+log = consoling.getLogger()
+
+Passable = (hasattr(socket, 'AF_UNIX') and hasattr(socket, 'SCM_RIGHTS') and
+            hasattr(socket.socket, 'sendmsg'))  # platform can pass descriptors
+
+
+class FdPacked(bytes):
+    '''
+    Packed page that carries an open file descriptor
+    '''
+    def __new__(cls, packed, fd):
+        self = super(FdPacked, cls).__new__(cls, packed)
+        self.fd = fd
+        return self
+
+    def close(self):
+        '''
+        Close carried descriptor if still open
+        '''
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def duplicate(packed):
+    '''
+    Returns packed or a copy with a duplicated descriptor if FdPacked
+    so the copy may be sent while packed stays open
+    '''
+    fd = getattr(packed, 'fd', None)
+    if fd is None:
+        return packed
+    return FdPacked(packed, os.dup(fd))
+
+
+def spool(packed, dirpath=None):
+    '''
+    Returns open file descriptor of anonymous file holding packed
+    Uses memfd when available otherwise unlinked temporary file in dirpath
+    '''
+    if hasattr(os, 'memfd_create'):
+        fd = os.memfd_create('raet', getattr(os, 'MFD_CLOEXEC', 0))
+    else:
+        fd, path = tempfile.mkstemp(prefix='raet', suffix='.page', dir=dirpath or None)
+        os.unlink(path)
+    try:
+        view = memoryview(packed)
+        while view:
+            view = view[os.write(fd, view):]
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+
+def load(packed, size):
+    '''
+    Returns size bytes mapped from file descriptor carried by FdPacked packed
+    and closes the descriptor
+    Raises PageError if there is no descriptor or it is too short
+    '''
+    fd = getattr(packed, 'fd', None)
+    if fd is None:
+        emsg = "Missing file descriptor of passed page body"
+        raise raeting.PageError(emsg)
+    try:
+        if size > raeting.MAX_MESSAGE_SIZE or os.fstat(fd).st_size < size:
+            emsg = "Invalid size {0} of passed page body".format(size)
+            raise raeting.PageError(emsg)
+        mm = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        try:
+            return mm[:size]
+        finally:
+            mm.close()
+    finally:
+        packed.close()
+
+
+class SocketFdNb(nonblocking.SocketUxdNb):
+    '''
+    Nonblocking uxd socket server that sends FdPacked pages with their
+    descriptor and receives pages with any passed descriptor as FdPacked
+    '''
+    FdSpace = socket.CMSG_SPACE(array('i').itemsize) if Passable else 0
+
+    def receive(self):
+        '''
+        Perform non blocking receive on socket.
+        Returns duple (data, sa), if no data then returns (b'', None)
+        data is FdPacked when a descriptor was passed with it
+        '''
+        if not Passable:
+            return super(SocketFdNb, self).receive()
+        try:
+            data, ancdata, flags, sa = self.ss.recvmsg(self.bs, self.FdSpace)
+        except socket.error as ex:
+            if ex.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return (b'', None)
+            log.profuse("socket.error = {0}: receiving at {1}\n", ex, self.ha)
+            raise
+
+        fds = array('i')
+        for level, kind, cdata in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(cdata[:len(cdata) - (len(cdata) % fds.itemsize)])
+        if fds:
+            for fd in fds[1:]:  # only one is ever passed
+                os.close(fd)
+            data = FdPacked(data, fds[0])
+
+        if self.wlog:
+            self.wlog.writeRx(sa, data)
+        return (data, sa)
+
+    def send(self, data, da):
+        '''
+        Perform non blocking send on socket passing descriptor of FdPacked
+        data which is closed once sent
+        '''
+        fd = getattr(data, 'fd', None)
+        if fd is None:
+            return super(SocketFdNb, self).send(data, da)
+        try:
+            result = self.ss.sendmsg([data],
+                                     [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array('i', [fd]))],
+                                     0,
+                                     da)
+        except socket.error as ex:
+            log.profuse("socket.error = {0}: sending from {1} to {2}\n",
+                    ex, self.ha, da)
+            raise
+        data.close()
+        if self.wlog:
+            self.wlog.writeTx(da, data)
+        return result
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+'''
+ringing.py raet shared memory ring buffer lane transport
+
+Each yard with ring transport enabled owns a Ring, an mmap'd file next to its
+uxd socket named by appending '.ring' to the socket path. Any number of
+sending yards on the host map the ring of the destination yard and append
+pages to it as records under an flock, so the ring is multiple producer
+single consumer. The uxd socket is kept and only carries a one byte doorbell
+datagram when a producer writes to a ring whose consumer has drained it, as
+well as plain pages from yards without ring transport.
+
+Pages sent over a ring are not limited to UXD_MAX_PACKET_SIZE so large
+messages are written once into shared memory as a single page instead of
+being paginated into many datagrams. Put the lane sockdirpath on tmpfs such
+as /dev/shm to keep ring pages out of disk writeback.
+
+Ring file layout, all integers little endian:
+    header of .HeadSize bytes
+        magic 8 bytes, capacity u64, head u64, tail u64, bell u8, closed u8
+    data area of capacity bytes
+head and tail are running byte counts of records written and read.
+Each record is a u32 record size, u16 source address size, source address
+then page bytes and may wrap around the end of the data area.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import os
+import errno
+import mmap
+import socket
+import struct
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+from ioflo.base import nonblocking
+
+# Import raet libs
+from ..abiding import *  # import globals
+from .. import raeting
+from . import passing
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+DOORBELL = b'\x00'  # doorbell datagram, no page is a single byte
+
+
+class Ring(object):
+    '''
+    Multiple producer single consumer ring buffer in an mmap'd file
+    '''
+    Magic = b'RAETRNG1'
+    HeadSize = 64
+    Header = struct.Struct('<8sQ')  # magic capacity
+    Counter = struct.Struct('<Q')
+    Flag = struct.Struct('<B')
+    Record = struct.Struct('<IH')  # record size, source address size
+    HeadOffset = 16
+    TailOffset = 24
+    BellOffset = 32
+    ClosedOffset = 33
+
+    def __init__(self, path, capacity=None):
+        '''
+        Setup instance
+
+        path is ring file path
+        capacity is size of data area in bytes
+        '''
+        self.path = path
+        self.capacity = capacity
+        self.file = None
+        self.mm = None
+
+    @property
+    def opened(self):
+        return self.mm is not None
+
+    def create(self):
+        '''
+        Create new ring file replacing any stale one and map it as consumer
+        Producers still mapping a replaced file see it closed
+        '''
+        if os.path.exists(self.path):
+            stale = Ring(self.path)
+            try:
+                if stale.open():
+                    stale.destroy()
+            except (OSError, ValueError):
+                pass
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        self.file = os.fdopen(fd, 'r+b')
+        self.file.truncate(self.HeadSize + self.capacity)
+        self.mm = mmap.mmap(self.file.fileno(), self.HeadSize + self.capacity)
+        self.Header.pack_into(self.mm, 0, self.Magic, self.capacity)
+        return True
+
+    def open(self):
+        '''
+        Map existing ring file as producer
+        Returns True if mapped, False if no valid ring file at .path
+        '''
+        try:
+            self.file = open(self.path, 'r+b')
+        except (IOError, OSError):
+            return False
+        try:
+            size = os.fstat(self.file.fileno()).st_size
+            if size > self.HeadSize:
+                self.mm = mmap.mmap(self.file.fileno(), size)
+        except (mmap.error, ValueError, OSError):
+            self.mm = None
+        if self.mm is not None:
+            magic, capacity = self.Header.unpack_from(self.mm, 0)
+            if magic == self.Magic and capacity + self.HeadSize <= size:
+                self.capacity = capacity
+                return True
+        self.close()
+        return False
+
+    def close(self):
+        '''
+        Unmap and close ring file
+        '''
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def destroy(self):
+        '''
+        Mark ring closed so producers stop using it then close and remove file
+        '''
+        if self.mm is not None:
+            self.Flag.pack_into(self.mm, self.ClosedOffset, 1)
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            if os.path.exists(self.path):
+                raise
+
+    @property
+    def closed(self):
+        '''
+        True once consumer has destroyed the ring
+        '''
+        return self.Flag.unpack_from(self.mm, self.ClosedOffset)[0] != 0
+
+    @property
+    def bell(self):
+        '''
+        True while a doorbell has been rung and the consumer has not drained
+        '''
+        return self.Flag.unpack_from(self.mm, self.BellOffset)[0] != 0
+
+    @bell.setter
+    def bell(self, value):
+        self.Flag.pack_into(self.mm, self.BellOffset, 1 if value else 0)
+
+    def counters(self):
+        '''
+        Returns duple (head, tail)
+        '''
+        return (self.Counter.unpack_from(self.mm, self.HeadOffset)[0],
+                self.Counter.unpack_from(self.mm, self.TailOffset)[0])
+
+    def put(self, pos, data):
+        '''
+        Copy data into data area at running count pos wrapping at end
+        '''
+        offset = pos % self.capacity
+        first = min(len(data), self.capacity - offset)
+        start = self.HeadSize + offset
+        self.mm[start:start + first] = data[:first]
+        if first < len(data):
+            self.mm[self.HeadSize:self.HeadSize + len(data) - first] = data[first:]
+
+    def get(self, pos, size):
+        '''
+        Returns size bytes from data area at running count pos wrapping at end
+        '''
+        offset = pos % self.capacity
+        first = min(size, self.capacity - offset)
+        start = self.HeadSize + offset
+        if first == size:
+            return self.mm[start:start + size]
+        return self.mm[start:start + first] + self.mm[self.HeadSize:self.HeadSize + size - first]
+
+    def write(self, data, sa):
+        '''
+        Append record of page data from source address sa
+        Returns None if ring is full otherwise True if consumer needs a
+        doorbell or False if one is already pending
+        '''
+        sa = ns2b(sa)
+        size = self.Record.size + len(sa) + len(data)
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        try:
+            head, tail = self.counters()
+            if size > self.capacity - (head - tail):
+                return None
+            view = memoryview(data)
+            self.put(head, self.Record.pack(size, len(sa)))
+            self.put(head + self.Record.size, sa)
+            self.put(head + self.Record.size + len(sa), view)
+            self.Counter.pack_into(self.mm, self.HeadOffset, head + size)
+            if self.bell:
+                return False
+            self.bell = True
+            return True
+        finally:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def read(self):
+        '''
+        Returns duple (data, sa) of next record or None if empty
+        Only the consumer reads
+        '''
+        head, tail = self.counters()
+        if head == tail:
+            return None
+        size, salen = self.Record.unpack(self.get(tail, self.Record.size))
+        sa = self.get(tail + self.Record.size, salen).decode('utf-8')
+        data = self.get(tail + self.Record.size + salen, size - self.Record.size - salen)
+        self.Counter.pack_into(self.mm, self.TailOffset, tail + size)
+        return (data, sa)
+
+
+class SocketRingNb(passing.SocketFdNb):
+    '''
+    Nonblocking uxd socket server that receives pages from its own shared
+    memory Ring and sends pages to the Rings of destination yards, using
+    datagrams as doorbells and for destinations without a ring
+    '''
+    RingSize = 4 * 1024 * 1024  # bytes in ring data area
+
+    def __init__(self, ringSize=None, **kwa):
+        '''
+        Setup instance
+
+        ringSize is bytes in ring data area
+        '''
+        super(SocketRingNb, self).__init__(**kwa)
+        self.ringSize = ringSize if ringSize is not None else self.RingSize
+        self.ring = None  # own ring read as consumer
+        self.rings = odict()  # producer Ring or None keyed by destination ha
+
+    @staticmethod
+    def ringPath(ha):
+        '''
+        Returns ring file path of yard with uxd socket path ha
+        '''
+        return "{0}.ring".format(ha)
+
+    def open(self):
+        '''
+        Open uxd socket and create own ring
+        '''
+        if not super(SocketRingNb, self).open():
+            return False
+        self.ring = Ring(self.ringPath(self.ha), capacity=self.ringSize)
+        try:
+            self.ring.create()
+        except (IOError, OSError) as ex:
+            console.terse("Ring error = {0}\n".format(ex))
+            super(SocketRingNb, self).close()
+            return False
+        return True
+
+    def close(self):
+        '''
+        Close peer rings, remove own ring and close uxd socket
+        '''
+        for ring in self.rings.values():
+            if ring is not None:
+                ring.close()
+        self.rings.clear()
+        if self.ring is not None:
+            self.ring.destroy()
+            self.ring = None
+        super(SocketRingNb, self).close()
+
+    def peer(self, da):
+        '''
+        Returns producer Ring of destination ha da or None if it has none
+        '''
+        ring = self.rings.get(da, False)
+        if ring is False or (ring is not None and ring.closed):
+            if ring:
+                ring.close()
+            ring = Ring(self.ringPath(da))
+            if not ring.open():
+                ring = None
+            self.rings[da] = ring
+        return ring
+
+    def forget(self, da):
+        '''
+        Drop cached ring of destination ha da
+        '''
+        ring = self.rings.pop(da, None)
+        if ring is not None:
+            ring.close()
+
+    def pageSize(self, da):
+        '''
+        Returns max page size to destination ha da over its ring
+        or UXD_MAX_PACKET_SIZE if it has none
+        '''
+        ring = self.peer(da)
+        if ring is None:
+            return raeting.UXD_MAX_PACKET_SIZE
+        return max(raeting.UXD_MAX_PACKET_SIZE, ring.capacity // 4)
+
+    def receive(self):
+        '''
+        Perform non blocking receive of datagram or ring page
+        Returns duple (data, sa), if no data then returns (b'', None)
+        '''
+        while True:
+            data, sa = super(SocketRingNb, self).receive()
+            if data != DOORBELL:
+                break
+        if data:
+            return (data, sa)
+        record = self.ring.read()
+        if record is None:
+            self.ring.bell = False  # clear then recheck so no write is missed
+            record = self.ring.read()
+        return record if record is not None else (b'', None)
+
+    def send(self, data, da):
+        '''
+        Perform non blocking send of page data to destination ha da over its
+        ring if any otherwise as datagram
+        Raises socket.error EAGAIN when destination ring is full
+        '''
+        if getattr(data, 'fd', None) is not None:  # passed page
+            return super(SocketRingNb, self).send(data, da)
+        ring = self.peer(da)
+        if ring is None:
+            return super(SocketRingNb, self).send(data, da)
+        bell = ring.write(data, self.ha)
+        if bell is not False:  # also ring when full in case consumer is gone
+            try:
+                super(SocketRingNb, self).send(DOORBELL, da)
+            except socket.error as ex:
+                err = raeting.get_exception_error(ex)
+                if err in (errno.ECONNREFUSED, errno.ENOENT):
+                    self.forget(da)
+                    raise
+                if err not in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS):
+                    raise  # doorbell already queued when busy
+        if bell is None:
+            raise socket.error(errno.EAGAIN, "Ring full")
+        return len(data)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+'''
+sequencing.py raet reliable lane delivery of pages
+
+A LaneStack with .reliable True stamps every page it sends to a yard with a
+per yard page sequence number, head field 'ps', starting at 1 for each
+session id. At most .window pages are sent and not yet acked per yard and
+are kept by the TxSequence of the remote yard until acked, so retransmit
+memory is bounded. Further pages wait in its backlog and transmit defers new
+messages once the backlog reaches .backlog pages so producers slow down
+instead of overflowing the receiving socket.
+
+Every LaneStack delivers sequenced pages it receives in order through the
+RxSequence of the remote yard, drops duplicates, holds up to .window out of
+order pages and answers with cumulative ack pages. An ack page has no body
+and head fields 'pa', the next page sequence number expected, and 'pw', the
+number of pages the receiver will accept beyond it. The receiver shrinks
+'pw' while its .rxMsgs is over its high water mark and sends a window update
+when it reopens. The sender retransmits its oldest unacked page when its
+retry timer expires or on the second duplicate ack, and probes a zero window
+with the next backlog page when the timer expires.
+
+A receiver that starts receiving a session at a page other than the first,
+because the first was lost or it restarted, acks with 'pa' 0. The sender
+answers with a sync page whose head field 'pb' is its oldest unacked page
+sequence number and the receiver delivers from there on. Pages acked by a
+yard before it restarted are not redelivered.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+from collections import deque
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+from ioflo.aid.timing import StoreTimer
+
+# Import raet libs
+from ..abiding import *  # import globals
+from .. import raeting
+from . import paging, passing
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+PS_TEMPLATE = 0xffffffffffff  # widest text head page sequence number for sizing pages
+
+
+class TxSequence(object):
+    '''
+    Sending side of reliable page delivery to a remote yard
+    '''
+    Dups = 2  # duplicate acks that trigger retransmit of oldest unacked page
+
+    def __init__(self, stack, remote):
+        '''
+        Setup instance
+
+        stack is LaneStack
+        remote is RemoteYard destination
+        '''
+        self.stack = stack
+        self.remote = remote
+        self.ps = 0  # last page sequence number assigned
+        self.base = 1  # oldest page sequence number not yet acked
+        self.credit = stack.window  # pages remote accepts beyond .base
+        self.unacked = odict()  # packed pages sent but not acked keyed by ps
+        self.backlog = deque()  # duples (ps, packed) waiting for window
+        self.dups = 0  # duplicate acks of .base
+        self.timer = StoreTimer(stack.store, duration=stack.retryTimeout)
+
+    @property
+    def backlogged(self):
+        '''
+        True when backlog is at the stack .backlog limit
+        '''
+        return bool(self.stack.backlog and len(self.backlog) >= self.stack.backlog)
+
+    @property
+    def busy(self):
+        '''
+        True while any page is unacked or waiting in backlog
+        '''
+        return bool(self.unacked or self.backlog)
+
+    def queue(self, packeds):
+        '''
+        Assign next page sequence numbers to list of packed pages whose heads
+        were stamped starting at .ps + 1 and send as window allows
+        '''
+        for packed in packeds:
+            self.ps += 1
+            self.backlog.append((self.ps, packed))
+        self.flush()
+
+    def flush(self):
+        '''
+        Send backlog pages that fit in the window
+        '''
+        window = min(self.stack.window, self.credit)
+        while self.backlog and self.backlog[0][0] < self.base + window:
+            ps, packed = self.backlog.popleft()
+            if not self.unacked:
+                self.timer.restart()
+            self.unacked[ps] = packed
+            self.send(packed)
+
+    def send(self, packed):
+        '''
+        Queue copy of packed page on stack .txes keeping packed for retransmit
+        '''
+        copy = passing.duplicate(packed)
+        if copy is not packed and self.stack.traceds:
+            self.stack.retraceTx(packed, copy)
+        self.stack.txes.append((copy, self.remote.ha))
+
+    def retransmit(self):
+        '''
+        Resend oldest unacked page
+        '''
+        for packed in self.unacked.values():
+            self.send(packed)
+            self.stack.incStat('page_retransmit')
+            break
+        self.timer.restart()
+
+    def sync(self):
+        '''
+        Returns packed sync page telling remote the oldest unacked page
+        '''
+        data = odict(pk=self.stack.Pk,
+                     sn=self.stack.local.name,
+                     dn=self.remote.name,
+                     si=self.remote.sid,
+                     pb=self.base)
+        page = paging.TxPage(stack=self.stack, data=data)
+        page.head.pack()
+        return page.head.packed
+
+    def ack(self, pa, pw):
+        '''
+        Update from ack page of remote that expects pa next and accepts pw more
+        pa of 0 means remote needs a sync page
+        '''
+        self.credit = pw
+        if not pa:
+            self.stack.txes.append((self.sync(), self.remote.ha))
+            self.stack.incStat('page_sync_tx')
+            return
+        if pa > self.ps + 1:
+            emsg = "Invalid page ack '{0}' from yard {1}\n".format(pa, self.remote.name)
+            console.terse(emsg)
+            self.stack.incStat('invalid_page_ack')
+            return
+        if pa < self.base:  # stale
+            return
+        if pa > self.base:
+            for ps in range(self.base, pa):
+                packed = self.unacked.pop(ps, None)
+                if isinstance(packed, passing.FdPacked):
+                    packed.close()
+            self.base = pa
+            self.dups = 0
+            self.timer.restart()
+        elif self.unacked:
+            self.dups += 1
+            if self.dups == self.Dups:
+                self.retransmit()
+        self.flush()
+
+    def service(self):
+        '''
+        Retransmit oldest unacked page or probe zero window when timer expires
+        '''
+        if not self.timer.expired:
+            return
+        if self.unacked:
+            self.retransmit()
+        elif self.backlog:  # zero window so probe with next page
+            ps, packed = self.backlog.popleft()
+            self.unacked[ps] = packed
+            self.send(packed)
+            self.stack.incStat('page_window_probe')
+            self.timer.restart()
+
+    def close(self):
+        '''
+        Close descriptors of passed pages still held
+        '''
+        packeds = list(self.unacked.values()) + [packed for ps, packed in self.backlog]
+        for packed in packeds:
+            if isinstance(packed, passing.FdPacked):
+                packed.close()
+        self.unacked.clear()
+        self.backlog.clear()
+
+
+class RxSequence(object):
+    '''
+    Receiving side of reliable page delivery from a remote yard
+    '''
+    def __init__(self, stack, remote):
+        '''
+        Setup instance
+
+        stack is LaneStack
+        remote is RemoteYard source
+        '''
+        self.stack = stack
+        self.remote = remote
+        self.expected = None  # next page sequence number, None until synced
+        self.pendings = odict()  # out of order RxPages keyed by ps
+        self.dirty = False  # True when pages received since last ack
+        self.advertised = stack.window  # pw of last ack
+
+    def receive(self, page):
+        '''
+        Returns list of pages now deliverable in order given received page
+        whose head has been parsed
+        '''
+        ps = page.data['ps']
+        if self.expected is None and ps == 1:  # first page of session
+            self.expected = ps
+        self.dirty = True
+        if (self.expected is not None and ps < self.expected) or ps in self.pendings:
+            self.stack.incStat('page_duplicate')
+            return []
+        if self.expected is None:  # hold until synced
+            if len(self.pendings) >= self.stack.window:
+                self.stack.incStat('page_window_drop')
+                return []
+            self.pendings[ps] = page
+            self.stack.incStat('page_unsynced')
+            return []
+        if ps - self.expected >= self.stack.window:
+            self.stack.incStat('page_window_drop')
+            return []
+        if ps > self.expected:
+            self.pendings[ps] = page
+            self.stack.incStat('page_out_of_order')
+            return []
+        self.pendings[ps] = page
+        return self.deliver()
+
+    def sync(self, pb):
+        '''
+        Returns list of pages now deliverable given sync page from remote
+        whose oldest unacked page is pb
+        '''
+        self.dirty = True
+        if self.expected is not None and pb <= self.expected:
+            return []
+        self.expected = pb
+        for ps in [ps for ps in self.pendings if ps < pb]:
+            del self.pendings[ps]
+        return self.deliver()
+
+    def deliver(self):
+        '''
+        Returns list of pending pages in order from .expected on
+        '''
+        pages = []
+        while self.expected in self.pendings:
+            pages.append(self.pendings.pop(self.expected))
+            self.expected += 1
+        return pages
+
+    @property
+    def room(self):
+        '''
+        Pages the stack will accept beyond .expected
+        '''
+        room = self.stack.window - len(self.pendings)
+        high = self.stack.rxMsgsHigh
+        if high:
+            room = min(room, high - len(self.stack.rxMsgs))
+        return max(0, room)
+
+    @property
+    def acking(self):
+        '''
+        True when an ack is due for new pages or a reopened window
+        '''
+        return self.dirty or (not self.advertised and self.room > 0)
+
+    def ack(self):
+        '''
+        Returns packed ack page
+        '''
+        self.dirty = False
+        self.advertised = self.room
+        data = odict(pk=self.stack.Pk,
+                     sn=self.stack.local.name,
+                     dn=self.remote.name,
+                     si=self.remote.sid,
+                     pa=self.expected or 0,
+                     pw=self.advertised)
+        page = paging.TxPage(stack=self.stack, data=data)
+        page.head.pack()
+        return page.head.packed
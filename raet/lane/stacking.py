@@ -28,12 +28,13 @@ from ioflo.base import nonblocking
 
 # Import raet libs
 from ..abiding import *  # import globals
-from .. import raeting, nacling, stacking
-from . import paging, yarding
-from ..raeting import PackKind
+from .. import raeting, consoling, nacling, stacking
+from . import paging, yarding, ringing, passing, sequencing
+from ..raeting import PackKind, HeadKind
 
 from ioflo.base.consoling import getConsole
 console = getConsole()
+log = consoling.getLogger()
 
 class LaneStack(stacking.Stack):
     '''
@@ -42,7 +43,16 @@ class LaneStack(stacking.Stack):
     Count = 0
     Uid =  0
     Pk = PackKind.json.value # serialization pack kind of Uxd message
+    Hk = HeadKind.raet.value # page head kind, raet text or binary, received auto detected
     Accept = True # accept any uxd messages if True from yards not already in lanes
+    Ring = False # use shared memory ring transport to yards that also use it
+    RingSize = ringing.SocketRingNb.RingSize # bytes in ring data area
+    FdThreshold = 0 # packed body bytes above which body is passed by file descriptor, 0 never
+    MaxPageSize = 0 # max datagram page size, 0 means probe largest datagram at startup
+    Reliable = False # sequence pages sent to yards and retransmit until acked
+    Window = 64 # max unacked pages sent to and out of order pages held from each yard
+    Backlog = 256 # pages waiting for window per yard at which transmit defers, 0 no limit
+    RetryTimeout = 0.5 # seconds before oldest unacked page is retransmitted
 
     def __init__(self,
                  local=None, #passed up from subclass
@@ -54,6 +64,15 @@ class LaneStack(stacking.Stack):
                  ha='',
                  bufcnt=100,
                  accept=None,
+                 ring=None,
+                 ringSize=None,
+                 fdThreshold=None,
+                 hk=None,
+                 maxPageSize=None,
+                 reliable=None,
+                 window=None,
+                 backlog=None,
+                 retryTimeout=None,
                  **kwa
                  ):
         '''
@@ -62,6 +81,15 @@ class LaneStack(stacking.Stack):
         if getattr(self, 'puid', None) is None:
             self.puid = puid if puid is not None else self.Uid
 
+        self.ring = (ring if ring is not None else self.Ring) and sys.platform != 'win32'
+        self.ringSize = ringSize if ringSize is not None else self.RingSize
+        self.fdThreshold = fdThreshold if fdThreshold is not None else self.FdThreshold
+        self.hk = hk if hk is not None else self.Hk
+        self.reliable = reliable if reliable is not None else self.Reliable
+        self.window = max(1, window if window is not None else self.Window)
+        self.backlog = backlog if backlog is not None else self.Backlog
+        self.retryTimeout = retryTimeout if retryTimeout is not None else self.RetryTimeout
+
         local = local or yarding.Yard(stack=self,
                                             name=name,
                                             uid=uid,
@@ -76,14 +104,21 @@ class LaneStack(stacking.Stack):
 
         self.haRemotes = odict() # remotes indexed by ha host address
         self.accept = self.Accept if accept is None else accept #accept uxd msg if not in lane
+        maxPageSize = maxPageSize if maxPageSize is not None else self.MaxPageSize
+        self.probed = None  # cached result of .probePageSize
+        self.maxPageSize = maxPageSize or self.probePageSize()
 
     def serverFromLocal(self):
         '''
         Create local listening server for stack
         '''
 
-        if not sys.platform == 'win32':
-            server = nonblocking.SocketUxdNb(ha=self.ha,
+        if self.ring:
+            server = ringing.SocketRingNb(ha=self.ha,
+                                bufsize=raeting.UXD_MAX_PACKET_SIZE * self.bufcnt,
+                                ringSize=self.ringSize)
+        elif not sys.platform == 'win32':
+            server = passing.SocketFdNb(ha=self.ha,
                                 bufsize=raeting.UXD_MAX_PACKET_SIZE * self.bufcnt)
         else:
             server = nonblocking.WinMailslotNb(ha=self.ha,
@@ -106,6 +141,109 @@ class LaneStack(stacking.Stack):
         '''
         super(LaneStack, self).removeRemote(remote)
         del self.haRemotes[remote.ha]
+        if self.ring:
+            self.server.forget(remote.ha)
+        if remote.txSequence:
+            remote.txSequence.close()
+
+    def probePageSize(self):
+        '''
+        Returns largest datagram in bytes accepted by a uxd socket pair with
+        the buffer size of .server or UXD_MAX_PACKET_SIZE if it cannot probe
+        Probes once and caches the result in .probed
+        '''
+        if self.probed is None:
+            self.probed = self._probePageSize()
+        return self.probed
+
+    def _probePageSize(self):
+        '''
+        Returns probed page size, see .probePageSize
+        '''
+        if sys.platform == 'win32' or not hasattr(socket, 'socketpair'):
+            return raeting.UXD_MAX_PACKET_SIZE
+        bufsize = self.server.bs if self.server else raeting.UXD_MAX_PACKET_SIZE
+        try:
+            pair = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        except socket.error:
+            return raeting.UXD_MAX_PACKET_SIZE
+        try:
+            for sock in pair:
+                if sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) < bufsize:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, bufsize)
+                if sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) < bufsize:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, bufsize)
+                sock.setblocking(0)
+            high = min(bufsize, pair[0].getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF))
+            probe = memoryview(bytearray(high))
+            low = 0
+            while low < high:  # binary search largest size that is sent
+                size = (low + high + 1) // 2
+                try:
+                    pair[0].send(probe[:size])
+                    pair[1].recv(size)
+                    low = size
+                except socket.error:
+                    high = size - 1
+        finally:
+            for sock in pair:
+                sock.close()
+        log.concise("LaneStack {0}: Probed max page size of {1}\n", self.name, low)
+        return low or raeting.UXD_MAX_PACKET_SIZE
+
+    def ringed(self, remote):
+        '''
+        Returns True if pages to remote are sent over its shared memory ring
+        '''
+        return bool(self.ring and self.server.peer(remote.ha))
+
+    def pageSize(self, remote):
+        '''
+        Returns max page size to remote, larger when sent over its ring
+        Socket pages are no larger than the remote advertised it reads
+        '''
+        if self.ringed(remote):
+            return self.server.pageSize(remote.ha)
+        return min(self.maxPageSize, remote.pageSize)
+
+    def advertise(self, remote):
+        '''
+        Queue bodiless page telling remote the largest page this yard reads,
+        its probed page size. Yards that predate head field rs drop the page
+        '''
+        remote.advertised = True
+        data = odict(pk=self.Pk,
+                     sn=self.local.name,
+                     dn=remote.name,
+                     si=remote.sid,
+                     rs=self.probePageSize())
+        page = paging.TxPage(stack=self, data=data)
+        try:
+            page.head.pack()
+        except raeting.PageError as ex:
+            console.terse(str(ex) + '\n')
+            self.incStat("packing_error")
+            return
+        self.txes.append((page.head.packed, remote.ha))
+        self.incStat('page_size_tx')
+
+    def serviceReceives(self):
+        '''
+        Retrieve from server all recieved and put on the rxes deque
+        Unless .rxMsgs is too full in which case leave them with the server
+        so senders see busy and retry later
+        '''
+        if self.receivesDeferring():
+            self.incStat("rx_msgs_deferred")
+            return
+        super(LaneStack, self).serviceReceives()
+
+    def receivesDeferring(self):
+        '''
+        Returns True if .serviceReceives leaves received pages with the server
+        because .rxMsgs is too full
+        '''
+        return self.rxMsgsDeferring()
 
     def _handleOneRx(self):
         '''
@@ -113,8 +251,8 @@ class LaneStack(stacking.Stack):
         Assumes that there is a message on the .rxes deque
         '''
         raw, sa = self.rxes.popleft()
-        console.verbose("{0} received raw message \n{1}\n".format(self.name, raw))
-        page = paging.RxPage(packed=raw)
+        log.dump(consoling.VERBOSE, "{0} received raw message ", raw, self.name)
+        page = paging.RxPage(stack=self, packed=raw)
 
         try:
             page.head.parse()
@@ -122,6 +260,15 @@ class LaneStack(stacking.Stack):
             console.terse(str(ex) + '\n')
             self.incStat('invalid_page_header')
 
+        if page.data.get('fs') or getattr(raw, 'fd', None) is not None:
+            try:
+                page.body.packed = passing.load(raw, page.data.get('fs', 0))
+            except (raeting.PageError, EnvironmentError, ValueError) as ex:
+                console.terse("Invalid passed page body. {0}\n".format(ex))
+                self.incStat('invalid_page_fd')
+                return
+            self.incStat('page_fd_rx')
+
         dn = page.data['dn'] # destination yard name
         if dn != self.local.name:
             emsg = "Invalid destination yard name = {0}. Dropping packet...\n".format(dn)
@@ -155,6 +302,33 @@ class LaneStack(stacking.Stack):
         if si != remote.rsid:
             remote.rsid = si
             remote.removeStaleBooks()
+            remote.rxSequence = None
+            remote.advertised = False
+
+        if not remote.advertised:  # remote knows our name so drops rs if older
+            self.advertise(remote)
+
+        if 'rs' in page.data:  # receive size page
+            remote.pageSize = max(raeting.UXD_MAX_PACKET_SIZE, page.data['rs'])
+            self.incStat('page_size_rx')
+            return
+
+        if 'pa' in page.data:  # ack page
+            self.incStat('page_ack_rx')
+            if remote.txSequence:
+                remote.txSequence.ack(page.data['pa'], page.data.get('pw', self.window))
+            return
+
+        if 'ps' in page.data or 'pb' in page.data:  # sequenced or sync page
+            if not remote.rxSequence:
+                remote.rxSequence = sequencing.RxSequence(stack=self, remote=remote)
+            if 'ps' in page.data:
+                pages = remote.rxSequence.receive(page)
+            else:
+                pages = remote.rxSequence.sync(page.data['pb'])
+            for page in pages:
+                self.processRx(page, remote)
+            return
 
         self.processRx(page, remote)
 
@@ -177,8 +351,9 @@ class LaneStack(stacking.Stack):
         Retrieve next page from stack receive queue if any and parse
         Assumes received header has been parsed
         '''
-        console.verbose("{0} received page header\n{1}\n".format(self.name, received.data))
-        console.verbose("{0} received page index = '{1}'\n".format(self.name, received.index))
+        if log.enabled(consoling.VERBOSE):
+            log.verbose("{0} received page header\n{1}\n", self.name, received.data)
+            log.verbose("{0} received page index = '{1}'\n", self.name, received.index)
 
         if received.paginated:
             index = received.index #(received.data['si'], received.data['bi'])
@@ -191,26 +366,100 @@ class LaneStack(stacking.Stack):
                     self.incStat('missed_page')
                     return
                 book = paging.RxBook(stack=self)
+                book.trace = self.startTrace('rx', index)
+                if book.trace:
+                    book.trace.mark('received')
                 remote.addBook(index, book)
             book.parse(received)
             if not book.complete:
                 return
             remote.removeBook(index)
             body = book.body
+            trace = book.trace
         else:
+            trace = self.startTrace('rx', received.index)
+            if trace:
+                trace.mark('received')
             received.body.parse()
             body = received.body.data
 
+        if trace:
+            trace.mark('complete')
         self.rxMsgs.append((body, remote.name))
+        if trace:
+            trace.mark('rx_msgs', done=True)
+
+    def process(self):
+        '''
+        Send acks of sequenced pages received and retransmit unacked pages
+        '''
+        for remote in self.remotes.values():
+            if remote.rxSequence and remote.rxSequence.acking:
+                self.txes.append((remote.rxSequence.ack(), remote.ha))
+                self.incStat('page_ack_tx')
+            if remote.txSequence and remote.txSequence.busy:
+                remote.txSequence.service()
+
+    def nextDeadline(self, manage=False):
+        '''
+        Returns seconds until the next retransmit timer expires or deferred
+        .txes are retried or None
+        '''
+        stops = [remote.txSequence.timer.stop for remote in self.remotes.values()
+                 if remote.txSequence and remote.txSequence.busy]
+        stamp = self.store.stamp
+        stops = [stop - stamp for stop in stops if stop > stamp]
+        retry = self.txesDeadline()
+        if retry is not None:
+            stops.append(retry)
+        return min(stops) if stops else None
+
+    def transmit(self, msg, uid=None):
+        '''
+        Append duple (msg, uid) to .txMsgs deque
+        Returns True if accepted or False if deferred by backpressure
+        including a full reliable backlog to the destination yard
+        '''
+        if self.reliable:
+            remote = self.remotes.get(uid) if uid is not None else next(
+                    iter(self.remotes.values()), None)
+            if remote and remote.txSequence and remote.txSequence.backlogged:
+                self.incStat("tx_backlog_deferred")
+                return False
+        return super(LaneStack, self).transmit(msg, uid=uid)
+
+    def transmitDeferring(self, uid=None):
+        '''
+        Returns True if .transmit of a message to remote uid would be deferred
+        by backpressure including a full reliable backlog to the yard
+        '''
+        if self.reliable:
+            remote = self.remotes.get(uid) if uid is not None else next(
+                    iter(self.remotes.values()), None)
+            if remote and remote.txSequence and remote.txSequence.backlogged:
+                return True
+        return super(LaneStack, self).transmitDeferring(uid)
+
+    def txSequenceOf(self, remote):
+        '''
+        Returns TxSequence of remote creating it if need be
+        '''
+        if not remote.txSequence:
+            remote.txSequence = sequencing.TxSequence(stack=self, remote=remote)
+        return remote.txSequence
 
     def  _handleOneTxMsg(self):
         '''
         Take one message from .txMsgs deque and handle it
         Assumes there is a message on the deque
         '''
-        body, uid = self.txMsgs.popleft() # duple (body dict, destination name)
-        self.message(body, uid=uid)
-        console.verbose("{0} sending to {1}\n{2}\n".format(self.name, uid, body))
+        txMsg = self.txMsgs.popleft() # (body dict, destination name) trace is optional
+        body, uid = txMsg[:2]
+        trace = txMsg[2] if len(txMsg) > 2 else None
+        if trace:
+            trace.mark('message')
+        self.message(body, uid=uid, trace=trace)
+        log.dump(consoling.VERBOSE, "{0} sending to {1}", body, self.name, uid)
 
     def _handleOneTx(self, laters, blocks):
         '''
@@ -218,50 +467,97 @@ class LaneStack(stacking.Stack):
         Assumes there is a message
         laters is deque of messages to try again later
         blocks is list of blocked destination address so put all associated into laters
+        Returns number of bytes sent
         '''
         tx, ta = self.txes.popleft()  # duple = (packet, destination address)
 
         if ta in blocks: # already blocked on this iteration
-            laters.append((tx, ta)) # keep sequential
-            return
+            self._deferTx(laters, tx, ta) # keep sequential
+            return 0
 
         try:
             self.server.send(tx, ta)
         except Exception as ex:
-            console.concise("Error sending to '{0}' from '{1}: {2}\n".format(
-                ta, self.ha, ex))
+            log.concise("Error sending to '{0}' from '{1}: {2}\n",
+                ta, self.ha, ex)
             err = raeting.get_exception_error(ex)
             if err == errno.ECONNREFUSED or err == errno.ENOENT:
+                if isinstance(tx, passing.FdPacked):
+                    tx.close()
                 self.incStat("stale_transmit_yard")
                 yard = self.haRemotes.get(ta)
                 if yard:
                     self.removeRemote(yard)
                     console.terse("Reaped yard {0}\n".format(yard.name))
+                return 0
+            elif (err == errno.EMSGSIZE or (err == errno.ENOBUFS and
+                    len(tx) > raeting.UXD_MAX_PACKET_SIZE and
+                    len(tx) > self.probePageSize())):
+                # datagram larger than socket accepts so repaginate smaller
+                self.incStat("oversize_transmit_page")
+                self.maxPageSize = max(raeting.UXD_MAX_PACKET_SIZE,
+                                       min(self.probePageSize(), len(tx) // 2))
+                console.terse("Reduced max page size to {0}\n".format(self.maxPageSize))
+                self._repageTx(laters, tx, ta)
+                blocks.append(ta)
+                return 0
             elif err in [errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS]:
                 self.incStat("busy_transmit_yard")
                 #busy with last message save it for later
-                laters.append((tx, ta))
+                self._deferTx(laters, tx, ta)
                 blocks.append(ta)
-
+                return 0
             else:
                 self.incStat("error_transmit_yard")
                 raise
+        if self.traceds:
+            self.tracedTx(tx)
+        return len(tx)
 
-    def message(self, body, uid=None):
+    def _repageTx(self, laters, tx, ta):
+        '''
+        Split unpaginated page tx that was too large to send into pages of
+        .maxPageSize and save them on laters. Sections of paginated pages
+        cannot be split so are dropped
+        '''
+        page = paging.RxPage(stack=self, packed=tx)
+        try:
+            page.head.parse()
+        except raeting.PageError as ex:
+            console.terse(str(ex) + '\n')
+            return
+        if page.paginated or 'ps' in page.data:  # sequence numbers are fixed
+            emsg = "Dropped oversize section {0} of book {1} to {2}\n".format(
+                    page.data['pn'], page.data['bi'], ta)
+            console.terse(emsg)
+            self.incStat("oversize_section_dropped")
+            return
+        book = paging.TxBook(stack=self, data=page.data)
+        book.packed = page.body.packed
+        book.paginate(headsize=page.head.size, pageSize=self.maxPageSize)
+        for page in book.pages:
+            self._deferTx(laters, page.packed, ta)
+
+    def message(self, body, uid=None, trace=None):
         '''
         Sends message body to yard  given by uid and manages paging of long messages
+        trace is optional tracing.Trace of message
         '''
         if uid is None:
             if not self.remotes:
                 emsg = "No yard to send to\n"
                 console.terse(emsg)
                 self.incStat("invalid_destination")
+                if trace:
+                    trace.mark('failed', done=True)
                 return
             uid = self.remotes.values()[0].uid
         if uid not in self.remotes:
             emsg = "Invalid destination yard '{0}'\n".format(uid)
             console.terse(emsg)
             self.incStat("invalid_destination")
+            if trace:
+                trace.mark('failed', done=True)
             return
         remote = self.remotes[uid]
         data = odict(pk=self.Pk,
@@ -269,15 +565,94 @@ class LaneStack(stacking.Stack):
                      dn=remote.name,
                      si=remote.sid,
                      bi=remote.nextBid())
-        book = paging.TxBook(data=data, body=body)
-        try:
-            book.pack()
+        if self.reliable:
+            data['ps'] = sequencing.PS_TEMPLATE
+        book = paging.TxBook(stack=self, data=data, body=body)
+        try:  # ring pages are already large and must stay in order
+            book.pack(pageSize=self.pageSize(remote),
+                      fdSize=0 if self.ringed(remote) else self.fdThreshold)
         except raeting.PageError as ex:
             console.terse(str(ex) + '\n')
             self.incStat("packing_error")
+            if trace:
+                trace.mark('failed', done=True)
             return
+        if 'fs' in book.pages[0].data:
+            self.incStat("page_fd_tx")
 
-        for page in book.pages:
-            self.txes.append((page.packed, remote.ha))
+        if trace:
+            trace.index = (data['sn'], data['dn'], data['si'], data['bi'])
+
+        if self.reliable:
+            sequence = self.txSequenceOf(remote)
+            try:
+                packeds = book.stamp(odict(), ps=sequence.ps + 1)
+                if trace:  # before queue sends copies that take over the trace
+                    trace.mark('txes')
+                    self.traceTx(packeds[0], trace, done=True)
+                sequence.queue(packeds)
+            finally:
+                book.close()
+        else:
+            packeds = [page.packed for page in book.pages]
+            for packed in packeds:
+                self.txes.append((packed, remote.ha))
+            if trace:
+                trace.mark('txes')
+                self.traceTx(packeds[0], trace, done=True)
+
+    def multicast(self, body, uids=None):
+        '''
+        Sends message body to each yard given by uids, default all remotes,
+        serializing and paging body once then stamping per yard page heads
+        Returns number of yards the message was queued to
+        '''
+        if uids is None:
+            uids = list(self.remotes.keys())
+        remotes = []
+        for uid in uids:
+            if uid not in self.remotes:
+                emsg = "Invalid destination yard '{0}'\n".format(uid)
+                console.terse(emsg)
+                self.incStat("invalid_destination")
+                continue
+            remotes.append(self.remotes[uid])
+        if not remotes:
+            return 0
+
+        pageSize = min(self.pageSize(remote) for remote in remotes)
+        # longest head fields so every stamped page fits pageSize
+        data = odict(pk=self.Pk,
+                     sn=self.local.name,
+                     dn=max((remote.name for remote in remotes), key=len),
+                     si=max((remote.sid for remote in remotes), key=len),
+                     bi=0xffffffff)
+        if self.reliable:
+            data['ps'] = sequencing.PS_TEMPLATE
+        book = paging.TxBook(stack=self, data=data, body=body)
+        try:
+            book.pack(pageSize=pageSize,
+                      fdSize=0 if any(self.ringed(remote) for remote in remotes)
+                                else self.fdThreshold)
+        except raeting.PageError as ex:
+            console.terse(str(ex) + '\n')
+            self.incStat("packing_error")
+            return 0
+        if 'fs' in book.pages[0].data:
+            self.incStat("page_fd_tx")
+
+        try:
+            for remote in remotes:
+                data = odict(dn=remote.name, si=remote.sid, bi=remote.nextBid())
+                if self.reliable:
+                    sequence = self.txSequenceOf(remote)
+                    sequence.queue(book.stamp(data, ps=sequence.ps + 1))
+                    continue
+                for packed in book.stamp(data):
+                    self.txes.append((packed, remote.ha))
+        finally:
+            book.close()
+        self.incStat("multicast_tx")
+        return len(remotes)
 
 
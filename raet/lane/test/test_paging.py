@@ -225,6 +225,61 @@ class BasicTestCase(unittest.TestCase):
         self.assertEqual(book1.data['si'], sid)
         self.assertEqual(book1.data['bi'], 1)
 
+    def testBinaryHead(self):
+        '''
+        Test binary page head pack and auto detected parse
+        '''
+        console.terse("{0}\n".format(self.testBinaryHead.__doc__))
+
+        class BinaryStack(object):
+            hk = raeting.HeadKind.binary.value
+
+        data = odict(pk=raeting.PackKind.json.value)
+        sid = nacling.uuid(size=18)
+        data.update(odict(sn="boy", dn='girl', si=sid, bi=7))
+        body = odict([('content', "Hello all yards.")])
+        page0 = paging.TxPage(stack=BinaryStack(), data=data, embody=body)
+        page0.pack()
+        self.assertTrue(page0.packed.startswith(paging.Head.Magic))
+        self.assertEqual(len(page0.head.packed), paging.Head.Binary.size + 18 + 3 + 4)
+        self.assertEqual(page0.packed[len(page0.head.packed):], b'{"content":"Hello all yards."}')
+        page1 = paging.RxPage(packed=page0.packed)
+        page1.parse()
+        self.assertDictEqual(page1.body.data, body)
+        self.assertEqual(page1.data, odict(ri='RAET', vn=0, pk=0, sn='boy', dn='girl',
+                                           si=sid, bi=7, pn=0, pc=1))
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(10000))
+        body = odict([('content', stuff)])
+        book0 = paging.TxBook(stack=BinaryStack(), data=data, body=body)
+        book0.pack()
+        self.assertEqual(len(book0.pages), 2)
+        book1 = paging.RxBook()
+        for page in book0.pages:
+            self.assertTrue(page.packed.startswith(paging.Head.Magic))
+            page = paging.RxPage(packed=page.packed)
+            page.head.parse()
+            book1.parse(page)
+        self.assertTrue(book1.complete)
+        self.assertDictEqual(book1.body, body)
+        self.assertEqual(book1.index, ('girl', 'boy', sid, 7))
+
+        page = paging.RxPage(packed=page0.packed[:paging.Head.Binary.size + 5])
+        self.assertRaises(raeting.PageError, page.head.parse)
+
+        # sequenced and ack pages carry sequence fields
+        for fields in [odict(ps=5), odict(pa=6, pw=0)]:
+            page0 = paging.TxPage(stack=BinaryStack(), data=data)
+            page0.data.update(fields)
+            page0.head.pack()
+            self.assertTrue(page0.head.packed.startswith(paging.Head.SeqMagic))
+            page1 = paging.RxPage(packed=page0.head.packed)
+            page1.head.parse()
+            for key, value in fields.items():
+                self.assertEqual(page1.data[key], value)
+            self.assertEqual(page1.data['bi'], 7)
+            self.assertEqual(page1.data['sn'], 'boy')
+
 
 def runOne(test):
     '''
@@ -240,7 +295,8 @@ def runSome():
     names = ['testPackParseJson',
              'testPackParseMsgpack',
              'testSectionedJson',
-             'testSectionedMsgpack', ]
+             'testSectionedMsgpack',
+             'testBinaryHead', ]
     tests.extend(map(BasicTestCase, names))
 
     suite = unittest.TestSuite(tests)
@@ -26,8 +26,8 @@ console = getConsole()
 
 # Import raet libs
 from raet.abiding import *  # import globals
-from raet import raeting
-from raet.lane import yarding, stacking
+from raet import raeting, tracing
+from raet.lane import yarding, stacking, paging, passing
 
 def setUpModule():
     console.reinit(verbosity=console.Wordage.concise)
@@ -56,17 +56,19 @@ class BasicTestCase(unittest.TestCase):
 
         self.baseDirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
 
-        # main stack
+        # main stack, fixed page size so large messages are sectioned
         self.main = stacking.LaneStack(name='main',
                                        uid=1,
                                        lanename='cherry',
-                                       sockdirpath=self.baseDirpath)
+                                       sockdirpath=self.baseDirpath,
+                                       maxPageSize=raeting.UXD_MAX_PACKET_SIZE)
 
         #other stack
         self.other = stacking.LaneStack(name='other',
                                         uid=1,
                                         lanename='cherry',
-                                        sockdirpath=self.baseDirpath)
+                                        sockdirpath=self.baseDirpath,
+                                        maxPageSize=raeting.UXD_MAX_PACKET_SIZE)
 
     def tearDown(self):
         self.main.server.close()
@@ -194,7 +196,8 @@ class BasicTestCase(unittest.TestCase):
                                    uid=data['uid'],
                                    main=main,
                                    lanename=data['lanename'],
-                                   sockdirpath=data['sockdirpath'])
+                                   sockdirpath=data['sockdirpath'],
+                                   maxPageSize=raeting.UXD_MAX_PACKET_SIZE)
 
         return stack
 
@@ -716,8 +719,8 @@ class BasicTestCase(unittest.TestCase):
 
         self.assertEqual(len(main.txMsgs), 0)
         self.assertEqual(len(other.txMsgs), 0)
-        self.assertEqual(len(main.txes), 1)
-        self.assertEqual(len(other.txes), 1)
+        self.assertEqual(len(main.txes), 2)  # remaining page and receive size page
+        self.assertEqual(len(other.txes), 2)
         self.assertEqual(len(main.nameRemotes['other'].books), 1)
         self.assertEqual(len(other.nameRemotes['main'].books), 1)
         self.assertEqual(len(main.rxMsgs), 0)
@@ -746,13 +749,13 @@ class BasicTestCase(unittest.TestCase):
         self.assertEqual(other.nameRemotes['main'].rsid, mainSid)
 
         self.assertEqual(len(main.txes), 0)
-        self.assertEqual(len(other.txes), 1)
+        self.assertEqual(len(other.txes), 2)
         self.assertEqual(len(main.nameRemotes['other'].books), 0)
         self.assertEqual(len(other.nameRemotes['main'].books), 1)
         self.assertEqual(len(main.rxMsgs), 0)
         self.assertEqual(len(other.rxMsgs), 0)
 
-        # Now remaining page from other (there should be no pages from main)
+        # Now remaining page from other (there should be no message pages from main)
         self.serviceOneAll(main, other)
 
         self.assertEqual(main.nameRemotes['other'].rsid,
@@ -761,8 +764,8 @@ class BasicTestCase(unittest.TestCase):
                           main.nameRemotes['other'].sid)
 
 
-        self.assertEqual(len(main.txes), 0)
-        self.assertEqual(len(other.txes), 0)
+        self.assertEqual(len(main.txes), 1)  # receive size pages
+        self.assertEqual(len(other.txes), 1)
         self.assertEqual(len(main.nameRemotes['other'].books), 0)
         self.assertEqual(len(other.nameRemotes['main'].books), 1)
         self.assertEqual(len(main.rxMsgs), 0)
@@ -852,8 +855,8 @@ class BasicTestCase(unittest.TestCase):
         self.assertEqual(main.nameRemotes['other'].rsid, otherSid)
         self.assertEqual(other.nameRemotes['main'].rsid, mainSid)
 
-        self.assertEqual(len(main.txes), 0)
-        self.assertEqual(len(other.txes), 0)
+        self.assertEqual(len(main.txes), 1)  # receive size pages for new sids
+        self.assertEqual(len(other.txes), 1)
         self.assertEqual(len(main.nameRemotes['other'].books), 0)
         self.assertEqual(len(other.nameRemotes['main'].books), 0)
         self.assertEqual(len(main.rxMsgs), 1)
@@ -864,6 +867,447 @@ class BasicTestCase(unittest.TestCase):
         main.server.close()
         other.server.close()
 
+    def testMessageRing(self):
+        '''
+        Messages over shared memory ring transport with fallback to datagrams
+        '''
+        console.terse("{0}\n".format(self.testMessageRing.__doc__))
+
+        main = stacking.LaneStack(name='ringmain',
+                                  lanename='cherry',
+                                  sockdirpath=self.baseDirpath,
+                                  ring=True,
+                                  ringSize=1024 * 1024,
+                                  maxPageSize=raeting.UXD_MAX_PACKET_SIZE)
+        other = stacking.LaneStack(name='ringother',
+                                   lanename='cherry',
+                                   sockdirpath=self.baseDirpath,
+                                   ring=True,
+                                   ringSize=1024 * 1024)
+        self.assertTrue(os.path.exists(main.ha + '.ring'))
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        remote = main.remotes.values()[0]
+        self.assertEqual(main.pageSize(remote), 256 * 1024)
+        self.assertEqual(self.main.pageSize(remote), raeting.UXD_MAX_PACKET_SIZE)
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(20000))  # 200KB
+        msgs = [odict(index=i, content=stuff) for i in range(8)]  # overfills ring
+        main.message(msgs[0], remote.uid)
+        self.assertEqual(len(main.txes), 1)  # single page no pagination
+        for msg in msgs[1:]:
+            main.transmit(msg, remote.uid)
+        self.serviceStacks([main, other], duration=2.0)
+        self.assertEqual(len(main.txes), 0)
+        self.assertTrue(main.stats['busy_transmit_yard'] >= 1)
+        self.assertEqual(len(other.rxMsgs), len(msgs))
+        for msg in msgs:
+            self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+
+        other.transmit(odict(content='Hello ring'), other.remotes.values()[0].uid)
+        self.serviceStacks([main, other], duration=0.5)
+        self.assertEqual(main.rxMsgs.popleft(), ({'content': 'Hello ring'}, 'ringother'))
+
+        # plain stack without ring gets paginated datagrams
+        plain = self.other
+        main.addRemote(yarding.RemoteYard(stack=main, ha=plain.ha))
+        remote = main.nameRemotes[plain.local.name]
+        self.assertEqual(main.pageSize(remote), raeting.UXD_MAX_PACKET_SIZE)
+        main.message(msgs[0], remote.uid)
+        self.assertTrue(len(main.txes) > 1)
+        self.serviceStacks([main, plain], duration=1.0)
+        self.assertEqual(plain.rxMsgs.popleft(), (msgs[0], main.local.name))
+        plain.transmit(odict(content='Hello plain'), plain.nameRemotes['ringmain'].uid)
+        self.serviceStacks([main, plain], duration=0.5)
+        self.assertEqual(main.rxMsgs.popleft(), ({'content': 'Hello plain'}, plain.local.name))
+
+        other.server.close()
+        self.assertFalse(os.path.exists(other.ha + '.ring'))
+        main.transmit(odict(content='Hello gone'), main.nameRemotes['ringother'].uid)
+        self.serviceStack(main, duration=0.5)
+        self.assertNotIn('ringother', main.nameRemotes)  # reaped
+        main.server.close()
+
+    @unittest.skipIf(not passing.Passable, "descriptor passing not supported")
+    def testMessageFdPass(self):
+        '''
+        Large messages passed by file descriptor in a single page
+        '''
+        console.terse("{0}\n".format(self.testMessageFdPass.__doc__))
+
+        main = stacking.LaneStack(name='fdmain',
+                                  lanename='cherry',
+                                  sockdirpath=self.baseDirpath,
+                                  fdThreshold=raeting.UXD_MAX_PACKET_SIZE)
+        other = self.other  # default stack receives passed pages
+        self.assertIsInstance(other.server, passing.SocketFdNb)
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        remote = main.remotes.values()[0]
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(200000))  # 2MB
+        msgs = [odict(index=i, content=stuff) for i in range(3)]
+        main.message(msgs[0], remote.uid)
+        self.assertEqual(len(main.txes), 1)
+        self.assertIsInstance(list(main.txes)[0][0], passing.FdPacked)
+        for msg in msgs[1:]:
+            main.transmit(msg, remote.uid)
+        main.transmit(odict(content='small'), remote.uid)
+        self.serviceStacks([main, other], duration=1.0)
+        self.assertEqual(main.stats['page_fd_tx'], 3)
+        self.assertEqual(other.stats['page_fd_rx'], 3)
+        self.assertEqual(len(other.rxMsgs), 4)
+        for msg in msgs:
+            self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+        self.assertEqual(other.rxMsgs.popleft(), ({'content': 'small'}, main.local.name))
+        self.assertEqual(len(other.nameRemotes['fdmain'].books), 0)
+
+        # control page without its descriptor is dropped
+        page = paging.TxPage(data=odict(pk=0, sn='fdmain', dn='other', fs=100))
+        page.head.pack()
+        main.txes.append((page.head.packed, other.ha))
+        self.serviceStacks([main, other], duration=0.5)
+        self.assertEqual(other.stats['invalid_page_fd'], 1)
+        self.assertEqual(len(other.rxMsgs), 0)
+
+        main.server.close()
+
+    def testPageSizeProbe(self):
+        '''
+        Page size probed at startup and reduced when a page is too large
+        '''
+        console.terse("{0}\n".format(self.testPageSizeProbe.__doc__))
+
+        main = stacking.LaneStack(name='probemain',
+                                  lanename='cherry',
+                                  sockdirpath=self.baseDirpath)
+        other = stacking.LaneStack(name='probeother',
+                                   lanename='cherry',
+                                   sockdirpath=self.baseDirpath)
+        self.assertTrue(main.maxPageSize >= raeting.UXD_MAX_PACKET_SIZE)
+        self.assertTrue(main.maxPageSize <= main.server.bs)
+        self.assertEqual(main.probePageSize(), main.maxPageSize)
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        remote = main.remotes.values()[0]
+        self.assertEqual(main.pageSize(remote), raeting.UXD_MAX_PACKET_SIZE)
+
+        # other tells main the largest page it reads once main pages it
+        msg = odict(content="Hello other")
+        main.message(msg, remote.uid)
+        self.serviceStacks([main, other], duration=0.5)
+        self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+        self.assertEqual(other.stats['page_size_tx'], 1)
+        self.assertEqual(main.stats['page_size_rx'], 1)
+        self.assertEqual(remote.pageSize, other.probePageSize())
+        self.assertEqual(main.pageSize(remote), min(main.maxPageSize, remote.pageSize))
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(10000))  # 100KB
+        msg = odict(content=stuff)
+        main.message(msg, remote.uid)
+        if main.pageSize(remote) > len(stuff) + 1024:
+            self.assertEqual(len(main.txes), 1)  # single page no pagination
+        self.serviceStacks([main, other], duration=0.5)
+        self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+
+        # page larger than the socket accepts is repaginated smaller
+        probed = main.maxPageSize
+        main.maxPageSize = raeting.MAX_MESSAGE_SIZE
+        remote.pageSize = raeting.MAX_MESSAGE_SIZE
+        stuff = "".join(str(i).rjust(10, " ") for i in range(probed // 10 + 1000))
+        msg = odict(content=stuff)
+        main.message(msg, remote.uid)
+        self.assertEqual(len(main.txes), 1)
+        self.serviceStacks([main, other], duration=1.0)
+        self.assertEqual(main.stats['oversize_transmit_page'], 1)
+        self.assertTrue(main.maxPageSize < len(stuff))
+        self.assertEqual(main.probed, probed)  # probed once
+        self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+        self.assertEqual(len(other.rxMsgs), 0)
+
+        main.server.close()
+        other.server.close()
+
+    def testPageSizeAdvertised(self):
+        '''
+        Pages to a yard that reads smaller pages than the sender fit the receiver
+        '''
+        console.terse("{0}\n".format(self.testPageSizeAdvertised.__doc__))
+
+        main = stacking.LaneStack(name='sizemain',
+                                  lanename='cherry',
+                                  sockdirpath=self.baseDirpath)
+        other = stacking.LaneStack(name='sizeother',
+                                   lanename='cherry',
+                                   sockdirpath=self.baseDirpath,
+                                   bufcnt=2)
+        self.assertTrue(other.probePageSize() < main.maxPageSize)
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        remote = main.remotes.values()[0]
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(30000))  # 300KB
+        msgs = [odict(index=i, content=stuff) for i in range(2)]
+        main.message(msgs[0], remote.uid)
+        self.assertTrue(len(main.txes) > 1)  # default size pages until other says
+        self.serviceStacks([main, other], duration=0.5)
+        self.assertEqual(remote.pageSize, other.probePageSize())
+        self.assertEqual(main.pageSize(remote), other.probePageSize())
+
+        main.message(msgs[1], remote.uid)
+        for tx, ta in main.txes:
+            self.assertTrue(len(tx) <= other.probePageSize())
+        self.serviceStacks([main, other], duration=0.5)
+        self.assertEqual(len(other.rxMsgs), len(msgs))
+        for msg in msgs:
+            self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+        self.assertNotIn('invalid_page_header', other.stats)
+
+        # yard that predates receive size pages is sent default size pages
+        old = stacking.LaneStack(name='sizeold',
+                                 lanename='cherry',
+                                 sockdirpath=self.baseDirpath)
+        old.advertise = lambda remote: None
+        main.addRemote(yarding.RemoteYard(stack=main, ha=old.ha))
+        remote = main.nameRemotes[old.local.name]
+        fields = raeting.PAGE_FIELDS
+        raeting.PAGE_FIELDS = [field for field in fields if field != 'rs']
+        try:
+            for msg in msgs:
+                main.message(msg, remote.uid)
+                main.serviceAll()
+                time.sleep(0.1)
+                old.serviceAll()  # parses with old page fields
+        finally:
+            raeting.PAGE_FIELDS = fields
+        self.assertEqual(main.pageSize(remote), raeting.UXD_MAX_PACKET_SIZE)
+        self.assertEqual(len(old.rxMsgs), len(msgs))
+        for msg in msgs:
+            self.assertEqual(old.rxMsgs.popleft(), (msg, main.local.name))
+
+        main.server.close()
+        other.server.close()
+        old.server.close()
+
+    def testMessageReliable(self):
+        '''
+        Reliable lane messages with page loss, acks and flow control
+        '''
+        console.terse("{0}\n".format(self.testMessageReliable.__doc__))
+
+        main = stacking.LaneStack(store=self.store,
+                                  name='relymain',
+                                  lanename='cherry',
+                                  sockdirpath=self.baseDirpath,
+                                  maxPageSize=raeting.UXD_MAX_PACKET_SIZE,
+                                  reliable=True,
+                                  window=4,
+                                  backlog=8)
+        other = stacking.LaneStack(store=self.store,
+                                   name='relyother',
+                                   lanename='cherry',
+                                   sockdirpath=self.baseDirpath,
+                                   maxPageSize=raeting.UXD_MAX_PACKET_SIZE,
+                                   window=4,
+                                   rxMsgsHigh=4)
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        remote = main.remotes.values()[0]
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(10000))  # sectioned
+        msgs = [odict(index=i, content='Hello other') for i in range(3)]
+        msgs.append(odict(index=3, content=stuff))
+        for msg in msgs:
+            main.message(msg, remote.uid)
+        sequence = remote.txSequence
+        self.assertEqual(sequence.ps, 5)
+        self.assertEqual(len(sequence.unacked), 4)  # window
+        self.assertEqual(len(sequence.backlog), 1)
+
+        # lose first page so receiver needs sync
+        main.serviceTxes()
+        other.serviceReceives()
+        other.rxes.popleft()
+        self.serviceStacks([main, other], duration=2.0)
+        self.assertTrue(other.stats['page_unsynced'] >= 1)
+        self.assertEqual(main.stats['page_sync_tx'], 1)
+        self.assertTrue(main.stats['page_retransmit'] >= 1)
+        self.assertTrue(main.stats['page_ack_rx'] >= 1)
+        self.assertEqual(len(other.rxMsgs), len(msgs))
+        for msg in msgs:
+            self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+        self.assertFalse(sequence.busy)
+        self.assertEqual(sequence.base, 6)
+        self.assertEqual(sequence.credit, 0)  # receiver was full when it acked
+        self.serviceStacks([main, other], duration=0.2)
+        self.assertEqual(sequence.credit, 4)  # window update once drained
+
+        # lose a later page
+        for msg in msgs:
+            main.message(msg, remote.uid)
+        main.serviceTxes()
+        other.serviceReceives()
+        other.rxes.popleft()
+        self.serviceStacks([main, other], duration=2.0)
+        self.assertTrue(other.stats['page_out_of_order'] >= 1)
+        self.assertEqual(len(other.rxMsgs), len(msgs))
+        for msg in msgs:
+            self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+        self.assertEqual(sequence.base, 11)
+
+        # receiver that stops draining closes window and producer defers
+        msgs = [odict(index=i, content='Hello again') for i in range(20)]
+        accepted = []
+        for msg in msgs:
+            if main.transmit(msg, remote.uid):
+                accepted.append(msg)
+            self.serviceStacks([main, other], duration=0.1)
+        self.assertTrue(main.stats['tx_backlog_deferred'] >= 1)
+        self.assertTrue(len(accepted) < len(msgs))
+        self.assertTrue(len(sequence.unacked) + len(sequence.backlog) >= 8)
+        self.assertEqual(other.nameRemotes[main.local.name].rxSequence.advertised, 0)
+        received = []
+        while len(received) < len(accepted):
+            self.serviceStacks([main, other], duration=0.2)
+            self.assertTrue(other.rxMsgs)
+            while other.rxMsgs:
+                received.append(other.rxMsgs.popleft()[0])
+        self.assertEqual(received, accepted)
+        self.assertEqual(len(other.rxMsgs), 0)
+
+        main.server.close()
+        other.server.close()
+
+    def testMessageBinaryHead(self):
+        '''
+        Messages between stacks with binary and text page heads
+        '''
+        console.terse("{0}\n".format(self.testMessageBinaryHead.__doc__))
+
+        self.main.hk = raeting.HeadKind.binary.value
+        self.bootstrap()
+        stuff = "".join(str(i).rjust(10, " ") for i in range(10000))  # sectioned
+
+        mains = [odict(content='Hello other'), odict(content=stuff)]
+        others = [odict(content='Hello main'), odict(content=stuff)]
+        self.message(mains=mains, others=others, duration=1.0)
+        self.assertEqual(self.other.stats['page_size_rx'], 1)  # in binary head
+        remote = self.other.nameRemotes[self.main.local.name]
+        self.assertEqual(remote.pageSize, self.main.probePageSize())
+
+    def testMulticast(self):
+        '''
+        Multicast message serialized once to many yards
+        '''
+        console.terse("{0}\n".format(self.testMulticast.__doc__))
+
+        workers = [self.other]
+        for name in ['worker1', 'worker22', 'worker333']:
+            workers.append(stacking.LaneStack(name=name,
+                                              lanename='cherry',
+                                              sockdirpath=self.baseDirpath))
+        for worker in workers:
+            self.main.addRemote(yarding.RemoteYard(stack=self.main, ha=worker.ha))
+        stacks = [self.main] + workers
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(10000))  # sectioned
+        msgs = [odict(content='Hello workers'), odict(content=stuff)]
+        for msg in msgs:
+            self.assertEqual(self.main.multicast(msg), len(workers))
+        self.assertEqual(self.main.multicast(odict(content='Hello some'),
+                                             uids=[self.main.remotes.values()[1].uid, 99]), 1)
+        self.assertEqual(self.main.stats['invalid_destination'], 1)
+        self.serviceStacks(stacks, duration=1.0)
+        for worker in workers:
+            for msg in msgs:
+                self.assertEqual(worker.rxMsgs.popleft(), (msg, 'main'))
+            self.assertEqual(len(worker.rxMsgs), 1 if worker is workers[1] else 0)
+
+        if passing.Passable:
+            self.main.fdThreshold = raeting.UXD_MAX_PACKET_SIZE
+            big = odict(content=stuff * 10)
+            self.assertEqual(self.main.multicast(big), len(workers))
+            self.serviceStacks(stacks, duration=1.0)
+            self.assertEqual(self.main.stats['page_fd_tx'], 1)  # one spool for all
+            for worker in workers:
+                self.assertEqual(worker.rxMsgs.pop(), (big, 'main'))
+                self.assertEqual(worker.stats['page_fd_rx'], 1)
+
+        for worker in workers[1:]:
+            worker.server.close()
+
+    def testMessageTraced(self):
+        '''
+        Sampled lane messages fire lifecycle events collected per stage
+        '''
+        console.terse("{0}\n".format(self.testMessageTraced.__doc__))
+        self.bootstrap()
+        events = []
+        collector = tracing.Collector()
+        sinks = [collector, lambda trace, stage, stamp: events.append((trace, stage))]
+        self.main.tracer = tracing.Tracer(sample=0.5, sinks=sinks)
+        self.other.tracer = tracing.Tracer(sinks=sinks)
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(1000))  # sectioned
+        msgs = [odict(index=i, content=stuff if i % 2 else 'Hello') for i in range(4)]
+        for msg in msgs:
+            self.assertTrue(self.main.transmit(msg))
+        self.service()
+        for msg in msgs:
+            self.assertEqual(self.other.rxMsgs.popleft(), (msg, 'main'))
+
+        txes = [trace for trace, stage in events if trace.kind == 'tx' and stage == 'sent']
+        self.assertEqual(len(txes), 2)  # sampled half
+        for trace in txes:
+            self.assertEqual(list(trace.stamps.keys()),
+                             ['transmit', 'message', 'txes', 'sent'])
+            self.assertEqual(trace.index[:2], ('main', 'other'))
+            stamps = list(trace.stamps.values())
+            self.assertEqual(stamps, sorted(stamps))
+        rxes = [trace for trace, stage in events if stage == 'rx_msgs']
+        self.assertEqual(len(rxes), 4)
+        self.assertEqual([trace.index[3] for trace in rxes], [1, 2, 3, 4])
+        self.assertEqual(list(rxes[1].stamps.keys()), ['received', 'complete', 'rx_msgs'])
+
+        report = collector.report()
+        self.assertEqual(report['tx:transmit>message']['count'], 2)
+        self.assertEqual(report['tx:total']['count'], 2)
+        self.assertEqual(report['rx:complete>rx_msgs']['count'], 4)
+        self.assertFalse(collector.failures)
+
+    @unittest.skipIf(not passing.Passable, "descriptor passing not supported")
+    def testMessageTracedReliable(self):
+        '''
+        Traces of reliable passed pages reach sent and bad destinations fail
+        '''
+        console.terse("{0}\n".format(self.testMessageTracedReliable.__doc__))
+        main = stacking.LaneStack(name='tracemain',
+                                  lanename='cherry',
+                                  sockdirpath=self.baseDirpath,
+                                  reliable=True,
+                                  fdThreshold=raeting.UXD_MAX_PACKET_SIZE)
+        other = self.other
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        remote = main.remotes.values()[0]
+        collector = tracing.Collector()
+        main.tracer = tracing.Tracer(sinks=[collector])
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(20000))  # passed
+        msgs = [odict(index=i, content=stuff) for i in range(2)]
+        for msg in msgs:
+            self.assertTrue(main.transmit(msg, remote.uid))
+        self.serviceStacks([main, other], duration=0.5)
+        self.assertEqual(main.stats['page_fd_tx'], 2)
+        for msg in msgs:
+            self.assertEqual(other.rxMsgs.popleft(), (msg, main.local.name))
+        self.assertEqual(len(main.traceds), 0)
+        report = collector.report()
+        self.assertEqual(report['tx:txes>sent']['count'], 2)
+        self.assertEqual(report['tx:total']['count'], 2)
+
+        self.assertTrue(main.transmit(odict(content='Hello nobody'), uid=999))
+        main.serviceTxMsgs()
+        self.assertEqual(main.stats['invalid_destination'], 1)
+        self.assertEqual(collector.failures, {'tx': 1})
+        self.assertEqual(len(main.traceds), 0)
+
+        main.server.close()
+
 def runOne(test):
     '''
     Unittest Runner
@@ -884,7 +1328,16 @@ def runSome():
              'testAutoAccept',
              'testAutoAcceptNot',
              'testFetchRemoteFromHa',
-             'testRestart']
+             'testRestart',
+             'testMessageRing',
+             'testMessageFdPass',
+             'testPageSizeProbe',
+             'testPageSizeAdvertised',
+             'testMessageReliable',
+             'testMessageBinaryHead',
+             'testMulticast',
+             'testMessageTraced',
+             'testMessageTracedReliable']
     tests.extend(map(BasicTestCase, names))
 
     suite = unittest.TestSuite(tests)
@@ -19,11 +19,13 @@ from ioflo.aid.odicting import odict
 # Import raet libs
 from ..abiding import *  # import globals
 from .. import raeting
+from .. import consoling
 from .. import nacling
 from .. import lotting
 
 from ioflo.base.consoling import getConsole
 console = getConsole()
+log = consoling.getLogger()
 
 YARD_UXD_DIR = os.path.join('/var', 'cache', 'raet')
 ALT_YARD_UXD_DIR = os.path.join('~', '.raet', 'uxd')
@@ -191,6 +193,10 @@ class RemoteYard(Yard):
         super(RemoteYard, self).__init__(stack=stack, prefix=prefix, uid=uid, **kwa)
         self.rsid = rsid # last sid received from remote
         self.books = odict()
+        self.txSequence = None # sequencing.TxSequence of reliable pages sent
+        self.rxSequence = None # sequencing.RxSequence of sequenced pages received
+        self.pageSize = raeting.UXD_MAX_PACKET_SIZE # largest page remote reads once advertised
+        self.advertised = False # True once local receive size sent in remote session
 
     def addBook(self, index, book):
         '''
@@ -200,7 +206,7 @@ class RemoteYard(Yard):
             emsg = "Cannot add book at index '{0}', alreadys exists".format(index)
             raise raeting.YardError(emsg)
         self.books[index] = book
-        console.verbose( "Added book to {0} at '{1}'\n".format(self.name, index))
+        log.verbose( "Added book to {0} at '{1}'\n", self.name, index)
 
     def removeBook(self, index, book=None):
         '''
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+'''
+metering.py raet stack metrics registry
+
+Every stack has a Registry at .metrics over its .stats odict. Counters are
+still changed with stack.incStat and gauges set with stack.updateStat so
+existing stats keys keep working, while the registry adds fixed bucket
+Histograms and Gauges whose value is read from a callable, such as queue
+depths, only when a snapshot is taken.
+
+A stack with .metered True also observes the time spent in each packet
+phase, the segments per message and the round trip time to each remote in
+histograms. Metered is off by default since timing costs a clock read per
+phase.
+
+Snapshots are plain mappings that export as json or as a text exposition
+file in the prometheus format.
+
+Example:
+
+    stack = RoadStack(metered=True, ...)
+    ...
+    snap = stack.metrics.snapshot()
+    snap['histograms']['phase_decrypt']['p99']
+    stack.metrics.write('/var/run/raet/master.prom')
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import os
+import time
+import bisect
+import numbers
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+
+# Import raet libs
+from .abiding import *  # import globals
+from . import raeting
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+Clock = getattr(time, 'perf_counter', time.time)
+
+# seconds from 10 microseconds to 10 seconds
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# counts in powers of two
+COUNT_BUCKETS = tuple(2 ** i for i in range(17))
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def stringify(value):
+    '''
+    Returns value with keys of nested mappings that json cannot encode, such
+    as ha tuples of per destination depths, converted to str
+    '''
+    if not isinstance(value, dict):
+        return value
+    return odict((key if isinstance(key, (basestring, numbers.Number)) or key is None
+                  else str(key), stringify(val)) for key, val in value.items())
+
+
+class Histogram(object):
+    '''
+    Fixed bucket histogram of observed values
+    .counts[i] is number of values <= .buckets[i] and > .buckets[i - 1],
+    the last count is of values larger than every bucket
+    '''
+    def __init__(self, buckets=LATENCY_BUCKETS, name='', labels=None):
+        '''
+        Setup instance
+
+        buckets is sequence of increasing bucket upper bounds
+        name is metric name
+        labels is optional odict of label values such as remote name
+        '''
+        self.buckets = tuple(sorted(buckets))
+        self.name = name
+        self.labels = labels
+        self.clear()
+
+    def clear(self):
+        '''
+        Forget all observed values
+        '''
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        '''
+        Add value
+        '''
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        '''
+        Returns upper bound of bucket holding quantile q, 0.0 <= q <= 1.0,
+        or .max when in the overflow bucket, None if nothing observed
+        '''
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank and total:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        '''
+        Returns odict of count, sum, mean, max, quantiles and cumulative
+        bucket counts keyed by upper bound
+        '''
+        snap = odict(name=self.name)
+        if self.labels:
+            snap['labels'] = odict(self.labels)
+        snap.update(count=self.count,
+                    sum=self.sum,
+                    mean=(self.sum / self.count) if self.count else 0.0,
+                    max=self.max)
+        for q in QUANTILES:
+            snap['p{0}'.format(int(q * 100))] = self.quantile(q)
+        buckets = odict()
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            buckets[repr(bound)] = total
+        buckets['+Inf'] = self.count
+        snap['buckets'] = buckets
+        return snap
+
+
+class Registry(object):
+    '''
+    Metrics of a stack
+
+    .stats is odict of counters and gauges changed by incStat and updateStat
+    .gauged is set of .stats keys that are gauges
+    .gauges is odict of callables returning gauge values keyed by name
+    .histograms is odict of Histograms keyed by name or by name with
+        labels as in 'remote_rtt{remote=alpha}'
+    .timer is optional StoreTimer whose elapsed time gives counter rates
+    '''
+    def __init__(self, stats=None, timer=None):
+        '''
+        Setup instance
+        '''
+        self.stats = stats if stats is not None else odict()
+        self.gauged = set()
+        self.gauges = odict()
+        self.histograms = odict()
+        self.timer = timer
+
+    def gauge(self, name, func):
+        '''
+        Register callable func returning current value of gauge name
+        '''
+        self.gauges[name] = func
+
+    @staticmethod
+    def key(name, labels=None):
+        '''
+        Returns histogram key of name and labels odict
+        '''
+        if not labels:
+            return name
+        return "{0}{{{1}}}".format(name, ",".join("{0}={1}".format(k, v)
+                                                  for k, v in labels.items()))
+
+    def histogram(self, name, buckets=None, labels=None):
+        '''
+        Returns histogram name with labels creating it with buckets if need be
+        buckets defaults to LATENCY_BUCKETS
+        '''
+        key = self.key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = Histogram(buckets if buckets is not None else LATENCY_BUCKETS,
+                                  name=name,
+                                  labels=labels)
+            self.histograms[key] = histogram
+        return histogram
+
+    def observe(self, name, value, buckets=None):
+        '''
+        Add value to unlabeled histogram name
+        '''
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histogram(name, buckets)
+        histogram.observe(value)
+
+    def discard(self, name, labels=None):
+        '''
+        Remove histogram name with labels if any
+        '''
+        self.histograms.pop(self.key(name, labels), None)
+
+    def clear(self):
+        '''
+        Clear all histograms
+        '''
+        for histogram in self.histograms.values():
+            histogram.clear()
+
+    def snapshot(self):
+        '''
+        Returns odict with counters, gauges, histograms and elapsed seconds
+        and per second rates of counters since stats were last cleared
+        '''
+        counters = odict()
+        gauges = odict()
+        for key, value in self.stats.items():
+            if key in self.gauged or not isinstance(value, numbers.Number):
+                gauges[key] = stringify(value)
+            else:
+                counters[key] = value
+        for name, func in self.gauges.items():
+            try:
+                gauges[name] = stringify(func())
+            except Exception as ex:  # gauge source went away
+                console.terse("Failed reading gauge {0}. {1}\n".format(name, ex))
+        snap = odict(counters=counters,
+                     gauges=gauges,
+                     histograms=odict((name, histogram.snapshot())
+                                      for name, histogram in self.histograms.items()))
+        if self.timer is not None:
+            elapsed = self.timer.elapsed
+            snap['elapsed'] = elapsed
+            snap['rates'] = odict((key, (value / elapsed) if elapsed > 0 else 0.0)
+                                  for key, value in counters.items())
+        return snap
+
+    def dumps(self, snap=None):
+        '''
+        Returns json of snap defaulting to new snapshot
+        '''
+        snap = snap if snap is not None else self.snapshot()
+        return json.dumps(snap, separators=(',', ':'), default=str)
+
+    def exposition(self, prefix='raet', labels=None, snap=None):
+        '''
+        Returns text exposition in prometheus format of snap defaulting to
+        new snapshot with metric names prefixed by prefix and labels odict
+        added to every sample
+        '''
+        snap = snap if snap is not None else self.snapshot()
+        base = odict(labels or ())
+        lines = []
+
+        def sample(name, value, extra=None):
+            tags = odict(base)
+            if extra:
+                tags.update(extra)
+            if tags:
+                name = "{0}{{{1}}}".format(name, ",".join('{0}="{1}"'.format(k, v)
+                                                         for k, v in tags.items()))
+            lines.append("{0} {1}".format(name, value))
+
+        for kind, values in (('counter', snap['counters']), ('gauge', snap['gauges'])):
+            for key, value in values.items():
+                name = "{0}_{1}".format(prefix, key)
+                if isinstance(value, bool) or not isinstance(value, (numbers.Number, dict)):
+                    continue
+                lines.append("# TYPE {0} {1}".format(name, kind))
+                if isinstance(value, dict):  # per key values such as depths
+                    for k, v in value.items():
+                        if isinstance(v, numbers.Number):
+                            sample(name, v, odict(key=k))
+                else:
+                    sample(name, value)
+        typed = set()
+        for key, hist in snap['histograms'].items():
+            name = "{0}_{1}".format(prefix, hist.get('name') or key)
+            if name not in typed:
+                lines.append("# TYPE {0} histogram".format(name))
+                typed.add(name)
+            tags = odict(hist.get('labels') or ())
+            for bound, count in hist['buckets'].items():
+                extra = odict(tags)
+                extra['le'] = bound
+                sample(name + '_bucket', count, extra)
+            sample(name + '_sum', hist['sum'], tags)
+            sample(name + '_count', hist['count'], tags)
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, fmt='text', **kwa):
+        '''
+        Atomically write snapshot to file at path as fmt 'text' exposition
+        or 'json', kwa are passed to .exposition
+        '''
+        if fmt == 'json':
+            content = self.dumps()
+        elif fmt == 'text':
+            content = self.exposition(**kwa)
+        else:
+            raise raeting.RaetError("Unknown metrics format '{0}'".format(fmt))
+        temp = "{0}.tmp".format(path)
+        with open(temp, 'w') as f:
+            f.write(content)
+        os.rename(temp, path)
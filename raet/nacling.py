@@ -7,6 +7,9 @@ nacling.py raet protocol nacl (crypto) management classes
 import sys
 import time
 import binascii
+import threading
+from collections import deque
+
 import six
 import libnacl
 
@@ -554,6 +557,124 @@ class Privateer(object):
         return box.decrypt(cipher, nonce, decoder)
 
 
+class Sealer(object):
+    '''
+    Container for local nacl symmetric secret key
+        .key is the raw secret key
+    Used to seal data that only the holder of .key may open
+    '''
+    KEY_SIZE = 32
+    NONCE_SIZE = 24
+
+    def __init__(self, key=None):
+        if key:
+            if len(key) != self.KEY_SIZE:
+                key = encoding.HexEncoder.decode(key)
+        else:
+            key = libnacl.randombytes(self.KEY_SIZE)
+        self.key = key
+        self.keyraw = key
+        self.keyhex = encoding.HexEncoder.encode(key)
+
+    @classmethod
+    def derive(cls, seed, context=b''):
+        '''
+        Return new Sealer whose key is derived from raw seed bytes and context
+        '''
+        return cls(key=libnacl.crypto_generichash(context + seed))
+
+    def nonce(self):
+        '''
+        Generate a safe nonce value
+        '''
+        return libnacl.randombytes(self.NONCE_SIZE)
+
+    def encrypt(self, msg):
+        '''
+        Return duple of (cyphertext, nonce) resulting from sealing msg with .key
+        '''
+        nonce = self.nonce()
+        return (libnacl.crypto_secretbox(msg, nonce, self.key), nonce)
+
+    def decrypt(self, cipher, nonce):
+        '''
+        Return msg resulting from opening cipher with nonce and .key
+        Raises ValueError if cipher does not open
+        '''
+        return libnacl.crypto_secretbox_open(cipher, nonce, self.key)
+
+
+class PrivateerPool(object):
+    '''
+    Pool of precomputed Privateer short term key pairs
+    Generating a key pair requires a Curve25519 base point multiply so the pool
+    is refilled on a background worker thread instead of the caller's thread.
+    The worker thread only runs while the pool is below size.
+
+    .size is the number of key pairs to keep on hand
+    .hits is count of key pairs taken from pool
+    .misses is count of times pool was exhausted
+    '''
+    Size = 64
+
+    def __init__(self, size=None, fill=True):
+        '''
+        Setup instance
+
+        size is number of precomputed key pairs to keep on hand
+        fill is True means start background refill immediately
+        '''
+        self.size = max(0, int(size if size is not None else self.Size))
+        self.privateers = deque()  # deque append and popleft are thread safe
+        self.lock = threading.Lock()
+        self.worker = None
+        self.hits = 0
+        self.misses = 0
+        if fill:
+            self.refill()
+
+    def __len__(self):
+        return len(self.privateers)
+
+    def fill(self):
+        '''
+        Generate key pairs until pool is full. Runs on worker thread
+        '''
+        while len(self.privateers) < self.size:
+            self.privateers.append(Privateer())
+
+    def refill(self):
+        '''
+        Start background worker thread to fill pool if not full and not
+        already running
+        '''
+        if len(self.privateers) >= self.size:
+            return
+        with self.lock:
+            if self.worker is not None and self.worker.is_alive():
+                return
+            self.worker = threading.Thread(target=self.fill,
+                                           name="PrivateerPoolRefill")
+            self.worker.daemon = True
+            self.worker.start()
+
+    def get(self):
+        '''
+        Return a Privateer from the pool or None when the pool is exhausted.
+        Triggers a background refill.
+        '''
+        try:
+            privateer = self.privateers.popleft()
+        except IndexError:
+            privateer = None
+        self.refill()
+        if privateer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return privateer
+
+
 def uuid(size=16):
     '''
     Generate universally unique id hex string with size characters
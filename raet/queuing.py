@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+'''
+queuing.py raet protocol transmit queue classes
+
+FairQueue is a drop in replacement for the stack .txes deque of
+(packed, destination address) duples. Packets are kept in per destination
+queues that are served by deficit round robin with byte based quanta so that
+a large backlog for one destination does not delay packets to the others.
+
+ClassQueue layers strict priority traffic classes over FairQueue so that
+control packets are always sent ahead of interactive and then bulk packets.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import time
+from collections import deque
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+
+# Import raet libs
+from .raeting import Priority
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+
+class FairQueue(object):
+    '''
+    Deficit round robin queue of (packed, ha) duples keyed by destination ha
+
+    Supports the subset of the deque interface that the stacks use for .txes
+    namely append, appendleft, popleft, pop, clear, len, truth and iteration.
+    Each time a destination reaches the head of the round it is credited
+    .quantum bytes and may dequeue packets until its deficit is exhausted.
+    '''
+    Quantum = 1024  # bytes credited per round, at least one udp packet
+
+    def __init__(self, items=None, quantum=None):
+        '''
+        Setup FairQueue instance
+
+        items is optional iterable of (packed, ha) duples to enqueue
+        quantum is bytes credited to a destination per round
+        '''
+        self.quantum = max(1, quantum if quantum is not None else self.Quantum)
+        self.queues = odict()  # per destination deque of duples keyed by ha
+        self.deficits = dict()  # per destination deficit in bytes keyed by ha
+        self.actives = deque()  # round robin order of destinations with packets
+        self.count = 0
+        self.last = None  # ha of last appended duple for pop
+        if items:
+            for item in items:
+                self.append(item)
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    __nonzero__ = __bool__
+
+    def __iter__(self):
+        '''
+        Iterate over duples grouped by destination in round robin order
+        '''
+        for ha in list(self.actives):
+            for item in list(self.queues[ha]):
+                yield item
+
+    def _activate(self, ha):
+        '''
+        Add destination ha to round robin if not already present
+        Returns the deque for ha
+        '''
+        queue = self.queues.get(ha)
+        if queue is None:
+            queue = self.queues[ha] = deque()
+        if not queue:
+            self.actives.append(ha)
+            self.deficits[ha] = 0
+            if len(self.actives) == 1:  # new head gets credited for its turn
+                self.deficits[ha] = self.quantum
+        return queue
+
+    def _retire(self, ha):
+        '''
+        Remove emptied destination ha at head of round and credit next head
+        '''
+        self.actives.popleft()
+        del self.queues[ha]
+        del self.deficits[ha]
+        if self.actives:
+            self.deficits[self.actives[0]] += self.quantum
+
+    def _skipRounds(self):
+        '''
+        Credit every active destination at once with the whole rounds of
+        quantum that pass before any head packet can be sent so packets much
+        larger than .quantum do not turn the round once per quantum
+        '''
+        rounds = min(-(-(len(self.queues[ha][0][0]) - self.deficits[ha]) // self.quantum)
+                     for ha in self.actives) - 1
+        if rounds > 0:
+            for ha in self.actives:
+                self.deficits[ha] += rounds * self.quantum
+
+    def append(self, item):
+        '''
+        Enqueue duple item (packed, ha) at the tail of its destination queue
+        '''
+        ha = item[1]
+        self._activate(ha).append(item)
+        self.count += 1
+        self.last = ha
+
+    def appendleft(self, item):
+        '''
+        Enqueue duple item (packed, ha) at the head of its destination queue
+        Used to requeue packets that could not be sent without reordering
+        '''
+        ha = item[1]
+        self._activate(ha).appendleft(item)
+        self.count += 1
+
+    def popleft(self):
+        '''
+        Dequeue next duple (packed, ha) in deficit round robin order
+        Raises IndexError if empty
+        '''
+        if not self.count:
+            raise IndexError("pop from an empty FairQueue")
+        ha = self.actives[0]
+        if self.deficits[ha] < len(self.queues[ha][0][0]):
+            self._skipRounds()
+        while True:
+            ha = self.actives[0]
+            queue = self.queues[ha]
+            size = len(queue[0][0])
+            if self.deficits[ha] >= size:
+                break
+            self.actives.rotate(-1)  # turn over so credit next head
+            self.deficits[self.actives[0]] += self.quantum
+
+        item = queue.popleft()
+        self.count -= 1
+        self.deficits[ha] -= size
+        if not queue:
+            self._retire(ha)
+        return item
+
+    def pop(self):
+        '''
+        Remove and return most recently appended duple
+        Raises IndexError if empty
+        '''
+        if not self.count:
+            raise IndexError("pop from an empty FairQueue")
+        ha = self.last if self.last in self.queues else self.actives[-1]
+        queue = self.queues[ha]
+        item = queue.pop()
+        self.count -= 1
+        if not queue:
+            if self.actives[0] == ha:
+                self._retire(ha)
+            else:
+                self.actives.remove(ha)
+                del self.queues[ha]
+                del self.deficits[ha]
+        return item
+
+    def clear(self):
+        '''
+        Remove all duples
+        '''
+        self.queues.clear()
+        self.deficits.clear()
+        self.actives.clear()
+        self.count = 0
+        self.last = None
+
+    def depths(self):
+        '''
+        Returns odict of queue depth keyed by destination ha
+        '''
+        return odict([(ha, len(queue)) for ha, queue in self.queues.items()])
+
+
+class ClassQueue(object):
+    '''
+    Strict priority queue of FairQueues one per traffic class in Priority
+
+    Supports the same deque subset as FairQueue where append and appendleft
+    take an optional priority that defaults to .Default. Tracks per class
+    latency, that is time from enqueue to dequeue, using .clock.
+    '''
+    Default = Priority.interactive
+
+    def __init__(self, items=None, quantum=None, default=None, clock=None):
+        '''
+        Setup ClassQueue instance
+
+        items is optional iterable of (packed, ha) duples to enqueue at default
+        quantum is bytes credited to a destination per round in each class
+        default is Priority of duples enqueued without priority
+        clock is function returning current time in seconds
+        '''
+        self.default = Priority(default if default is not None else self.Default)
+        self.clock = clock if clock is not None else time.time
+        self.classes = [FairQueue(quantum=quantum) for priority in Priority]
+        self.latencies = odict([(priority.name, [0, 0.0, 0.0]) for priority in Priority])
+        self.last = None  # priority of last appended duple for pop
+        self.current = None  # priority of last dequeued duple for requeue
+        self.stamped = None  # enqueue stamp of last dequeued duple for requeue
+        if items:
+            for item in items:
+                self.append(item)
+
+    @property
+    def quantum(self):
+        return self.classes[0].quantum
+
+    def __len__(self):
+        return sum(len(fair) for fair in self.classes)
+
+    def __bool__(self):
+        return any(fair for fair in self.classes)
+
+    __nonzero__ = __bool__
+
+    def __iter__(self):
+        '''
+        Iterate over duples in priority then round robin order
+        '''
+        for fair in self.classes:
+            for packed, ha, stamp in fair:
+                yield (packed, ha)
+
+    def append(self, item, priority=None):
+        '''
+        Enqueue duple item (packed, ha) in traffic class priority
+        '''
+        priority = self.default if priority is None else priority
+        packed, ha = item
+        self.classes[priority].append((packed, ha, self.clock()))
+        self.last = priority
+
+    def appendleft(self, item, priority=None, stamp=None):
+        '''
+        Enqueue duple item (packed, ha) at head of its destination queue
+        in traffic class priority
+        stamp is the original enqueue time of a requeued duple so its latency
+        includes the time before it was requeued, defaults to now
+        '''
+        priority = self.default if priority is None else priority
+        stamp = self.clock() if stamp is None else stamp
+        packed, ha = item
+        self.classes[priority].appendleft((packed, ha, stamp))
+
+    def popleft(self):
+        '''
+        Dequeue next duple (packed, ha) from highest priority nonempty class
+        Raises IndexError if empty
+        '''
+        for priority, fair in enumerate(self.classes):
+            if fair:
+                packed, ha, stamp = fair.popleft()
+                latency = self.latencies[Priority(priority).name]
+                delay = max(0.0, self.clock() - stamp)
+                latency[0] += 1
+                latency[1] += delay
+                latency[2] = max(latency[2], delay)
+                self.current = Priority(priority)
+                self.stamped = stamp
+                return (packed, ha)
+        raise IndexError("pop from an empty ClassQueue")
+
+    def pop(self):
+        '''
+        Remove and return most recently appended duple
+        Raises IndexError if empty
+        '''
+        if self.last is not None and self.classes[self.last]:
+            packed, ha, stamp = self.classes[self.last].pop()
+            return (packed, ha)
+        for fair in reversed(self.classes):
+            if fair:
+                packed, ha, stamp = fair.pop()
+                return (packed, ha)
+        raise IndexError("pop from an empty ClassQueue")
+
+    def clear(self):
+        '''
+        Remove all duples
+        '''
+        for fair in self.classes:
+            fair.clear()
+        self.last = None
+
+    def depths(self):
+        '''
+        Returns odict of queue depth over all classes keyed by destination ha
+        '''
+        depths = odict()
+        for fair in self.classes:
+            for ha, depth in fair.depths().items():
+                depths[ha] = depths.get(ha, 0) + depth
+        return depths
+
+    def classDepths(self):
+        '''
+        Returns odict of queue depth keyed by traffic class name
+        '''
+        return odict([(priority.name, len(self.classes[priority]))
+                      for priority in Priority])
@@ -121,6 +121,8 @@ UDP_MAX_PACKET_SIZE = min(1024, UDP_MAX_DATAGRAM_SIZE)  # assumes IPV6 capable e
 UXD_MAX_PACKET_SIZE = (2 ** 16) - 1  # 65535
 MAX_SEGMENT_COUNT = (2 ** 16) - 1  # 65535
 MAX_MESSAGE_SIZE = min(67107840, UDP_MAX_PACKET_SIZE * MAX_SEGMENT_COUNT)
+ZIP_THRESHOLD = 512  # min packed message body size to compress
+STREAM_MARK = b'RAET\x00STREAM\n'  # raw body prefix of stream chunk messages
 MAX_HEAD_SIZE = 255
 
 JSON_END = b'\r\n\r\n'
@@ -135,6 +137,13 @@ COOKIESTUFF_PACKER = struct.Struct('!32sLL24s')
 COOKIE_PACKER = struct.Struct('!80s24s')
 INITIATESTUFF_PACKER = struct.Struct('!32s48s24s128s')
 INITIATE_PACKER = struct.Struct('!32s24s248s24s')
+# allow resumption ticket bodies
+TICKETSTUFF_PACKER = struct.Struct('!L32sd32s')  # nuid verraw expire secret
+TICKET_SIZE = TICKETSTUFF_PACKER.size + 16 + 24  # sealed stuff and nonce
+GRANTSTUFF_PACKER = struct.Struct('!32sd')  # secret life
+GRANT_PACKER = struct.Struct('!{0}s56s24s'.format(TICKET_SIZE))
+RESUME_PACKER = struct.Struct('!{0}s32s48s24s'.format(TICKET_SIZE))
+RESUMED_PACKER = struct.Struct('!48s24s{0}s'.format(GRANT_PACKER.size))
 
 
 def get_exception_error(ex):
@@ -173,6 +182,19 @@ class BodyKind(enum.IntEnum):
     unknown = 255
 
 
+@enum.unique
+class ZipKind(enum.IntEnum):
+    '''
+    Integer Enums of Body Compression Kinds
+    In message packets the body compression kind. In resume packets the
+    kind offered and in allow acks the kind agreed. Hello packets offer the
+    kind in the last byte of their plain text so older peers never see zk
+    '''
+    nada = 0
+    zlib = 1
+    unknown = 255
+
+
 @enum.unique
 class FootKind(enum.IntEnum):
     '''
@@ -253,6 +275,7 @@ class PcktKind(enum.IntEnum):
     reject = 13
     pend = 14
     done = 15
+    resume = 16
     unknown = 255
 
 
@@ -285,6 +308,16 @@ class PackKind(enum.IntEnum):
     pack = 1
 
 
+@enum.unique
+class Priority(enum.IntEnum):
+    '''
+    Integer Enums of Traffic Class Priorities, lower value is served first
+    '''
+    control = 0  # join, allow, alive and other protocol transactions
+    interactive = 1  # single segment messages
+    bulk = 2  # multiple segment messages
+
+
 # head fields that may be included in packet header if not default value
 PACKET_DEFAULTS = odict([
                             ('sh', DEFAULT_SRC_HOST),
@@ -320,18 +353,19 @@ PACKET_DEFAULTS = odict([
                             ('fk', 0),
                             ('fl', 0),
                             ('fg', '00'),
+                            ('zk', 0),
                       ])
 
 PACKET_FIELDS = ['sh', 'sp', 'dh', 'dp',
                  'ri', 'vn', 'pk', 'pl', 'hk', 'hl',
                  'se', 'de', 'cf', 'bf', 'nf', 'df', 'vf', 'si', 'ti', 'tk',
                  'dt', 'oi', 'wf', 'sn', 'sc', 'ml', 'sf', 'af',
-                 'bk', 'ck', 'fk', 'fl', 'fg']
+                 'bk', 'ck', 'fk', 'fl', 'fg', 'zk']
 
 PACKET_HEAD_FIELDS = ['ri', 'vn', 'pk', 'pl', 'hk', 'hl',
                'se', 'de', 'cf', 'bf', 'nf', 'df', 'vf', 'si', 'ti', 'tk',
                'dt', 'oi', 'wf', 'sn', 'sc', 'ml', 'sf', 'af',
-               'bk', 'bl', 'ck', 'cl', 'fk', 'fl', 'fg']
+               'bk', 'bl', 'ck', 'cl', 'fk', 'fl', 'fg', 'zk']
 
 PACKET_FLAGS = ['vf', 'df', 'nf', 'af', 'sf', 'wf', 'bf', 'cf']
 PACKET_FLAG_FIELDS = ['vf', 'df', 'nf', 'af', 'sf', 'wf', 'bf', 'cf']
@@ -366,6 +400,7 @@ PACKET_FIELD_FORMATS = odict([
                     ('fk', 'x'),
                     ('fl', 'x'),
                     ('fg', '.2s'),
+                    ('zk', 'x'),
               ])
 
 # head fields that may be included in page header if not default value
@@ -391,9 +426,19 @@ PAGE_FIELD_FORMATS = odict([
                             ('bi', 'x'),
                             ('pn', '04x'),
                             ('pc', '04x'),
+                            ('fs', 'x'),
+                            ('ps', 'x'),
+                            ('pb', 'x'),
+                            ('pa', 'x'),
+                            ('pw', 'x'),
+                            ('rs', 'x'),
                            ])
 
-PAGE_FIELDS = ['ri', 'vn', 'pk', 'sn', 'dn', 'si', 'bi', 'pn', 'pc']
+# fs is size of body passed by file descriptor, only in head when passed
+# ps page sequence number, pb sync base, pa ack and pw window only in head when reliable
+# rs largest page the sender reads only in head of bodiless receive size page
+PAGE_FIELDS = ['ri', 'vn', 'pk', 'sn', 'dn', 'si', 'bi', 'pn', 'pc', 'fs',
+               'ps', 'pb', 'pa', 'pw', 'rs']
 
 
 class RaetError(Exception):
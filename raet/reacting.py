@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+'''
+reacting.py raet selector based event loop for multiple stacks
+
+Reactor registers the sockets of many stacks with a selector (epoll on linux)
+and sleeps until a socket is readable or the earliest timer of any stack
+expires, including the retry of .txes sends deferred by a busy destination.
+A busy lane destination is the peer's receive buffer or ring, not the local
+socket, so waiting for writability would spin. Read interest is dropped while
+a stack defers receives so a full .rxMsgs does not spin either. Only the
+stacks that are ready are serviced. Stack store stamps follow the reactor
+clock so StoreTimers expire in real time.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import time
+
+try:
+    import selectors
+except ImportError:
+    selectors = None
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+
+# Import raet libs
+from .abiding import *  # import globals
+from . import raeting
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+Clock = getattr(time, 'monotonic', time.time)
+
+
+class Reactor(object):
+    '''
+    Selector based event loop that services many stacks
+    '''
+    Period = 1.0  # max seconds to wait when no timers are pending
+
+    def __init__(self, stacks=None, period=None, manage=False, selector=None, clock=None):
+        '''
+        Setup instance
+
+        stacks is optional iterable of stacks to add
+        period is max seconds to wait for events when no timers pending
+        manage is True to also manage RoadStack presence on remote timers
+        selector is selectors.BaseSelector instance, defaults to DefaultSelector
+        clock is function returning current time in seconds
+        '''
+        if selector is None:
+            if selectors is None:
+                raise raeting.StackError("Reactor requires the selectors module")
+            selector = selectors.DefaultSelector()
+        self.selector = selector
+        self.clock = clock if clock is not None else Clock
+        self.period = period if period is not None else self.Period
+        self.manage = manage
+        self.stacks = []
+        self.interests = odict()  # registered [socket, events] keyed by id(stack)
+        self.deadlines = odict()  # absolute store stamp of next timer keyed by id(stack)
+        self.origins = odict()  # (store, clock at store stamp zero) keyed by id(store)
+        for stack in stacks or []:
+            self.add(stack)
+
+    def add(self, stack):
+        '''
+        Add stack and register its server socket if any
+        '''
+        if stack in self.stacks:
+            emsg = "Reactor stack '{0}' already added".format(stack.name)
+            raise raeting.StackError(emsg)
+        self.stacks.append(stack)
+        sock = self.socket(stack)
+        if sock is not None:
+            self.selector.register(sock, selectors.EVENT_READ, stack)
+            self.interests[id(stack)] = [sock, selectors.EVENT_READ]
+        if id(stack.store) not in self.origins:
+            self.origins[id(stack.store)] = (stack.store, self.clock() - stack.store.stamp)
+
+    def remove(self, stack):
+        '''
+        Remove stack and unregister its server socket
+        '''
+        self.stacks.remove(stack)
+        interest = self.interests.pop(id(stack), None)
+        if interest is not None and interest[1]:
+            self.selector.unregister(interest[0])
+        self.deadlines.pop(id(stack), None)
+
+    def close(self):
+        '''
+        Remove all stacks and close selector
+        '''
+        for stack in list(self.stacks):
+            self.remove(stack)
+        self.selector.close()
+
+    @staticmethod
+    def socket(stack):
+        '''
+        Returns selectable socket of stack server or None
+        '''
+        return getattr(stack.server, 'ss', None) if stack.server else None
+
+    def stamp(self):
+        '''
+        Advance store stamps of all stacks to reactor clock
+        '''
+        now = self.clock()
+        for store, origin in self.origins.values():
+            stamp = now - origin
+            if stamp > store.stamp:
+                store.changeStamp(stamp)
+
+    def timeout(self):
+        '''
+        Returns seconds to wait for events. Zero when a stack has queued work
+        otherwise time until the earliest pending timer limited to .period
+        Updates .deadlines and selector interests
+        '''
+        timeout = self.period
+        for stack in self.stacks:
+            self.updateInterest(stack)
+            if stack.txMsgs or stack.rxes:
+                timeout = 0.0
+            deadline = stack.nextDeadline(manage=self.manage)
+            if deadline is None:
+                self.deadlines.pop(id(stack), None)
+            else:
+                self.deadlines[id(stack)] = stack.store.stamp + deadline
+                timeout = min(timeout, deadline)
+        return timeout
+
+    def serviceOnce(self, timeout=None):
+        '''
+        Wait up to timeout seconds, default from .timeout(), for a stack to be
+        ready then service ready stacks
+        Returns list of serviced stacks
+        '''
+        self.stamp()
+        wait = self.timeout()
+        if timeout is not None:
+            wait = min(wait, timeout)
+
+        masks = odict()
+        if self.interests:
+            for key, mask in self.selector.select(wait):
+                masks[id(key.data)] = mask
+        elif wait > 0.0:
+            time.sleep(wait)
+
+        self.stamp()
+        serviceds = []
+        for stack in self.stacks:
+            mask = masks.get(id(stack), 0)
+            deadline = self.deadlines.get(id(stack))
+            polled = id(stack) not in self.interests  # no selectable socket
+            if (polled or mask or stack.txMsgs or stack.rxes or
+                    (deadline is not None and stack.store.stamp >= deadline)):
+                self.serviceStack(stack, readable=polled or mask & selectors.EVENT_READ)
+                serviceds.append(stack)
+        return serviceds
+
+    def serviceStack(self, stack, readable=True):
+        '''
+        Service stack queues and timers and update its selector interest
+        '''
+        if readable:
+            stack.serviceReceives()
+        stack.serviceRxes()
+        stack.process()
+        if self.manage and hasattr(stack, 'manage'):
+            stack.manage(cascade=True)
+        stack.serviceTxMsgs()
+        stack.serviceTxes()
+        self.updateInterest(stack)
+
+    def updateInterest(self, stack):
+        '''
+        Update selector interest of stack to readable unless it defers receives
+        '''
+        interest = self.interests.get(id(stack))
+        if interest is not None:
+            events = 0 if stack.receivesDeferring() else selectors.EVENT_READ
+            if events != interest[1]:
+                if not events:
+                    self.selector.unregister(interest[0])
+                elif not interest[1]:
+                    self.selector.register(interest[0], events, stack)
+                else:
+                    self.selector.modify(interest[0], events, stack)
+                interest[1] = events
+
+    def run(self, duration=None):
+        '''
+        Service stacks until duration seconds elapse or forever if None
+        '''
+        stop = self.clock() + duration if duration is not None else None
+        while stop is None or self.clock() < stop:
+            remaining = (stop - self.clock()) if stop is not None else None
+            self.serviceOnce(timeout=remaining)
@@ -19,12 +19,90 @@ from ioflo.aid.timing import StoreTimer
 # Import raet libs
 from ..abiding import *  # import globals
 from .. import raeting
-from ..raeting import TrnsKind
+from .. import consoling
+from ..raeting import TrnsKind, ZipKind
 from .. import nacling
 from .. import lotting
 
 from ioflo.base.consoling import getConsole
 console = getConsole()
+log = consoling.getLogger()
+
+
+class DoneSet(object):
+    '''
+    Compact set of done transaction ids that expire after timeout seconds
+    given stamps from caller such as store stamps. Ids are kept in a deque of time buckets each of which is
+    a set of the ids added during the bucket's span. Add, membership and
+    expiry are O(1) in the number of ids since the number of buckets is bounded.
+    Ids expire in bulk a whole bucket at a time within one bucket span of timeout.
+
+    .timeout is seconds until added ids expire
+    .buckets is deque of duples of (stop stamp, set of ids)
+    .maxSize is max number of ids kept, oldest buckets dropped when exceeded
+    .size is number of ids kept
+    '''
+    Buckets = 16  # number of buckets spanning timeout
+    MaxSize = 1000000  # bound on number of ids kept
+
+    def __init__(self, timeout, buckets=None, maxSize=None):
+        '''
+        Setup instance
+        '''
+        self.timeout = timeout
+        buckets = buckets if buckets is not None else self.Buckets
+        self.span = max(float(timeout) / max(1, buckets), 0.0)
+        self.maxSize = maxSize if maxSize is not None else self.MaxSize
+        self.buckets = deque()
+        self.size = 0  # number of ids in all buckets
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, tid):
+        for stop, tids in self.buckets:
+            if tid in tids:
+                return True
+        return False
+
+    def add(self, tid, stamp):
+        '''
+        Add tid at time stamp to current bucket, starting new bucket when
+        current span ended
+        Returns number of ids dropped to keep within .maxSize
+        '''
+        drops = 0
+        if not self.buckets or stamp >= self.buckets[-1][0]:
+            self.buckets.append((stamp + self.span, set()))
+        tids = self.buckets[-1][1]
+        if tid not in tids:
+            tids.add(tid)
+            self.size += 1
+        while self.size > self.maxSize and len(self.buckets) > 1:
+            stop, tids = self.buckets.popleft()
+            self.size -= len(tids)
+            drops += len(tids)
+        return drops
+
+    def expire(self, stamp):
+        '''
+        Remove buckets whose ids have all expired as of time stamp
+        Returns number of ids removed
+        '''
+        count = 0
+        limit = stamp - self.timeout
+        while self.buckets and self.buckets[0][0] <= limit:
+            stop, tids = self.buckets.popleft()
+            count += len(tids)
+        self.size -= count
+        return count
+
+    def clear(self):
+        '''
+        Remove all ids
+        '''
+        self.buckets.clear()
+        self.size = 0
 
 
 class Estate(lotting.Lot):
@@ -80,7 +158,7 @@ class Estate(lotting.Lot):
         self.dyned = dyned
         self.role = role if role is not None else self.name
         self.transactions = odict() # estate transactions keyed by transaction index
-        self.doneTransactions = odict()  # temporary storage for done transaction ids
+        self.doneTransactions = DoneSet(timeout=self.stack.MsgStaleTimeout)  # done tids
 
     @property
     def eha(self):
@@ -158,7 +236,7 @@ class Estate(lotting.Lot):
             raise raeting.EstateError(emsg)
         self.transactions[index] = transaction
         transaction.remote = self
-        console.verbose( "Added transaction to {0} at '{1}'\n".format(self.name, index))
+        log.verbose( "Added transaction to {0} at '{1}'\n", self.name, index)
 
     def removeTransaction(self, index, transaction=None):
         '''
@@ -168,26 +246,42 @@ class Estate(lotting.Lot):
         if index in self.transactions: # fast way
             if not transaction or transaction is self.transactions[index]:
                 del self.transactions[index]
-                console.verbose( "Removed transaction from {0} at"
-                                 " '{1}'\n".format(self.name, index))
+                log.verbose( "Removed transaction from {0} at"
+                             " '{1}'\n", self.name, index)
                 return
 
         if transaction: # find transaction slow way
             for i, trans in self.transactions.items():
                 if trans is transaction:
                     del self.transactions[i]
-                    console.concise( "Removed transaction from '{0}' at '{1}',"
-                            " instead of at '{2}'\n".format(self.name, i, index))
+                    log.concise( "Removed transaction from '{0}' at '{1}',"
+                            " instead of at '{2}'\n", self.name, i, index)
 
-    def addDoneTransaction(self, index):
-        self.doneTransactions[index] = StoreTimer(self.stack.store, duration=self.stack.MsgStaleTimeout)
+    def messageBytes(self):
+        '''
+        Returns total bytes of messages being sent to remote by outstanding
+        message initiator transactions
+        '''
+        return sum(getattr(transaction, 'size', 0)
+                   for transaction in self.transactions.values()
+                   if transaction.kind == TrnsKind.message and not transaction.rmt)
+
+    def addDoneTransaction(self, tid):
+        '''
+        Remember tid of done correspondent transaction so stale resends are nacked
+        '''
+        drops = self.doneTransactions.add(tid, self.stack.store.stamp)
+        if drops:
+            self.stack.incStat('done_transaction_drop', drops)
 
     def cleanupDoneTransactions(self):
-        for index, timer in self.doneTransactions.iteritems():
-            if not timer.expired:
-                break
-            del self.doneTransactions[index]
-            console.verbose("Removed already done transaction from {0} at '{1}'\n".format(self.name, index))
+        '''
+        Forget expired done transaction ids
+        '''
+        count = self.doneTransactions.expire(self.stack.store.stamp)
+        if count:
+            log.verbose("Removed {0} already done transactions from {1}\n",
+                    count, self.name)
 
     def removeStaleTransactions(self):
         '''
@@ -288,13 +382,17 @@ class RemoteEstate(Estate):
         self.alived = None
         self.reaped = None
         self.acceptance = acceptance
-        self.privee = nacling.Privateer() # short term key manager
+        self.privee = self.stack.privateer() # short term key manager
         self.publee = nacling.Publican() # correspondent short term key  manager
         self.verfer = nacling.Verifier(verkey) # correspondent verify key manager
         self.pubber = nacling.Publican(pubkey) # correspondent long term key manager
 
         self.rsid = rsid # last sid received from remote when RmtFlag is True
 
+        self.ticket = None  # allow resumption ticket (ticket, secret) from allowent
+        self.ticketExpire = 0.0  # wall clock time when .ticket expires
+        self.zk = ZipKind.nada.value  # body compression kind negotiated on allow
+
         # persistence keep alive heartbeat timer. Initial duration has offset so
         # not synced with other side persistence heatbeet
         # by default do not use offset on main
@@ -345,7 +443,7 @@ class RemoteEstate(Estate):
         Regenerate short term keys
         '''
         self.allowed = None
-        self.privee = nacling.Privateer() # short term key
+        self.privee = self.stack.privateer() # short term key
         self.publee = nacling.Publican() # correspondent short term key  manager
 
     def validRsid(self, rsid):
@@ -392,8 +490,8 @@ class RemoteEstate(Estate):
         Remote is dead, reap it if main estate.
         '''
         if self.stack.main: # only main can reap
-            console.concise("Stack {0}: Reaping dead remote {1} at {2}\n".format(
-                    self.stack.name, self.name, self.stack.store.stamp))
+            log.concise("Stack {0}: Reaping dead remote {1} at {2}\n",
+                    self.stack.name, self.name, self.stack.store.stamp)
             self.stack.incStat("remote_reap")
             self.reaped = True
 
@@ -402,8 +500,8 @@ class RemoteEstate(Estate):
         Remote packet received from remote so not dead anymore.
         '''
         if self.stack.main: # only only main can reap or unreap
-            console.concise("Stack {0}: Unreaping dead remote {1} at {2}\n".format(
-                    self.stack.name, self.name, self.stack.store.stamp))
+            log.concise("Stack {0}: Unreaping dead remote {1} at {2}\n",
+                    self.stack.name, self.name, self.stack.store.stamp)
             self.stack.incStat("remote_unreap")
             self.reaped = False
 
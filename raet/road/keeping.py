@@ -7,6 +7,7 @@ keeping.py raet protocol keep classes
 
 # Import python libs
 import os
+import time
 from collections import deque
 
 try:
@@ -37,6 +38,8 @@ class RoadKeep(keeping.Keep):
             local/
                 estate.ext
                 role.ext
+                ticket.ext
+                ticket.log
             remote/
                 estate.name.ext
                 estate.name.ext
@@ -56,6 +59,7 @@ class RoadKeep(keeping.Keep):
                          'sid', 'main', 'kind', 'joined', 'role']
     RemoteRoleFields = ['role', 'acceptance', 'verhex', 'pubhex']
     Auto = AutoMode.never.value #auto accept
+    RolePeriod = 0.0  # min seconds between stat checks of cached role files
 
     def __init__(self,
                  stackname='stack',
@@ -63,14 +67,22 @@ class RoadKeep(keeping.Keep):
                  auto=None,
                  baseroledirpath='',
                  roledirpath='',
+                 rolePeriod=None,
                  **kwa):
         '''
         Setup RoadKeep instance
+
+        rolePeriod is minimum seconds between stat checks of a cached remote role
+            file for changes made outside this keep. Zero means check every access
         '''
         super(RoadKeep, self).__init__(stackname=stackname,
                                        prefix=prefix,
                                        **kwa)
         self.auto = auto if auto is not None else self.Auto
+        self.rolePeriod = rolePeriod if rolePeriod is not None else self.RolePeriod
+        # cache of remote role data keyed by role,
+        # values are lists of [data, signature, checked]
+        self.roleCache = odict()
 
         if not roledirpath:
             if baseroledirpath:
@@ -109,6 +121,13 @@ class RoadKeep(keeping.Keep):
         self.localrolepath = os.path.join(self.localroledirpath,
                 "{0}.{1}".format('role', self.ext))
 
+        self.ticketpath = os.path.join(self.localdirpath,
+                "{0}.{1}".format('ticket', self.ext))
+        self.ticketlogpath = os.path.join(self.localdirpath,
+                "{0}.{1}".format('ticket', 'log'))
+
+        self.loadAllRemoteRoleData()  # preload role cache
+
     def clearAllDir(self):
         '''
         Clear all keep directories
@@ -146,6 +165,53 @@ class RoadKeep(keeping.Keep):
         if os.path.exists(self.localrolepath):
             os.remove(self.localrolepath)
 
+    def dumpTicketData(self, data):
+        '''
+        Dump the redeemed resumption ticket data to file
+        Compacts the ticket log since data holds all its entries
+        '''
+        self.dump(data, self.ticketpath)
+        if os.path.exists(self.ticketlogpath):
+            os.remove(self.ticketlogpath)
+
+    def appendTicketData(self, tid, expire):
+        '''
+        Append one redeemed resumption ticket id and expire time to the
+        ticket log without rewriting the ticket file
+        '''
+        with open(self.ticketlogpath, "a") as f:
+            f.write("{0} {1!r}\n".format(tid, expire))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def loadTicketData(self):
+        '''
+        Load and Return the redeemed resumption ticket data from the ticket file
+        updated with the entries of the ticket log
+        '''
+        data = odict()
+        if os.path.exists(self.ticketpath):
+            data.update(self.load(self.ticketpath) or odict())
+        if os.path.exists(self.ticketlogpath):
+            with open(self.ticketlogpath, "r") as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) != 2:  # partial line from crash while appending
+                        continue
+                    try:
+                        data[fields[0]] = float(fields[1])
+                    except ValueError:
+                        continue
+        return data
+
+    def clearTicketData(self):
+        '''
+        Clear the ticket file and ticket log
+        '''
+        for path in [self.ticketpath, self.ticketlogpath]:
+            if os.path.exists(path):
+                os.remove(path)
+
     def clearLocalRoleDir(self):
         '''
         Clear the Local Role directory
@@ -153,14 +219,39 @@ class RoadKeep(keeping.Keep):
         if os.path.exists(self.localroledirpath):
             os.rmdir(self.localroledirpath)
 
+    def remoteRolePath(self, role):
+        '''
+        Return the file path of the remote role data file for role
+        '''
+        return os.path.join(self.remoteroledirpath,
+                "{0}.{1}.{2}".format('role', role, self.ext))
+
+    @staticmethod
+    def signRole(filepath):
+        '''
+        Return signature of role file at filepath used to detect changes made
+        outside of this keep or None if the file does not exist
+        '''
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return (stat.st_mtime, stat.st_size, stat.st_ino)
+
+    def cacheRemoteRoleData(self, data, role, signature):
+        '''
+        Update the role cache entry for role with copy of data and file signature
+        '''
+        self.roleCache[role] = [odict(data), signature, time.time()]
+
     def dumpRemoteRoleData(self, data, role):
         '''
         Dump the role data to file
         '''
-        filepath = os.path.join(self.remoteroledirpath,
-                "{0}.{1}.{2}".format('role', role, self.ext))
+        filepath = self.remoteRolePath(role)
 
         self.dump(data, filepath)
+        self.cacheRemoteRoleData(data, role, self.signRole(filepath))
 
     def dumpAllRemoteRoleData(self, roles):
         '''
@@ -172,20 +263,35 @@ class RoadKeep(keeping.Keep):
     def loadRemoteRoleData(self, role):
         '''
         Load and Return the data from the role file
+
+        Served from the role cache when the role file has not changed since it
+        was cached so that the common case does not read from disk.
+        Returns a copy that the caller may modify.
         '''
+        entry = self.roleCache.get(role)
+        if entry is not None and self.rolePeriod:
+            if (time.time() - entry[2]) < self.rolePeriod:
+                return odict(entry[0])
+
+        filepath = self.remoteRolePath(role)
+        signature = self.signRole(filepath)
+        if entry is not None and entry[1] == signature:
+            entry[2] = time.time()
+            return odict(entry[0])
+
         data = odict([(key, None) for key in self.RemoteRoleFields])
-        filepath = os.path.join(self.remoteroledirpath,
-                "{0}.{1}.{2}".format('role', role, self.ext))
-        if not os.path.exists(filepath):
+        if signature is None:
             data.update(role=role)
-            return data
-        data.update(self.load(filepath))
+        else:
+            data.update(self.load(filepath))
+        self.cacheRemoteRoleData(data, role, signature)
         return data
 
     def loadAllRemoteRoleData(self):
         '''
         Load and Return the roles dict from the all the role data files
         indexed by role in filenames
+        Refreshes the role cache with the loaded data
         '''
         roles = odict()
         for filename in os.listdir(self.remoteroledirpath):
@@ -196,17 +302,23 @@ class RoadKeep(keeping.Keep):
             if not role or prefix != 'role':
                 continue
             filepath = os.path.join(self.remoteroledirpath, filename)
+            signature = self.signRole(filepath)
             roles[role] = self.load(filepath)
+            if ext.lstrip('.') == self.ext:
+                data = odict([(key, None) for key in self.RemoteRoleFields])
+                data.update(roles[role])
+                self.cacheRemoteRoleData(data, role, signature)
         return roles
 
     def clearRemoteRoleData(self, role):
         '''
         Clear data from the role data file
         '''
-        filepath = os.path.join(self.remoteroledirpath,
-                "{0}.{1}.{2}".format('role', role, self.ext))
+        filepath = self.remoteRolePath(role)
         if os.path.exists(filepath):
             os.remove(filepath)
+        if role in self.roleCache:
+            del self.roleCache[role]
 
     def clearAllRemoteRoleData(self):
         '''
@@ -222,6 +334,7 @@ class RoadKeep(keeping.Keep):
             filepath = os.path.join(self.remoteroledirpath, filename)
             if os.path.exists(filepath):
                 os.remove(filepath)
+        self.roleCache.clear()
 
     def clearRemoteRoleDir(self):
         '''
@@ -486,6 +599,7 @@ def clearAllKeep(dirpath):
     road = RoadKeep(dirpath=dirpath)
     road.clearLocalData()
     road.clearLocalRoleData()
+    road.clearTicketData()
     road.clearAllRemoteData()
     road.clearAllRemoteRoleData()
 
@@ -6,6 +6,7 @@ packeting module provides classes for Raet packets
 '''
 
 # Import python libs
+import zlib
 from collections import Mapping, deque
 try:
     import simplejson as json
@@ -27,7 +28,13 @@ console = getConsole()
 # Import raet libs
 from ..abiding import *  # import globals
 from .. import raeting
-from ..raeting import PcktKind, TailSize, CoatKind, FootSize, FootKind, BodyKind, HeadKind
+from .. import consoling
+from .. import serializing
+from .. import metering
+from ..raeting import (PcktKind, TailSize, CoatKind, FootSize, FootKind,
+                       BodyKind, HeadKind, ZipKind)
+
+log = consoling.getLogger()
 
 class Part(object):
     '''
@@ -273,19 +280,37 @@ class TxBody(Body):
         '''
         self.packed = b''
         bk = self.packet.data['bk']
-        if bk == BodyKind.json:
-            if self.data:
-                self.packed = ns2b(json.dumps(self.data,
-                                              separators=(',', ':')))
-        elif bk == BodyKind.msgpack:
-            if self.data:
-                if not msgpack:
-                    emsg = "Msgpack not installed."
-                    raise raeting.PacketError(emsg)
-                self.packed = msgpack.dumps(self.data,
-                                            encoding='utf-8')
-        elif bk == BodyKind.raw:
+        if bk == BodyKind.raw:
             self.packed = self.data # data is already formatted string
+        elif bk != BodyKind.nada and self.data:
+            codec = serializing.lookup(BodyKind, bk)
+            if codec is None:
+                emsg = "No serializer for body kind '{0}'.".format(bk)
+                raise raeting.PacketError(emsg)
+            self.packed = serializing.dumps(codec, self.data)
+        self.zip()
+
+    def zip(self):
+        '''
+        Compress .packed of message packet when head field zk requests it and
+        .packed is at least the stack zip threshold. Clears zk when the body
+        is not compressed
+        '''
+        data = self.packet.data
+        if not data['zk'] or data['pk'] != PcktKind.message:
+            return
+        if data['zk'] != ZipKind.zlib:
+            emsg = "Unsupported body compression kind '{0}'".format(data['zk'])
+            raise raeting.PacketError(emsg)
+        stack = self.packet.stack
+        threshold = stack.zipThreshold if stack else raeting.ZIP_THRESHOLD
+        zipped = None
+        if len(self.packed) >= threshold:
+            zipped = zlib.compress(self.packed)
+        if zipped is not None and len(zipped) < len(self.packed):
+            self.packed = zipped
+        else:
+            data['zk'] = ZipKind.nada.value
 
 class RxBody(Body):
     '''
@@ -303,33 +328,51 @@ class RxBody(Body):
             emsg = "Unrecognizable packet body."
             raise raeting.PacketError(emsg)
 
+        self.unzip()
         self.data = odict()
 
-        if bk == BodyKind.json:
-            if self.packed:
-                kit = json.loads(self.packed.decode('utf-8'),
-                                 object_pairs_hook=odict,
-                                 encoding='utf-8')
-                if not isinstance(kit, Mapping):
-                    emsg = "Packet body not a mapping."
-                    raise raeting.PacketError(emsg)
-                self.data = kit
-        elif bk == BodyKind.msgpack:
-            if self.packed:
-                if not msgpack:
-                    emsg = "Msgpack not installed."
-                    raise raeting.PacketError(emsg)
-                kit = msgpack.loads(self.packed,
-                                    object_pairs_hook=odict,
-                                    encoding='utf-8')
-                if not isinstance(kit, Mapping):
-                    emsg = "Packet body not a mapping."
-                    raise raeting.PacketError(emsg)
-                self.data = kit
-        elif bk == BodyKind.raw:
+        if bk == BodyKind.raw:
             self.data = self.packed # return as bytes
         elif bk == BodyKind.nada:
             pass
+        elif self.packed:
+            stack = self.packet.stack
+            codec = serializing.lookup(BodyKind, bk, stack.ordered if stack else True)
+            if codec is None:
+                emsg = "No serializer for body kind '{0}'.".format(bk)
+                raise raeting.PacketError(emsg)
+            if stack and stack.lazy and self.packet.data['pk'] == PcktKind.message:
+                self.data = serializing.LazyBody(self.packed, codec)
+                return
+            try:
+                kit = codec.loads(self.packed)
+            except ValueError as ex:
+                raise raeting.PacketError("Invalid packet body. {0}".format(ex))
+            if not isinstance(kit, Mapping):
+                emsg = "Packet body not a mapping."
+                raise raeting.PacketError(emsg)
+            self.data = kit
+
+    def unzip(self):
+        '''
+        Decompress .packed of message packet if head field zk is set
+        Decompressed size is limited to MAX_MESSAGE_SIZE
+        '''
+        data = self.packet.data
+        if not data.get('zk') or data['pk'] != PcktKind.message:
+            return
+        if data['zk'] != ZipKind.zlib:
+            emsg = "Unsupported body compression kind '{0}'".format(data['zk'])
+            raise raeting.PacketError(emsg)
+        unzipper = zlib.decompressobj()
+        try:
+            packed = unzipper.decompress(self.packed, raeting.MAX_MESSAGE_SIZE)
+        except zlib.error as ex:
+            raise raeting.PacketError("Invalid compressed body. {0}".format(ex))
+        if unzipper.unconsumed_tail:
+            emsg = "Decompressed body exceeds max of {0}".format(raeting.MAX_MESSAGE_SIZE)
+            raise raeting.PacketError(emsg)
+        self.packed = packed
 
 class Coat(Part):
     '''
@@ -689,6 +732,10 @@ class RxPacket(Packet):
             emsg = "Packed empty, nothing to parse."
             raise raeting.PacketError(emsg)
 
+        metered = getattr(self.stack, 'metered', False)
+        if metered:
+            start = metering.Clock()
+
         self.head.parse()
 
         if self.data['vn'] not in raeting.VERSIONS.values():
@@ -696,8 +743,15 @@ class RxPacket(Packet):
                     "version '{1}'".format(self.data['vn']))
             raise raeting.PacketError(emsg)
 
+        if metered:
+            mark = metering.Clock()
+            self.stack.metrics.observe('phase_parse_outer', mark - start)
+
         self.foot.parse() #foot unpacks itself
 
+        if metered:
+            self.stack.metrics.observe('phase_verify', metering.Clock() - mark)
+
     def unpackInner(self, packed=None):
         '''
         Unpacks the body, and coat parts of .packed
@@ -720,8 +774,23 @@ class RxPacket(Packet):
         Raises PacketError exception If failure
         '''
         self.unpackInner()
+        self.parseCoatBody()
+
+    def parseCoatBody(self):
+        '''
+        Parses coat then body from .coat.packed timing decrypt and deserialize
+        phases when stack is metered
+        '''
+        if not getattr(self.stack, 'metered', False):
+            self.coat.parse()
+            self.body.parse()
+            return
+        start = metering.Clock()
         self.coat.parse()
+        mark = metering.Clock()
         self.body.parse()
+        self.stack.metrics.observe('phase_decrypt', mark - start)
+        self.stack.metrics.observe('phase_deserialize', metering.Clock() - mark)
 
 class Tray(object):
     '''
@@ -775,6 +844,7 @@ class TxTray(Tray):
                           data=self.data)
 
         packet.prepack()
+        self.data['zk'] = packet.data['zk']  # cleared if body not compressed
         if packet.size <= raeting.UDP_MAX_PACKET_SIZE:
             packet.sign()
             self.packets.append(packet)
@@ -836,8 +906,8 @@ class RxTray(Tray):
         sn = packet.data['sn']
         if sn > self.highest:
             self.highest = sn
-        console.verbose("segment count={0} number={1} tid={2}\n".format(
-            sc, sn, packet.data['ti']))
+        log.verbose("segment count={0} number={1} tid={2}\n",
+            sc, sn, packet.data['ti'])
 
         if sc == 1:  # this is only segment to complete now
             self.data.update(packet.data)
@@ -886,8 +956,7 @@ class RxTray(Tray):
         packet = RxPacket(stack = self.stack, data=self.data)
         packet.coat.packed = self.packed
 
-        packet.coat.parse()
-        packet.body.parse()
+        packet.parseCoatBody()
         self.complete = True
 
         return packet.body.data
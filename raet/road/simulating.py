@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+'''
+simulating.py raet in process simulated lossy udp network
+
+A RoadStack given a Network opens a SocketSimNb server on it instead of a
+udp socket. Datagrams sent between the servers of one Network never touch
+the host network stack. Each is delayed by the network latency plus a
+uniform jitter and may be lost, duplicated or reordered. With a bandwidth
+set, each link between two servers sends one datagram at a time. A full
+send buffer raises EAGAIN just as a busy socket does.
+
+Time is the Store virtual clock so a datagram arrives once store.stamp
+reaches its arrival time, and randomness comes from a seeded
+random.Random. Stacks serviced in one process while advancing the store
+therefore see exactly the same traffic on every run, which makes
+throughput and retransmission benchmarks reproducible without netem or
+real sockets.
+
+Example:
+
+    store = Store(stamp=0.0)
+    network = simulating.Network(store=store, latency=0.05, jitter=0.01,
+                                 loss=0.02, bandwidth=1e6, seed=1)
+    main = RoadStack(store=store, network=network, ha=("", 7530), ...)
+    other = RoadStack(store=store, network=network, ha=("", 7531), ...)
+    while ...:
+        main.serviceAll()
+        other.serviceAll()
+        store.advanceStamp(network.nextDeadline() or 0.01)
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import errno
+import heapq
+import random
+import socket
+from collections import deque
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+from ioflo.base.storing import Store
+
+# Import raet libs
+from ..abiding import *  # import globals
+from .. import raeting
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+
+class Network(object):
+    '''
+    Simulated datagram network of SocketSimNb servers
+    '''
+    Host = '127.0.0.1'  # host of servers bound to any interface
+    Latency = 0.0  # one way seconds
+    Jitter = 0.0  # most seconds added to or taken from latency
+    Loss = 0.0  # probability a datagram is lost
+    Duplicate = 0.0  # probability a datagram is delivered twice
+    Reorder = 0.0  # probability a datagram skips latency so overtakes others
+    Bandwidth = 0.0  # bytes per second per link, 0 means unlimited
+    Seed = 0
+    Ports = 49152  # first port given to servers bound to port 0
+
+    def __init__(self,
+                 store=None,
+                 latency=None,
+                 jitter=None,
+                 loss=None,
+                 duplicate=None,
+                 reorder=None,
+                 bandwidth=None,
+                 seed=None,
+                 host=None):
+        '''
+        Setup instance
+
+        store is Store whose stamp is the network clock
+        latency, jitter are seconds
+        loss, duplicate, reorder are probabilities 0.0 to 1.0
+        bandwidth is bytes per second per link, 0 means unlimited
+        seed seeds the random generator
+        host is host of servers bound to any interface
+        '''
+        self.store = store if store is not None else Store(stamp=0.0)
+        self.latency = latency if latency is not None else self.Latency
+        self.jitter = jitter if jitter is not None else self.Jitter
+        self.loss = loss if loss is not None else self.Loss
+        self.duplicate = duplicate if duplicate is not None else self.Duplicate
+        self.reorder = reorder if reorder is not None else self.Reorder
+        self.bandwidth = bandwidth if bandwidth is not None else self.Bandwidth
+        self.seed = seed if seed is not None else self.Seed
+        self.host = host if host is not None else self.Host
+        self.random = random.Random(self.seed)
+        self.servers = odict()  # open servers keyed by ha
+        self.flights = []  # heap of (arrival, count, data, sa, da) in flight
+        self.count = 0  # datagrams scheduled, orders equal arrivals
+        self.frees = dict()  # stamp each link is free to send keyed by (sa, da)
+        self.port = self.Ports  # next port given to servers bound to port 0
+        self.stats = odict()
+
+    def incStat(self, key, delta=1):
+        self.stats[key] = self.stats.get(key, 0) + delta
+
+    def normalize(self, ha):
+        '''
+        Returns ha with any interface host replaced by .host
+        '''
+        host, port = ha
+        if host in ('', '0.0.0.0', 'localhost'):
+            host = self.host
+        return (host, port)
+
+    def server(self, **kwa):
+        '''
+        Returns new SocketSimNb on this network, kwa as for SocketUdpNb
+        '''
+        return SocketSimNb(network=self, **kwa)
+
+    def bind(self, server):
+        '''
+        Returns bound ha of server or None if address is in use
+        '''
+        host, port = self.normalize(server.ha)
+        if not port:
+            while (host, self.port) in self.servers:
+                self.port += 1
+            port = self.port
+            self.port += 1
+        ha = (host, port)
+        if ha in self.servers:
+            return None
+        self.servers[ha] = server
+        return ha
+
+    def unbind(self, server):
+        '''
+        Remove server so datagrams to it are dropped
+        '''
+        if self.servers.get(server.ha) is server:
+            del self.servers[server.ha]
+
+    def send(self, data, sa, da, bufsize=0):
+        '''
+        Schedule datagram data from sa to da
+        Raises socket.error EAGAIN when the link has more than bufsize bytes
+        waiting for bandwidth
+        Returns number of bytes sent
+        '''
+        now = self.store.stamp
+        da = self.normalize(da)
+        size = len(data)
+        depart = now
+        if self.bandwidth:
+            link = (sa, da)
+            free = max(now, self.frees.get(link, now))
+            if bufsize and (free - now) * self.bandwidth + size > bufsize:
+                self.incStat('datagram_busy')
+                raise socket.error(errno.EAGAIN, "Simulated send buffer full")
+            depart = free + size / float(self.bandwidth)
+            self.frees[link] = depart
+        self.incStat('datagram_tx')
+
+        if self.loss and self.random.random() < self.loss:
+            self.incStat('datagram_lost')
+            return size
+        copies = 1
+        if self.duplicate and self.random.random() < self.duplicate:
+            self.incStat('datagram_duplicated')
+            copies = 2
+        for copy in range(copies):
+            arrival = depart
+            if self.reorder and self.random.random() < self.reorder:
+                self.incStat('datagram_reordered')
+            else:
+                arrival += self.latency
+                if self.jitter:
+                    arrival += self.random.uniform(-self.jitter, self.jitter)
+                arrival = max(depart, arrival)
+            heapq.heappush(self.flights, (arrival, self.count, data, sa, da))
+            self.count += 1
+        return size
+
+    def service(self):
+        '''
+        Deliver datagrams whose arrival is due to receive buffers of servers
+        '''
+        now = self.store.stamp
+        flights = self.flights
+        while flights and flights[0][0] <= now:
+            arrival, count, data, sa, da = heapq.heappop(flights)
+            server = self.servers.get(da)
+            if server is None:
+                self.incStat('datagram_unreachable')
+                continue
+            if server.bs and server.rxBytes + len(data) > server.bs:
+                self.incStat('datagram_overflow')
+                continue
+            server.rxes.append((data, sa))
+            server.rxBytes += len(data)
+            self.incStat('datagram_rx')
+
+    def nextDeadline(self):
+        '''
+        Returns seconds until next datagram arrives or None if none in flight
+        '''
+        if not self.flights:
+            return None
+        return max(0.0, self.flights[0][0] - self.store.stamp)
+
+
+class SocketSimNb(object):
+    '''
+    Nonblocking server on a simulated Network with the interface of
+    ioflo SocketUdpNb
+    '''
+    def __init__(self,
+                 network,
+                 ha=None,
+                 host='',
+                 port=55000,
+                 bufsize=1024,
+                 wlog=None,
+                 bcast=False):
+        '''
+        Setup instance
+
+        network is Network the server binds to
+        other parameters as for SocketUdpNb, bufsize bounds both the receive
+        buffer and bytes waiting to send
+        '''
+        self.network = network
+        self.ha = ha or (host, port)
+        self.bs = bufsize
+        self.wlog = wlog
+        self.bcast = bcast
+        self.ss = None  # no real socket
+        self.opened = False
+        self.rxes = deque()  # received duples (data, sa)
+        self.rxBytes = 0  # bytes in .rxes
+
+    def actualBufSizes(self):
+        '''
+        Returns duple of send and receive buffer sizes
+        '''
+        return (self.bs, self.bs) if self.opened else (0, 0)
+
+    def open(self):
+        '''
+        Bind to network at .ha
+        '''
+        ha = self.network.bind(self)
+        if ha is None:
+            console.terse("socket.error = Simulated address {0} already in use\n".format(
+                    self.ha))
+            return False
+        self.ha = ha
+        self.opened = True
+        return True
+
+    def reopen(self):
+        '''
+        Idempotently open server
+        '''
+        self.close()
+        return self.open()
+
+    def close(self):
+        '''
+        Unbind from network dropping received datagrams
+        '''
+        if self.opened:
+            self.network.unbind(self)
+            self.opened = False
+        self.rxes.clear()
+        self.rxBytes = 0
+
+    def receive(self):
+        '''
+        Perform non blocking receive of arrived datagram
+        Returns duple (data, sa), if no data then returns (b'', None)
+        '''
+        self.network.service()
+        if not self.rxes:
+            return (b'', None)
+        data, sa = self.rxes.popleft()
+        self.rxBytes -= len(data)
+        if self.wlog:
+            self.wlog.writeRx(sa, data)
+        return (data, sa)
+
+    def send(self, data, da):
+        '''
+        Perform non blocking send of datagram data to destination da
+        Raises socket.error EAGAIN when send buffer is full
+        '''
+        result = self.network.send(data, self.ha, da, self.bs)
+        if self.wlog:
+            self.wlog.writeTx(da, data)
+        return result
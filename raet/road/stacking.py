@@ -9,6 +9,8 @@ stacking.py raet protocol stacking classes
 import socket
 import os
 import errno
+import time
+import binascii
 
 from collections import deque,  Mapping
 try:
@@ -23,21 +25,26 @@ except ImportError:
 
 # Import ioflo libs
 from ioflo.aid.odicting import odict
+from ioflo.aid.timing import StoreTimer
 from ioflo.base import nonblocking
 
 # Import raet libs
 from ..abiding import *  # import globals
 from .. import raeting
-from ..raeting import PcktKind, TrnsKind, CoatKind, FootKind, BodyKind, HeadKind
+from .. import consoling
+from ..raeting import PcktKind, TrnsKind, CoatKind, FootKind, BodyKind, HeadKind, ZipKind
 from .. import nacling
 from .. import stacking
+from .. import metering
 from . import keeping
 from . import packeting
 from . import estating
 from . import transacting
+from . import streaming
 
 from ioflo.base.consoling import getConsole
 console = getConsole()
+log = consoling.getLogger()
 
 class RoadStack(stacking.KeepStack):
     '''
@@ -78,12 +85,49 @@ class RoadStack(stacking.KeepStack):
         The default timeout to reap a dead remote
     role
         The local estate role identifier for key management
+    privateerPoolSize
+        The number of precomputed short term key pairs to keep on hand for
+        rekeying allows. Pool is refilled on background thread. 0 means no pool
+    ticketLife
+        The lifetime in seconds of allow resumption tickets issued to allowers.
+        0.0 means do not issue tickets
+    ticketKey
+        The secret key used to seal allow resumption tickets. Defaults to a
+        key derived from the local long term private key so tickets survive restarts.
+        Redeemed tickets are kept in the local keep so none is redeemed twice
+    admitLimit
+        The max number of concurrent join and allow correspondent transactions.
+        Excess join and allow requests wait in the admission queue. 0 means no limit
+    admitQueueSize
+        The max number of join and allow requests waiting for admission
+    msgBytesHigh
+        The high water mark of outstanding message bytes per remote at which
+        transmit to that remote defers. 0 means no limit
+    msgBytesLow
+        The low water mark at which transmit to the remote resumes.
+        Defaults to half of msgBytesHigh
+    streamer
+        Callable streamer(stream, chunk) that receives the chunks of incoming
+        streams in order and chunk None when the stream ends. None means
+        spool incoming streams to files
+    spooldirpath
+        The directory of incoming stream spool files. Defaults to tempdir
+    zk
+        The body compression kind to offer remotes on allow. Messages to a
+        remote are compressed only when both sides offer the same kind
+    zipThreshold
+        The min packed message body size in bytes to compress
+    network
+        The simulating.Network the stack server opens on instead of a udp
+        socket. None means udp socket
     '''
     Count = 0 # count of Stack instances to give unique stack names
     Hk = HeadKind.raet.value # stack default
     Bk = BodyKind.json.value # stack default
     Fk = FootKind.nacl.value # stack default
     Ck = CoatKind.nacl.value # stack default
+    Zk = ZipKind.nada.value # stack default body compression kind offered on allow
+    ZipThreshold = raeting.ZIP_THRESHOLD # stack default min body size to compress
     Bf = False # stack default for bcstflag
     BurstSize = 0  # stack default for max segments in each burst, 0 = no limit
     Period = 1.0 # stack default for keep alive
@@ -92,6 +136,14 @@ class RoadStack(stacking.KeepStack):
     JoinerTimeout = 5.0 # stack default for joiner transaction timeout
     JoinentTimeout = 5.0 # stack default for joinent transaction timeout
     MsgStaleTimeout = 600.0  # stale messages waiting timeout
+    PrivateerPoolSize = 0  # stack default for short term key pair pool size
+    TicketLife = 0.0  # stack default allow resumption ticket lifetime, 0.0 = none
+    TicketContext = b'raet allow resumption ticket'
+    AdmitLimit = 0  # stack default max concurrent join allow correspondents, 0 = none
+    AdmitQueueSize = 1024  # stack default max join allow requests waiting admission
+    AdmitTimeout = 5.0  # max time join allow request waits for admission
+    MsgBytesHigh = 0  # stack default outstanding message bytes per remote, 0 = none
+    StreamTimeout = 60.0  # max seconds between chunks of incoming stream
 
     def __init__(self,
                  puid=None,
@@ -114,6 +166,18 @@ class RoadStack(stacking.KeepStack):
                  period=None,
                  offset=None,
                  interim=None,
+                 privateerPoolSize=None,
+                 ticketLife=None,
+                 ticketKey=None,
+                 admitLimit=None,
+                 admitQueueSize=None,
+                 msgBytesHigh=None,
+                 msgBytesLow=None,
+                 streamer=None,
+                 spooldirpath=None,
+                 zk=None,
+                 zipThreshold=None,
+                 network=None,
                  **kwa
                  ):
         '''
@@ -141,11 +205,16 @@ class RoadStack(stacking.KeepStack):
         local.stack = self
 
         self.aha = ha # init before server is initialized
+        self.network = network # init before server is initialized
 
         # Remotes reference these in there init so create before super
         self.period = period if period is not None else self.Period
         self.offset = offset if offset is not None else self.Offset
         self.interim = interim if interim is not None else self.Interim
+        privateerPoolSize = (privateerPoolSize if privateerPoolSize is not None
+                             else self.PrivateerPoolSize)
+        self.privateers = (nacling.PrivateerPool(size=privateerPoolSize)
+                           if privateerPoolSize else None)
 
         super(RoadStack, self).__init__(puid=puid,
                                         keep=keep,
@@ -161,6 +230,29 @@ class RoadStack(stacking.KeepStack):
         self.aliveds =  odict() # alived remotes keyed by name
         self.reapeds =  odict() # reaped remotes keyed by name
         self.availables = set() # set of available remote names
+        self.ticketLife = ticketLife if ticketLife is not None else self.TicketLife
+        self.sealer = (nacling.Sealer(key=ticketKey) if ticketKey else
+                       nacling.Sealer.derive(self.local.priver.keyraw,
+                                             context=self.TicketContext))
+        self.redeemeds = odict() # redeemed resumption ticket ids keyed to expire time
+        self.redeemedLogs = 0 # redeemed entries appended to ticket log since dump
+        self.restoreRedeemeds()
+        self.admitLimit = admitLimit if admitLimit is not None else self.AdmitLimit
+        self.admitQueueSize = (admitQueueSize if admitQueueSize is not None
+                               else self.AdmitQueueSize)
+        self.admitteds = set() # admitted join and allow correspondent transactions
+        self.admissions = odict() # (packet, timer) waiting admission keyed by source ha
+        self.rxLatencies = odict() # (count, total, max) keyed by traffic class name
+        self.rxStamps = deque() # receive times of the newest .rxes duples
+        self.msgBytesHigh = msgBytesHigh if msgBytesHigh is not None else self.MsgBytesHigh
+        self.msgBytesLow = msgBytesLow if msgBytesLow is not None else self.msgBytesHigh // 2
+        self.streamer = streamer
+        self.spooldirpath = spooldirpath
+        self.streamId = 0  # last outgoing stream id
+        self.txStreams = odict()  # outgoing TxStreams keyed by stream id
+        self.rxStreams = odict()  # incoming RxStreams keyed by (remote uid, stream id)
+        self.zk = zk if zk is not None else self.Zk
+        self.zipThreshold = zipThreshold if zipThreshold is not None else self.ZipThreshold
 
     @property
     def ha(self):
@@ -187,10 +279,105 @@ class RoadStack(stacking.KeepStack):
         '''
         Create local listening server for stack
         '''
+        if self.network is not None:
+            return self.network.server(ha=self.ha,
+                        bufsize=raeting.UDP_MAX_PACKET_SIZE * self.bufcnt)
         server = nonblocking.SocketUdpNb(ha=self.ha,
                         bufsize=raeting.UDP_MAX_PACKET_SIZE * self.bufcnt)
         return server
 
+    def privateer(self):
+        '''
+        Return new short term key pair Privateer for remote
+        Taken from .privateers pool when enabled
+        '''
+        if self.privateers is not None:
+            privateer = self.privateers.get()
+            if privateer is not None:
+                return privateer
+            self.incStat('privateer_pool_empty')
+        return nacling.Privateer()
+
+    def issueTicket(self, remote):
+        '''
+        Return new allow resumption ticket grant for remote as packed bytes
+        or empty bytes if tickets are disabled.
+        The ticket is sealed with .sealer so only this stack can open it.
+        The ticket secret and lifetime are encrypted with the short term keys
+        so only the remote may use the ticket.
+        '''
+        if not self.ticketLife > 0.0:
+            return b''
+        secret = nacling.Sealer().keyraw  # fresh secret key shared with remote
+        stuff = raeting.TICKETSTUFF_PACKER.pack(remote.nuid,
+                                                remote.verfer.keyraw,
+                                                time.time() + self.ticketLife,
+                                                secret)
+        cipher, nonce = self.sealer.encrypt(stuff)
+        ticket = cipher + nonce
+        stuff = raeting.GRANTSTUFF_PACKER.pack(secret, self.ticketLife)
+        cipher, nonce = remote.privee.encrypt(stuff, remote.publee.key)
+        self.incStat('ticket_issued')
+        return raeting.GRANT_PACKER.pack(ticket, cipher, nonce)
+
+    def redeemTicket(self, ticket, remote):
+        '''
+        Return secret from allow resumption ticket issued by this stack to remote
+        Raises raeting.TransactionError if the ticket is invalid, expired,
+        not issued to remote, or already redeemed
+        '''
+        now = time.time()
+        for tid, expire in list(self.redeemeds.items()):  # forget expired tickets
+            if expire > now:  # approximately in expire order so rest not expired
+                break
+            del self.redeemeds[tid]
+
+        cipher, nonce = ticket[:-nacling.Sealer.NONCE_SIZE], ticket[-nacling.Sealer.NONCE_SIZE:]
+        try:
+            stuff = self.sealer.decrypt(cipher, nonce)
+        except ValueError as ex:
+            raise raeting.TransactionError("Invalid resumption ticket. {0}".format(ex))
+        nuid, verraw, expire, secret = raeting.TICKETSTUFF_PACKER.unpack(stuff)
+        if nuid != remote.nuid or verraw != remote.verfer.keyraw:
+            raise raeting.TransactionError("Resumption ticket not issued to remote")
+        if expire <= now:
+            raise raeting.TransactionError("Expired resumption ticket")
+        if nonce in self.redeemeds:
+            raise raeting.TransactionError("Replayed resumption ticket")
+        self.redeemeds[nonce] = expire
+        self.logRedeemed(nonce, expire)  # before use so a restart cannot redeem it again
+        return secret
+
+    def logRedeemed(self, tid, expire):
+        '''
+        Append redeemed ticket id tid to keep ticket log
+        Compacts by dumping .redeemeds once the log holds more entries than
+        .redeemeds so each redemption costs amortized constant keep io
+        '''
+        self.keep.appendTicketData(binascii.hexlify(tid).decode('ascii'), expire)
+        self.redeemedLogs += 1
+        if self.redeemedLogs > len(self.redeemeds):
+            self.dumpRedeemeds()
+
+    def dumpRedeemeds(self):
+        '''
+        Dump unexpired redeemed ticket ids to keep which clears the ticket log
+        '''
+        self.keep.dumpTicketData(odict((binascii.hexlify(tid).decode('ascii'), expire)
+                                       for tid, expire in self.redeemeds.items()))
+        self.redeemedLogs = 0
+
+    def restoreRedeemeds(self):
+        '''
+        Load unexpired redeemed ticket ids from keep in expire order
+        '''
+        now = time.time()
+        data = self.keep.loadTicketData()
+        for tid, expire in sorted(data.items(), key=lambda item: item[1]):
+            if expire > now:
+                self.redeemeds[binascii.unhexlify(tid)] = expire
+        self.redeemedLogs = len(data)  # so expired entries are compacted soon
+
     def addRemote(self, remote, dump=False):
         '''
         Add a remote  to .remotes
@@ -266,7 +453,7 @@ class RoadStack(stacking.KeepStack):
       Used as a wrapper to create new remotes
       Override to add additional kwa validations
       '''
-    	return estating.RemoteEstate(**kwa)
+      return estating.RemoteEstate(**kwa)
 
     def dumpLocalRole(self):
         '''
@@ -393,6 +580,7 @@ class RoadStack(stacking.KeepStack):
         super(RoadStack, self).clearAllKeeps()
         self.clearLocalRoleKeep()
         self.clearRemoteRoleKeeps()
+        self.keep.clearTicketData()
 
     def manage(self, cascade=False, immediate=False):
         '''
@@ -428,13 +616,16 @@ class RoadStack(stacking.KeepStack):
         self.aliveds = aliveds
         self.reapeds = reapeds
 
-    def _handleOneRx(self):
+    def _parseOneRx(self):
         '''
-        Handle on message from .rxes deque
+        Parse outer of one message from .rxes deque
         Assumes that there is a message on the .rxes deque
+        Returns packet or None if parsing failed
         '''
         raw, sa = self.rxes.popleft()
-        console.verbose("{0} received packet\n{1}\n".format(self.name, raw))
+        while len(self.rxStamps) > len(self.rxes):  # stamp of raw if any
+            self.rxStamps.popleft()
+        log.dump(consoling.VERBOSE, "{0} received packet", raw, self.name)
 
         packet = packeting.RxPacket(stack=self, packed=raw)
         try:
@@ -442,30 +633,111 @@ class RoadStack(stacking.KeepStack):
         except raeting.PacketError as ex:
             console.terse(str(ex) + '\n')
             self.incStat('parsing_outer_error')
-            return
+            return None
 
         sh, sp = sa
         packet.data.update(sh=sh, sp=sp)
+        return packet
+
+    def _handleOneRx(self):
+        '''
+        Handle on message from .rxes deque
+        Assumes that there is a message on the .rxes deque
+        '''
+        packet = self._parseOneRx()
+        if packet:
+            self.dispatchRx(packet)
+
+    def dispatchRx(self, packet):
+        '''
+        Process packet timing it as dispatch phase when .metered
+        Dispatch includes any inner parsing by the transaction
+        '''
+        if not self.metered:
+            self.processRx(packet)
+            return
+        start = metering.Clock()
         self.processRx(packet)
+        self.metrics.observe('phase_dispatch', metering.Clock() - start)
+
+    def _handleOneReceived(self):
+        '''
+        Handle one received packet from server recording its receive time
+        on .rxStamps for rx latency
+        '''
+        if not super(RoadStack, self)._handleOneReceived():
+            return False
+        self.rxStamps.append(time.time())
+        return True
+
+    def serviceRxes(self):
+        '''
+        Process all messages in .rxes deque by traffic class
+        Control transactions are processed ahead of messages from other
+        remotes but never ahead of earlier packets from the same remote so
+        each remote's packets are processed in arrival order
+        '''
+        now = time.time()
+        classes = [deque() for priority in raeting.Priority]
+        sources = dict()  # lowest priority class used so far keyed by source ha
+        while self.rxes:
+            stamp = self.rxStamps[0] if len(self.rxStamps) == len(self.rxes) else now
+            packet = self._parseOneRx()
+            if packet:
+                sa = (packet.data['sh'], packet.data['sp'])
+                priority = max(self.rxPriority(packet), sources.get(sa, 0))
+                sources[sa] = priority
+                classes[priority].append((packet, stamp))
+
+        for priority, packets in zip(raeting.Priority, classes):
+            while packets:
+                packet, stamp = packets.popleft()
+                self.dispatchRx(packet)
+                self.updateRxLatency(priority, time.time() - stamp)
+
+    def rxPriority(self, packet):
+        '''
+        Returns raeting.Priority traffic class of received packet
+        '''
+        if packet.data['tk'] != TrnsKind.message:
+            return raeting.Priority.control
+        if packet.data['sc'] > 1:  # segmented
+            return raeting.Priority.bulk
+        return raeting.Priority.interactive
+
+    def updateRxLatency(self, priority, delay):
+        '''
+        Update mean and max rx latency stats for traffic class priority
+        where delay is time from receive to done processing a packet
+        '''
+        name = raeting.Priority(priority).name
+        count, total, most = self.rxLatencies.get(name, (0, 0.0, 0.0))
+        count += 1
+        total += delay
+        most = max(most, delay)
+        self.rxLatencies[name] = (count, total, most)
+        self.updateStat('rx_latency_{0}'.format(name), total / count)
+        self.updateStat('rx_latency_{0}_max'.format(name), most)
 
     def processRx(self, packet):
         '''
         Process packet via associated transaction or
         reply with new correspondent transaction
         '''
-        console.profuse("{0} received packet data\n{1}\n".format(self.name, packet.data))
-        console.verbose("{0} received packet index: (rf={1[0]}, le={1[1]}, re={1[2]},"
-                " si={1[3]}, ti={1[4]}, bf={1[5]})\n".format(self.name, packet.index))
-        try:
-            tkname = TrnsKind(packet.data['tk'])
-        except ValueError as ex:
-            tkname = None
-        try:
-            pkname = PcktKind(packet.data['pk'])
-        except ValueError as ex:
-            pkname = None
-        console.verbose("{0} received trans kind = '{1}' packet kind = '{2}'"
-                        "\n".format(self.name, tkname, pkname))
+        if log.enabled(consoling.VERBOSE):
+            log.profuse("{0} received packet data\n{1}\n", self.name, packet.data)
+            log.verbose("{0} received packet index: (rf={1[0]}, le={1[1]}, re={1[2]},"
+                    " si={1[3]}, ti={1[4]}, bf={1[5]})\n", self.name, packet.index)
+            try:
+                tkname = TrnsKind(packet.data['tk'])
+            except ValueError as ex:
+                tkname = None
+            try:
+                pkname = PcktKind(packet.data['pk'])
+            except ValueError as ex:
+                pkname = None
+            log.verbose("{0} received trans kind = '{1}' packet kind = '{2}'"
+                        "\n", self.name, tkname, pkname)
 
         bf = packet.data['bf']
         if bf:
@@ -535,6 +807,9 @@ class RoadStack(stacking.KeepStack):
                             self.incStat('join_stale')
                             return
 
+                        if not self.admit(packet): # wait for admission
+                            return
+
                         # create vacuous remote will be assigned to joinees in joinent
                         remote = self.newRemote(stack=self,
                                                 fuid=0,  # was fuid=se
@@ -623,12 +898,14 @@ class RoadStack(stacking.KeepStack):
         '''
         if (packet.data['tk'] == TrnsKind.join and
                 packet.data['pk'] == PcktKind.request):
-            self.replyJoin(packet, remote)
+            if self.admit(packet):
+                self.replyJoin(packet, remote)
             return
 
         if (packet.data['tk'] == TrnsKind.allow and
-                packet.data['pk'] == PcktKind.hello):
-            self.replyAllow(packet, remote)
+                packet.data['pk'] in [PcktKind.hello, PcktKind.resume]):
+            if self.admit(packet):
+                self.replyAllow(packet, remote)
             return
 
         if (packet.data['tk'] == TrnsKind.alive and
@@ -647,6 +924,37 @@ class RoadStack(stacking.KeepStack):
 
         self.incStat('stale_packet')
 
+    def nextDeadline(self, manage=False):
+        '''
+        Returns seconds until the next pending timer expires that needs
+        .process or .manage when manage is True or None if no timers pending
+        Timers that have already expired are skipped since they are handled
+        by the next .process or .manage which restarts them if still needed
+        Includes when deferred .txes are retried
+        '''
+        stops = []
+        for remote in self.remotes.values():
+            for transaction in remote.transactions.values():
+                if transaction.timeout > 0.0:
+                    stops.append(transaction.timer.stop)
+                redoTimer = getattr(transaction, 'redoTimer', None)
+                if redoTimer is not None:
+                    stops.append(redoTimer.stop)
+            if manage:
+                stops.append(remote.timer.stop)
+                stops.append(remote.reapTimer.stop)
+        for packet, timer in self.admissions.values():
+            stops.append(timer.stop)
+        for stream in self.rxStreams.values():
+            stops.append(stream.timer.stop)
+
+        stamp = self.store.stamp
+        stops = [stop - stamp for stop in stops if stop > stamp]
+        retry = self.txesDeadline()
+        if retry is not None:
+            stops.append(retry)
+        return min(stops) if stops else None
+
     def process(self):
         '''
         Call .process or all remotes to allow timer based processing
@@ -654,8 +962,107 @@ class RoadStack(stacking.KeepStack):
         '''
         #for transaction in self.transactions.values():
             #transaction.process()
+        dones = 0
         for remote in self.remotes.values():
             remote.process()
+            dones += len(remote.doneTransactions)
+        if dones or 'done_transactions' in self.stats:
+            self.updateStat('done_transactions', dones)
+        self.serviceAdmissions()
+        self.serviceStreams()
+
+    def pruneAdmitteds(self):
+        '''
+        Forget admitted correspondents that are done or orphaned
+        '''
+        for transaction in list(self.admitteds):
+            if ((transaction not in transaction.remote.transactions.values()) or
+                    (transaction.timeout > 0.0 and transaction.timer.expired)):
+                self.admitteds.discard(transaction)
+
+    def admit(self, packet):
+        '''
+        Admission control for new join and allow correspondents
+        Returns True if correspondent may proceed now
+        Otherwise queues packet to be processed when admitted and returns False.
+        Retries from the same source ha replace the queued packet.
+        Queued join requests are sent a pend as backoff hint.
+        '''
+        if not self.admitLimit:
+            return True
+
+        sha = (packet.data['sh'], packet.data['sp'])
+        if sha in self.admissions: # retry of waiting request so dedupe
+            self.admissions[sha] = (packet, self.admissions[sha][1])
+            self.incStat('admission_duplicate')
+            return False
+
+        self.pruneAdmitteds()
+        if len(self.admitteds) < self.admitLimit:
+            return True
+
+        if len(self.admissions) >= self.admitQueueSize:
+            emsg = ("Stack '{0}'. Admission queue full. Dropping {1} from"
+                    " {2}...\n".format(self.name, TrnsKind(packet.data['tk']).name, sha))
+            console.concise(emsg)
+            self.incStat('admission_overflow')
+            return False
+
+        self.admissions[sha] = (packet, StoreTimer(self.store, duration=self.AdmitTimeout))
+        self.incStat('admission_queued')
+        self.updateStat('admission_queue_depth', len(self.admissions))
+        if packet.data['tk'] == TrnsKind.join:
+            self.pendAdmission(packet)
+        return False
+
+    def pendAdmission(self, packet):
+        '''
+        Send pend to joiner of join request waiting for admission so that joiner
+        backs off its redos
+        '''
+        data = odict(hk=self.Hk,
+                     bk=self.Bk,
+                     dh=packet.data['sh'],
+                     dp=packet.data['sp'],
+                     se=packet.data['de'],
+                     de=packet.data['se'],
+                     tk=TrnsKind.join.value,
+                     cf=True,
+                     bf=packet.data['bf'],
+                     si=packet.data['si'],
+                     ti=packet.data['ti'],
+                     ck=CoatKind.nada.value,
+                     fk=FootKind.nada.value)
+        pend = packeting.TxPacket(stack=self,
+                                  kind=PcktKind.pend.value,
+                                  embody=odict(),
+                                  data=data)
+        try:
+            pend.pack()
+        except raeting.PacketError as ex:
+            console.terse(str(ex) + '\n')
+            self.incStat("packing_error")
+            return
+        self.queueTx(pend.packed,
+                     (packet.data['sh'], packet.data['sp']),
+                     raeting.Priority.control)
+
+    def serviceAdmissions(self):
+        '''
+        Process queued join and allow requests while below admission limit
+        '''
+        if not self.admissions:
+            return
+
+        self.pruneAdmitteds()
+        while self.admissions and len(self.admitteds) < self.admitLimit:
+            sha = next(iter(self.admissions))
+            packet, timer = self.admissions.pop(sha)
+            if timer.expired:
+                self.incStat('admission_expired')
+                continue
+            self.processRx(packet)
+        self.updateStat('admission_queue_depth', len(self.admissions))
 
     def parseInner(self, packet):
         '''
@@ -664,8 +1071,8 @@ class RoadStack(stacking.KeepStack):
         '''
         try:
             packet.parseInner()
-            console.verbose("Stack '{0}'. Received packet body\n{1}\n".format(
-                    self.name, packet.body.data))
+            log.dump(consoling.VERBOSE, "Stack '{0}'. Received packet body",
+                     packet.body.data, self.name)
         except raeting.PacketError as ex:
             console.terse(str(ex) + '\n')
             self.incStat('parsing_inner_error')
@@ -761,6 +1168,8 @@ class RoadStack(stacking.KeepStack):
                                       txData=data,
                                       rxPacket=packet)
         joinent.join()
+        if self.admitLimit:
+            self.admitteds.add(joinent)
 
     def allow(self, uid=None, timeout=None, cascade=False):
         '''
@@ -780,6 +1189,12 @@ class RoadStack(stacking.KeepStack):
                                       cascade=cascade)
         allower.hello()
 
+    def negotiateZip(self, zk):
+        '''
+        Returns body compression kind to use with remote that offered zk
+        '''
+        return self.zk if (self.zk and zk == self.zk) else ZipKind.nada.value
+
     def replyAllow(self, packet, remote):
         '''
         Correspond to new allow transaction
@@ -791,7 +1206,12 @@ class RoadStack(stacking.KeepStack):
                                         tid=packet.data['ti'],
                                         txData=data,
                                         rxPacket=packet)
-        allowent.hello()
+        if packet.data['pk'] == PcktKind.resume:
+            allowent.resume()
+        else:
+            allowent.hello()
+        if self.admitLimit:
+            self.admitteds.add(allowent)
 
     def alive(self, uid=None, timeout=None, cascade=False):
         '''
@@ -826,13 +1246,16 @@ class RoadStack(stacking.KeepStack):
                                       rxPacket=packet)
         alivent.alive()
 
-    def transmit(self, msg, uid=None, timeout=None):
+    def transmit(self, msg, uid=None, timeout=None, priority=None):
         '''
         Append duple (msg, uid) to .txMsgs deque
         If msg is not mapping then raises exception
         If uid is None then it will default to the first entry in .remotes
         If timeout is None then it will use Messenger default
         timeout of 0 means never timeout of message transaction
+        priority is raeting.Priority traffic class of the message
+        If priority is None then interactive if single segment else bulk
+        Returns True if accepted or False if deferred by backpressure
         '''
         if not isinstance(msg, Mapping):
             emsg = "Invalid msg, not a mapping {0}\n".format(msg)
@@ -846,44 +1269,178 @@ class RoadStack(stacking.KeepStack):
                 self.incStat("invalid_destination")
                 return
             uid = self.remotes.values()[0].uid
-        self.txMsgs.append((msg, uid, timeout))
+        if self.txMsgsDeferring():
+            self.incStat("tx_msgs_deferred")
+            return False
+        remote = self.remotes.get(uid)
+        if remote and self.msgBytesDeferring(remote):
+            self.incStat("msg_bytes_deferred")
+            return False
+        trace = self.startTrace('tx')
+        if trace:
+            trace.mark('transmit')
+            self.txMsgs.append((msg, uid, timeout, priority, trace))
+        else:
+            self.txMsgs.append((msg, uid, timeout, priority))
+        return True
+
+    def transmitDeferring(self, uid=None):
+        '''
+        Returns True if .transmit of a message to remote uid would be deferred
+        by backpressure including outstanding message bytes to the remote
+        '''
+        if super(RoadStack, self).transmitDeferring(uid):
+            return True
+        if uid is None:
+            remote = next(iter(self.remotes.values()), None)
+        else:
+            remote = self.remotes.get(uid)
+        return bool(remote and self.msgBytesDeferring(remote))
+
+    def msgBytesDeferring(self, remote):
+        '''
+        Returns True if transmit to remote should defer because of too many
+        outstanding message bytes
+        '''
+        return self.pressurize('msg_bytes_{0}'.format(remote.name),
+                               remote.messageBytes(),
+                               self.msgBytesHigh,
+                               self.msgBytesLow)
+
+    def updatePressures(self):
+        '''
+        Refresh backpressure flags and gauges including per remote
+        outstanding message bytes
+        '''
+        super(RoadStack, self).updatePressures()
+        if self.msgBytesHigh or 'msg_bytes' in self.stats:
+            msgBytes = odict()
+            for remote in self.remotes.values():
+                msgBytes[remote.name] = remote.messageBytes()
+                self.msgBytesDeferring(remote)
+            self.updateStat('msg_bytes', msgBytes)
 
     def  _handleOneTxMsg(self):
         '''
         Take one message from .txMsgs deque and handle it
         Assumes there is a message on the deque
         '''
-        # triple (body dict, destination uid, timout)
-        body, uid, timeout = self.txMsgs.popleft()
-        self.message(body, uid=uid, timeout=timeout)
-        console.verbose("{0} sending\n{1}\n".format(self.name, body))
+        # (body dict, destination uid, timout, priority, trace) priority and trace are optional
+        txMsg = self.txMsgs.popleft()
+        body, uid, timeout = txMsg[:3]
+        priority = txMsg[3] if len(txMsg) > 3 else None
+        trace = txMsg[4] if len(txMsg) > 4 else None
+        if trace:
+            trace.mark('message')
+        self.message(body, uid=uid, timeout=timeout, priority=priority, trace=trace)
+        log.dump(consoling.VERBOSE, "{0} sending", body, self.name)
 
-    def message(self, body, uid=None, timeout=None):
+    def message(self, body, uid=None, timeout=None, priority=None, trace=None):
         '''
         Initiate message transaction to remote at duid
         If uid is None then create remote at ha
         If timeout is None then use Messenger default
         If timeout is 0 then never timeout
+        If priority is None then use Messenger default
+        trace is optional tracing.Trace of message
         '''
         remote = self.retrieveRemote(uid=uid)
         if not remote:
             emsg = "Invalid remote destination estate id '{0}'\n".format(uid)
             console.terse(emsg)
             self.incStat('invalid_remote_uid')
+            if trace:
+                trace.mark('failed', done=True)
             return
-        data = odict(hk=self.Hk, bk=self.Bk, fk=self.Fk, ck=self.Ck)
+        data = odict(hk=self.Hk, bk=self.Bk, fk=self.Fk, ck=self.Ck, zk=remote.zk)
         messenger = transacting.Messenger(stack=self,
                                           remote=remote,
                                           timeout=timeout,
                                           txData=data,
                                           bcst=self.Bf,
-                                          burst=self.BurstSize)
+                                          burst=self.BurstSize,
+                                          priority=priority,
+                                          trace=trace)
         messenger.message(body)
+        return messenger
+
+    def stream(self, source, uid=None, meta=None, timeout=None, chunkSize=None,
+               window=None):
+        '''
+        Initiate stream of bytes from source to remote at uid as a sequence of
+        chunk messages with at most window in flight
+        source is file like object with .read or iterable of bytes
+        meta is optional json serializable metadata delivered with stream
+        If uid is None then it will default to the first entry in .remotes
+        If timeout is None then use Messenger default for each chunk
+        If chunkSize or window is None then use TxStream defaults
+        Returns TxStream whose .complete or .failed is set when done
+        or None if remote is invalid
+        '''
+        remote = self.retrieveRemote(uid=uid)
+        if not remote:
+            emsg = "Invalid remote destination estate id '{0}'\n".format(uid)
+            console.terse(emsg)
+            self.incStat('invalid_remote_uid')
+            return None
+        self.streamId += 1
+        stream = streaming.TxStream(stack=self,
+                                    remote=remote,
+                                    sid=self.streamId,
+                                    source=source,
+                                    meta=meta,
+                                    chunkSize=chunkSize,
+                                    window=window,
+                                    timeout=timeout)
+        self.txStreams[stream.sid] = stream
+        stream.service()
+        if stream.done:
+            del self.txStreams[stream.sid]
+        return stream
+
+    def receiveStream(self, packed, remote):
+        '''
+        Process raw body packed of completed chunk message from remote
+        '''
+        try:
+            header, chunk = streaming.parseChunk(packed)
+        except raeting.PacketError as ex:
+            console.terse(str(ex) + '\n')
+            self.incStat('invalid_stream_chunk')
+            return
+        key = (remote.uid, header['id'])
+        stream = self.rxStreams.get(key)
+        if stream is None:
+            stream = streaming.RxStream(stack=self,
+                                        remote=remote,
+                                        sid=header['id'],
+                                        timeout=self.StreamTimeout)
+            self.rxStreams[key] = stream
+        stream.receive(header, chunk)
+        if stream.done:
+            del self.rxStreams[key]
+
+    def serviceStreams(self):
+        '''
+        Send more chunks of outgoing streams and abandon stalled incoming ones
+        '''
+        for sid, stream in list(self.txStreams.items()):
+            stream.service()
+            if stream.done:
+                del self.txStreams[sid]
+        for key, stream in list(self.rxStreams.items()):
+            if stream.timer.expired:
+                stream.fail()
+                del self.rxStreams[key]
 
     def replyMessage(self, packet, remote):
         '''
         Correspond to new Message transaction
+        Drops the packet when .rxMsgs is too full so the messenger retries later
         '''
+        if self.rxMsgsDeferring():
+            self.incStat("rx_msgs_deferred")
+            return
         data = odict(hk=self.Hk, bk=self.Bk, fk=self.Fk, ck=self.Ck)
         messengent = transacting.Messengent(stack=self,
                                             remote=remote,
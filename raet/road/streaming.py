@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+'''
+streaming.py raet protocol streaming classes
+
+A stream transfers an arbitrarily large payload from a byte iterator or file
+object as a sequence of chunk messages. Each chunk is sent by its own
+reliable Messenger transaction with a raw body made of raeting.STREAM_MARK,
+a json chunk header, a newline and the chunk bytes. Raw body messages
+without the mark are ordinary messages and go to .rxMsgs. At most .window chunk messages are in flight
+per stream so memory is bounded by window * chunkSize at both ends. Each
+chunk header advertises the window so the receiver drops chunks beyond it.
+
+The receiving RoadStack reorders chunks and either hands each one in order to
+its .streamer callback or appends it to a spool file. When the last chunk
+arrives the stack appends a message to .rxMsgs of the form
+
+    odict(stream=odict(id=id, meta=meta, size=size, path=path))
+
+where path is the spool file path or None when a streamer callback is used.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import os
+import tempfile
+from collections import deque
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+from ioflo.aid.timing import StoreTimer
+
+# Import raet libs
+from ..abiding import *  # import globals
+from .. import raeting
+from .. import consoling
+from ..raeting import BodyKind
+from . import transacting
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+log = consoling.getLogger()
+
+
+def packChunk(header, chunk):
+    '''
+    Returns raw body bytes of chunk message from header mapping and chunk bytes
+    '''
+    return b''.join([raeting.STREAM_MARK,
+                     ns2b(json.dumps(header, separators=(',', ':'))),
+                     b'\n',
+                     chunk])
+
+
+def isChunk(packed):
+    '''
+    Returns True if raw body bytes packed is of a chunk message
+    '''
+    return isinstance(packed, bytes) and packed.startswith(raeting.STREAM_MARK)
+
+
+def parseChunk(packed):
+    '''
+    Returns duple (header, chunk) parsed from raw body bytes of chunk message
+    Raises PacketError if malformed
+    '''
+    if not isChunk(packed):
+        raise raeting.PacketError("Invalid stream chunk mark")
+    head, sep, chunk = packed[len(raeting.STREAM_MARK):].partition(b'\n')
+    try:
+        header = json.loads(head.decode('utf-8'), object_pairs_hook=odict)
+    except ValueError as ex:
+        raise raeting.PacketError("Invalid stream chunk header. {0}".format(ex))
+    if not sep or not isinstance(header, dict) or 'id' not in header or 'sn' not in header:
+        raise raeting.PacketError("Invalid stream chunk header '{0}'".format(head))
+    return (header, chunk)
+
+
+class TxStream(object):
+    '''
+    Outgoing stream of chunk messages to a remote
+    '''
+    ChunkSize = 65536  # max bytes of payload per chunk message
+    Window = 4  # max chunk messages in flight
+
+    def __init__(self, stack, remote, sid, source, meta=None, chunkSize=None,
+                 window=None, timeout=None):
+        '''
+        Setup instance
+
+        stack is RoadStack
+        remote is RemoteEstate destination
+        sid is stream id unique to stack
+        source is file like object with .read or iterable of bytes
+        meta is optional json serializable metadata delivered with stream
+        chunkSize is max bytes of payload per chunk message
+        window is max chunk messages in flight
+        timeout is Messenger timeout of each chunk message
+        '''
+        self.stack = stack
+        self.remote = remote
+        self.sid = sid
+        self.meta = meta
+        self.chunkSize = max(1, chunkSize if chunkSize is not None else self.ChunkSize)
+        self.window = max(1, window if window is not None else self.Window)
+        self.timeout = timeout
+        self.chunks = self.chunker(source)
+        self.ahead = next(self.chunks, None)  # lookahead to flag last chunk
+        self.sn = 0  # next chunk sequence number
+        self.size = 0  # payload bytes sent
+        self.inflights = deque()  # messengers of chunks not yet acked done
+        self.complete = False
+        self.failed = False
+
+    def chunker(self, source):
+        '''
+        Generator of chunks of at most .chunkSize bytes from source
+        '''
+        if hasattr(source, 'read'):
+            while True:
+                chunk = source.read(self.chunkSize)
+                if not chunk:
+                    break
+                yield chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+        else:
+            for chunk in source:
+                if not isinstance(chunk, bytes):
+                    chunk = chunk.encode('utf-8')
+                for i in range(0, len(chunk), self.chunkSize):
+                    yield chunk[i:i + self.chunkSize]
+
+    @property
+    def done(self):
+        '''
+        True when stream has completed or failed
+        '''
+        return self.complete or self.failed
+
+    def service(self):
+        '''
+        Retire acked chunk messages then send chunks until window is full
+        '''
+        if self.done:
+            return
+        while self.inflights:
+            messenger = self.inflights[0]
+            if messenger.completed:
+                self.inflights.popleft()
+                continue
+            if (self.remote.uid not in self.stack.remotes or
+                    self.remote.transactions.get(messenger.index) is not messenger):
+                self.fail()  # chunk timed out or rejected
+                return
+            break
+        while (self.sn == 0 or self.ahead is not None) and len(self.inflights) < self.window:
+            self.send()
+            if self.failed:
+                return
+        if not self.inflights and self.ahead is None:
+            self.complete = True
+            log.concise("Stream {0}. Complete {1} to {2} in {3} chunks\n",
+                    self.stack.name, self.sid, self.remote.name, self.sn)
+            self.stack.incStat('stream_tx_complete')
+
+    def send(self):
+        '''
+        Send next chunk as raw body message
+        '''
+        chunk = self.ahead if self.ahead is not None else b''
+        self.ahead = next(self.chunks, None)
+        header = odict(id=self.sid, sn=self.sn, end=self.ahead is None, wn=self.window)
+        if self.sn == 0:
+            header['meta'] = self.meta
+        data = odict(hk=self.stack.Hk,
+                     bk=BodyKind.raw.value,
+                     fk=self.stack.Fk,
+                     ck=self.stack.Ck,
+                     zk=self.remote.zk)
+        messenger = transacting.Messenger(stack=self.stack,
+                                          remote=self.remote,
+                                          timeout=self.timeout,
+                                          txData=data,
+                                          bcst=self.stack.Bf,
+                                          burst=self.stack.BurstSize)
+        messenger.message(packChunk(header, chunk))
+        if self.remote.transactions.get(messenger.index) is not messenger:
+            self.fail()  # not allowed or could not pack
+            return
+        self.inflights.append(messenger)
+        self.sn += 1
+        self.size += len(chunk)
+        self.stack.incStat('stream_tx_chunk')
+
+    def fail(self):
+        '''
+        Abandon stream
+        '''
+        self.failed = True
+        self.ahead = None
+        self.inflights.clear()
+        console.terse("Stream {0}. Failed {1} to {2} at chunk {3}\n".format(
+                self.stack.name, self.sid, self.remote.name, self.sn))
+        self.stack.incStat('stream_tx_failed')
+
+
+class RxStream(object):
+    '''
+    Incoming stream of chunk messages from a remote
+    Delivers chunks in order to stack .streamer callback or spool file
+    '''
+    Timeout = 60.0  # max seconds between chunks before stream is abandoned
+    Window = TxStream.Window  # chunks buffered ahead when header has no window
+    MaxWindow = 64  # max chunks buffered ahead whatever window is advertised
+
+    def __init__(self, stack, remote, sid, timeout=None):
+        '''
+        Setup instance
+
+        stack is RoadStack
+        remote is RemoteEstate source
+        sid is stream id assigned by source
+        timeout is max seconds between chunks
+        '''
+        self.stack = stack
+        self.remote = remote
+        self.sid = sid
+        self.meta = None
+        self.sn = 0  # next chunk sequence number to deliver
+        self.size = 0  # payload bytes delivered
+        self.pendings = odict()  # out of order (chunk, end) keyed by sn
+        self.spool = None  # spool file when no streamer callback
+        self.path = None
+        self.complete = False
+        self.failed = False
+        self.timer = StoreTimer(stack.store,
+                                duration=timeout if timeout is not None else self.Timeout)
+
+    @property
+    def done(self):
+        '''
+        True when stream has completed or failed
+        '''
+        return self.complete or self.failed
+
+    def receive(self, header, chunk):
+        '''
+        Accept chunk with header and deliver all in order chunks
+        Drops chunks at or beyond the advertised window past the next chunk
+        to deliver so out of order chunks buffered stay bounded
+        '''
+        self.timer.restart()
+        sn = header['sn']
+        if sn < self.sn or sn in self.pendings:
+            self.stack.incStat('stream_rx_duplicate')
+            return
+        window = header.get('wn')
+        if not isinstance(window, int) or window < 1:
+            window = self.Window
+        if sn >= self.sn + min(window, self.MaxWindow):
+            self.stack.incStat('stream_rx_overrun')
+            return
+        if sn == 0:
+            self.meta = header.get('meta')
+        self.pendings[sn] = (chunk, header.get('end', False))
+        while self.sn in self.pendings:
+            chunk, end = self.pendings.pop(self.sn)
+            self.deliver(chunk)
+            self.sn += 1
+            if end:
+                self.finish()
+                break
+
+    def deliver(self, chunk):
+        '''
+        Hand chunk to streamer callback or write it to spool file
+        '''
+        self.size += len(chunk)
+        self.stack.incStat('stream_rx_chunk')
+        if self.stack.streamer:
+            if chunk:
+                self.stack.streamer(self, chunk)
+            return
+        if self.spool is None:
+            dirpath = self.stack.spooldirpath
+            if dirpath and not os.path.exists(dirpath):
+                os.makedirs(dirpath)
+            self.spool = tempfile.NamedTemporaryFile(prefix='raet',
+                                                     suffix='.spool',
+                                                     dir=dirpath or None,
+                                                     delete=False)
+            self.path = self.spool.name
+        self.spool.write(chunk)
+
+    def finish(self):
+        '''
+        Close stream and notify application with message on stack .rxMsgs
+        '''
+        self.complete = True
+        if self.spool is not None:
+            self.spool.close()
+        if self.stack.streamer:
+            self.stack.streamer(self, None)
+        body = odict(stream=odict(id=self.sid,
+                                  meta=self.meta,
+                                  size=self.size,
+                                  path=self.path))
+        self.stack.rxMsgs.append((body, self.remote.name))
+        log.concise("Stream {0}. Complete {1} from {2} with {3} bytes\n",
+                self.stack.name, self.sid, self.remote.name, self.size)
+        self.stack.incStat('stream_rx_complete')
+
+    def fail(self):
+        '''
+        Abandon stream and remove partial spool file
+        '''
+        self.failed = True
+        self.pendings.clear()
+        if self.spool is not None:
+            self.spool.close()
+            os.remove(self.path)
+            self.path = None
+        if self.stack.streamer:
+            self.stack.streamer(self, None)
+        console.terse("Stream {0}. Abandoned {1} from {2} at chunk {3}\n".format(
+                self.stack.name, self.sid, self.remote.name, self.sn))
+        self.stack.incStat('stream_rx_timeout')
@@ -76,6 +76,55 @@ class BasicTestCase(unittest.TestCase):
 
         stack.server.close()
 
+    def testDoneSet(self):
+        '''
+        Test time bucketed set of done transaction ids
+        '''
+        console.terse("{0}\n".format(self.testDoneSet.__doc__))
+        dones = estating.DoneSet(timeout=10.0, buckets=5)
+        self.assertEqual(dones.span, 2.0)
+        self.assertEqual(len(dones), 0)
+        self.assertNotIn(1, dones)
+
+        dones.add(1, self.store.stamp)
+        dones.add(1, self.store.stamp)  # duplicate
+        dones.add(2, self.store.stamp)
+        self.assertEqual(len(dones), 2)
+        self.assertEqual(len(dones.buckets), 1)
+        self.assertIn(1, dones)
+        self.assertIn(2, dones)
+
+        self.store.advanceStamp(2.0)
+        dones.add(3, self.store.stamp)
+        self.assertEqual(len(dones.buckets), 2)
+
+        self.store.advanceStamp(9.0)
+        self.assertEqual(dones.expire(self.store.stamp), 0)  # not whole bucket
+        self.assertIn(1, dones)
+        self.store.advanceStamp(1.0)
+        self.assertEqual(dones.expire(self.store.stamp), 2)
+        self.assertNotIn(1, dones)
+        self.assertNotIn(2, dones)
+        self.assertIn(3, dones)
+        self.assertEqual(len(dones), 1)
+
+        self.store.advanceStamp(2.0)
+        self.assertEqual(dones.expire(self.store.stamp), 1)
+        self.assertEqual(len(dones), 0)
+        self.assertEqual(len(dones.buckets), 0)
+
+        dones = estating.DoneSet(timeout=10.0, buckets=5, maxSize=3)
+        for tid in range(1, 4):
+            self.assertEqual(dones.add(tid, self.store.stamp), 0)
+            self.store.advanceStamp(2.0)
+        self.assertEqual(dones.add(4, self.store.stamp), 1)  # oldest bucket dropped
+        self.assertEqual(len(dones), 3)
+        self.assertNotIn(1, dones)
+        self.assertIn(4, dones)
+        dones.clear()
+        self.assertEqual(len(dones), 0)
+        self.assertNotIn(4, dones)
+
 
 def runOneBasic(test):
     '''
@@ -90,6 +139,7 @@ def runSome():
     tests =  []
     names = [
                 'testNormalizeHost',
+                'testDoneSet',
             ]
     tests.extend(map(BasicTestCase, names))
 
@@ -2096,6 +2096,67 @@ class BasicTestCase(unittest.TestCase):
             stack.server.close()
             stack.clearAllKeeps()
 
+    def testRoleCache(self):
+        '''
+        Test remote role data cached in memory and refreshed on outside change
+        '''
+        console.terse("{0}\n".format(self.testRoleCache.__doc__))
+        dirpath = os.path.join(self.base, 'road', 'keep', 'main')
+        keep = keeping.RoadKeep(dirpath=dirpath, auto=raeting.AutoMode.never.value)
+        self.assertEqual(len(keep.roleCache), 0)
+
+        verhex = str(nacling.Signer().verhex.decode('ISO-8859-1'))
+        pubhex = str(nacling.Privateer().pubhex.decode('ISO-8859-1'))
+        status = keep.statusRole('other', verhex=verhex, pubhex=pubhex, dump=True)
+        self.assertEqual(status, raeting.Acceptance.pending.value)
+        self.assertIn('other', keep.roleCache)
+
+        # preload on startup
+        keep = keeping.RoadKeep(dirpath=dirpath, auto=raeting.AutoMode.never.value)
+        self.assertIn('other', keep.roleCache)
+        self.assertEqual(keep.roleCache['other'][0]['verhex'], verhex)
+
+        loads = []
+        load = keep.load
+        def countingLoad(filepath):
+            loads.append(filepath)
+            return load(filepath)
+        keep.load = countingLoad
+
+        status = keep.statusRole('other', verhex=verhex, pubhex=pubhex, dump=True)
+        self.assertEqual(status, raeting.Acceptance.pending.value)
+        data = keep.loadRemoteRoleData('other')
+        self.assertEqual(data['acceptance'], raeting.Acceptance.pending.value)
+        data['acceptance'] = raeting.Acceptance.rejected.value  # copy not cache
+        self.assertEqual(len(loads), 0)
+
+        # operator accepts by editing role file outside of this keep
+        other = keeping.RoadKeep(dirpath=dirpath, auto=raeting.AutoMode.never.value)
+        data = other.loadRemoteRoleData('other')
+        data['acceptance'] = raeting.Acceptance.accepted.value
+        data['comment'] = 'changes file size so change detected within mtime resolution'
+        other.dump(data, other.remoteRolePath('other'))
+
+        status = keep.statusRole('other', verhex=verhex, pubhex=pubhex, dump=True)
+        self.assertEqual(status, raeting.Acceptance.accepted.value)
+        self.assertEqual(len(loads), 1)
+        status = keep.statusRole('other', verhex=verhex, pubhex=pubhex, dump=True)
+        self.assertEqual(len(loads), 1)
+
+        # missing role file is cached too
+        data = keep.loadRemoteRoleData('nobody')
+        self.assertEqual(data['acceptance'], None)
+        self.assertEqual(data['role'], 'nobody')
+        keep.loadRemoteRoleData('nobody')
+        self.assertEqual(len(loads), 1)
+
+        keep.clearRemoteRoleData('other')
+        self.assertNotIn('other', keep.roleCache)
+        data = keep.loadRemoteRoleData('other')
+        self.assertEqual(data['acceptance'], None)
+        keep.clearAllRemoteRoleData()
+        self.assertEqual(len(keep.roleCache), 0)
+
 def runOne(test):
     '''
     Unittest Runner
@@ -2120,7 +2181,8 @@ def runSome():
              'testLostOtherKeepLocal',
              'testLostMainKeep',
              'testLostMainKeepLocal',
-             'testLostBothKeepLocal',]
+             'testLostBothKeepLocal',
+             'testRoleCache',]
 
     tests.extend(map(BasicTestCase, names))
 
@@ -16,6 +16,10 @@ import sys
 import time
 import tempfile
 import shutil
+try:
+    import simplejson as json
+except ImportError:
+    import json
 
 from ioflo.aid.odicting import odict
 from ioflo.aid.timing import Timer, StoreTimer
@@ -107,7 +111,8 @@ class BasicTestCase(unittest.TestCase):
                                             'ck': 0,
                                             'fk': 0,
                                             'fl': 0,
-                                            'fg': '00'})
+                                            'fg': '00',
+                                            'zk': 0})
         self.assertDictEqual(packet1.body.data, body)
 
     def testBasicMsgpack(self):
@@ -162,7 +167,8 @@ class BasicTestCase(unittest.TestCase):
                                             'ck': 0,
                                             'fk': 0,
                                             'fl': 0,
-                                            'fg': '00'})
+                                            'fg': '00',
+                                            'zk': 0})
         self.assertDictEqual(packet1.body.data, body)
 
     def testBasicRaetJson(self):
@@ -217,7 +223,8 @@ class BasicTestCase(unittest.TestCase):
                                             'ck': 0,
                                             'fk': 0,
                                             'fl': 0,
-                                            'fg': '00'})
+                                            'fg': '00',
+                                            'zk': 0})
         self.assertDictEqual(packet1.body.data, body)
 
     def testBasicRaetMsgpack(self):
@@ -272,7 +279,8 @@ class BasicTestCase(unittest.TestCase):
                                             'ck': 0,
                                             'fk': 0,
                                             'fl': 0,
-                                            'fg': '00'})
+                                            'fg': '00',
+                                            'zk': 0})
         self.assertDictEqual(packet1.body.data, body)
 
     def testBasicRaetRaw(self):
@@ -326,7 +334,8 @@ class BasicTestCase(unittest.TestCase):
                                             'ck': 0,
                                             'fk': 0,
                                             'fl': 0,
-                                            'fg': '00'})
+                                            'fg': '00',
+                                            'zk': 0})
         self.assertEqual(packet1.body.data, body)
 
     def testSegmentation(self):
@@ -390,9 +399,66 @@ class BasicTestCase(unittest.TestCase):
                                            'ck': 0,
                                            'fk': 0,
                                            'fl': 0,
-                                           'fg': '08'})
+                                           'fg': '08',
+                                           'zk': 0})
         self.assertEquals( tray1.body, stuff)
 
+    def testZip(self):
+        '''
+        Test compressed message body pack unpack single and segmented
+        '''
+        console.terse("{0}\n".format(self.testZip.__doc__))
+        hk = raeting.HeadKind.raet.value
+        bk = raeting.BodyKind.json.value
+        zk = raeting.ZipKind.zlib.value
+
+        data = odict(hk=hk, bk=bk, zk=zk)
+        body = odict(msg='Hello Raet World')  # below threshold so not compressed
+        packet0 = packeting.TxPacket(embody=body, data=data, )
+        packet0.pack()
+        self.assertEqual(packet0.data['zk'], 0)
+        self.assertNotIn(b'\nzk ', packet0.packed)
+
+        body = odict([('state{0}'.format(i), odict(result=True, comment='Already set'))
+                      for i in range(100)])
+        plain = len(ns2b(json.dumps(body, separators=(',', ':'))))
+        self.assertTrue(plain > raeting.UDP_MAX_PACKET_SIZE)
+        tray0 = packeting.TxTray(data=data, body=body)
+        tray0.pack()
+        self.assertEqual(tray0.data['zk'], zk)
+        self.assertEqual(len(tray0.packets), 1)  # compressed fits in one packet
+        self.assertIn(b'\nzk 1', tray0.packets[0].packed)
+        packet1 = packeting.RxPacket(packed=tray0.packets[0].packed)
+        packet1.parse()
+        self.assertEqual(packet1.data['zk'], zk)
+        self.assertEqual(packet1.body.data, body)
+
+        body = odict([('state{0}'.format(i), ns2u(str(i * 7919) * 4)) for i in range(1000)])
+        tray0 = packeting.TxTray(data=data, body=body)
+        tray0.pack()
+        plain = len(ns2b(json.dumps(body, separators=(',', ':'))))
+        self.assertTrue(1 < len(tray0.packets) < plain // raeting.UDP_MAX_PACKET_SIZE)
+        tray1 = packeting.RxTray()
+        for packet in tray0.packets:
+            packet1 = packeting.RxPacket(packed=packet.packed)
+            packet1.parseOuter()
+            tray1.parse(packet1)
+        self.assertTrue(tray1.complete)
+        self.assertEqual(tray1.data['zk'], zk)
+        self.assertEqual(tray1.body, body)
+
+        data = odict(hk=hk, bk=raeting.BodyKind.raw.value, zk=zk)  # incompressible
+        tray0 = packeting.TxTray(data=data, body=os.urandom(2000))
+        tray0.pack()
+        self.assertEqual(tray0.data['zk'], 0)
+        self.assertEqual(len(tray0.packets), 3)
+
+        packet1 = packeting.RxPacket(packed=packet0.packed)
+        packet1.parse()
+        packet1.data['zk'] = zk  # claims compressed but is not
+        packet1.body.packed = ns2b('not compressed')
+        self.assertRaises(raeting.PacketError, packet1.body.parse)
+
 class StackTestCase(unittest.TestCase):
     '''
     Pack and Parse with stacks
@@ -538,7 +604,8 @@ class StackTestCase(unittest.TestCase):
                                           'ck': 0,
                                           'fk': 1,
                                           'fl': 64,
-                                          'fg': '08'})
+                                          'fg': '08',
+                                          'zk': 0})
         self.assertEqual( tray1.body, self.stuff)
 
         # Json body
@@ -591,7 +658,8 @@ class StackTestCase(unittest.TestCase):
                                           'ck': 0,
                                           'fk': 1,
                                           'fl': 64,
-                                          'fg': '08'})
+                                          'fg': '08',
+                                          'zk': 0})
 
         self.assertEqual( tray1.body, body)
 
@@ -656,7 +724,8 @@ class StackTestCase(unittest.TestCase):
                                           'ck': 1,
                                           'fk': 1,
                                           'fl': 64,
-                                          'fg': '08'})
+                                          'fg': '08',
+                                          'zk': 0})
 
         self.assertEqual( tray1.body, body)
 
@@ -685,7 +754,8 @@ def runSome():
              'testBasicRaetJson',
              'testBasicRaetMsgpack',
              'testBasicRaetRaw',
-             'testSegmentation']
+             'testSegmentation',
+             'testZip']
     tests.extend(map(BasicTestCase, names))
 
     names = ['testSign',
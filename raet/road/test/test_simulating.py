@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for simulated lossy network
+
+'''
+from __future__ import print_function
+# pylint: skip-file
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import errno
+import socket
+import tempfile
+import shutil
+
+from ioflo.aid.odicting import odict
+from ioflo.aid.timing import StoreTimer
+from ioflo.base.storing import Store
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import raeting, nacling
+from raet.road import keeping, estating, stacking, simulating
+
+if sys.platform == 'win32':
+    TEMPDIR = 'c:/temp'
+    if not os.path.exists(TEMPDIR):
+        os.mkdir(TEMPDIR)
+else:
+    TEMPDIR = '/tmp'
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.store = Store(stamp=0.0)
+        self.timer = StoreTimer(store=self.store, duration=1.0)
+        self.baseDirpath = tempfile.mkdtemp(prefix="raet",  suffix="base", dir=TEMPDIR)
+        self.stacks = []
+
+    def tearDown(self):
+        for stack in self.stacks:
+            stack.server.close()
+            stack.clearAllDir()
+        if os.path.exists(self.baseDirpath):
+            shutil.rmtree(self.baseDirpath)
+
+    def createStack(self, name, network, ha, main=None):
+        '''
+        Utility method to create road stack on network
+        '''
+        dirpath = os.path.join(self.baseDirpath, 'road', 'keep', name)
+        keeping.clearAllKeep(dirpath)
+        stack = stacking.RoadStack(store=self.store,
+                                   name=name,
+                                   main=main,
+                                   auto=raeting.AutoMode.once.value,
+                                   ha=ha,
+                                   sigkey=nacling.Signer().keyhex,
+                                   prikey=nacling.Privateer().keyhex,
+                                   dirpath=dirpath,
+                                   network=network)
+        self.stacks.append(stack)
+        return stack
+
+    def service(self, stacks, duration=1.0, step=0.01):
+        '''
+        Utility method to service stacks until no transactions remain
+        '''
+        self.timer.restart(duration=duration)
+        while not self.timer.expired:
+            for stack in stacks:
+                stack.serviceAll()
+            if not any(stack.transactions for stack in stacks):
+                break
+            self.store.advanceStamp(step)
+
+    def bootstrap(self, network):
+        '''
+        Utility method to join and allow other with main on network
+        '''
+        main = self.createStack('main', network, ("", raeting.RAET_PORT), main=True)
+        other = self.createStack('other', network, ("", raeting.RAET_TEST_PORT))
+        other.addRemote(estating.RemoteEstate(stack=other,
+                                              fuid=0, # vacuous join
+                                              sid=0, # always 0 for join
+                                              ha=main.local.ha))
+        other.join()
+        self.service([main, other], duration=10.0)
+        other.allow()
+        self.service([main, other], duration=10.0)
+        self.assertTrue(other.remotes.values()[0].allowed)
+        self.assertTrue(main.remotes.values()[0].allowed)
+        return (main, other)
+
+    def testDelivery(self):
+        '''
+        Test datagrams arrive after latency from the sender address
+        '''
+        console.terse("{0}\n".format(self.testDelivery.__doc__))
+        network = simulating.Network(store=self.store, latency=0.1)
+        alpha = network.server(ha=("", 7530), bufsize=1024)
+        beta = network.server(ha=("0.0.0.0", 0), bufsize=1024)
+        self.assertTrue(alpha.reopen())
+        self.assertTrue(beta.reopen())
+        self.assertEqual(alpha.ha, ("127.0.0.1", 7530))
+        self.assertEqual(beta.ha, ("127.0.0.1", network.Ports))
+        self.assertFalse(network.server(ha=("127.0.0.1", 7530)).open())
+
+        self.assertEqual(alpha.send(b"hello", ("", beta.ha[1])), 5)
+        self.assertEqual(beta.receive(), (b'', None))
+        self.assertAlmostEqual(network.nextDeadline(), 0.1)
+        self.store.advanceStamp(0.1)
+        self.assertEqual(beta.receive(), (b"hello", alpha.ha))
+        self.assertIs(network.nextDeadline(), None)
+
+        beta.close()
+        alpha.send(b"gone", beta.ha)
+        self.store.advanceStamp(0.1)
+        network.service()
+        self.assertEqual(network.stats['datagram_unreachable'], 1)
+        alpha.close()
+
+    def testImpairments(self):
+        '''
+        Test seeded loss, duplication and reordering are reproducible
+        '''
+        console.terse("{0}\n".format(self.testImpairments.__doc__))
+
+        def run(**kwa):
+            network = simulating.Network(store=Store(stamp=0.0), **kwa)
+            alpha = network.server(ha=("", 7530), bufsize=100000)
+            beta = network.server(ha=("", 7531), bufsize=100000)
+            alpha.reopen()
+            beta.reopen()
+            for i in range(100):
+                alpha.send(str(i).encode(), beta.ha)
+            network.store.advanceStamp(1.0)
+            received = []
+            while True:
+                data, sa = beta.receive()
+                if not data:
+                    break
+                received.append(int(data))
+            return (received, network.stats)
+
+        received, stats = run(loss=0.2, seed=1)
+        self.assertEqual(run(loss=0.2, seed=1), (received, stats))
+        self.assertNotEqual(run(loss=0.2, seed=2)[0], received)
+        self.assertEqual(len(received), 100 - stats['datagram_lost'])
+        self.assertTrue(0 < stats['datagram_lost'] < 50)
+
+        received, stats = run(duplicate=1.0)
+        self.assertEqual(received, [i for i in range(100) for copy in range(2)])
+        self.assertEqual(stats['datagram_duplicated'], 100)
+
+        received, stats = run(latency=0.1, reorder=0.25, seed=3)
+        self.assertEqual(sorted(received), list(range(100)))
+        self.assertNotEqual(received, list(range(100)))
+        self.assertEqual(received[:stats['datagram_reordered']],
+                         sorted(received[:stats['datagram_reordered']]))
+
+    def testBandwidth(self):
+        '''
+        Test bandwidth spaces arrivals and full send buffer raises EAGAIN
+        '''
+        console.terse("{0}\n".format(self.testBandwidth.__doc__))
+        network = simulating.Network(store=self.store, bandwidth=1000.0)
+        alpha = network.server(ha=("", 7530), bufsize=2000)
+        beta = network.server(ha=("", 7531), bufsize=2000)
+        alpha.reopen()
+        beta.reopen()
+        data = b'x' * 1000
+        alpha.send(data, beta.ha)
+        alpha.send(data, beta.ha)
+        with self.assertRaises(socket.error) as cm:
+            alpha.send(data, beta.ha)
+        self.assertEqual(cm.exception.errno, errno.EAGAIN)
+        self.assertEqual(network.stats['datagram_busy'], 1)
+
+        self.store.advanceStamp(1.0)
+        self.assertEqual(beta.receive()[0], data)
+        self.assertEqual(beta.receive(), (b'', None))
+        self.assertAlmostEqual(network.nextDeadline(), 1.0)
+        self.store.advanceStamp(1.0)
+        self.assertEqual(beta.receive()[0], data)
+        alpha.send(data, beta.ha)  # link free again
+        alpha.close()
+        beta.close()
+
+    def testLossyMessaging(self):
+        '''
+        Test road stacks join, allow and message over lossy simulated network
+        '''
+        console.terse("{0}\n".format(self.testLossyMessaging.__doc__))
+        network = simulating.Network(store=self.store,
+                                     latency=0.02,
+                                     jitter=0.01,
+                                     bandwidth=1e6,
+                                     seed=7)
+        main, other = self.bootstrap(network)
+        network.loss = 0.05  # impair after join so it needs no rejoin
+        network.duplicate = 0.05
+        network.reorder = 0.05
+        self.assertIs(main.server.network, network)
+        self.assertIsNone(main.server.ss)
+
+        bodies = [odict(index=i, bloat=str(i).rjust(10000, " ")) for i in range(5)]
+        for body in bodies:
+            other.transmit(body)
+        self.service([main, other], duration=60.0)
+        received = []
+        while main.rxMsgs:
+            received.append(main.rxMsgs.popleft()[0])
+        self.assertEqual(sorted(received, key=lambda body: body['index']), bodies)
+        self.assertTrue(network.stats['datagram_lost'] > 0)
+        self.assertEqual(network.stats['datagram_tx'],
+                         network.stats['datagram_rx'] +
+                         network.stats['datagram_lost'] -
+                         network.stats.get('datagram_duplicated', 0) +
+                         network.stats.get('datagram_unreachable', 0) +
+                         network.stats.get('datagram_overflow', 0) +
+                         len(network.flights))
+
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = [
+             'testDelivery',
+             'testImpairments',
+             'testBandwidth',
+             'testLossyMessaging',
+            ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    #runAll() #run all unittests
+
+    runSome()#only run some
+
+    #runOne('testLossyMessaging')
@@ -26,8 +26,8 @@ console = getConsole()
 
 # Import raet libs
 from raet.abiding import *  # import globals
-from raet import raeting, nacling
-from raet.road import keeping, estating, stacking, transacting
+from raet import raeting, nacling, serializing, tracing
+from raet.road import keeping, estating, stacking, transacting, packeting, streaming
 
 if sys.platform == 'win32':
     TEMPDIR = 'c:/temp'
@@ -750,6 +750,688 @@ class BasicTestCase(unittest.TestCase):
         remote = self.other.remotes.values()[0]
         self.assertTrue(remote.alived)
 
+    def testPrivateerPool(self):
+        '''
+        Test allow rekeys from precomputed short term key pair pool
+        '''
+        console.terse("{0}\n".format(self.testPrivateerPool.__doc__))
+        self.assertIs(self.main.privateers, None)
+        self.main.privateers = nacling.PrivateerPool(size=2)
+        self.main.privateers.worker.join()
+        pooled = [privateer.keyhex for privateer in self.main.privateers.privateers]
+
+        self.join()
+        remote = self.main.remotes.values()[0]
+        self.assertTrue(remote.joined)
+        self.assertIn(remote.privee.keyhex, pooled)  # new remote draws from pool
+
+        self.main.privateers.worker.join()
+        pooled = [privateer.keyhex for privateer in self.main.privateers.privateers]
+        self.allow()
+        self.assertTrue(remote.allowed)
+        self.assertIn(remote.privee.keyhex, pooled)  # rekey draws from pool
+        self.assertEqual(self.main.privateers.hits, 2)
+        self.assertNotIn('privateer_pool_empty', self.main.stats)
+
+        self.main.privateers.worker.join()
+        self.main.privateers.privateers.clear()
+        self.main.privateers.size = 0  # exhausted pool falls back to inline
+        self.allow()
+        self.assertTrue(remote.allowed)
+        self.assertEqual(self.main.stats['privateer_pool_empty'], 1)
+
+    def testAllowResume(self):
+        '''
+        Test allow resumption with ticket from prior allow
+        '''
+        console.terse("{0}\n".format(self.testAllowResume.__doc__))
+        self.main.ticketLife = 60.0
+
+        self.join()
+        self.allow()
+        otherRemote = self.main.remotes.values()[0]
+        mainRemote = self.other.remotes.values()[0]
+        self.assertTrue(otherRemote.allowed)
+        self.assertTrue(mainRemote.allowed)
+        self.assertEqual(self.main.stats['ticket_issued'], 1)
+        self.assertIsNotNone(mainRemote.ticket)
+        self.assertIsNone(otherRemote.ticket)
+        self.assertNotIn('allow_resume', self.other.stats)
+        ticket = mainRemote.ticket
+
+        console.terse("\nResume Allow *********\n")
+        self.allow()
+        self.assertEqual(len(self.main.transactions), 0)
+        self.assertEqual(len(self.other.transactions), 0)
+        self.assertTrue(otherRemote.allowed)
+        self.assertTrue(mainRemote.allowed)
+        self.assertEqual(self.other.stats['allow_resume'], 1)
+        self.assertEqual(self.main.stats['allow_resume'], 1)
+        self.assertNotIn('redo_hello', self.other.stats)
+        self.assertEqual(self.main.stats['ticket_issued'], 2)
+        self.assertEqual(mainRemote.publee.keyraw, otherRemote.privee.pubraw)
+        self.assertEqual(otherRemote.publee.keyraw, mainRemote.privee.pubraw)
+        self.assertIsNotNone(mainRemote.ticket)
+        self.assertNotEqual(mainRemote.ticket, ticket)
+
+        console.terse("\nRedeemed Ticket Survives Restart *********\n")
+        self.assertEqual(len(self.main.redeemeds), 1)
+        keep = self.main.keep
+        self.assertTrue(os.path.exists(keep.ticketlogpath))  # appended not dumped
+        self.assertFalse(os.path.exists(keep.ticketpath))
+        restarted = stacking.RoadStack(store=self.store,
+                                       name='restarted',
+                                       main=True,
+                                       ha=("", raeting.RAET_TEST_PORT + 10),
+                                       dirpath=self.main.keep.dirpath)
+        self.assertEqual(restarted.local.priver.keyraw, self.main.local.priver.keyraw)
+        self.assertEqual(restarted.redeemeds, self.main.redeemeds)
+        with self.assertRaises(raeting.TransactionError) as cm:
+            restarted.redeemTicket(ticket[0], otherRemote)
+        self.assertIn("Replayed resumption ticket", str(cm.exception))
+
+        console.terse("\nTicket Log Compacted After Expiry *********\n")
+        self.assertEqual(restarted.redeemedLogs, 1)
+        restarted.redeemeds.popitem()  # as if forgotten on expiry
+        tid = b'\x00' * nacling.Sealer.NONCE_SIZE
+        expire = time.time() + 60.0
+        restarted.redeemeds[tid] = expire
+        restarted.logRedeemed(tid, expire)
+        self.assertEqual(restarted.redeemedLogs, 0)
+        self.assertFalse(os.path.exists(keep.ticketlogpath))
+        self.assertEqual(keep.loadTicketData(), {'00' * nacling.Sealer.NONCE_SIZE: expire})
+        restarted.server.close()
+
+        self.other.transmit(odict(content="Resumed other to main"))
+        self.main.transmit(odict(content="Resumed main to other"))
+        self.service()
+        self.assertEqual(len(self.main.rxMsgs), 1)
+        self.assertEqual(len(self.other.rxMsgs), 1)
+
+        console.terse("\nReplay Ticket Falls Back To Full Allow *********\n")
+        mainRemote.ticket = ticket
+        self.allow()
+        self.assertTrue(otherRemote.allowed)
+        self.assertTrue(mainRemote.allowed)
+        self.assertEqual(self.main.stats['invalid_resume'], 1)
+        self.assertEqual(self.other.stats['allow_resume_fallback'], 1)
+        self.assertEqual(self.other.stats['allow_resume'], 1)
+        self.assertEqual(mainRemote.publee.keyraw, otherRemote.privee.pubraw)
+        self.assertEqual(otherRemote.publee.keyraw, mainRemote.privee.pubraw)
+
+        console.terse("\nExpired Ticket Not Used *********\n")
+        mainRemote.ticketExpire = 0.0
+        self.allow()
+        self.assertTrue(mainRemote.allowed)
+        self.assertEqual(self.other.stats['allow_resume'], 1)
+        self.assertEqual(self.other.stats['allow_resume_fallback'], 1)
+
+        console.terse("\nResumption Disabled Falls Back To Full Allow *********\n")
+        self.main.ticketLife = 0.0
+        self.assertIsNotNone(mainRemote.ticket)
+        self.allow()
+        self.assertTrue(otherRemote.allowed)
+        self.assertTrue(mainRemote.allowed)
+        self.assertEqual(self.other.stats['allow_resume_fallback'], 2)
+        self.assertIsNone(mainRemote.ticket)
+
+    def testJoinAdmission(self):
+        '''
+        Test join admission control queues excess joins with pend hint
+        '''
+        console.terse("{0}\n".format(self.testJoinAdmission.__doc__))
+        self.main.admitLimit = 1
+
+        dirpath = os.path.join(self.baseDirpath, 'road', 'keep', 'third')
+        third = stacking.RoadStack(store=self.store,
+                                   name='third',
+                                   auto=raeting.AutoMode.once.value,
+                                   ha=("", 7532),
+                                   dirpath=dirpath)
+        stacks = [self.main, self.other, third]
+        for stack in [self.other, third]:
+            stack.addRemote(estating.RemoteEstate(stack=stack,
+                                                  fuid=0, # vacuous join
+                                                  sid=0, # always 0 for join
+                                                  ha=self.main.local.ha))
+            stack.join()
+
+        self.timer.restart(duration=3.0)
+        while not self.timer.expired:
+            for stack in stacks:
+                stack.serviceAll()
+            if not any(stack.transactions for stack in stacks):
+                break
+            self.store.advanceStamp(0.1)
+            time.sleep(0.1)
+
+        self.assertEqual(self.main.stats['admission_queued'], 1)
+        self.assertEqual(self.main.stats['admission_queue_depth'], 0)
+        self.assertEqual(len(self.main.admissions), 0)
+        self.assertEqual(len(self.main.remotes), 2)
+        for remote in self.main.remotes.values():
+            self.assertTrue(remote.joined)
+        pends = sum(stack.stats.get('joiner_rx_pend', 0) for stack in [self.other, third])
+        self.assertEqual(pends, 1)
+        for stack in [self.other, third]:
+            self.assertEqual(len(stack.transactions), 0)
+            self.assertTrue(stack.remotes.values()[0].joined)
+
+        third.server.close()
+        third.clearAllDir()
+
+    def testTxesPassLimit(self):
+        '''
+        Test fair queued txes with bytes per pass limit and depth stats
+        '''
+        console.terse("{0}\n".format(self.testTxesPassLimit.__doc__))
+        self.join()
+        self.allow()
+        remote = self.main.remotes.values()[0]
+
+        self.main.txPassLimit = 2048
+        stuff = ''.join(str(i % 10) for i in range(16384))
+        self.main.transmit(odict(stuff=stuff), remote.uid)
+        self.main.serviceTxMsgs()
+        queued = len(self.main.txes)
+        self.assertTrue(queued > 3)
+        self.assertEqual(self.main.txes.depths(), {remote.ha: queued})
+
+        self.main.serviceTxes()
+        self.assertEqual(self.main.stats['txes_pass_limited'], 1)
+        self.assertTrue(0 < len(self.main.txes) < queued)
+        self.assertEqual(self.main.stats['txes_depths'],
+                         {remote.ha: len(self.main.txes)})
+        self.assertEqual(self.main.stats['txes_depth_max'], len(self.main.txes))
+
+        self.service(duration=5.0)
+        while self.main.txes:  # flush trailing packets past last transaction
+            self.main.serviceTxes()
+        self.assertEqual(len(self.main.txes), 0)
+        self.assertEqual(self.main.stats['txes_depths'], {})
+        self.assertEqual(self.main.stats['txes_depth_max'], 0)
+        self.assertEqual(len(self.other.rxMsgs), 1)
+        msg, name = self.other.rxMsgs.popleft()
+        self.assertEqual(msg['stuff'], stuff)
+
+    def testTrafficPriority(self):
+        '''
+        Test control transactions bypass queued bulk message segments
+        '''
+        console.terse("{0}\n".format(self.testTrafficPriority.__doc__))
+        self.join()
+        self.allow()
+        remote = self.main.remotes.values()[0]
+
+        stuff = ''.join(str(i % 10) for i in range(16384))
+        self.main.transmit(odict(stuff=stuff), remote.uid)
+        self.main.transmit(odict(stuff='small'), remote.uid)
+        self.main.serviceTxMsgs()
+        self.assertEqual(self.main.txes.classDepths()['control'], 0)
+        self.assertEqual(self.main.txes.classDepths()['interactive'], 1)
+        self.assertTrue(self.main.txes.classDepths()['bulk'] > 1)
+        self.main.alive(uid=remote.uid)
+        self.assertEqual(self.main.txes.classDepths()['control'], 1)
+
+        packed, ha = self.main.txes.popleft()
+        packet = packeting.RxPacket(stack=self.other, packed=packed)
+        packet.parseOuter()
+        self.assertEqual(packet.data['tk'], raeting.TrnsKind.alive)
+        self.assertIs(self.other.rxPriority(packet), raeting.Priority.control)
+        self.main.txes.appendleft((packed, ha), self.main.txes.current)
+
+        self.service(duration=5.0)
+        self.assertEqual(len(self.other.rxMsgs), 2)
+        msgs = [msg['stuff'] for msg, name in self.other.rxMsgs]
+        self.assertIn(stuff, msgs)
+        self.assertIn('small', msgs)
+        for name in ['control', 'interactive', 'bulk']:
+            self.assertIn('tx_latency_{0}'.format(name), self.main.stats)
+            self.assertIn('tx_latency_{0}_max'.format(name), self.main.stats)
+            self.assertIn('rx_latency_{0}'.format(name), self.other.stats)
+        self.assertTrue(remote.alived)
+
+    def testRxArrivalOrder(self):
+        '''
+        Test received control packets do not overtake earlier message packets
+        from the same remote and rx latency counts time queued on rxes
+        '''
+        console.terse("{0}\n".format(self.testRxArrivalOrder.__doc__))
+        self.join()
+        self.allow()
+        remote = self.main.remotes.values()[0]
+        ha = self.other.remotes.values()[0].ha
+
+        stuff = ''.join(str(i % 10) for i in range(16384))
+        self.main.transmit(odict(stuff=stuff), remote.uid)
+        self.main.serviceTxMsgs()
+        raws = [packed for packed, da in self.main.txes]
+        self.main.txes.clear()
+        self.main.alive(uid=remote.uid)
+        raws.extend(packed for packed, da in self.main.txes)  # alive after message
+        self.main.txes.clear()
+
+        kinds = []
+        dispatchRx = self.other.dispatchRx
+        def dispatching(packet):
+            kinds.append(packet.data['tk'])
+            dispatchRx(packet)
+        self.other.dispatchRx = dispatching
+        controls = self.other.rxLatencies['control'][0]
+        received = time.time() - 1.0
+        for raw in raws:
+            self.other.rxes.append((raw, ha))
+            self.other.rxStamps.append(received)
+        self.other.serviceRxes()
+        self.assertEqual(kinds[-1], raeting.TrnsKind.alive)
+        self.assertEqual(set(kinds[:-1]), set([raeting.TrnsKind.message]))
+        self.assertEqual(len(self.other.rxStamps), 0)
+        self.assertTrue(self.other.stats['rx_latency_bulk_max'] >= 1.0)
+        self.assertTrue(self.other.stats['rx_latency_bulk'] >= 1.0)
+        self.assertEqual(self.other.rxLatencies['control'][0], controls)  # alive demoted
+
+        self.service(duration=5.0)
+        self.assertEqual(len(self.other.rxMsgs), 1)
+        self.assertTrue(remote.alived)
+
+    def testBackpressure(self):
+        '''
+        Test txMsgs rxMsgs and message bytes water marks defer and resume
+        '''
+        console.terse("{0}\n".format(self.testBackpressure.__doc__))
+        pressures = []
+        self.main.pressure = lambda key, deferring: pressures.append((key, deferring))
+        self.main.txMsgsHigh = 2
+        self.main.txMsgsLow = 0
+        self.other.rxMsgsHigh = 1
+        self.other.rxMsgsLow = 0
+
+        self.join()
+        self.allow()
+        remote = self.main.remotes.values()[0]
+
+        self.assertIs(self.main.transmit(odict(stuff='one'), remote.uid), True)
+        self.assertIs(self.main.transmit(odict(stuff='two'), remote.uid), True)
+        self.assertIs(self.main.transmit(odict(stuff='three'), remote.uid), False)
+        self.assertEqual(self.main.stats['tx_msgs_deferred'], 1)
+        self.assertEqual(self.main.stats['tx_msgs_pressured'], 1)
+        self.assertEqual(pressures, [('tx_msgs', True)])
+        self.assertEqual(len(self.main.txMsgs), 2)
+
+        self.service()  # other rxMsgs fills at one so second message waits
+        self.assertEqual(pressures, [('tx_msgs', True), ('tx_msgs', False)])
+        self.assertEqual(self.main.stats['tx_msgs_depth'], 0)
+        self.assertEqual(len(self.other.rxMsgs), 1)
+        self.assertTrue(self.other.stats['rx_msgs_deferred'] >= 1)
+        self.assertEqual(len(self.main.transactions), 1)
+
+        self.other.rxMsgs.popleft()  # consumer catches up
+        self.service(duration=3.0)
+        self.assertEqual(len(self.other.rxMsgs), 1)
+        self.assertEqual(len(self.main.transactions), 0)
+        self.assertEqual(self.other.rxMsgs[0][0]['stuff'], 'two')
+
+        self.main.msgBytesHigh = 1024
+        self.main.msgBytesLow = 0
+        stuff = ''.join(str(i % 10) for i in range(4096))
+        self.assertIs(self.main.transmit(odict(stuff=stuff), remote.uid), True)
+        self.main.serviceTxMsgs()
+        self.assertTrue(remote.messageBytes() > 4096)
+        self.assertEqual(self.main.stats['msg_bytes'], {remote.name: remote.messageBytes()})
+        self.assertIs(self.main.transmit(odict(stuff='small'), remote.uid), False)
+        self.assertEqual(self.main.stats['msg_bytes_deferred'], 1)
+        self.assertEqual(pressures[-1], ('msg_bytes_{0}'.format(remote.name), True))
+        self.assertFalse(self.main.txMsgsDeferring())
+        self.assertTrue(self.main.transmitDeferring(remote.uid))
+        self.assertTrue(self.main.transmitDeferring())
+
+        self.other.rxMsgs.clear()
+        self.service(duration=3.0)
+        self.assertEqual(remote.messageBytes(), 0)
+        self.main.updatePressures()
+        self.assertEqual(pressures[-1], ('msg_bytes_{0}'.format(remote.name), False))
+        self.assertFalse(self.main.transmitDeferring(remote.uid))
+        self.assertIs(self.main.transmit(odict(stuff='small'), remote.uid), True)
+
+    def testStreamSpool(self):
+        '''
+        Test stream from file object is spooled to file in order with bounded window
+        '''
+        console.terse("{0}\n".format(self.testStreamSpool.__doc__))
+        self.other.spooldirpath = os.path.join(self.baseDirpath, 'spool')
+        self.join()
+        self.allow()
+        remote = self.main.remotes.values()[0]
+
+        payload = os.urandom(100000)
+        source = tempfile.TemporaryFile(dir=self.baseDirpath)
+        source.write(payload)
+        source.seek(0)
+        stream = self.main.stream(source, remote.uid, meta=odict(name='payload.bin'),
+                                  chunkSize=8192, window=3)
+        self.assertEqual(len(stream.inflights), 3)
+        self.assertEqual(len(self.main.transactions), 3)
+        self.assertIn(stream.sid, self.main.txStreams)
+
+        while not stream.done:
+            self.service(real=False)
+            self.assertTrue(len(stream.inflights) <= 3)
+            self.assertTrue(len(self.main.transactions) <= 3)
+        self.assertTrue(stream.complete)
+        self.assertEqual(stream.sn, 13)
+        self.assertEqual(stream.size, len(payload))
+        self.assertEqual(self.main.txStreams, odict())
+        self.assertEqual(self.main.stats['stream_tx_chunk'], 13)
+        self.assertEqual(self.main.stats['stream_tx_complete'], 1)
+        source.close()
+
+        self.service(real=False)
+        self.assertEqual(self.other.rxStreams, odict())
+        self.assertEqual(len(self.other.rxMsgs), 1)
+        msg, name = self.other.rxMsgs.popleft()
+        self.assertEqual(name, self.main.name)
+        self.assertEqual(msg['stream']['id'], stream.sid)
+        self.assertEqual(msg['stream']['meta'], {'name': 'payload.bin'})
+        self.assertEqual(msg['stream']['size'], len(payload))
+        path = msg['stream']['path']
+        self.assertTrue(path.startswith(self.other.spooldirpath))
+        with open(path, 'rb') as spool:
+            self.assertEqual(spool.read(), payload)
+        self.assertEqual(self.other.stats['stream_rx_chunk'], 13)
+        self.assertEqual(self.other.stats['stream_rx_complete'], 1)
+
+    def testStreamWindow(self):
+        '''
+        Test incoming stream drops chunks beyond the advertised window
+        '''
+        console.terse("{0}\n".format(self.testStreamWindow.__doc__))
+        self.join()
+        remote = self.other.remotes.values()[0]
+        stream = streaming.RxStream(stack=self.other, remote=remote, sid=1)
+
+        stream.receive(odict(id=1, sn=3, wn=4), b'd')
+        self.assertNotIn('stream_rx_overrun', self.other.stats)
+        stream.receive(odict(id=1, sn=3, wn=4), b'd')
+        self.assertEqual(self.other.stats['stream_rx_duplicate'], 1)
+        stream.receive(odict(id=1, sn=2, wn=2), b'c')
+        self.assertEqual(self.other.stats['stream_rx_overrun'], 1)
+        stream.receive(odict(id=1, sn=4), b'e')  # default window
+        self.assertEqual(self.other.stats['stream_rx_overrun'], 2)
+        stream.receive(odict(id=1, sn=streaming.RxStream.MaxWindow, wn=10 ** 9), b'f')
+        self.assertEqual(self.other.stats['stream_rx_overrun'], 3)
+        self.assertEqual(list(stream.pendings.keys()), [3])
+
+        chunks = []
+        self.other.streamer = lambda stream, chunk: chunks.append(chunk)
+        for sn, chunk in enumerate([b'a', b'b', b'c']):
+            stream.receive(odict(id=1, sn=sn, wn=4), chunk)
+        self.assertEqual(stream.sn, 4)
+        stream.receive(odict(id=1, sn=7, wn=4, end=True), b'h')  # now within window
+        self.assertEqual(self.other.stats['stream_rx_overrun'], 3)
+        self.assertEqual(chunks, [b'a', b'b', b'c', b'd'])
+        self.assertEqual(list(stream.pendings.keys()), [7])
+
+    def testRawMessage(self):
+        '''
+        Test raw body messages without stream mark are delivered to rxMsgs
+        '''
+        console.terse("{0}\n".format(self.testRawMessage.__doc__))
+        self.join()
+        self.allow()
+        self.other.Bk = raeting.BodyKind.raw.value
+        bodies = [b'hello raw world', b'{"id": 1, "sn": 0}\nnot a chunk', os.urandom(5000)]
+        for body in bodies:
+            self.other.message(body)
+            self.service(real=False)
+        self.assertEqual(list(self.main.rxMsgs),
+                         [(body, self.other.name) for body in bodies])
+        self.assertNotIn('invalid_stream_chunk', self.main.stats)
+        self.assertEqual(self.main.rxStreams, odict())
+        self.assertFalse(streaming.isChunk(bodies[1]))
+        self.assertTrue(streaming.isChunk(streaming.packChunk(odict(id=1, sn=0), b'')))
+        with self.assertRaises(raeting.PacketError):
+            streaming.parseChunk(bodies[1])
+
+    def testStreamCallback(self):
+        '''
+        Test stream from iterator is delivered in order to streamer callback
+        and abandoned when chunks stop arriving
+        '''
+        console.terse("{0}\n".format(self.testStreamCallback.__doc__))
+        chunks = []
+        self.other.streamer = lambda stream, chunk: chunks.append((stream.meta, chunk))
+        self.join()
+        self.allow()
+        remote = self.main.remotes.values()[0]
+
+        parts = [ns2b(str(i) * 3000) for i in range(10)]
+        stream = self.main.stream(iter(parts), remote.uid, meta='parts', chunkSize=2000)
+        while not stream.done:
+            self.service(real=False)
+        self.service(real=False)
+        self.assertTrue(stream.complete)
+        self.assertEqual(b''.join(chunk for meta, chunk in chunks[:-1]), b''.join(parts))
+        self.assertTrue(all(len(chunk) <= 2000 for meta, chunk in chunks[:-1]))
+        self.assertEqual(chunks[-1], ('parts', None))
+        msg, name = self.other.rxMsgs.popleft()
+        self.assertEqual(msg['stream']['path'], None)
+        self.assertEqual(msg['stream']['size'], 30000)
+
+        empty = self.main.stream([], remote.uid)  # empty stream is one end chunk
+        self.service(real=False)
+        self.service(real=False)
+        self.assertTrue(empty.complete)
+        self.assertEqual(self.other.rxMsgs.popleft()[0]['stream']['size'], 0)
+
+        del chunks[:]
+        header = odict(id=99, sn=1, end=True)  # first chunk never arrives
+        self.other.receiveStream(streaming.packChunk(header, b'late'),
+                                 self.other.remotes.values()[0])
+        self.assertEqual(len(self.other.rxStreams), 1)
+        self.assertEqual(chunks, [])
+        self.store.advanceStamp(self.other.StreamTimeout + 1.0)
+        self.other.process()
+        self.assertEqual(self.other.rxStreams, odict())
+        self.assertEqual(chunks, [(None, None)])
+        self.assertEqual(self.other.stats['stream_rx_timeout'], 1)
+        self.assertEqual(len(self.other.rxMsgs), 0)
+
+    def testZipNegotiated(self):
+        '''
+        Test body compression is negotiated on allow and reduces segments
+        '''
+        console.terse("{0}\n".format(self.testZipNegotiated.__doc__))
+        self.main.zk = raeting.ZipKind.zlib.value  # only main offers
+        self.join()
+        self.allow()
+        remote = self.main.remotes.values()[0]
+        self.assertEqual(remote.zk, raeting.ZipKind.nada.value)
+        self.assertEqual(self.other.remotes.values()[0].zk, raeting.ZipKind.nada.value)
+
+        body = odict([('state{0}'.format(i), odict(result=True,
+                                                   changes=odict(),
+                                                   comment='File /etc/app{0} is in the correct state'.format(i)))
+                      for i in range(200)])
+        self.main.transmit(body, remote.uid)
+        self.service(real=False)
+        plains = self.main.stats['message_segment_tx']
+        self.assertEqual(self.other.rxMsgs.popleft(), (body, self.main.name))
+
+        self.other.zk = raeting.ZipKind.zlib.value  # now both offer
+        self.allow()
+        self.assertEqual(remote.zk, raeting.ZipKind.zlib.value)
+        self.assertEqual(self.other.remotes.values()[0].zk, raeting.ZipKind.zlib.value)
+
+        self.main.transmit(body, remote.uid)
+        self.service(real=False)
+        zippeds = self.main.stats['message_segment_tx'] - plains
+        self.assertEqual(self.other.rxMsgs.popleft(), (body, self.main.name))
+        self.assertTrue(zippeds * 4 < plains)
+
+        self.other.transmit(odict(content='small'))  # below threshold
+        self.service(real=False)
+        self.assertEqual(self.main.rxMsgs.popleft(), ({'content': 'small'}, self.other.name))
+
+    def testZipInterop(self):
+        '''
+        Test allow with compression offered succeeds with peer whose parser
+        predates head field zk
+        '''
+        console.terse("{0}\n".format(self.testZipInterop.__doc__))
+        fields = raeting.PACKET_HEAD_FIELDS
+        olds = [field for field in fields if field != 'zk']
+
+        def serviceOld(old, new, duration=2.0):
+            self.timer.restart(duration=duration)
+            while not self.timer.expired:
+                new.serviceAll()
+                raeting.PACKET_HEAD_FIELDS = olds  # old parser rejects zk
+                try:
+                    old.serviceAll()
+                finally:
+                    raeting.PACKET_HEAD_FIELDS = fields
+                if not (old.transactions or new.transactions):
+                    break
+                self.store.advanceStamp(0.1)
+
+        self.join()
+        for old, new in [(self.main, self.other), (self.other, self.main)]:
+            new.zk = raeting.ZipKind.zlib.value  # new offers, old does not know zk
+            old.zk = raeting.ZipKind.nada.value
+            if new is self.other:
+                new.allow()
+            else:
+                old.allow()
+            serviceOld(old, new)
+            for stack in (old, new):
+                remote = stack.remotes.values()[0]
+                self.assertTrue(remote.allowed)
+                self.assertEqual(remote.zk, raeting.ZipKind.nada.value)
+                self.assertNotIn('parsing_outer_error', stack.stats)
+            body = odict(data='x' * 2000)
+            new.transmit(body)
+            serviceOld(old, new)
+            self.assertEqual(old.rxMsgs.popleft(), (body, new.name))
+
+        self.main.zk = raeting.ZipKind.zlib.value  # both new so negotiated
+        self.other.zk = raeting.ZipKind.zlib.value
+        self.allow()
+        self.assertEqual(self.main.remotes.values()[0].zk, raeting.ZipKind.zlib.value)
+        self.assertEqual(self.other.remotes.values()[0].zk, raeting.ZipKind.zlib.value)
+
+    def testLazyRelay(self):
+        '''
+        Test lazy bodies are forwarded without decoding and decode on access
+        '''
+        console.terse("{0}\n".format(self.testLazyRelay.__doc__))
+        self.main.lazy = True
+        self.join()
+        self.allow()
+        remote = self.main.remotes.values()[0]
+
+        body = odict([('route', odict(src='other', dst='elsewhere')),
+                      ('data', 'x' * 4000)])  # segmented
+        self.other.transmit(body)
+        self.service(real=False)
+        msg, name = self.main.rxMsgs.popleft()
+        self.assertIsInstance(msg, serializing.LazyBody)
+        self.assertFalse(msg.decoded)
+
+        self.main.transmit(msg, remote.uid)  # relay back untouched
+        self.service(real=False)
+        self.assertFalse(msg.decoded)
+        self.assertEqual(self.other.rxMsgs.popleft(), (body, self.main.name))
+
+        self.assertEqual(msg['route']['dst'], 'elsewhere')
+        self.assertTrue(msg.decoded)
+        self.assertEqual(msg, body)
+        msg['route'] = odict(src='main', dst='other')  # modified so reserialized
+        self.main.transmit(msg, remote.uid)
+        self.service(real=False)
+        rxMsg, name = self.other.rxMsgs.popleft()
+        self.assertIsInstance(rxMsg, odict)
+        self.assertEqual(rxMsg['route'], {'src': 'main', 'dst': 'other'})
+        self.assertEqual(rxMsg['data'], body['data'])
+
+    def testMetered(self):
+        '''
+        Test metered stacks observe phase, segment and round trip histograms
+        '''
+        console.terse("{0}\n".format(self.testMetered.__doc__))
+        self.join()
+        self.allow()
+        self.main.metered = True
+        self.other.metered = True
+        self.assertFalse(self.main.metrics.histograms)
+
+        body = odict(data='x' * 4000)  # segmented
+        self.other.transmit(body)
+        self.service(real=False)
+        self.assertEqual(self.main.rxMsgs.popleft(), (body, self.other.name))
+
+        histograms = self.main.metrics.histograms
+        for name in ('phase_parse_outer', 'phase_verify', 'phase_decrypt',
+                     'phase_deserialize', 'phase_dispatch'):
+            self.assertTrue(histograms[name].count > 0)
+        segments = self.other.metrics.histograms['message_segments_tx']
+        self.assertEqual(segments.count, 1)
+        self.assertTrue(segments.max > 1)
+        self.assertEqual(histograms['message_segments_rx'].max, segments.max)
+        rtt = self.other.metrics.histograms['remote_rtt{remote=main}']
+        self.assertTrue(rtt.count > 0)
+
+        snap = self.main.metrics.snapshot()
+        self.assertEqual(snap['gauges']['rx_msgs_depth'], 0)
+        self.assertEqual(snap['gauges']['remotes'], 1)
+        self.assertTrue(snap['counters']['message_segment_rx'] > 1)
+        self.assertIn('raet_phase_decrypt_count', self.main.metrics.exposition())
+
+        self.other.removeRemote(self.other.remotes.values()[0])
+        self.assertNotIn('remote_rtt{remote=main}', self.other.metrics.histograms)
+
+    def testTraced(self):
+        '''
+        Test sampled messages fire lifecycle events collected per stage
+        '''
+        console.terse("{0}\n".format(self.testTraced.__doc__))
+        self.join()
+        self.allow()
+        collector = tracing.Collector()
+        self.other.tracer = tracing.Tracer(sinks=[collector])
+        self.main.tracer = tracing.Tracer(sinks=[collector])
+        traces = []
+        self.other.tracer.add(lambda trace, stage, stamp: traces.append(trace)
+                                                          if trace.done else None)
+
+        msgs = [odict(content='Hello'), odict(data='x' * 4000)]  # segmented
+        for msg in msgs:
+            self.assertTrue(self.other.transmit(msg))
+        self.service(real=False)
+        for msg in msgs:
+            self.assertEqual(self.main.rxMsgs.popleft(), (msg, self.other.name))
+
+        self.assertEqual(len(traces), 2)
+        for trace in traces:
+            self.assertEqual(list(trace.stamps.keys()),
+                             ['transmit', 'message', 'txes', 'sent', 'acked'])
+            self.assertEqual(trace.name, self.other.name)
+            self.assertEqual(trace.index[3:5], (self.other.remotes.values()[0].sid,
+                                                trace.index[4]))
+        self.assertNotEqual(traces[0].index, traces[1].index)
+        self.assertFalse(self.other.traceds)
+
+        report = collector.report()
+        for key in ('tx:transmit>message', 'tx:message>txes', 'tx:txes>sent',
+                    'tx:sent>acked', 'tx:total', 'rx:received>complete',
+                    'rx:complete>rx_msgs', 'rx:total'):
+            self.assertEqual(report[key]['count'], 2)
+            self.assertTrue(report[key]['p99'] >= report[key]['p50'] >= 0.0)
+
+        self.other.transmit(odict(content='lost'))
+        self.other.serviceAll()
+        self.other.removeRemote(self.other.remotes.values()[0])
+        self.assertEqual(collector.failures, odict(tx=1))
+
 def runOne(test):
     '''
     Unittest Runner
@@ -773,6 +1455,22 @@ def runSome():
              'testBasicAlive',
              'testStaleNack',
              'testJoinForever',
+             'testPrivateerPool',
+             'testAllowResume',
+             'testJoinAdmission',
+             'testTxesPassLimit',
+             'testTrafficPriority',
+             'testRxArrivalOrder',
+             'testBackpressure',
+             'testStreamSpool',
+             'testStreamWindow',
+             'testRawMessage',
+             'testStreamCallback',
+             'testZipNegotiated',
+             'testZipInterop',
+             'testLazyRelay',
+             'testMetered',
+             'testTraced',
             ]
     tests.extend(map(BasicTestCase, names))
 
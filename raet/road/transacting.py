@@ -9,6 +9,7 @@ stacking.py raet protocol stacking classes
 import socket
 import binascii
 import struct
+import time
 
 try:
     import simplejson as json
@@ -24,30 +25,36 @@ from ioflo.aid.aiding import packByte, unpackByte
 # Import raet libs
 from ..abiding import *  # import globals
 from .. import raeting
-from ..raeting import Acceptance, PcktKind, TrnsKind, CoatKind, FootKind
+from .. import consoling
+from ..raeting import Acceptance, PcktKind, TrnsKind, CoatKind, FootKind, BodyKind, Priority, ZipKind
 from .. import nacling
+from .. import metering
 from . import packeting
 from . import estating
 
 from ioflo.base.consoling import getConsole
 console = getConsole()
+log = consoling.getLogger()
 
 class Transaction(object):
     '''
     RAET protocol transaction class
     '''
     Timeout =  5.0 # default timeout
+    TxPriority = Priority.control # traffic class of transmitted packets
 
     def __init__(self, stack=None, remote=None, kind=None, timeout=None,
                  rmt=False, bcst=False, sid=None, tid=None,
-                 txData=None, txPacket=None, rxPacket=None):
+                 txData=None, txPacket=None, rxPacket=None, priority=None):
         '''
         Setup Transaction instance
         timeout of 0.0 means no timeout go forever
+        priority is raeting.Priority traffic class, None means class default
         '''
         self.stack = stack
         self.remote = remote
         self.kind = kind or raeting.PACKET_DEFAULTS['tk']
+        self.priority = priority if priority is not None else self.TxPriority
 
         if timeout is None:
             timeout = self.Timeout
@@ -92,7 +99,7 @@ class Transaction(object):
         Queue tx duple on stack transmit queue
         '''
         try:
-            self.stack.tx(packet.packed, self.remote.uid)
+            self.stack.tx(packet.packed, self.remote.uid, self.priority)
         except raeting.StackError as ex:
             console.terse(str(ex) + '\n')
             self.stack.incStat(self.statKey())
@@ -249,7 +256,7 @@ class Staler(Initiator):
             self.stack.incStat("packing_error")
             return
 
-        self.stack.txes.append((packet.packed, ha))
+        self.stack.queueTx(packet.packed, ha, Priority.control)
         console.terse("Staler '{0}'. Do Nack of stale correspondent {1} in {2} at {3}\n".format(
                 self.stack.name, ha, self.tid, self.stack.store.stamp))
         self.stack.incStat('stale_correspondent_nack')
@@ -350,7 +357,7 @@ class Stalent(Correspondent):
                                        self.stack.store.stamp))
             kind == PcktKind.nack
 
-        self.stack.txes.append((packet.packed, ha))
+        self.stack.queueTx(packet.packed, ha, Priority.control)
         self.stack.incStat('stale_initiator_nack')
 
 class Joiner(Initiator):
@@ -456,8 +463,8 @@ class Joiner(Initiator):
             else:
                 self.remove(index=self.index) # in case never sent txPacket
 
-            console.concise("Joiner {0}. Timed out with {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Joiner {0}. Timed out with {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
 
             return
 
@@ -475,8 +482,8 @@ class Joiner(Initiator):
             if (self.txPacket and
                     self.txPacket.data['pk'] == PcktKind.request):
                 self.transmit(self.txPacket) #redo
-                console.concise("Joiner {0}. Redo Join with {1} in {2} at {3}\n".format(
-                     self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+                log.concise("Joiner {0}. Redo Join with {1} in {2} at {3}\n",
+                     self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
                 self.stack.incStat('joiner_tx_join_redo')
             else: #check to see if status has changed to accept after other kind
                 if self.remote:
@@ -555,11 +562,11 @@ class Joiner(Initiator):
             self.stack.incStat("packing_error")
             self.remove()
             return
-        console.concise("Joiner {0}. Do Join with {1} in {2} at {3}\n".format(
-                        self.stack.name,
-                        self.remote.name,
-                        self.tid,
-                        self.stack.store.stamp))
+        log.concise("Joiner {0}. Do Join with {1} in {2} at {3}\n",
+                    self.stack.name,
+                    self.remote.name,
+                    self.tid,
+                    self.stack.store.stamp)
         self.transmit(packet)
         self.add(index=self.txPacket.index)
 
@@ -794,8 +801,8 @@ class Joiner(Initiator):
             self.remove(index=self.txPacket.index)
             return
 
-        console.concise("Joiner {0}. Do Ack Pend of {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Joiner {0}. Do Ack Pend of {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
 
         self.transmit(packet)
 
@@ -830,8 +837,8 @@ class Joiner(Initiator):
             self.remove(index=self.txPacket.index)
             return
 
-        console.concise("Joiner {0}. Do Ack Accept, Done with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Joiner {0}. Do Ack Accept, Done with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat("join_initiate_complete")
 
         self.transmit(packet)
@@ -990,8 +997,8 @@ class Joinent(Correspondent):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.nack() # stale
-            console.concise("Joinent {0}. Timed out with {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Joinent {0}. Timed out with {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
             return
 
         # need to perform the check for accepted status and then send accept
@@ -1009,8 +1016,8 @@ class Joinent(Correspondent):
             if (self.txPacket and
                     self.txPacket.data['pk'] == PcktKind.response):
                 self.transmit(self.txPacket) #redo
-                console.concise("Joinent {0}. Redo Accept with {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+                log.concise("Joinent {0}. Redo Accept with {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
                 self.stack.incStat('joinent_tx_accept_redo')
             else: #check to see if status has changed to accept
                 if self.remote:
@@ -1349,8 +1356,8 @@ class Joinent(Correspondent):
             self.remove(index=self.rxPacket.index)
             return
 
-        console.concise("Joinent {0}. Do Ack Pending accept of {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Joinent {0}. Do Ack Pending accept of {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.transmit(packet)
 
     def ackAccept(self):
@@ -1392,8 +1399,8 @@ class Joinent(Correspondent):
             self.remove(index=self.rxPacket.index)
             return
 
-        console.concise("Joinent {0}. Do Accept of {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Joinent {0}. Do Accept of {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.transmit(packet)
 
     def pend(self):
@@ -1411,8 +1418,8 @@ class Joinent(Correspondent):
         if not self.stack.parseInner(self.rxPacket):
             return
 
-        console.concise("Joinent {0}. Done with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Joinent {0}. Done with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat("join_correspond_complete")
 
         if self.remote.sid == 0: # session id  must be non-zero after join
@@ -1499,7 +1506,7 @@ class Joinent(Correspondent):
 
         self.stack.incStat(self.statKey())
 
-        self.stack.txes.append((packet.packed, ha))
+        self.stack.queueTx(packet.packed, ha, Priority.control)
         self.remove(index=self.rxPacket.index)
 
 class Allower(Initiator):
@@ -1510,6 +1517,7 @@ class Allower(Initiator):
     Timeout = 4.0
     RedoTimeoutMin = 0.25 # initial timeout
     RedoTimeoutMax = 1.0 # max timeout
+    ResumeRedos = 2 # max resume redos before falling back to full hello
 
     def __init__(self, redoTimeoutMin=None, redoTimeoutMax=None,
                  cascade=False, **kwa):
@@ -1529,6 +1537,8 @@ class Allower(Initiator):
         self.sid = self.remote.sid
         self.tid = self.remote.nextTid()
         self.oreo = None # cookie from correspondent needed until handshake completed
+        self.secret = None # resumption ticket secret needed until resumption completed
+        self.resumeRedos = 0 # count of resume redos before falling back to hello
         self.prep() # prepare .txData
 
     def transmit(self, packet):
@@ -1564,8 +1574,8 @@ class Allower(Initiator):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.remove()
-            console.concise("Allower {0}. Timed out with {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Allower {0}. Timed out with {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
             return
 
         # need keep sending join until accepted or timed out
@@ -1578,20 +1588,30 @@ class Allower(Initiator):
             if self.txPacket:
                 if self.txPacket.data['pk'] == PcktKind.hello:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Allower {0}. Redo Hello with {1} in {2} at {3}\n".format(
-                            self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+                    log.concise("Allower {0}. Redo Hello with {1} in {2} at {3}\n",
+                            self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
                     self.stack.incStat('redo_hello')
 
+                if self.txPacket.data['pk'] == PcktKind.resume:
+                    if self.resumeRedos >= self.ResumeRedos: # correspondent may not resume
+                        self.unresume()
+                    else:
+                        self.resumeRedos += 1
+                        self.transmit(self.txPacket) # redo
+                        log.concise("Allower {0}. Redo Resume with {1} in {2} at {3}\n",
+                                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
+                        self.stack.incStat('redo_resume')
+
                 if self.txPacket.data['pk'] == PcktKind.initiate:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Allower {0}. Redo Initiate with {1} in {2} at {3}\n".format(
-                             self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+                    log.concise("Allower {0}. Redo Initiate with {1} in {2} at {3}\n",
+                             self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
                     self.stack.incStat('redo_initiate')
 
                 if self.txPacket.data['pk'] == PcktKind.ack:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Allower {0}. Redo Ack Final with {1} in {2} at {3}\n".format(
-                             self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+                    log.concise("Allower {0}. Redo Ack Final with {1} in {2} at {3}\n",
+                             self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
                     self.stack.incStat('redo_final')
 
     def prep(self):
@@ -1640,7 +1660,19 @@ class Allower(Initiator):
         self.remote.rekey() # refresh short term keys and reset .allowed to None
         self.add()
 
-        plain = binascii.hexlify(b''.rjust(32, b'\x00'))
+        if self.remote.ticket and time.time() < self.remote.ticketExpire:
+            self.resume()
+            return
+
+        self.greet()
+
+    def greet(self):
+        '''
+        Send hello packet to start full handshake
+        The last byte of plain offers the stack body compression kind. Older
+        correspondents only check plain against its cipher so ignore it
+        '''
+        plain = binascii.hexlify(bytes(bytearray([0] * 31 + [self.stack.zk])))
         cipher, nonce = self.remote.privee.encrypt(plain, self.remote.pubber.key)
         body = raeting.HELLO_PACKER.pack(plain, self.remote.privee.pubraw, cipher, nonce)
 
@@ -1656,8 +1688,53 @@ class Allower(Initiator):
             self.remove()
             return
         self.transmit(packet)
-        console.concise("Allower {0}. Do Hello with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allower {0}. Do Hello with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
+
+    def resume(self):
+        '''
+        Send resume packet with resumption ticket from prior allow
+        Correspondent responds with its new short term key in one round trip
+        '''
+        ticket, self.secret = self.remote.ticket
+        self.remote.ticket = None # tickets are single use
+
+        cipher, nonce = nacling.Sealer(key=self.secret).encrypt(self.remote.privee.pubraw)
+        body = raeting.RESUME_PACKER.pack(ticket,
+                                          self.remote.privee.pubraw,
+                                          cipher,
+                                          nonce)
+
+        data = odict(self.txData)
+        if self.stack.zk:  # only ticket granting correspondents get resume
+            data.update(zk=self.stack.zk)
+        packet = packeting.TxPacket(stack=self.stack,
+                                    kind=PcktKind.resume.value,
+                                    embody=body,
+                                    data=data)
+        try:
+            packet.pack()
+        except raeting.PacketError as ex:
+            console.terse(str(ex) + '\n')
+            self.stack.incStat("packing_error")
+            self.remove()
+            return
+        self.transmit(packet)
+        log.concise("Allower {0}. Do Resume with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
+
+    def unresume(self):
+        '''
+        Fall back to full handshake when resumption fails
+        '''
+        self.secret = None
+        log.concise("Allower {0}. Resume failed with {1} in {2}, Do full"
+                    " handshake at {3}\n", self.stack.name,
+                                                 self.remote.name,
+                                                 self.tid,
+                                                 self.stack.store.stamp)
+        self.stack.incStat('allow_resume_fallback')
+        self.greet()
 
     def cookie(self):
         '''
@@ -1758,8 +1835,8 @@ class Allower(Initiator):
             return
 
         self.transmit(packet)
-        console.concise("Allower {0}. Do Initiate with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allower {0}. Do Initiate with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
 
     def allow(self):
         '''
@@ -1770,10 +1847,70 @@ class Allower(Initiator):
         if not self.stack.parseInner(self.rxPacket):
             return
 
+        body = self.rxPacket.body.data
+        if self.txPacket and self.txPacket.data['pk'] == PcktKind.resume:
+            if not self.resumed(body):
+                return
+        elif body: # new correspondents include resumption ticket grant
+            self.grant(body)
+
+        self.remote.zk = self.stack.negotiateZip(self.rxPacket.data['zk'])
         self.remote.allowed = True
         self.remote.alived = True  # fast alive as soon as allowed
         self.ackFinal()
 
+    def resumed(self, body):
+        '''
+        Process ack to resume packet body
+        Returns True if resumption succeeded Otherwise falls back to full
+        handshake and returns False
+        '''
+        if not isinstance(body, bytes) or len(body) != raeting.RESUMED_PACKER.size:
+            emsg = "Invalid length of resumed packet body\n"
+            console.terse(emsg)
+            self.stack.incStat('invalid_resumed')
+            self.unresume()
+            return False
+
+        cipher, nonce, grant = raeting.RESUMED_PACKER.unpack(body)
+        try:
+            shortraw = nacling.Sealer(key=self.secret).decrypt(cipher, nonce)
+        except ValueError as ex:
+            emsg = "Invalid resumed stuff: '{0}'\n".format(str(ex))
+            console.terse(emsg)
+            self.stack.incStat('invalid_resumed')
+            self.unresume()
+            return False
+
+        self.secret = None
+        self.remote.publee = nacling.Publican(key=shortraw)
+        self.grant(grant)
+        self.stack.incStat('allow_resume')
+        return True
+
+    def grant(self, body):
+        '''
+        Process resumption ticket grant from correspondent
+        '''
+        if not isinstance(body, bytes) or len(body) != raeting.GRANT_PACKER.size:
+            emsg = "Invalid length of resumption ticket grant\n"
+            console.terse(emsg)
+            self.stack.incStat('invalid_grant')
+            return
+
+        ticket, cipher, nonce = raeting.GRANT_PACKER.unpack(body)
+        try:
+            stuff = self.remote.privee.decrypt(cipher, nonce, self.remote.publee.key)
+        except ValueError as ex:
+            emsg = "Invalid grant stuff: '{0}'\n".format(str(ex))
+            console.terse(emsg)
+            self.stack.incStat('invalid_grant')
+            return
+
+        secret, life = raeting.GRANTSTUFF_PACKER.unpack(stuff)
+        self.remote.ticket = (ticket, secret)
+        self.remote.ticketExpire = time.time() + life
+
     def ackFinal(self):
         '''
         Send ack to ack Initiate to terminate transaction
@@ -1796,8 +1933,8 @@ class Allower(Initiator):
         self.remove()
         self.transmit(packet)
 
-        console.concise("Allower {0}. Do Ack Final, Done with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allower {0}. Do Ack Final, Done with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat("allow_initiate_complete")
 
         self.remote.nextSid() # start new session always on successful allow
@@ -1853,9 +1990,13 @@ class Allower(Initiator):
         if not self.stack.parseInner(self.rxPacket):
             return
 
+        if self.txPacket and self.txPacket.data['pk'] == PcktKind.resume:
+            self.unresume()
+            return
+
         self.remove()
-        console.concise("Allower {0}. Refused by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allower {0}. Refused by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def reject(self):
@@ -1868,8 +2009,8 @@ class Allower(Initiator):
 
         self.remote.allowed = False
         self.remove()
-        console.concise("Allower {0}. Rejected by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allower {0}. Rejected by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def unjoin(self):
@@ -1882,8 +2023,8 @@ class Allower(Initiator):
 
         self.remote.joined = False
         self.remove()
-        console.concise("Allower {0}. Rejected unjoin by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allower {0}. Rejected unjoin by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
         self.stack.join(uid=self.remote.uid, cascade=self.cascade, timeout=self.timeout)
 
@@ -1909,6 +2050,7 @@ class Allowent(Correspondent):
                                            duration=self.redoTimeoutMin)
 
         self.oreo = None #keep locally generated oreo around for redos
+        self.zk = ZipKind.nada.value  # body compression kind offered in hello
         self.prep() # prepare .txData
 
     def transmit(self, packet):
@@ -1927,6 +2069,8 @@ class Allowent(Correspondent):
         if packet.data['tk'] == TrnsKind.allow:
             if packet.data['pk'] == PcktKind.hello:
                 self.hello()
+            elif packet.data['pk'] == PcktKind.resume:
+                self.resume()
             elif packet.data['pk'] == PcktKind.initiate:
                 self.initiate()
             elif packet.data['pk'] == PcktKind.ack:
@@ -1945,8 +2089,8 @@ class Allowent(Correspondent):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.nack(kind=PcktKind.refuse.value)
-            console.concise("Allowent {0}. Timed out with {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Allowent {0}. Timed out with {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
             return
 
         # need to perform the check for accepted status and then send accept
@@ -1960,14 +2104,14 @@ class Allowent(Correspondent):
             if self.txPacket:
                 if self.txPacket.data['pk'] == PcktKind.cookie:
                     self.transmit(self.txPacket) #redo
-                    console.concise("Allowent {0}. Redo Cookie with {1} in {2} at {3}\n".format(
-                             self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+                    log.concise("Allowent {0}. Redo Cookie with {1} in {2} at {3}\n",
+                             self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
                     self.stack.incStat('redo_cookie')
 
                 if self.txPacket.data['pk'] == PcktKind.ack:
                     self.transmit(self.txPacket) #redo
-                    console.concise("Allowent {0}. Redo Ack with {1} in {2} at {3}\n".format(
-                             self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+                    log.concise("Allowent {0}. Redo Ack with {1} in {2} at {3}\n",
+                             self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
                     self.stack.incStat('redo_allow')
 
     def prep(self):
@@ -1993,6 +2137,52 @@ class Allowent(Correspondent):
         if not self.stack.parseInner(self.rxPacket):
             return
 
+        if not self.ready():
+            return
+
+        data = self.rxPacket.data
+        body = self.rxPacket.body.data
+
+        if not isinstance(body, bytes):
+            emsg = "Invalid format of hello packet body\n"
+            console.terse(emsg)
+            self.stack.incStat('invalid_hello')
+            #self.remove()
+            self.nack(kind=PcktKind.reject.value)
+            return
+
+        if len(body) != raeting.HELLO_PACKER.size:
+            emsg = "Invalid length of hello packet body\n"
+            console.terse(emsg)
+            self.stack.incStat('invalid_hello')
+            #self.remove()
+            self.nack(kind=PcktKind.reject.value)
+            return
+
+        plain, shortraw, cipher, nonce = raeting.HELLO_PACKER.unpack(body)
+
+        self.remote.publee = nacling.Publican(key=shortraw)
+        msg = self.stack.local.priver.decrypt(cipher, nonce, self.remote.publee.key)
+        if msg != plain :
+            emsg = "Invalid plain not match decrypted cipher\n"
+            console.terse(emsg)
+            self.stack.incStat('invalid_hello')
+            #self.remove()
+            self.nack(kind=PcktKind.reject.value)
+            return
+
+        try:  # last byte of plain offers body compression kind
+            self.zk = bytearray(binascii.unhexlify(plain))[-1]
+        except (TypeError, ValueError, IndexError):
+            self.zk = ZipKind.nada.value
+        self.cookie()
+
+    def ready(self):
+        '''
+        Check that allow may proceed with remote, resolve races with other allows
+        then refresh short term keys and add self to remote transactions
+        Returns True if ready Otherwise False
+        '''
         joins = self.remote.joinInProcess()
         if joins:
             emsg = ("Allowent {0}. Attempt to allow while join already in process with {1}.  "
@@ -2008,7 +2198,7 @@ class Allowent(Correspondent):
                         "Dropping...\n".format(self.stack.name, self.remote.name))
                 console.concise(emsg)
                 self.stack.incStat('duplicate_allow_attempt')
-                return
+                return False
 
             if allow.rmt: # is already a correspondent to an allow
                 emsg = ("Allowent {0}. Another allowent already in process with {1}. "
@@ -2016,7 +2206,7 @@ class Allowent(Correspondent):
                 console.concise(emsg)
                 self.stack.incStat('redundant_allow_attempt')
                 self.nack(kind=PcktKind.refuse.value)
-                return
+                return False
 
             else: # already initiator allow in process, resolve race condition
                 if self.stack.local.name < self.remote.name: # abort correspondent
@@ -2026,7 +2216,7 @@ class Allowent(Correspondent):
                     console.concise(emsg)
                     self.stack.incStat('redundant_allow_attempt')
                     self.nack(kind=PcktKind.refuse.value)
-                    return
+                    return False
 
                 else: # abort initiator, could let otherside nack do this
                     emsg = ("Allowent {0}. Removing initiator allow with {1}. "
@@ -2043,43 +2233,89 @@ class Allowent(Correspondent):
             console.terse(emsg)
             self.stack.incStat('unjoined_allow_attempt')
             self.nack(kind=PcktKind.unjoined.value)
-            return
+            return False
 
         self.remote.rekey() # refresh short term keys and .allowed
         self.add()
+        return True
+
+    def resume(self):
+        '''
+        Process resume packet with resumption ticket
+        '''
+        if not self.stack.parseInner(self.rxPacket):
+            return
+
+        if not self.ready():
+            return
 
-        data = self.rxPacket.data
         body = self.rxPacket.body.data
 
-        if not isinstance(body, bytes):
-            emsg = "Invalid format of hello packet body\n"
-            console.terse(emsg)
-            self.stack.incStat('invalid_hello')
-            #self.remove()
-            self.nack(kind=PcktKind.reject.value)
+        if not self.stack.ticketLife > 0.0:
+            emsg = "Allowent {0}. Resumption disabled\n".format(self.stack.name)
+            console.concise(emsg)
+            self.stack.incStat('invalid_resume')
+            self.nack(kind=PcktKind.nack.value)
             return
 
-        if len(body) != raeting.HELLO_PACKER.size:
-            emsg = "Invalid length of hello packet body\n"
+        if not isinstance(body, bytes) or len(body) != raeting.RESUME_PACKER.size:
+            emsg = "Invalid length of resume packet body\n"
             console.terse(emsg)
-            self.stack.incStat('invalid_hello')
-            #self.remove()
-            self.nack(kind=PcktKind.reject.value)
+            self.stack.incStat('invalid_resume')
+            self.nack(kind=PcktKind.nack.value)
             return
 
-        plain, shortraw, cipher, nonce = raeting.HELLO_PACKER.unpack(body)
+        ticket, shortraw, cipher, nonce = raeting.RESUME_PACKER.unpack(body)
 
-        self.remote.publee = nacling.Publican(key=shortraw)
-        msg = self.stack.local.priver.decrypt(cipher, nonce, self.remote.publee.key)
-        if msg != plain :
-            emsg = "Invalid plain not match decrypted cipher\n"
+        try:
+            secret = self.stack.redeemTicket(ticket, self.remote)
+        except raeting.TransactionError as ex:
+            console.terse(str(ex) + '\n')
+            self.stack.incStat('invalid_resume')
+            self.nack(kind=PcktKind.nack.value)
+            return
+
+        try:
+            vouch = nacling.Sealer(key=secret).decrypt(cipher, nonce)
+        except ValueError as ex:
+            vouch = None
+        if vouch != shortraw:
+            emsg = "Short term key vouch failed in resume\n"
             console.terse(emsg)
-            self.stack.incStat('invalid_hello')
-            #self.remove()
-            self.nack(kind=PcktKind.reject.value)
+            self.stack.incStat('invalid_resume')
+            self.nack(kind=PcktKind.nack.value)
             return
 
-        self.cookie()
+        self.remote.publee = nacling.Publican(key=shortraw)
+        self.negotiateZip(self.rxPacket.data['zk'])
+        self.ackResume(secret)
+
+    def ackResume(self, secret):
+        '''
+        Send ack to resume request with new short term key and new ticket
+        '''
+        cipher, nonce = nacling.Sealer(key=secret).encrypt(self.remote.privee.pubraw)
+        body = raeting.RESUMED_PACKER.pack(cipher,
+                                           nonce,
+                                           self.stack.issueTicket(self.remote))
+        packet = packeting.TxPacket(stack=self.stack,
+                                    kind=PcktKind.ack.value,
+                                    embody=body,
+                                    data=self.txData)
+        try:
+            packet.pack()
+        except raeting.PacketError as ex:
+            console.terse(str(ex) + '\n')
+            self.stack.incStat("packing_error")
+            self.remove()
+            return
+
+        self.transmit(packet)
+        log.concise("Allowent {0}. Do Ack Resume with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
+        self.stack.incStat('allow_resume')
+
+        self.allow()
 
     def cookie(self):
         '''
@@ -2107,8 +2343,8 @@ class Allowent(Correspondent):
             self.remove()
             return
         self.transmit(packet)
-        console.concise("Allowent {0}. Do Cookie with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allowent {0}. Do Cookie with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
 
     def initiate(self):
         '''
@@ -2194,14 +2430,26 @@ class Allowent(Correspondent):
             self.nack(kind=PcktKind.reject.value)
             return
 
+        self.negotiateZip(self.zk)
         self.ackInitiate()
 
+    def negotiateZip(self, zk):
+        '''
+        Set remote body compression kind from kind zk offered by allower and
+        confirm agreed kind in head of ack. Head field zk is only sent once
+        the allower has offered it so older allowers never see it
+        '''
+        self.remote.zk = self.stack.negotiateZip(zk)
+        if self.remote.zk:
+            self.txData.update(zk=self.remote.zk)
+
     def ackInitiate(self):
         '''
         Send ack to initiate request
+        Body includes resumption ticket grant when enabled
         '''
 
-        body = b''
+        body = self.stack.issueTicket(self.remote)
         packet = packeting.TxPacket(stack=self.stack,
                                     kind=PcktKind.ack.value,
                                     embody=body,
@@ -2215,8 +2463,8 @@ class Allowent(Correspondent):
             return
 
         self.transmit(packet)
-        console.concise("Allowent {0}. Do Ack Initiate with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allowent {0}. Do Ack Initiate with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
 
         self.allow()
 
@@ -2240,8 +2488,8 @@ class Allowent(Correspondent):
             return
 
         self.remove()
-        console.concise("Allowent {0}. Done with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allowent {0}. Done with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat("allow_correspond_complete")
         self.remote.sendSavedMessages() # could include messages saved on rejoin
 
@@ -2253,8 +2501,8 @@ class Allowent(Correspondent):
             return
 
         self.remove()
-        console.concise("Allowent {0}. Refused by {1} in {2} at {3}n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allowent {0}. Refused by {1} in {2} at {3}n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def reject(self):
@@ -2267,8 +2515,8 @@ class Allowent(Correspondent):
 
         self.remote.allowed = False
         self.remove()
-        console.concise("Allowent {0}. Rejected by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Allowent {0}. Rejected by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def nack(self, kind=PcktKind.nack.value):
@@ -2292,11 +2540,11 @@ class Allowent(Correspondent):
             console.terse("Allowent {0}. Do Nack Refuse of {1} in {2} at {3}\n".format(
                     self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
         elif kind==PcktKind.reject:
-            console.concise("Allowent {0}. Do Nack Reject {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Allowent {0}. Do Nack Reject {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         elif kind==PcktKind.unjoined:
-            console.concise("Allowent {0}. Do Nack Unjoined {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Allowent {0}. Do Nack Unjoined {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         elif kind == PcktKind.nack:
             console.terse("Allowent {0}. Do Nack of {1} in {2} at {3}\n".format(
                     self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
@@ -2378,8 +2626,8 @@ class Aliver(Initiator):
         Perform time based processing of transaction
         '''
         if self.timeout > 0.0 and self.timer.expired:
-            console.concise("Aliver {0}. Timed out with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Aliver {0}. Timed out with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
             self.remove()
             self.remote.refresh(alived=False) # mark as dead
             return
@@ -2394,8 +2642,8 @@ class Aliver(Initiator):
             if self.txPacket:
                 if self.txPacket.data['pk'] == PcktKind.request:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Aliver {0}. Redo with {1} in {2} at {3}\n".format(
-                        self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+                    log.concise("Aliver {0}. Redo with {1} in {2} at {3}\n",
+                        self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
                     self.stack.incStat('redo_alive')
 
     def prep(self):
@@ -2450,8 +2698,8 @@ class Aliver(Initiator):
             self.remove()
             return
         self.transmit(packet)
-        console.concise("Aliver {0}. Do Alive with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Aliver {0}. Do Alive with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
 
     def complete(self):
         '''
@@ -2461,8 +2709,8 @@ class Aliver(Initiator):
             return
         self.remote.refresh(alived=True) # restart timer mark as alive
         self.remove()
-        console.concise("Aliver {0}. Done with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Aliver {0}. Done with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat("alive_complete")
 
     def refuse(self):
@@ -2474,8 +2722,8 @@ class Aliver(Initiator):
             return
         self.remote.refresh(alived=None) # restart timer do not change status
         self.remove()
-        console.concise("Aliver {0}. Refused by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Aliver {0}. Refused by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def reject(self):
@@ -2487,8 +2735,8 @@ class Aliver(Initiator):
             return
         self.remote.refresh(alived=False) # restart timer set status to False
         self.remove()
-        console.concise("Aliver {0}. Rejected by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Aliver {0}. Rejected by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def unjoin(self):
@@ -2501,8 +2749,8 @@ class Aliver(Initiator):
         self.remote.refresh(alived=None) # restart timer do not change status
         self.remote.joined = False
         self.remove()
-        console.concise("Aliver {0}. Refused unjoin by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Aliver {0}. Refused unjoin by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
         self.stack.join(uid=self.remote.uid, cascade=self.cascade, timeout=self.timeout)
 
@@ -2516,8 +2764,8 @@ class Aliver(Initiator):
         self.remote.refresh(alived=None) # restart timer do not change status
         self.remote.allowed = False
         self.remove()
-        console.concise("Aliver {0}. Refused unallow by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Aliver {0}. Refused unallow by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
         self.stack.allow(uid=self.remote.uid, cascade=self.cascade, timeout=self.timeout)
 
@@ -2554,8 +2802,8 @@ class Alivent(Correspondent):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.nack() #manage restarts alive later
-            console.concise("Alivent {0}. Timed out with {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Alivent {0}. Timed out with {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
             return
 
     def prep(self):
@@ -2618,12 +2866,12 @@ class Alivent(Correspondent):
             return
 
         self.transmit(packet)
-        console.concise("Alivent {0}. Do ack alive with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Alivent {0}. Do ack alive with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.remote.refresh(alived=True)
         self.remove()
-        console.concise("Alivent {0}. Done with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Alivent {0}. Done with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat("alive_complete")
 
     def nack(self, kind=PcktKind.nack.value):
@@ -2653,8 +2901,8 @@ class Alivent(Correspondent):
                 console.terse("Alivent {0}. Do Unallowed of {1} in {2} at {3}\n".format(
                         self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
         elif kind == PcktKind.reject:
-            console.concise("Alivent {0}. Do Reject {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Alivent {0}. Do Reject {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         elif kind == PcktKind.nack:
             console.terse("Alivent {0}. Do Nack of {1} in {2} at {3}\n".format(
                     self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
@@ -2680,10 +2928,13 @@ class Messenger(Initiator):
     Timeout = 0.0
     RedoTimeoutMin = 0.2 # initial timeout
     RedoTimeoutMax = 0.5 # max timeout
+    TxPriority = None # interactive if single segment else bulk
 
-    def __init__(self, redoTimeoutMin=None, redoTimeoutMax=None, burst=0, **kwa):
+    def __init__(self, redoTimeoutMin=None, redoTimeoutMax=None, burst=0,
+                 trace=None, **kwa):
         '''
         Setup instance
+        trace is optional tracing.Trace of message
         '''
         kwa['kind'] = TrnsKind.message.value
         super(Messenger, self).__init__(**kwa)
@@ -2701,6 +2952,12 @@ class Messenger(Initiator):
         self.tid = self.remote.nextTid()
         self.prep() # prepare .txData
         self.tray = packeting.TxTray(stack=self.stack)
+        self.size = 0  # bytes of packed message for backpressure
+        self.completed = False  # received done ack
+        self.txStamp = None  # clock of last transmit when metered and not a redo
+        self.trace = trace
+        if self.trace:
+            self.trace.index = self.index
 
     def transmit(self, packet):
         '''
@@ -2708,6 +2965,11 @@ class Messenger(Initiator):
         '''
         super(Messenger, self).transmit(packet)
         self.redoTimer.restart()
+        if self.stack.metered:
+            self.txStamp = metering.Clock()
+        if self.trace and 'txes' not in self.trace.stamps and self.txPacket is packet:
+            self.trace.mark('txes')
+            self.stack.traceTx(packet.packed, self.trace)
 
     def receive(self, packet):
         """
@@ -2715,6 +2977,12 @@ class Messenger(Initiator):
         """
         super(Messenger, self).receive(packet)
 
+        if self.txStamp is not None:  # round trip of segment not redone
+            self.stack.metrics.histogram('remote_rtt',
+                                         labels=odict(remote=self.remote.name)
+                                        ).observe(metering.Clock() - self.txStamp)
+            self.txStamp = None
+
         if packet.data['tk'] == TrnsKind.message:
             if packet.data['pk'] == PcktKind.ack: # more
                 self.acked = True
@@ -2734,8 +3002,8 @@ class Messenger(Initiator):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.remove()
-            console.concise("Messenger {0}. Timed out with {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Messenger {0}. Timed out with {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
             return
 
         # keep sending message  until completed or timed out
@@ -2751,13 +3019,14 @@ class Messenger(Initiator):
                         self.txPacket.data.update(af=True)
                         self.txPacket.repack()
                     self.transmit(self.txPacket) # redo
-                    console.concise("Messenger {0}. Redo Segment {1} with "
-                                    "{2} in {3} at {4}\n".format(
-                                    self.stack.name,
-                                    self.txPacket.data['sn'],
-                                    self.remote.name,
-                                    self.tid,
-                                    self.stack.store.stamp))
+                    self.txStamp = None  # ambiguous round trip
+                    log.concise("Messenger {0}. Redo Segment {1} with "
+                                "{2} in {3} at {4}\n",
+                                self.stack.name,
+                                self.txPacket.data['sn'],
+                                self.remote.name,
+                                self.tid,
+                                self.stack.store.stamp)
                     self.stack.incStat('redo_segment')
 
     def prep(self):
@@ -2797,6 +3066,13 @@ class Messenger(Initiator):
                 self.stack.incStat("packing_error")
                 self.remove()
                 return
+            if self.priority is None:
+                self.priority = (Priority.bulk if len(self.tray.packets) > 1
+                                               else Priority.interactive)
+            self.size = sum(packet.size for packet in self.tray.packets)
+            self.stack.observe('message_segments_tx',
+                               len(self.tray.packets),
+                               metering.COUNT_BUCKETS)
 
         if self.tray.current >= len(self.tray.packets):
             emsg = "Messenger {0}. Current packet {1} greater than num packets {2}\n".format(
@@ -2833,8 +3109,8 @@ class Messenger(Initiator):
             self.tray.last = self.tray.current
             self.tray.current += 1
             self.stack.incStat("message_segment_tx")
-            console.concise("Messenger {0}. Do Message Segment {1} with {2} in {3} at {4}\n".format(
-                    self.stack.name, self.tray.last, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Messenger {0}. Do Message Segment {1} with {2} in {3} at {4}\n",
+                    self.stack.name, self.tray.last, self.remote.name, self.tid, self.stack.store.stamp)
 
     def another(self):
         '''
@@ -2850,8 +3126,8 @@ class Messenger(Initiator):
         else:
             current = self.rxPacket.data['sn'] + 1
             if self.tray.current > current:
-                console.concise("Messenger {0}. Current {1} is ahead of requested {2}. Adjust.\n".format(
-                    self.stack.name, self.tray.current, current))
+                log.concise("Messenger {0}. Current {1} is ahead of requested {2}. Adjust.\n",
+                    self.stack.name, self.tray.current, current)
                 self.tray.current = current
                 self.tray.last = current - 1
             if self.tray.current < len(self.tray.packets):
@@ -2923,14 +3199,15 @@ class Messenger(Initiator):
             for packet in misseds:
                 self.transmit(packet)
                 self.stack.incStat("message_segment_tx")
-                console.concise("Messenger {0}. Do Resend Message Segment "
-                                "{1} with {2} in {3} at {4}\n".format(
+                log.concise("Messenger {0}. Do Resend Message Segment "
+                            "{1} with {2} in {3} at {4}\n",
                     self.stack.name,
                     packet.data['sn'],
                     self.remote.name,
                     self.tid,
-                    self.stack.store.stamp))
+                    self.stack.store.stamp)
                 self.misseds.discard(packet)  # remove from self.misseds
+            self.txStamp = None  # ambiguous round trip
 
     def complete(self):
         '''
@@ -2943,9 +3220,12 @@ class Messenger(Initiator):
         self.remote.refresh(alived=True)
         self.stack.incStat('message_complete_rx')
 
+        self.completed = True
+        if self.trace:
+            self.trace.mark('acked', done=True)
         self.remove()
-        console.concise("Messenger {0}. Done with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Messenger {0}. Done with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat("message_initiate_complete")
 
     def reject(self):
@@ -2960,8 +3240,8 @@ class Messenger(Initiator):
         self.stack.incStat('message_reject_rx')
 
         self.remove()
-        console.concise("Messenger {0}. Rejected by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Messenger {0}. Rejected by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def nack(self):
@@ -2984,10 +3264,18 @@ class Messenger(Initiator):
         self.transmit(packet)
         self.stack.incStat('message_nack_tx')
         self.remove()
-        console.concise("Messenger {0}. Do Nack Reject of {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Messenger {0}. Do Nack Reject of {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
+    def remove(self, remote=None, index=None):
+        '''
+        Augment remove to end trace of message that did not complete
+        '''
+        if self.trace:
+            self.trace.mark('failed', done=True)
+        super(Messenger, self).remove(remote, index)
+
 class Messengent(Correspondent):
     '''
     RAET protocol Messengent Correspondent class Dual of Messenger
@@ -3013,6 +3301,9 @@ class Messengent(Correspondent):
         self.lowest = None
         self.prep() # prepare .txData
         self.tray = packeting.RxTray(stack=self.stack)
+        self.trace = self.stack.startTrace('rx', self.index)
+        if self.trace:
+            self.trace.mark('received')
 
     def transmit(self, packet):
         '''
@@ -3041,8 +3332,8 @@ class Messengent(Correspondent):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.nack()
-            console.concise("Messengent {0}. Timed out with {1} in {2} at {3}\n".format(
-                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+            log.concise("Messengent {0}. Timed out with {1} in {2} at {3}\n",
+                    self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
             return
 
         if self.redoTimer.expired:
@@ -3147,13 +3438,13 @@ class Messengent(Correspondent):
             return
         self.transmit(packet)
         self.stack.incStat("message_more_ack")
-        console.concise("Messengent {0}. Do Ack More from {1} on Segment {2} with {3} in {4} at {5}\n".format(
+        log.concise("Messengent {0}. Do Ack More from {1} on Segment {2} with {3} in {4} at {5}\n",
             self.stack.name,
             self.tray.highest + 1,
             self.rxPacket.data['sn'],
             self.remote.name,
             self.tid,
-            self.stack.store.stamp))
+            self.stack.store.stamp)
 
     def resend(self, misseds):
         '''
@@ -3180,12 +3471,12 @@ class Messengent(Correspondent):
                 return
             self.transmit(packet)
             self.stack.incStat("message_resend_tx")
-            console.concise("Messengent {0}. Do Resend Segments {1} with {2} in {3} at {4}\n".format(
+            log.concise("Messengent {0}. Do Resend Segments {1} with {2} in {3} at {4}\n",
                     self.stack.name,
                     misseds,
                     self.remote.name,
                     self.tid,
-                    self.stack.store.stamp))
+                    self.stack.store.stamp)
             misseds = remainders
 
     def complete(self):
@@ -3193,13 +3484,24 @@ class Messengent(Correspondent):
         Complete transaction and remove
         '''
         self.done()
-        console.verbose("{0} received message body\n{1}\n".format(
-            self.stack.name, self.tray.body))
-        # application layer authorizaiton needs to know who sent the message
-        self.stack.rxMsgs.append((self.tray.body, self.remote.name))
+        self.stack.observe('message_segments_rx',
+                           max(1, len(self.tray.segments)),
+                           metering.COUNT_BUCKETS)
+        if self.trace:
+            self.trace.mark('complete')
+        log.dump(consoling.VERBOSE, "{0} received message body",
+                 self.tray.body, self.stack.name)
+        if (self.tray.data['bk'] == BodyKind.raw and
+                self.tray.body.startswith(raeting.STREAM_MARK)):  # chunk of stream
+            self.stack.receiveStream(self.tray.body, self.remote)
+        else:
+            # application layer authorizaiton needs to know who sent the message
+            self.stack.rxMsgs.append((self.tray.body, self.remote.name))
+        if self.trace:
+            self.trace.mark('rx_msgs', done=True)
         self.remove()
-        console.concise("Messengent {0}. Complete with {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Messengent {0}. Complete with {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat("messagent_correspond_complete")
 
     def done(self):
@@ -3220,12 +3522,12 @@ class Messengent(Correspondent):
             return
         self.transmit(packet)
         self.stack.incStat("message_complete_ack")
-        console.concise("Messengent {0}. Do Ack Done Message on Segment {1} with {2} in {3} at {4}\n".format(
+        log.concise("Messengent {0}. Do Ack Done Message on Segment {1} with {2} in {3} at {4}\n",
             self.stack.name,
             self.rxPacket.data['sn'],
             self.remote.name,
             self.tid,
-            self.stack.store.stamp))
+            self.stack.store.stamp)
 
     def reject(self):
         '''
@@ -3239,8 +3541,8 @@ class Messengent(Correspondent):
         self.stack.incStat("message_reject_nack")
 
         self.remove()
-        console.concise("Messengent {0}. Rejected by {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Messengent {0}. Rejected by {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def nack(self):
@@ -3262,10 +3564,12 @@ class Messengent(Correspondent):
 
         self.transmit(packet)
         self.remove()
-        console.concise("Messagent {0}. Do Nack Reject of {1} in {2} at {3}\n".format(
-                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp))
+        log.concise("Messagent {0}. Do Nack Reject of {1} in {2} at {3}\n",
+                self.stack.name, self.remote.name, self.tid, self.stack.store.stamp)
         self.stack.incStat(self.statKey())
 
     def remove(self, remote=None, index=None):
+        if self.trace:
+            self.trace.mark('failed', done=True)
         self.remote.addDoneTransaction(self.tid)
         super(Messengent, self).remove(remote, index)
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+'''
+running.py raet background thread stack runner
+
+StackRunner services a RoadStack or LaneStack on its own thread with a
+Reactor so the stack is serviced as soon as packets arrive or timers expire.
+Other threads exchange messages with the runner through its .txMsgs and
+.rxMsgs deques, whose append and popleft are atomic, and never touch the
+stack directly. Calls that must run on the stack, such as join, are queued
+with .call. An optional wakeup socket becomes readable whenever messages are
+added to .rxMsgs so a consumer can select on .fileno().
+
+The stack must have a store that is not shared with another thread since the
+runner advances its stamp.
+
+Example:
+
+    runner = StackRunner(RoadStack(store=Store(stamp=0.0), ...), wakeup=True)
+    runner.start()
+    runner.transmit(odict(content='Hello'), uid)
+    select.select([runner], [], [])
+    msg, name = runner.receive()
+    runner.close()
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import socket
+import threading
+from collections import deque
+
+# Import raet libs
+from .abiding import *  # import globals
+from . import raeting
+from .reacting import Reactor, selectors
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+
+class StackRunner(object):
+    '''
+    Services a Stack instance on a background thread
+
+    .txMsgs is deque of (msg, uid, ...) tuples whose items are the arguments
+        of stack.transmit. Tuples deferred by backpressure stay queued.
+    .rxMsgs is deque of (msg, name) duples received by the stack
+    .calls is deque of (function, args, kwargs) triples run on the thread
+    '''
+    Period = None  # max seconds between services when idle, None is Reactor default
+
+    def __init__(self, stack, period=None, manage=False, wakeup=False,
+                 txMsgs=None, rxMsgs=None):
+        '''
+        Setup instance
+
+        stack is RoadStack or LaneStack with open server and unshared store
+        period is max seconds to wait for events when no timers pending
+        manage is True to also manage RoadStack presence on remote timers
+        wakeup is True to create wakeup socket readable when .rxMsgs is not empty
+        txMsgs is optional deque of outgoing transmit tuples
+        rxMsgs is optional deque of incoming (msg, name) duples
+        '''
+        self.stack = stack
+        self.period = period if period is not None else self.Period
+        self.txMsgs = txMsgs if txMsgs is not None else deque()
+        self.rxMsgs = rxMsgs if rxMsgs is not None else deque()
+        self.calls = deque()
+        self.reactor = Reactor(stacks=[stack], period=self.period, manage=manage)
+        self.waker, self.waked = self.pair()  # runner wakeup, write then read end
+        self.reactor.selector.register(self.waked, selectors.EVENT_READ, self)
+        self.notifier = self.notified = None  # consumer wakeup, write then read end
+        if wakeup:
+            self.notifier, self.notified = self.pair()
+        self.thread = None
+        self.stopped = True
+        self.error = None  # exception that stopped thread if any
+
+    @staticmethod
+    def pair():
+        '''
+        Returns duple of nonblocking connected sockets
+        '''
+        pair = socket.socketpair()
+        for sock in pair:
+            sock.setblocking(False)
+        return pair
+
+    @staticmethod
+    def ring(sock):
+        '''
+        Write wakeup byte to sock ignoring full buffer
+        '''
+        try:
+            sock.send(b'\x00')
+        except socket.error:
+            pass  # already has unread wakeup bytes
+
+    @staticmethod
+    def drain(sock):
+        '''
+        Read and discard all wakeup bytes on sock
+        '''
+        try:
+            while sock.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+    def fileno(self):
+        '''
+        Returns file descriptor of wakeup socket so runner is selectable
+        Raises StackError when created without wakeup
+        '''
+        if self.notified is None:
+            emsg = "Runner of stack {0} has no wakeup socket".format(self.stack.name)
+            raise raeting.StackError(emsg)
+        return self.notified.fileno()
+
+    def start(self):
+        '''
+        Start servicing stack on daemon thread
+        '''
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopped = False
+        self.error = None
+        self.thread = threading.Thread(target=self.run,
+                                       name="{0}Runner".format(self.stack.name))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        '''
+        Stop servicing and wait up to timeout seconds for thread to finish
+        '''
+        self.stopped = True
+        self.wake()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def close(self, timeout=None):
+        '''
+        Stop servicing then close reactor, stack server and wakeup sockets
+        '''
+        self.stop(timeout)
+        self.reactor.selector.unregister(self.waked)
+        self.reactor.close()
+        self.stack.server.close()
+        for sock in (self.waker, self.waked, self.notifier, self.notified):
+            if sock is not None:
+                sock.close()
+
+    def wake(self):
+        '''
+        Wake runner thread so it services queued messages and calls
+        '''
+        self.ring(self.waker)
+
+    def transmit(self, msg, uid=None, *pa):
+        '''
+        Queue msg to remote uid, extra arguments are passed to stack.transmit
+        Thread safe
+        '''
+        self.txMsgs.append((msg, uid) + pa)
+        self.wake()
+
+    def receive(self):
+        '''
+        Returns next received duple (msg, remote name) or None if none
+        Clears wakeup socket so call until None after it selects readable
+        Wakes runner when draining below stack .rxMsgsHigh so it moves the
+        messages held back by .serviceRxMsgs
+        Thread safe for a single consumer
+        '''
+        if self.notified is not None:
+            self.drain(self.notified)
+        if self.rxMsgs:
+            high = self.stack.rxMsgsHigh
+            full = high and len(self.rxMsgs) >= high
+            rx = self.rxMsgs.popleft()
+            if full:
+                self.wake()
+            return rx
+        return None
+
+    def call(self, func, *pa, **kwa):
+        '''
+        Queue func(*pa, **kwa) to run on runner thread, e.g. stack.join
+        Thread safe
+        '''
+        self.calls.append((func, pa, kwa))
+        self.wake()
+
+    def run(self):
+        '''
+        Thread target, service until stopped
+        '''
+        try:
+            while not self.stopped:
+                self.serviceOnce()
+        except Exception as ex:
+            console.terse("Runner of stack {0}: stopped on error {1}\n".format(
+                    self.stack.name, ex))
+            self.error = ex
+            self.stopped = True
+
+    def serviceOnce(self, timeout=None):
+        '''
+        Service queued calls and messages then wait up to timeout seconds
+        for the stack to be ready and service it
+        '''
+        self.serviceCalls()
+        self.serviceTxMsgs()
+        self.reactor.serviceOnce(timeout=timeout)
+        self.drain(self.waked)
+        self.serviceRxMsgs()
+
+    def serviceCalls(self):
+        '''
+        Run queued calls on this thread
+        '''
+        while self.calls:
+            func, pa, kwa = self.calls.popleft()
+            func(*pa, **kwa)
+
+    def serviceTxMsgs(self):
+        '''
+        Hand queued messages to stack.transmit until deferred by backpressure
+        '''
+        while self.txMsgs:
+            item = self.txMsgs.popleft()
+            if self.stack.transmit(*item) is False:  # deferred so retry later
+                self.txMsgs.appendleft(item)
+                break
+
+    def serviceRxMsgs(self):
+        '''
+        Move received messages from stack to .rxMsgs and ring wakeup socket
+        Stops at stack .rxMsgsHigh so stack receive backpressure still applies
+        until .receive drains below it and wakes the runner
+        '''
+        stack = self.stack
+        high = stack.rxMsgsHigh
+        moved = False
+        while stack.rxMsgs and not (high and len(self.rxMsgs) >= high):
+            self.rxMsgs.append(stack.rxMsgs.popleft())
+            moved = True
+        if moved and self.notifier is not None:
+            self.ring(self.notifier)
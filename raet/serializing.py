@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+'''
+serializing.py raet message body serializer registry
+
+Codecs that serialize message bodies are registered by kind family, that is
+raeting.BodyKind for road packets or raeting.PackKind for lane pages, kind
+value and whether decoding preserves key order with odict. Packet and page
+bodies look up their codec here instead of branching on the kind, so faster
+codecs may be registered without changing them. Keeps write indented files by
+file extension with keeping.Keep and do not use the registry.
+
+A stack with .ordered False decodes into plain dicts, which is much faster
+than odict object_pairs_hook decoding. When no plain codec is registered for
+a kind the ordered codec is used.
+
+A stack with .lazy True delivers received message bodies as LazyBody
+mappings that keep the serialized bytes and decode them on first access.
+When an unmodified LazyBody is transmitted with a codec of the same format
+its bytes are sent untouched, so a relay forwarding messages between stacks
+skips a full decode and encode per hop.
+
+Example:
+
+    serializing.register(BodyKind, BodyKind.msgpack,
+                         serializing.MsgpackCodec(ordered=False, binary=True),
+                         ordered=False)
+    codec = serializing.lookup(BodyKind, BodyKind.msgpack, ordered=False)
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+from abc import ABCMeta, abstractmethod
+from collections import Mapping, MutableMapping
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+
+# Import raet libs
+from .abiding import *  # import globals
+from . import raeting
+from .raeting import BodyKind, PackKind
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+
+class Codec(ABCMeta(str('AbstractCodec'), (object, ), {})):  # python 2 and 3 abstract base
+    '''
+    Abstract base serializer of message bodies
+    Subclasses must override .dumps and .loads
+    .format names the wire format, codecs with equal formats read each
+    other's bytes
+    '''
+    Format = ''
+
+    def __init__(self, ordered=True):
+        '''
+        Setup instance
+
+        ordered is True to decode mappings as odict False as dict
+        '''
+        self.ordered = ordered
+        self.format = self.Format
+
+    @abstractmethod
+    def dumps(self, data):
+        '''
+        Returns bytes of data serialized
+        '''
+
+    @abstractmethod
+    def loads(self, packed):
+        '''
+        Returns mapping deserialized from bytes packed
+        Raises ValueError if packed is malformed
+        '''
+
+
+class JsonCodec(Codec):
+    '''
+    Compact json serializer
+    '''
+    Format = 'json'
+
+    def __init__(self, **kwa):
+        super(JsonCodec, self).__init__(**kwa)
+        self.decoder = (json.JSONDecoder(object_pairs_hook=odict) if self.ordered
+                        else json.JSONDecoder())
+
+    def dumps(self, data):
+        return ns2b(json.dumps(data, separators=(',', ':')))
+
+    def loads(self, packed):
+        return self.decoder.decode(packed.decode('utf-8'))
+
+
+class MsgpackCodec(Codec):
+    '''
+    Msgpack serializer
+    binary is True to pack bytes as msgpack bin type and unpack str type as
+    text so bytes values survive the round trip. Otherwise str and bytes
+    are both packed as str type and unpacked as utf-8 text
+    '''
+    Format = 'msgpack'
+
+    def __init__(self, binary=False, **kwa):
+        super(MsgpackCodec, self).__init__(**kwa)
+        if not msgpack:
+            raise raeting.RaetError("Msgpack not installed.")
+        self.binary = binary
+        if binary:
+            self.format = 'msgpack-bin'
+        self.unpackings = dict()
+        if self.ordered:
+            self.unpackings.update(object_pairs_hook=odict)
+        if binary:
+            self.unpackings.update(raw=False)
+        else:
+            self.unpackings.update(encoding='utf-8')
+
+    def dumps(self, data):
+        if self.binary:
+            return msgpack.dumps(data, use_bin_type=True)
+        return msgpack.dumps(data, encoding='utf-8')
+
+    def loads(self, packed):
+        return msgpack.loads(packed, **self.unpackings)
+
+
+class LazyBody(MutableMapping):
+    '''
+    Received message body that holds its serialized bytes and decodes them
+    with .codec only on first access
+
+    .packed is the received bytes or None once a top level key is set or
+    deleted. Nested values must be replaced rather than changed in place
+    for the change to be sent.
+    '''
+    def __init__(self, packed, codec):
+        '''
+        Setup instance
+
+        packed is serialized body bytes
+        codec is Codec that decodes packed
+        '''
+        self.packed = packed
+        self.codec = codec
+        self._data = None
+
+    @property
+    def data(self):
+        '''
+        Decoded mapping, decodes .packed on first access
+        Raises RaetError if .packed is malformed or not a mapping
+        '''
+        if self._data is None:
+            try:
+                data = self.codec.loads(self.packed)
+            except ValueError as ex:
+                raise raeting.RaetError("Invalid message body. {0}".format(ex))
+            if not isinstance(data, Mapping):
+                raise raeting.RaetError("Message body not a mapping.")
+            self._data = data
+        return self._data
+
+    @property
+    def decoded(self):
+        '''
+        True once .packed has been decoded
+        '''
+        return self._data is not None
+
+    def pack(self, codec):
+        '''
+        Returns bytes serialized with codec reusing .packed when unmodified
+        and codec has the same format
+        '''
+        if self.packed is not None and codec.format == self.codec.format:
+            return self.packed
+        return codec.dumps(self.data)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.packed = None
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.packed = None
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __bool__(self):
+        if self._data is None:
+            return True  # lazy bodies are only made from nonempty bytes
+        return bool(self._data)
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        if self._data is None:  # do not decode just to log
+            return "LazyBody({0} {1} bytes)".format(self.codec.format, len(self.packed))
+        return "LazyBody({0!r})".format(self._data)
+
+
+def dumps(codec, data):
+    '''
+    Returns data serialized with codec passing LazyBody bytes through
+    '''
+    if isinstance(data, LazyBody):
+        return data.pack(codec)
+    return codec.dumps(data)
+
+
+class Registry(object):
+    '''
+    Codecs keyed by (kinds, kind, ordered) with memoized lookup
+    '''
+    def __init__(self):
+        self.codecs = dict()
+        self.cache = dict()  # resolved codec or None keyed by lookup arguments
+
+    def register(self, kinds, kind, codec, ordered=True):
+        '''
+        Register codec for kind value of kinds family, BodyKind or PackKind
+        ordered is True if codec decodes mappings as odict
+        '''
+        self.codecs[(kinds, int(kind), ordered)] = codec
+        self.cache.clear()
+
+    def lookup(self, kinds, kind, ordered=True):
+        '''
+        Returns codec for kind value of kinds family or None if none.
+        Falls back to ordered codec when no plain dict codec is registered
+        '''
+        key = (kinds, kind, ordered)
+        try:
+            return self.cache[key]
+        except KeyError:
+            pass
+        codec = self.codecs.get((kinds, int(kind), ordered))
+        if codec is None and not ordered:
+            codec = self.codecs.get((kinds, int(kind), True))
+        self.cache[key] = codec
+        return codec
+
+
+Serializers = Registry()  # default registry used by packets and pages
+register = Serializers.register
+lookup = Serializers.lookup
+
+for ordered in (True, False):
+    register(BodyKind, BodyKind.json, JsonCodec(ordered=ordered), ordered=ordered)
+    register(PackKind, PackKind.json, JsonCodec(ordered=ordered), ordered=ordered)
+    if msgpack:
+        register(BodyKind, BodyKind.msgpack, MsgpackCodec(ordered=ordered), ordered=ordered)
+        register(PackKind, PackKind.pack, MsgpackCodec(ordered=ordered), ordered=ordered)
@@ -32,11 +32,15 @@ from ioflo.base.storing import Store
 # Import raet libs
 from .abiding import *  # import globals
 from . import raeting
+from . import consoling
 from . import keeping
 from . import lotting
+from . import queuing
+from . import metering
 
 from ioflo.base.consoling import getConsole
 console = getConsole()
+log = consoling.getLogger()
 
 class Stack(object):
     '''
@@ -45,6 +49,15 @@ class Stack(object):
     '''
     Count = 0
     Uid = 0 # base for next unique id for local and remotes
+    TxQuantum = queuing.FairQueue.Quantum # bytes per destination per round of .txes
+    TxPassLimit = 0 # max bytes sent per serviceTxes pass, 0 means no limit
+    TxRetry = 0.01 # seconds before retrying .txes sends deferred by a busy destination
+    TxMsgsHigh = 0 # .txMsgs high water mark to defer transmit, 0 means no limit
+    RxMsgsHigh = 0 # .rxMsgs high water mark to defer receive, 0 means no limit
+    Ordered = True # decode message bodies as odict, False as faster plain dict
+    Lazy = False # deliver message bodies as LazyBody decoded on first access
+    Metered = False # observe packet phase timing and latency histograms in .metrics
+    TraceTxLimit = 1024 # most traced packets awaiting send before oldest is forgotten
 
     def __init__(self,
                  store=None,
@@ -62,9 +75,21 @@ class Stack(object):
                  rxes=None,
                  txes=None,
                  stats=None,
+                 txQuantum=None,
+                 txPassLimit=None,
+                 txMsgsHigh=None,
+                 txMsgsLow=None,
+                 rxMsgsHigh=None,
+                 rxMsgsLow=None,
+                 pressure=None,
+                 ordered=None,
+                 lazy=None,
+                 metered=None,
+                 tracer=None,
                 ):
         '''
         Setup Stack instance
+        tracer is optional tracing.Tracer of message lifecycles
         '''
         self.store = store or Store(stamp=0.0)
 
@@ -95,15 +120,39 @@ class Stack(object):
 
             self.ha = self.server.ha  # update local host address after open
 
-            console.verbose("Stack '{0}': Opened server at '{1}'\n".format(self.name,
-                                                                           self.ha))
+            log.verbose("Stack '{0}': Opened server at '{1}'\n", self.name,
+                                                                       self.ha)
 
         self.rxMsgs = rxMsgs if rxMsgs is not None else deque() # messages received
         self.txMsgs = txMsgs if txMsgs is not None else deque() # messages to transmit
         self.rxes = rxes if rxes is not None else deque() # udp packets received
-        self.txes = txes if txes is not None else deque() # udp packet to transmit
+        self.txQuantum = txQuantum if txQuantum is not None else self.TxQuantum
+        self.txPassLimit = txPassLimit if txPassLimit is not None else self.TxPassLimit
+        self.txRetry = self.TxRetry
+        self.txDeferred = None # store stamp when a .txes send was last deferred
+        # packets to transmit by traffic class and fair queued per destination
+        self.txes = txes if txes is not None else queuing.ClassQueue(quantum=self.txQuantum)
         self.stats = stats if stats is not None else odict() # udp statistics
         self.statTimer = StoreTimer(self.store)
+        self.metered = metered if metered is not None else self.Metered
+        self.metrics = metering.Registry(stats=self.stats, timer=self.statTimer)
+        self.metrics.gauge('rxes_depth', lambda: len(self.rxes))
+        self.metrics.gauge('txes_depth', lambda: len(self.txes))
+        self.metrics.gauge('rx_msgs_depth', lambda: len(self.rxMsgs))
+        self.metrics.gauge('tx_msgs_depth', lambda: len(self.txMsgs))
+        self.metrics.gauge('remotes', lambda: len(self.remotes))
+        self.tracer = tracer
+        self.traceds = odict()  # (packed, trace, done) triples keyed by id(packed)
+
+        # backpressure water marks, low mark defaults to half the high mark
+        self.txMsgsHigh = txMsgsHigh if txMsgsHigh is not None else self.TxMsgsHigh
+        self.txMsgsLow = txMsgsLow if txMsgsLow is not None else self.txMsgsHigh // 2
+        self.rxMsgsHigh = rxMsgsHigh if rxMsgsHigh is not None else self.RxMsgsHigh
+        self.rxMsgsLow = rxMsgsLow if rxMsgsLow is not None else self.rxMsgsHigh // 2
+        self.pressure = pressure # callback pressure(key, deferring) on change
+        self.pressures = odict() # deferring flags keyed by pressure key
+        self.ordered = ordered if ordered is not None else self.Ordered
+        self.lazy = lazy if lazy is not None else self.Lazy
 
     @property
     def name(self):
@@ -224,6 +273,7 @@ class Stack(object):
 
         del self.uidRemotes[uid]
         del self.nameRemotes[remote.name]
+        self.metrics.discard('remote_rtt', odict(remote=remote.name))
 
     def removeAllRemotes(self):
         '''
@@ -252,9 +302,10 @@ class Stack(object):
 
     def updateStat(self, key, value):
         '''
-        Set stat key to value
+        Set stat key to value, exported as a gauge
         '''
         self.stats[key] = value
+        self.metrics.gauged.add(key)
 
     def clearStat(self, key):
         '''
@@ -269,8 +320,16 @@ class Stack(object):
         '''
         for key, value in self.stats.items():
             self.stats[key] = 0
+        self.metrics.clear()
         self.statTimer.restart()
 
+    def observe(self, name, value, buckets=None):
+        '''
+        Add value to histogram name of .metrics when .metered
+        '''
+        if self.metered:
+            self.metrics.observe(name, value, buckets)
+
     def _handleOneReceived(self):
         '''
         Handle one received message from server
@@ -308,7 +367,7 @@ class Stack(object):
         Assumes that there is a message on the .rxes deque
         '''
         raw, sa = self.rxes.popleft()
-        console.verbose("{0} received raw message\n{1}\n".format(self.name, raw))
+        log.dump(consoling.VERBOSE, "{0} received raw message", raw, self.name)
         processRx(packet=raw)
 
     def serviceRxes(self):
@@ -331,11 +390,71 @@ class Stack(object):
         '''
         pass
 
+    def pressurize(self, key, size, high, low):
+        '''
+        Update backpressure deferring flag for key given current size and
+        high and low water marks. Deferring starts when size reaches high
+        and stops when size falls to low. A high of 0 means never defer.
+        Calls .pressure(key, deferring) when the flag changes
+        Returns deferring flag
+        '''
+        deferring = self.pressures.get(key, False)
+        if not high:
+            update = False
+        elif deferring:
+            update = size > low
+        else:
+            update = size >= high
+        if update != deferring:
+            self.pressures[key] = update
+            if update:
+                self.incStat('{0}_pressured'.format(key))
+            if self.pressure:
+                self.pressure(key, update)
+        return update
+
+    def txMsgsDeferring(self):
+        '''
+        Returns True if transmit should defer because .txMsgs is too full
+        '''
+        return self.pressurize('tx_msgs',
+                               len(self.txMsgs),
+                               self.txMsgsHigh,
+                               self.txMsgsLow)
+
+    def rxMsgsDeferring(self):
+        '''
+        Returns True if receive should defer because .rxMsgs is too full
+        '''
+        return self.pressurize('rx_msgs',
+                               len(self.rxMsgs),
+                               self.rxMsgsHigh,
+                               self.rxMsgsLow)
+
+    def transmitDeferring(self, uid=None):
+        '''
+        Returns True if .transmit of a message to remote uid would be deferred
+        by backpressure, uid None means the first entry in .remotes
+        '''
+        return self.txMsgsDeferring()
+
+    def updatePressures(self):
+        '''
+        Refresh backpressure flags and message queue depth gauges
+        '''
+        self.txMsgsDeferring()
+        self.rxMsgsDeferring()
+        if self.txMsgsHigh or 'tx_msgs_depth' in self.stats:
+            self.updateStat('tx_msgs_depth', len(self.txMsgs))
+        if self.rxMsgsHigh or 'rx_msgs_depth' in self.stats:
+            self.updateStat('rx_msgs_depth', len(self.rxMsgs))
+
     def transmit(self, msg, uid=None):
         '''
         Append duple (msg, uid) to .txMsgs deque
         If msg is not mapping then raises exception
         If uid is None then it will default to the first entry in .remotes
+        Returns True if accepted or False if deferred by backpressure
         '''
         if not isinstance(msg, Mapping):
             emsg = "Invalid msg, not a mapping {0}\n".format(msg)
@@ -349,16 +468,60 @@ class Stack(object):
                 self.incStat("invalid_destination")
                 return
             uid = self.remotes.values()[0].uid
-        self.txMsgs.append((msg, uid))
+        if self.txMsgsDeferring():
+            self.incStat("tx_msgs_deferred")
+            return False
+        trace = self.startTrace('tx')
+        if trace:
+            trace.mark('transmit')
+            self.txMsgs.append((msg, uid, trace))
+        else:
+            self.txMsgs.append((msg, uid))
+        return True
+
+    def startTrace(self, kind, index=None):
+        '''
+        Returns new tracing.Trace of message of kind 'tx' or 'rx' with
+        transaction index if .tracer samples it otherwise None
+        '''
+        if not self.tracer:
+            return None
+        return self.tracer.start(self.name, kind, index)
+
+    def traceTx(self, packed, trace, done=False):
+        '''
+        Mark trace sent once packed is sent by .server
+        done is True if sent ends the trace
+        '''
+        self.traceds[id(packed)] = (packed, trace, done)
+        while len(self.traceds) > self.TraceTxLimit:
+            self.traceds.popitem(last=False)
+
+    def tracedTx(self, tx):
+        '''
+        Mark trace of tx sent if tx was traced
+        '''
+        traced = self.traceds.pop(id(tx), None)
+        if traced and traced[0] is tx:
+            traced[1].mark('sent', done=traced[2])
+
+    def retraceTx(self, packed, copy):
+        '''
+        Move trace of packed to copy that is queued on .txes in its place
+        '''
+        traced = self.traceds.pop(id(packed), None)
+        if traced and traced[0] is packed:
+            self.traceds[id(copy)] = (copy, traced[1], traced[2])
 
     def  _handleOneTxMsg(self):
         '''
         Take one message from .txMsgs deque and handle it
         Assumes there is a message on the deque
         '''
-        body, uid = self.txMsgs.popleft() # duple (body dict, destination uid
+        txMsg = self.txMsgs.popleft() # (body dict, destination uid) trace is optional
+        body, uid = txMsg[:2]
         self.message(body, uid=uid)
-        console.verbose("{0} sending\n{1}\n".format(self.name, body))
+        log.dump(consoling.VERBOSE, "{0} sending", body, self.name)
 
     def serviceTxMsgs(self):
         '''
@@ -366,6 +529,7 @@ class Stack(object):
         '''
         while self.txMsgs:
             self._handleOneTxMsg()
+        self.updatePressures()
 
     def serviceTxMsgOnce(self):
         '''
@@ -380,16 +544,28 @@ class Stack(object):
         '''
         pass
 
-    def tx(self, packed, duid):
+    def tx(self, packed, duid, priority=None):
         '''
         Queue duple of (packed, da) on stack .txes queue
         Where da is the ip destination (host,port) address associated with
         the remote identified by duid
+        priority is traffic class raeting.Priority, None means .txes default
         '''
         if duid not in self.remotes:
             msg = "Invalid destination remote id '{0}'".format(duid)
             raise raeting.StackError(msg)
-        self.txes.append((packed, self.remotes[duid].ha))
+        self.queueTx(packed, self.remotes[duid].ha, priority)
+
+    def queueTx(self, packed, ha, priority=None):
+        '''
+        Queue duple of (packed, ha) on stack .txes queue in traffic class
+        priority where ha is destination address
+        priority of None means .txes default
+        '''
+        if priority is None:
+            self.txes.append((packed, ha))
+        else:
+            self.txes.append((packed, ha), priority)
 
     def _handleOneTx(self, laters, blocks):
         '''
@@ -397,12 +573,13 @@ class Stack(object):
         Assumes there is a message
         laters is deque of messages to try again later
         blocks is list of destinations that already blocked on this service
+        Returns number of bytes sent
         '''
         tx, ta = self.txes.popleft()  # duple = (packet, destination address)
 
         if ta in blocks: # already blocked on this iteration
-            laters.append((tx, ta)) # keep sequential
-            return
+            self._deferTx(laters, tx, ta) # keep sequential
+            return 0
 
         try:
             self.server.send(tx, ta)
@@ -418,22 +595,69 @@ class Stack(object):
                 errors.append(errno.ETIME)
             if (err in errors):
                 # problem sending such as busy with last message. save it for later
-                laters.append((tx, ta))
+                self._deferTx(laters, tx, ta)
                 blocks.append(ta)
+                return 0
             else:
                 raise
+        if self.traceds:
+            self.tracedTx(tx)
+        return len(tx)
+
+    def _deferTx(self, laters, tx, ta):
+        '''
+        Save unsent packet tx to destination ta on laters along with the
+        traffic class and enqueue stamp it was dequeued with if any
+        '''
+        laters.append((tx, ta, getattr(self.txes, 'current', None),
+                       getattr(self.txes, 'stamped', None)))
+
+    def _requeueTxes(self, laters):
+        '''
+        Put the unsent packets in laters back at the front of .txes
+        in their original order, traffic class and enqueue stamp
+        '''
+        while laters:
+            tx, ta, priority, stamp = laters.pop()
+            if priority is None:
+                self.txes.appendleft((tx, ta))
+            else:
+                self.txes.appendleft((tx, ta), priority, stamp)
+
+    def updateTxesStats(self):
+        '''
+        Update per destination queue depth and per traffic class latency
+        stats for .txes
+        '''
+        depths = getattr(self.txes, 'depths', None)
+        if depths is None:
+            return
+        depths = depths()
+        if depths or self.stats.get('txes_depths'):
+            self.updateStat('txes_depths', depths)
+            self.updateStat('txes_depth_max', max(depths.values()) if depths else 0)
+        for name, (count, total, most) in getattr(self.txes, 'latencies', {}).items():
+            if count:
+                self.updateStat('tx_latency_{0}'.format(name), total / count)
+                self.updateStat('tx_latency_{0}_max'.format(name), most)
 
     def serviceTxes(self):
         '''
         Service the .txes deque to send  messages through server
+        Sends at most .txPassLimit bytes per pass when .txPassLimit is nonzero
         '''
         if self.server:
             laters = deque()
             blocks = []
+            sent = 0
             while self.txes:
-                self._handleOneTx(laters, blocks)
-            while laters:
-                self.txes.append(laters.popleft())
+                if self.txPassLimit and sent >= self.txPassLimit:
+                    self.incStat('txes_pass_limited')
+                    break
+                sent += self._handleOneTx(laters, blocks)
+            self.txDeferred = self.store.stamp if laters else None
+            self._requeueTxes(laters)
+            self.updateTxesStats()
 
     def serviceTxOnce(self):
         '''
@@ -444,8 +668,8 @@ class Stack(object):
             blocks = [] # will always be empty since only once
             if self.txes:
                 self._handleOneTx(laters, blocks)
-            while laters:
-                self.txes.append(laters.popleft())
+            self.txDeferred = self.store.stamp if laters else None
+            self._requeueTxes(laters)
 
     def serviceAllRx(self):
         '''
@@ -514,6 +738,31 @@ class Stack(object):
         '''
         pass
 
+    def nextDeadline(self, manage=False):
+        '''
+        Returns seconds until the next pending timer expires that needs
+        .process or .manage when manage is True or None if no timers pending
+        '''
+        return self.txesDeadline()
+
+    def txesDeadline(self):
+        '''
+        Returns seconds until .txes needs servicing or None if it is empty.
+        Zero unless the last pass deferred sends because a destination was
+        busy, in which case they are retried .txRetry seconds later
+        '''
+        if not self.txes:
+            return None
+        if self.txDeferred is None:
+            return 0.0
+        return max(0.0, self.txDeferred + self.txRetry - self.store.stamp)
+
+    def receivesDeferring(self):
+        '''
+        Returns True if .serviceReceives leaves received packets with the server
+        '''
+        return False
+
 class KeepStack(Stack):
     '''
     RAET protocol base stack object with persistance via Keep attribute.
@@ -626,8 +875,8 @@ class KeepStack(Stack):
         '''
         Clear out and remove the keep dir and contents
         '''
-        console.verbose("Stack {0}: Clearing keep dir '{1}'\n".format(
-                                  self.name, self.keep.dirpath))
+        log.verbose("Stack {0}: Clearing keep dir '{1}'\n",
+                              self.name, self.keep.dirpath)
         self.keep.clearAllDir()
 
     def dumpLocal(self):
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for asyncing module
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+if sys.version_info < (3, 5):
+    raise unittest.SkipTest("asyncio integration requires python 3.5")
+
+import os
+import shutil
+import tempfile
+import asyncio
+
+from ioflo.aid.odicting import odict
+from ioflo.base.storing import Store
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import raeting, asyncing
+from raet.road import estating, stacking as roading
+from raet.lane import yarding, passing, stacking as laning
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.store = Store(stamp=0.0)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.tempDirpath = tempfile.mkdtemp(prefix="raet",  suffix="base", dir='/tmp')
+        self.stacks = []
+
+    def tearDown(self):
+        for stack in self.stacks:
+            stack.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        shutil.rmtree(self.tempDirpath)
+
+    def wait(self, predicate, timeout=5.0):
+        '''
+        Run loop until predicate is true or timeout
+        '''
+        async def waiting():
+            while not predicate():
+                await asyncio.sleep(0.01)
+        self.loop.run_until_complete(asyncio.wait_for(waiting(), timeout))
+
+    def open(self, stack, **kwa):
+        '''
+        Wrap stack in AsyncStack and open it on the loop
+        '''
+        runner = asyncing.AsyncStack(stack, loop=self.loop, **kwa)
+        self.loop.run_until_complete(runner.open())
+        self.stacks.append(runner)
+        return runner
+
+    def testRoadLoopback(self):
+        '''
+        Test two road stacks join allow and message over loopback on asyncio
+        '''
+        console.terse("{0}\n".format(self.testRoadLoopback.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'road', 'keep')
+        main = self.open(roading.RoadStack(store=self.store,
+                                           name='main',
+                                           main=True,
+                                           auto=raeting.AutoMode.once.value,
+                                           ha=("127.0.0.1", raeting.RAET_PORT),
+                                           dirpath=os.path.join(dirpath, 'main')))
+        other = self.open(roading.RoadStack(store=self.store,
+                                            name='other',
+                                            auto=raeting.AutoMode.once.value,
+                                            ha=("127.0.0.1", raeting.RAET_TEST_PORT),
+                                            dirpath=os.path.join(dirpath, 'other')))
+        self.assertTrue(main.reading)
+
+        remote = estating.RemoteEstate(stack=other.stack,
+                                       fuid=0,
+                                       sid=0,
+                                       ha=main.stack.local.ha)
+        other.stack.addRemote(remote)
+        other.stack.join()
+        other.wake()
+        self.wait(lambda: remote.joined)
+        other.stack.allow()
+        other.wake()
+        self.wait(lambda: remote.allowed and not main.stack.transactions)
+
+        async def exchange():
+            await other.send(odict(content='Hello main'), remote.uid)
+            msg, name = await main.receive()
+            self.assertEqual(msg, {'content': 'Hello main'})
+            self.assertEqual(name, 'other')
+            await main.send(odict(content='Hello other'), main.stack.remotes.values()[0].uid)
+            async for msg, name in other:
+                return msg, name
+        msg, name = self.loop.run_until_complete(asyncio.wait_for(exchange(), 5.0))
+        self.assertEqual(msg, {'content': 'Hello other'})
+        self.assertEqual(name, 'main')
+
+        other.close()
+        self.assertRaises(StopAsyncIteration,
+                          self.loop.run_until_complete, other.receive())
+        for runner in [main, other]:
+            runner.stack.clearAllDir()
+
+    def testLaneLoopback(self):
+        '''
+        Test two lane stacks message over loopback on asyncio
+        '''
+        console.terse("{0}\n".format(self.testLaneLoopback.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = self.open(laning.LaneStack(store=self.store,
+                                          name='main',
+                                          uid=1,
+                                          lanename='cherry',
+                                          sockdirpath=dirpath))
+        other = self.open(laning.LaneStack(store=self.store,
+                                           name='other',
+                                           uid=1,
+                                           lanename='cherry',
+                                           sockdirpath=dirpath))
+        main.stack.addRemote(yarding.RemoteYard(stack=main.stack, ha=other.stack.ha))
+        other.stack.addRemote(yarding.RemoteYard(stack=other.stack, ha=main.stack.ha))
+
+        stuff = ''.join(str(i % 10) for i in range(raeting.UXD_MAX_PACKET_SIZE * 2))
+        msgs = [odict(content='Hello other'), odict(content=stuff)]
+
+        async def exchange():
+            for msg in msgs:
+                await main.send(msg)
+            received = []
+            async for msg, name in other:
+                received.append((msg, name))
+                if len(received) == len(msgs):
+                    return received
+        received = self.loop.run_until_complete(asyncio.wait_for(exchange(), 5.0))
+        self.assertEqual([msg for msg, name in received], msgs)
+        self.assertEqual(received[0][1], 'main')
+
+    def testSendDeferred(self):
+        '''
+        Test send waits on the remote that deferred transmit without retrying
+        '''
+        console.terse("{0}\n".format(self.testSendDeferred.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = self.open(laning.LaneStack(store=self.store,
+                                          name='main',
+                                          uid=1,
+                                          lanename='cherry',
+                                          sockdirpath=dirpath,
+                                          reliable=True,
+                                          window=1,
+                                          backlog=1))
+        other = laning.LaneStack(store=self.store,
+                                 name='other',
+                                 uid=1,
+                                 lanename='cherry',
+                                 sockdirpath=dirpath)
+        main.stack.addRemote(yarding.RemoteYard(stack=main.stack, ha=other.ha))
+        remote = main.stack.remotes.values()[0]
+        msgs = [odict(index=i, content='Hello other') for i in range(3)]
+
+        for msg in msgs[:2]:  # fill window and backlog
+            self.loop.run_until_complete(main.send(msg, remote.uid))
+        self.loop.run_until_complete(asyncio.sleep(0.1))
+        task = self.loop.create_task(main.send(msgs[2], remote.uid))
+        self.loop.run_until_complete(asyncio.sleep(0.3))  # other never acks
+        self.assertFalse(task.done())
+        self.assertTrue(remote.txSequence.backlogged)
+        self.assertFalse(main.stack.txMsgsDeferring())
+        self.assertEqual(main.stack.stats['tx_backlog_deferred'], 1)  # no busy loop
+        self.assertIn(remote.uid, main.acceptings)
+
+        other = self.open(other)
+        self.loop.run_until_complete(asyncio.wait_for(task, 5.0))
+        self.wait(lambda: len(other.stack.rxMsgs) == len(msgs))
+        self.assertEqual([msg for msg, name in other.stack.rxMsgs], msgs)
+        self.assertEqual(main.acceptings, {})
+
+    def testReceiveDeferred(self):
+        '''
+        Test socket is not watched while receives defer and resumes on drain
+        '''
+        console.terse("{0}\n".format(self.testReceiveDeferred.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = self.open(laning.LaneStack(store=self.store,
+                                          name='main',
+                                          uid=1,
+                                          lanename='cherry',
+                                          sockdirpath=dirpath))
+        other = self.open(laning.LaneStack(store=self.store,
+                                           name='other',
+                                           uid=1,
+                                           lanename='cherry',
+                                           sockdirpath=dirpath,
+                                           rxMsgsHigh=2,
+                                           rxMsgsLow=0))
+        main.stack.addRemote(yarding.RemoteYard(stack=main.stack, ha=other.stack.ha))
+        self.assertTrue(other.reading)
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(1000))
+        msgs = [odict(index=i, content=stuff) for i in range(200)]
+        for msg in msgs:
+            self.assertTrue(main.stack.transmit(msg))
+        main.wake()
+        self.wait(lambda: other.stack.receivesDeferring())
+        self.assertFalse(other.reading)
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+        self.assertTrue(main.stack.txes)  # other socket full so sends retried
+        self.assertIsNotNone(main.retrier)
+        self.assertEqual(other.stack.stats.get('rx_msgs_deferred', 0), 0)  # not polled
+
+        async def drain():
+            received = []
+            async for msg, name in other:
+                received.append(msg)
+                if len(received) == len(msgs):
+                    return received
+        received = self.loop.run_until_complete(asyncio.wait_for(drain(), 10.0))
+        self.assertEqual(received, msgs)
+        self.assertEqual(len(main.stack.txes), 0)
+        self.assertTrue(other.reading)
+
+    def testLaneRing(self):
+        '''
+        Test lane stacks message over shared memory ring on asyncio
+        '''
+        console.terse("{0}\n".format(self.testLaneRing.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = self.open(laning.LaneStack(store=self.store,
+                                          name='main',
+                                          uid=1,
+                                          lanename='cherry',
+                                          sockdirpath=dirpath,
+                                          ring=True,
+                                          ringSize=1024 * 1024))
+        other = self.open(laning.LaneStack(store=self.store,
+                                           name='other',
+                                           uid=1,
+                                           lanename='cherry',
+                                           sockdirpath=dirpath,
+                                           ring=True,
+                                           ringSize=1024 * 1024))
+        main.stack.addRemote(yarding.RemoteYard(stack=main.stack, ha=other.stack.ha))
+        remote = main.stack.remotes.values()[0]
+        self.assertTrue(main.stack.ringed(remote))
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(20000))  # 200KB
+        msgs = [odict(index=i, content=stuff) for i in range(8)]  # overfills ring
+
+        async def exchange():
+            for msg in msgs:
+                await main.send(msg, remote.uid)
+            received = []
+            async for msg, name in other:
+                received.append((msg, name))
+                if len(received) == len(msgs):
+                    return received
+        received = self.loop.run_until_complete(asyncio.wait_for(exchange(), 5.0))
+        self.assertEqual(received, [(msg, 'main') for msg in msgs])
+        self.assertEqual(other.stack.stats.get('invalid_page', 0), 0)
+
+    @unittest.skipIf(not passing.Passable, "descriptor passing not supported")
+    def testLaneFdPass(self):
+        '''
+        Test lane stacks pass large messages by file descriptor on asyncio
+        '''
+        console.terse("{0}\n".format(self.testLaneFdPass.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = self.open(laning.LaneStack(store=self.store,
+                                          name='main',
+                                          uid=1,
+                                          lanename='cherry',
+                                          sockdirpath=dirpath,
+                                          fdThreshold=raeting.UXD_MAX_PACKET_SIZE))
+        other = self.open(laning.LaneStack(store=self.store,
+                                           name='other',
+                                           uid=1,
+                                           lanename='cherry',
+                                           sockdirpath=dirpath))
+        main.stack.addRemote(yarding.RemoteYard(stack=main.stack, ha=other.stack.ha))
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(200000))  # 2MB
+        msgs = [odict(index=i, content=stuff) for i in range(3)]
+
+        async def exchange():
+            for msg in msgs:
+                await main.send(msg)
+            received = []
+            async for msg, name in other:
+                received.append((msg, name))
+                if len(received) == len(msgs):
+                    return received
+        received = self.loop.run_until_complete(asyncio.wait_for(exchange(), 5.0))
+        self.assertEqual(received, [(msg, 'main') for msg in msgs])
+        self.assertEqual(main.stack.stats['page_fd_tx'], 3)
+        self.assertEqual(other.stack.stats['page_fd_rx'], 3)
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testRoadLoopback',
+             'testLaneLoopback',
+             'testSendDeferred',
+             'testReceiveDeferred',
+             'testLaneRing',
+             'testLaneFdPass', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testBasic')
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for consoling module
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import shutil
+import tempfile
+
+from ioflo.aid.odicting import odict
+from ioflo.base.consoling import getConsole, Console
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import consoling
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+
+class Formatted(object):
+    '''
+    Value that counts how often it is formatted
+    '''
+    def __init__(self):
+        self.count = 0
+
+    def __format__(self, spec):
+        self.count += 1
+        return 'formatted'
+
+
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp(prefix="raet", suffix="consoling")
+        self.path = os.path.join(self.dirpath, 'console.txt')
+        self.console = Console(name='test', verbosity=Console.Wordage.terse, path=self.path)
+        self.log = consoling.Logger(console=self.console)
+
+    def tearDown(self):
+        self.console.close()
+        if os.path.exists(self.dirpath):
+            shutil.rmtree(self.dirpath)
+
+    def written(self):
+        self.console.flush()
+        with open(self.path) as f:
+            return f.read()
+
+    def testLazy(self):
+        '''
+        Test lines are formatted only when console verbosity writes them
+        '''
+        console.terse("{0}\n".format(self.testLazy.__doc__))
+        value = Formatted()
+        self.log.concise("concise {0}\n", value)
+        self.log.verbose("verbose {0}\n", value)
+        self.log.profuse("profuse {0}\n", value)
+        self.log.write(consoling.CONCISE, "write {0}\n", value)
+        self.assertEqual(value.count, 0)
+        self.assertFalse(self.log.enabled(consoling.CONCISE))
+        self.assertTrue(self.log.enabled(consoling.TERSE))
+        self.log.terse("terse {0} {1[0]} {name}\n", value, (1, ), name='x')
+        self.log.terse("no args {0}\n")  # not formatted without arguments
+        self.assertEqual(value.count, 1)
+
+        self.console.reinit(verbosity=consoling.VERBOSE)
+        self.assertTrue(self.log.enabled(consoling.VERBOSE))
+        self.assertFalse(self.log.enabled(consoling.PROFUSE))
+        self.log.concise("concise {0}\n", value)
+        self.log.verbose("verbose {0}\n", value)
+        self.log.profuse("profuse {0}\n", value)
+        self.assertEqual(value.count, 3)
+        self.assertEqual(self.written(), "terse formatted 1 x\nno args {0}\n"
+                                         "concise formatted\nverbose formatted\n")
+
+    def testDump(self):
+        '''
+        Test dumps are gated, sampled and truncated
+        '''
+        console.terse("{0}\n".format(self.testDump.__doc__))
+        log = consoling.Logger(console=self.console, dumpSample=0.5, dumpSize=4)
+        log.dump(consoling.VERBOSE, "hidden", b'data')
+        self.assertEqual(self.written(), "")
+        self.assertEqual(log.accrued, 0.0)  # unsampled when gated
+
+        self.console.reinit(verbosity=consoling.VERBOSE)
+        for i in range(4):
+            log.dump(consoling.VERBOSE, "{0} packet {1}", b'abcdefgh', 'main', i)
+        log.dump(consoling.VERBOSE, "body", odict(a=1))
+        log.dump(consoling.VERBOSE, "body", odict(a=2))
+        self.assertEqual(self.written(),
+                         "main packet 1\nb'abcd'... 4 more\n"
+                         "main packet 3\nb'abcd'... 4 more\n"
+                         "body\n{0}\n".format(odict(a=2)))
+
+    def testGetLogger(self):
+        '''
+        Test loggers are shared per console name
+        '''
+        console.terse("{0}\n".format(self.testGetLogger.__doc__))
+        log = consoling.getLogger()
+        self.assertIs(log, consoling.getLogger('console'))
+        self.assertIs(log.console, getConsole())
+        other = consoling.getLogger('raettest')
+        self.assertIs(other.console, getConsole('raettest'))
+        self.assertIsNot(other, log)
+
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = [
+                'testLazy',
+                'testDump',
+                'testGetLogger',
+            ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    #runAll() #run all unittests
+
+    runSome()#only run some
+
+    #runOne('testLazy')
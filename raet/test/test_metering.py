@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for metering module
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import json
+import shutil
+import tempfile
+
+from ioflo.aid.odicting import odict
+from ioflo.aid.timing import StoreTimer
+from ioflo.base.storing import Store
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import raeting, metering
+from raet.road import stacking
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.store = Store(stamp=0.0)
+        self.timer = StoreTimer(self.store)
+        self.stats = odict()
+        self.registry = metering.Registry(stats=self.stats, timer=self.timer)
+        self.dirpath = tempfile.mkdtemp(prefix="raet", suffix="metering")
+
+    def tearDown(self):
+        if os.path.exists(self.dirpath):
+            shutil.rmtree(self.dirpath)
+
+    def testHistogram(self):
+        '''
+        Test histogram bucket counts, quantiles and snapshot
+        '''
+        console.terse("{0}\n".format(self.testHistogram.__doc__))
+        histogram = metering.Histogram(buckets=(1, 2, 4, 8), name='sizes')
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in (1, 1, 2, 3, 3, 3, 5, 7, 8, 20):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 3, 3, 1])
+        self.assertEqual(histogram.count, 10)
+        self.assertEqual(histogram.sum, 53)
+        self.assertEqual(histogram.max, 20)
+        self.assertEqual(histogram.quantile(0.5), 4)
+        self.assertEqual(histogram.quantile(0.9), 8)
+        self.assertEqual(histogram.quantile(0.99), 20)
+
+        snap = histogram.snapshot()
+        self.assertEqual(snap['name'], 'sizes')
+        self.assertEqual(snap['mean'], 5.3)
+        self.assertEqual(snap['p50'], 4)
+        self.assertEqual(list(snap['buckets'].items()),
+                         [('1', 2), ('2', 3), ('4', 6), ('8', 9), ('+Inf', 10)])
+
+        histogram.clear()
+        self.assertEqual(histogram.count, 0)
+        self.assertEqual(histogram.counts, [0] * 5)
+
+    def testSnapshot(self):
+        '''
+        Test snapshot splits counters from gauges and computes rates
+        '''
+        console.terse("{0}\n".format(self.testSnapshot.__doc__))
+        depths = []
+        self.stats['message_tx'] = 10
+        self.stats['admission_queue_depth'] = 3
+        self.registry.gauged.add('admission_queue_depth')
+        self.stats['priority_latency'] = odict(interactive=0.5)
+        self.registry.gauge('depth', lambda: len(depths))
+        self.registry.observe('phase_decrypt', 0.0003)
+        self.registry.histogram('remote_rtt', labels=odict(remote='alpha')).observe(0.02)
+        self.store.advanceStamp(2.0)
+        depths.append(None)
+
+        snap = self.registry.snapshot()
+        self.assertEqual(snap['counters'], odict(message_tx=10))
+        self.assertEqual(snap['gauges']['admission_queue_depth'], 3)
+        self.assertEqual(snap['gauges']['priority_latency'], odict(interactive=0.5))
+        self.assertEqual(snap['gauges']['depth'], 1)
+        self.assertEqual(snap['elapsed'], 2.0)
+        self.assertEqual(snap['rates']['message_tx'], 5.0)
+        self.assertEqual(snap['histograms']['phase_decrypt']['count'], 1)
+        rtt = snap['histograms']['remote_rtt{remote=alpha}']
+        self.assertEqual(rtt['labels'], odict(remote='alpha'))
+        self.assertEqual(rtt['p99'], 0.02)
+
+        self.registry.discard('remote_rtt', odict(remote='alpha'))
+        self.assertNotIn('remote_rtt{remote=alpha}', self.registry.histograms)
+        self.registry.clear()
+        self.assertEqual(self.registry.histograms['phase_decrypt'].count, 0)
+
+    def testExport(self):
+        '''
+        Test json and text exposition export and atomic write
+        '''
+        console.terse("{0}\n".format(self.testExport.__doc__))
+        self.stats['message_tx'] = 4
+        self.stats['bad'] = 'text'
+        self.registry.gauge('depth', lambda: 2)
+        self.registry.histogram('remote_rtt',
+                                buckets=(0.1, 1.0),
+                                labels=odict(remote='alpha')).observe(0.5)
+
+        snap = json.loads(self.registry.dumps())
+        self.assertEqual(snap['counters']['message_tx'], 4)
+        self.assertEqual(snap['histograms']['remote_rtt{remote=alpha}']['count'], 1)
+
+        text = self.registry.exposition(labels=odict(stack='main'))
+        lines = text.splitlines()
+        self.assertIn('# TYPE raet_message_tx counter', lines)
+        self.assertIn('raet_message_tx{stack="main"} 4', lines)
+        self.assertIn('# TYPE raet_depth gauge', lines)
+        self.assertIn('raet_depth{stack="main"} 2', lines)
+        self.assertIn('# TYPE raet_remote_rtt histogram', lines)
+        self.assertIn('raet_remote_rtt_bucket{stack="main",remote="alpha",le="0.1"} 0', lines)
+        self.assertIn('raet_remote_rtt_bucket{stack="main",remote="alpha",le="1.0"} 1', lines)
+        self.assertIn('raet_remote_rtt_count{stack="main",remote="alpha"} 1', lines)
+        self.assertNotIn('bad', text)
+
+        path = os.path.join(self.dirpath, 'main.prom')
+        self.registry.write(path)
+        with open(path) as f:
+            self.assertEqual(f.read(), self.registry.exposition())
+        path = os.path.join(self.dirpath, 'main.json')
+        self.registry.write(path, fmt='json')
+        with open(path) as f:
+            self.assertEqual(json.load(f)['counters']['message_tx'], 4)
+        self.assertFalse(os.path.exists(path + '.tmp'))
+        self.assertRaises(raeting.RaetError, self.registry.write, path, fmt='xml')
+
+    def testExportStack(self):
+        '''
+        Test json export of stack stats with pages queued on txes
+        '''
+        console.terse("{0}\n".format(self.testExportStack.__doc__))
+        main = stacking.RoadStack(store=self.store,
+                                  name='main',
+                                  ha=("127.0.0.1", raeting.RAET_PORT),
+                                  dirpath=os.path.join(self.dirpath, 'main'))
+        try:
+            ha = ("127.0.0.1", raeting.RAET_TEST_PORT)
+            main.queueTx(b'queued', ha)
+            self.assertEqual(len(main.txes), 1)
+            main.updateTxesStats()
+            self.assertEqual(list(main.stats['txes_depths'].keys()), [ha])
+
+            snap = json.loads(main.metrics.dumps())
+            self.assertEqual(snap['gauges']['txes_depths'], {str(ha): 1})
+            path = os.path.join(self.dirpath, 'main.json')
+            main.metrics.write(path, fmt='json')
+            with open(path) as f:
+                self.assertEqual(json.load(f)['gauges']['txes_depth_max'], 1)
+        finally:
+            main.server.close()
+            main.clearAllDir()
+
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = [
+                'testHistogram',
+                'testSnapshot',
+                'testExport',
+                'testExportStack',
+            ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    #runAll() #run all unittests
+
+    runSome()#only run some
+
+    #runOne('testHistogram')
@@ -238,6 +238,30 @@ class BasicTestCase(unittest.TestCase):
         self.assertEqual(len(uuids), 1024)
         self.assertEqual(len(set(uuids)), len(uuids))
 
+    def testPrivateerPool(self):
+        '''
+        Test precomputed short term key pair pool
+        '''
+        console.terse("{0}\n".format(self.testPrivateerPool.__doc__))
+        pool = nacling.PrivateerPool(size=4, fill=False)
+        self.assertEqual(len(pool), 0)
+        self.assertIs(pool.get(), None)  # exhausted starts refill
+        self.assertEqual(pool.misses, 1)
+        pool.worker.join()
+        self.assertEqual(len(pool), 4)
+
+        privateers = [pool.get() for i in range(4)]
+        self.assertEqual(pool.hits, 4)
+        for privateer in privateers:
+            self.assertIsInstance(privateer, nacling.Privateer)
+        self.assertEqual(len(set(privateer.keyhex for privateer in privateers)), 4)
+        pool.worker.join()
+        self.assertEqual(len(pool), 4)
+
+        pool = nacling.PrivateerPool(size=0)
+        self.assertIs(pool.worker, None)
+        self.assertIs(pool.get(), None)
+
 class PartTestCase(unittest.TestCase):
     """
     Test encrytion of handshake parts
@@ -319,7 +343,8 @@ def runSome():
     tests = []
     names = ['testSign',
              'testEncrypt'
-             'testUuid', ]
+             'testUuid',
+             'testPrivateerPool', ]
     tests.extend(map(BasicTestCase, names))
 
     names = ['testBlank',
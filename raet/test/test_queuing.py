@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for queuing module
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import raeting, queuing
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.alpha = ('127.0.0.1', 7530)
+        self.beta = ('127.0.0.1', 7531)
+        self.gamma = ('127.0.0.1', 7532)
+
+    def tearDown(self):
+        pass
+
+    def testFairQueue(self):
+        '''
+        Test FairQueue deque interface
+        '''
+        console.terse("{0}\n".format(self.testFairQueue.__doc__))
+        txes = queuing.FairQueue()
+        self.assertEqual(txes.quantum, queuing.FairQueue.Quantum)
+        self.assertFalse(txes)
+        self.assertEqual(len(txes), 0)
+        self.assertRaises(IndexError, txes.popleft)
+        self.assertRaises(IndexError, txes.pop)
+
+        txes.append((b'a1', self.alpha))
+        txes.append((b'a2', self.alpha))
+        txes.append((b'b1', self.beta))
+        self.assertTrue(txes)
+        self.assertEqual(len(txes), 3)
+        self.assertEqual(list(txes), [(b'a1', self.alpha),
+                                      (b'a2', self.alpha),
+                                      (b'b1', self.beta)])
+        self.assertEqual(txes.depths(), {self.alpha: 2, self.beta: 1})
+
+        self.assertEqual(txes.pop(), (b'b1', self.beta))  # last appended
+        self.assertEqual(txes.depths(), {self.alpha: 2})
+        txes.appendleft((b'a0', self.alpha))
+        self.assertEqual(txes.popleft(), (b'a0', self.alpha))
+        self.assertEqual(txes.popleft(), (b'a1', self.alpha))
+        self.assertEqual(len(txes), 1)
+        txes.clear()
+        self.assertFalse(txes)
+        self.assertEqual(txes.depths(), {})
+
+    def testFairQueueRoundRobin(self):
+        '''
+        Test FairQueue serves destinations by deficit round robin
+        '''
+        console.terse("{0}\n".format(self.testFairQueueRoundRobin.__doc__))
+        txes = queuing.FairQueue(quantum=100)
+
+        for i in range(10):  # bulk backlog to alpha ahead of everything else
+            txes.append((b'a' * 100, self.alpha))
+        txes.append((b'b' * 10, self.beta))
+        txes.append((b'c' * 10, self.gamma))
+
+        order = [txes.popleft()[1] for i in range(3)]
+        self.assertEqual(order, [self.alpha, self.beta, self.gamma])
+        order = [txes.popleft()[1] for i in range(len(txes))]
+        self.assertEqual(order, [self.alpha] * 9)
+
+        # byte quanta so small packets get proportionally more turns
+        for i in range(4):
+            txes.append((b'a' * 100, self.alpha))
+        for i in range(8):
+            txes.append((b'b' * 50, self.beta))
+        order = [txes.popleft()[1] for i in range(len(txes))]
+        self.assertEqual(order, [self.alpha, self.beta, self.beta] * 4)
+
+        # packets larger than quantum accumulate deficit over rounds
+        txes.append((b'a' * 250, self.alpha))
+        txes.append((b'b' * 100, self.beta))
+        txes.append((b'b' * 100, self.beta))
+        order = [txes.popleft()[1] for i in range(len(txes))]
+        self.assertEqual(order, [self.beta, self.beta, self.alpha])
+        self.assertEqual(txes.deficits, {})
+
+        # whole rounds credited at once not one quantum per turn
+        txes = queuing.FairQueue(quantum=1)
+        txes.append((b'a' * 1000000, self.alpha))
+        txes.append((b'b' * 500000, self.beta))
+        txes.append((b'c' * 400001, self.gamma))
+        self.assertEqual(txes.popleft(), (b'c' * 400001, self.gamma))
+        self.assertEqual(txes.deficits, {self.alpha: 400002, self.beta: 400001})
+        order = [txes.popleft()[1] for i in range(len(txes))]
+        self.assertEqual(order, [self.beta, self.alpha])
+        self.assertEqual(txes.deficits, {})
+
+    def testClassQueue(self):
+        '''
+        Test ClassQueue serves traffic classes by strict priority
+        '''
+        console.terse("{0}\n".format(self.testClassQueue.__doc__))
+        stamps = [0.0]
+        txes = queuing.ClassQueue(quantum=100, clock=lambda: stamps[0])
+        self.assertEqual(txes.default, raeting.Priority.interactive)
+        self.assertEqual(txes.quantum, 100)
+        self.assertFalse(txes)
+        self.assertRaises(IndexError, txes.popleft)
+
+        for i in range(3):
+            txes.append((b'bulk', self.alpha), raeting.Priority.bulk)
+        txes.append((b'interactive', self.beta))
+        txes.append((b'control', self.alpha), raeting.Priority.control)
+        self.assertEqual(len(txes), 5)
+        self.assertEqual(txes.depths(), {self.alpha: 4, self.beta: 1})
+        self.assertEqual(txes.classDepths(), {'control': 1,
+                                              'interactive': 1,
+                                              'bulk': 3})
+        self.assertEqual(list(txes)[0], (b'control', self.alpha))
+
+        stamps[0] = 1.0
+        self.assertEqual(txes.popleft(), (b'control', self.alpha))
+        self.assertEqual(txes.current, raeting.Priority.control)
+        self.assertEqual(txes.stamped, 0.0)
+        stamps[0] = 2.0
+        txes.appendleft((b'control', self.alpha), txes.current, txes.stamped)  # requeue
+        self.assertEqual(txes.popleft(), (b'control', self.alpha))
+        self.assertEqual(txes.stamped, 0.0)  # original enqueue stamp kept
+        stamps[0] = 3.0
+        self.assertEqual(txes.popleft(), (b'interactive', self.beta))
+        self.assertEqual(txes.popleft(), (b'bulk', self.alpha))
+        self.assertEqual(txes.current, raeting.Priority.bulk)
+        self.assertEqual(txes.latencies['control'], [2, 3.0, 2.0])
+        self.assertEqual(txes.latencies['interactive'], [1, 3.0, 3.0])
+        self.assertEqual(txes.latencies['bulk'], [1, 3.0, 3.0])
+
+        txes.append((b'control', self.beta), raeting.Priority.control)
+        self.assertEqual(txes.pop(), (b'control', self.beta))  # last appended
+        self.assertEqual(len(txes), 2)
+        txes.clear()
+        self.assertFalse(txes)
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testFairQueue',
+             'testFairQueueRoundRobin',
+             'testClassQueue', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testBasic')
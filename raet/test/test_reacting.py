@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for reacting module
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import shutil
+import tempfile
+
+from ioflo.aid.odicting import odict
+from ioflo.base.storing import Store
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import raeting, reacting
+from raet.road import estating, stacking as roading
+from raet.lane import yarding, stacking as laning
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+@unittest.skipIf(reacting.selectors is None, "selectors module not available")
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.store = Store(stamp=0.0)
+        self.tempDirpath = tempfile.mkdtemp(prefix="raet",  suffix="base", dir='/tmp')
+        self.stamps = [0.0]
+        self.reactor = reacting.Reactor(period=0.5)
+
+    def tearDown(self):
+        for stack in self.reactor.stacks:
+            stack.server.close()
+        self.reactor.close()
+        shutil.rmtree(self.tempDirpath)
+
+    def testLaneReactor(self):
+        '''
+        Test reactor sleeps while idle and services only ready lane stacks
+        '''
+        console.terse("{0}\n".format(self.testLaneReactor.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = laning.LaneStack(store=self.store,
+                                name='main',
+                                uid=1,
+                                lanename='cherry',
+                                sockdirpath=dirpath)
+        other = laning.LaneStack(store=self.store,
+                                 name='other',
+                                 uid=1,
+                                 lanename='cherry',
+                                 sockdirpath=dirpath)
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        other.addRemote(yarding.RemoteYard(stack=other, ha=main.ha))
+        self.reactor.add(main)
+        self.reactor.add(other)
+        self.assertRaises(raeting.StackError, self.reactor.add, main)
+
+        self.assertEqual(self.reactor.timeout(), 0.5)  # idle waits full period
+        start = reacting.Clock()
+        self.assertEqual(self.reactor.serviceOnce(timeout=0.05), [])
+        self.assertTrue(reacting.Clock() - start >= 0.04)
+        self.assertTrue(self.store.stamp >= 0.04)  # store follows clock
+
+        main.transmit(odict(content='Hello other'))
+        self.assertEqual(self.reactor.timeout(), 0.0)
+        self.assertEqual(self.reactor.serviceOnce(timeout=1.0), [main])
+        self.assertEqual(self.reactor.serviceOnce(timeout=1.0), [other])
+        self.assertEqual(len(other.rxMsgs), 1)
+        self.assertEqual(other.rxMsgs.popleft(), ({'content': 'Hello other'}, 'main'))
+
+        self.reactor.remove(main)
+        self.assertEqual(self.reactor.stacks, [other])
+        main.server.close()
+
+    def testLaneReactorBusy(self):
+        '''
+        Test reactor waits for retry not writability when peer is busy and
+        drops read interest while receives are deferred
+        '''
+        console.terse("{0}\n".format(self.testLaneReactorBusy.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = laning.LaneStack(store=self.store,
+                                name='main',
+                                uid=1,
+                                lanename='cherry',
+                                sockdirpath=dirpath)
+        other = laning.LaneStack(store=self.store,
+                                 name='other',
+                                 uid=1,
+                                 lanename='cherry',
+                                 sockdirpath=dirpath,
+                                 rxMsgsHigh=1,
+                                 rxMsgsLow=0)
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        self.reactor.add(main)
+
+        stuff = "".join(str(i).rjust(10, " ") for i in range(1000))
+        for i in range(2000):  # other never reads so its receive buffer fills
+            main.transmit(odict(index=i, content=stuff))
+        self.reactor.serviceOnce(timeout=0.0)
+        self.assertTrue(len(main.txes) > 0)
+        self.assertIsNotNone(main.txDeferred)
+        self.assertAlmostEqual(main.txesDeadline(), main.txRetry)
+        self.assertEqual(self.reactor.interests[id(main)][1], reacting.selectors.EVENT_READ)
+        services = 0
+        stop = reacting.Clock() + 0.2
+        while reacting.Clock() < stop:
+            services += len(self.reactor.serviceOnce(timeout=0.2))
+        self.assertTrue(0 < services <= 0.2 / main.txRetry + 2)  # no busy spin
+
+        self.reactor.remove(main)  # else its retry deadline wakes the reactor
+        self.reactor.add(other)
+        self.reactor.serviceOnce(timeout=0.0)
+        self.assertTrue(other.rxMsgs)
+        self.assertTrue(other.receivesDeferring())
+        main.serviceTxes()  # refill other's socket so it is readable while deferring
+        self.reactor.timeout()
+        self.assertEqual(self.reactor.interests[id(other)][1], 0)
+        start = reacting.Clock()
+        self.assertNotIn(other, self.reactor.serviceOnce(timeout=0.1))
+        self.assertTrue(reacting.Clock() - start >= 0.09)
+
+        other.rxMsgs.clear()  # consumer catches up
+        self.reactor.timeout()
+        self.assertEqual(self.reactor.interests[id(other)][1], reacting.selectors.EVENT_READ)
+        self.assertIn(other, self.reactor.serviceOnce(timeout=0.1))
+        self.assertTrue(other.rxMsgs)
+        main.server.close()
+
+    def testRoadReactor(self):
+        '''
+        Test reactor wakes for road transaction timers and completes join
+        '''
+        console.terse("{0}\n".format(self.testRoadReactor.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'road', 'keep')
+        main = roading.RoadStack(store=self.store,
+                                 name='main',
+                                 main=True,
+                                 auto=raeting.AutoMode.once.value,
+                                 ha=("127.0.0.1", raeting.RAET_PORT),
+                                 dirpath=os.path.join(dirpath, 'main'))
+        other = roading.RoadStack(store=self.store,
+                                  name='other',
+                                  auto=raeting.AutoMode.once.value,
+                                  ha=("127.0.0.1", raeting.RAET_TEST_PORT),
+                                  dirpath=os.path.join(dirpath, 'other'))
+        self.assertIs(main.nextDeadline(), None)
+        self.reactor.add(main)
+        self.reactor.add(other)
+
+        remote = estating.RemoteEstate(stack=other,
+                                       fuid=0,
+                                       sid=0,
+                                       ha=main.local.ha)
+        other.addRemote(remote)
+        other.join()
+        deadline = other.nextDeadline()
+        self.assertTrue(deadline is not None and deadline <= other.JoinerTimeout)
+        self.assertTrue(self.reactor.timeout() <= deadline)
+
+        self.reactor.run(duration=0.5)
+        self.assertTrue(remote.joined)
+        self.assertEqual(len(other.transactions), 0)
+        self.assertEqual(len(main.transactions), 0)
+        self.assertIs(other.nextDeadline(), None)
+        for stack in [main, other]:
+            stack.clearAllDir()
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testLaneReactor',
+             'testLaneReactorBusy',
+             'testRoadReactor', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testBasic')
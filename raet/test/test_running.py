@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for running module
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import time
+import select
+import shutil
+import tempfile
+
+from ioflo.aid.odicting import odict
+from ioflo.base.storing import Store
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import raeting, reacting, running
+from raet.road import estating, stacking as roading
+from raet.lane import yarding, stacking as laning
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+@unittest.skipIf(reacting.selectors is None, "selectors module not available")
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.tempDirpath = tempfile.mkdtemp(prefix="raet",  suffix="base", dir='/tmp')
+        self.runners = []
+
+    def tearDown(self):
+        for runner in self.runners:
+            runner.close(timeout=2.0)
+        shutil.rmtree(self.tempDirpath)
+
+    def launch(self, stack, **kwa):
+        '''
+        Wrap stack in StackRunner and start it
+        '''
+        kwa.setdefault('period', 0.5)
+        runner = running.StackRunner(stack, **kwa)
+        runner.start()
+        self.runners.append(runner)
+        return runner
+
+    def wait(self, predicate, timeout=5.0):
+        '''
+        Sleep until predicate is true or timeout
+        Returns result of predicate
+        '''
+        end = time.time() + timeout
+        while not predicate() and time.time() < end:
+            time.sleep(0.01)
+        return predicate()
+
+    def testLaneRunner(self):
+        '''
+        Test lane stacks on runner threads exchange messages with wakeup socket
+        '''
+        console.terse("{0}\n".format(self.testLaneRunner.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = laning.LaneStack(store=Store(stamp=0.0),
+                                name='main',
+                                uid=1,
+                                lanename='cherry',
+                                sockdirpath=dirpath)
+        other = laning.LaneStack(store=Store(stamp=0.0),
+                                 name='other',
+                                 uid=1,
+                                 lanename='cherry',
+                                 sockdirpath=dirpath)
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        other.addRemote(yarding.RemoteYard(stack=other, ha=main.ha))
+        main = self.launch(main)
+        other = self.launch(other, wakeup=True)
+        self.assertRaises(raeting.StackError, main.fileno)
+
+        readable, writeable, errored = select.select([other], [], [], 0.0)
+        self.assertEqual(readable, [])
+        self.assertIs(other.receive(), None)
+
+        stuff = ''.join(str(i % 10) for i in range(raeting.UXD_MAX_PACKET_SIZE * 2))
+        msgs = [odict(content='Hello other'), odict(content=stuff)]
+        for msg in msgs:
+            main.transmit(msg)
+
+        received = []
+        while len(received) < len(msgs):
+            readable, writeable, errored = select.select([other], [], [], 5.0)
+            self.assertEqual(readable, [other])
+            while True:
+                rx = other.receive()
+                if rx is None:
+                    break
+                received.append(rx)
+        self.assertEqual(received, [(msg, 'main') for msg in msgs])
+        readable, writeable, errored = select.select([other], [], [], 0.0)
+        self.assertEqual(readable, [])
+
+        main.stop(timeout=2.0)
+        self.assertFalse(main.thread.is_alive())
+        self.assertIs(main.error, None)
+        main.transmit(odict(content='Later'))
+        self.assertEqual(len(main.txMsgs), 1)  # queued while stopped
+        main.start()
+        self.assertTrue(self.wait(lambda: other.rxMsgs))
+        self.assertEqual(other.receive(), ({'content': 'Later'}, 'main'))
+
+    def testLaneRunnerDrain(self):
+        '''
+        Test runner held at rx high mark resumes when consumer drains
+        without waiting for its idle period
+        '''
+        console.terse("{0}\n".format(self.testLaneRunnerDrain.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'lane', 'keep')
+        main = laning.LaneStack(store=Store(stamp=0.0),
+                                name='main',
+                                uid=1,
+                                lanename='cherry',
+                                sockdirpath=dirpath)
+        other = laning.LaneStack(store=Store(stamp=0.0),
+                                 name='other',
+                                 uid=1,
+                                 lanename='cherry',
+                                 sockdirpath=dirpath,
+                                 rxMsgsHigh=2,
+                                 rxMsgsLow=0)
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+        main = self.launch(main)
+        other = self.launch(other, period=30.0)
+
+        msgs = [odict(index=i, content='Hello other') for i in range(10)]
+        for msg in msgs:
+            main.transmit(msg)
+        self.assertTrue(self.wait(lambda: len(other.rxMsgs) == 2 and other.stack.rxMsgs))
+        time.sleep(0.1)
+        self.assertEqual(len(other.rxMsgs), 2)  # held at high mark
+
+        received = []
+        end = time.time() + 3.0  # well before idle period
+        while len(received) < len(msgs) and time.time() < end:
+            rx = other.receive()
+            if rx is None:
+                time.sleep(0.01)
+            else:
+                received.append(rx)
+        self.assertEqual(received, [(msg, 'main') for msg in msgs])
+        self.assertIs(other.error, None)
+
+    def testRoadRunner(self):
+        '''
+        Test road stacks on runner threads join allow and exchange messages
+        '''
+        console.terse("{0}\n".format(self.testRoadRunner.__doc__))
+        dirpath = os.path.join(self.tempDirpath, 'road', 'keep')
+        main = roading.RoadStack(store=Store(stamp=0.0),
+                                 name='main',
+                                 main=True,
+                                 auto=raeting.AutoMode.once.value,
+                                 ha=("127.0.0.1", raeting.RAET_PORT),
+                                 dirpath=os.path.join(dirpath, 'main'))
+        other = roading.RoadStack(store=Store(stamp=0.0),
+                                  name='other',
+                                  auto=raeting.AutoMode.once.value,
+                                  ha=("127.0.0.1", raeting.RAET_TEST_PORT),
+                                  dirpath=os.path.join(dirpath, 'other'))
+        remote = estating.RemoteEstate(stack=other,
+                                       fuid=0,
+                                       sid=0,
+                                       ha=main.local.ha)
+        other.addRemote(remote)
+        main = self.launch(main)
+        other = self.launch(other)
+        other.call(other.stack.join, cascade=True)
+        self.assertTrue(self.wait(lambda: remote.allowed and not main.stack.transactions))
+
+        other.transmit(odict(content='Hello main'), remote.uid)
+        self.assertTrue(self.wait(lambda: main.rxMsgs))
+        self.assertEqual(main.receive(), ({'content': 'Hello main'}, 'other'))
+        main.transmit(odict(content='Hello other'), main.stack.remotes.values()[0].uid,
+                      None, raeting.Priority.bulk)
+        self.assertTrue(self.wait(lambda: other.rxMsgs))
+        self.assertEqual(other.receive(), ({'content': 'Hello other'}, 'main'))
+        for runner in [main, other]:
+            self.assertIs(runner.error, None)
+            runner.stack.clearAllDir()
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testLaneRunner',
+             'testLaneRunnerDrain',
+             'testRoadRunner', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testBasic')
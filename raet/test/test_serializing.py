@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for serializing module
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from ioflo.aid.odicting import odict
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import raeting, serializing
+from raet.raeting import BodyKind, PackKind
+from raet.road import packeting
+from raet.lane import paging
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class FakeStack(object):
+    '''
+    Minimal stack providing .ordered and .lazy for packet and page parsing
+    '''
+    def __init__(self, ordered=True, lazy=False):
+        self.ordered = ordered
+        self.lazy = lazy
+
+
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.data = odict([('route', odict([('src', 'alpha'), ('dst', 'beta')])),
+                           ('content', 'Hello'),
+                           ('count', 3)])
+
+    def tearDown(self):
+        pass
+
+    def testRegistry(self):
+        '''
+        Test codec registration, lookup and plain dict fallback
+        '''
+        console.terse("{0}\n".format(self.testRegistry.__doc__))
+
+        registry = serializing.Registry()
+        self.assertIs(registry.lookup(BodyKind, BodyKind.json), None)
+
+        codec = serializing.JsonCodec()
+        registry.register(BodyKind, BodyKind.json, codec)
+        self.assertIs(registry.lookup(BodyKind, BodyKind.json), codec)
+        self.assertIs(registry.lookup(BodyKind, BodyKind.json.value), codec)
+        self.assertIs(registry.lookup(BodyKind, BodyKind.json, ordered=False), codec)
+        self.assertIs(registry.lookup(PackKind, PackKind.json), None)
+
+        plain = serializing.JsonCodec(ordered=False)
+        registry.register(BodyKind, BodyKind.json, plain, ordered=False)
+        self.assertIs(registry.lookup(BodyKind, BodyKind.json, ordered=False), plain)
+        self.assertIs(registry.lookup(BodyKind, BodyKind.json), codec)
+
+        for kinds, kind in [(BodyKind, BodyKind.json), (PackKind, PackKind.json)]:
+            for ordered in (True, False):
+                codec = serializing.lookup(kinds, kind, ordered)
+                self.assertIsInstance(codec, serializing.JsonCodec)
+                self.assertEqual(codec.ordered, ordered)
+        self.assertIs(serializing.lookup(BodyKind, BodyKind.raw), None)
+
+        self.assertRaises(TypeError, serializing.Codec)  # abstract
+
+        class DumpCodec(serializing.Codec):
+            def dumps(self, data):
+                return b''
+        self.assertRaises(TypeError, DumpCodec)  # loads not overridden
+
+    def testJsonCodec(self):
+        '''
+        Test json codec round trip as odict and plain dict
+        '''
+        console.terse("{0}\n".format(self.testJsonCodec.__doc__))
+
+        codec = serializing.JsonCodec()
+        packed = codec.dumps(self.data)
+        self.assertEqual(packed, b'{"route":{"src":"alpha","dst":"beta"},"content":"Hello","count":3}')
+        data = codec.loads(packed)
+        self.assertIsInstance(data, odict)
+        self.assertIsInstance(data['route'], odict)
+        self.assertEqual(list(data.keys()), ['route', 'content', 'count'])
+        self.assertEqual(data, self.data)
+
+        codec = serializing.JsonCodec(ordered=False)
+        data = codec.loads(packed)
+        self.assertIs(type(data), dict)
+        self.assertIs(type(data['route']), dict)
+        self.assertEqual(data, self.data)
+
+    @unittest.skipIf(msgpack is None, "msgpack not installed")
+    def testMsgpackCodec(self):
+        '''
+        Test msgpack codec round trip including binary mode
+        '''
+        console.terse("{0}\n".format(self.testMsgpackCodec.__doc__))
+
+        codec = serializing.MsgpackCodec()
+        data = codec.loads(codec.dumps(self.data))
+        self.assertIsInstance(data, odict)
+        self.assertEqual(data, self.data)
+
+        codec = serializing.MsgpackCodec(ordered=False)
+        data = codec.loads(codec.dumps(self.data))
+        self.assertIs(type(data), dict)
+        self.assertEqual(data, self.data)
+
+        codec = serializing.MsgpackCodec(binary=True)
+        self.data['blob'] = b'\x00\xff\xfe'
+        data = codec.loads(codec.dumps(self.data))
+        self.assertIsInstance(data['blob'], bytes)
+        self.assertEqual(data['blob'], b'\x00\xff\xfe')
+        self.assertEqual(data['content'], 'Hello')
+
+    def testPacketBody(self):
+        '''
+        Test road packet body uses registered codecs and stack ordering
+        '''
+        console.terse("{0}\n".format(self.testPacketBody.__doc__))
+
+        kinds = [BodyKind.json]
+        if msgpack:
+            kinds.append(BodyKind.msgpack)
+        for bk in kinds:
+            for ordered in (True, False):
+                packet = packeting.TxPacket(embody=self.data, data=odict(bk=bk))
+                packet.pack()
+                rxPacket = packeting.RxPacket(stack=FakeStack(ordered),
+                                              packed=packet.packed)
+                rxPacket.parse()
+                self.assertEqual(rxPacket.body.data, self.data)
+                self.assertIs(isinstance(rxPacket.body.data, odict), ordered)
+
+        # replace json codec so body packs with it
+        registry = serializing.Serializers
+        old = registry.codecs[(BodyKind, BodyKind.json, True)]
+        class UpperCodec(serializing.JsonCodec):
+            def dumps(self, data):
+                return super(UpperCodec, self).dumps(
+                        odict((k, v.upper() if isinstance(v, str) else v)
+                              for k, v in data.items()))
+        try:
+            serializing.register(BodyKind, BodyKind.json, UpperCodec())
+            packet = packeting.TxPacket(embody=odict(content='Hello'),
+                                        data=odict(bk=BodyKind.json))
+            packet.pack()
+            self.assertTrue(packet.packed.endswith(b'{"content":"HELLO"}'))
+        finally:
+            serializing.register(BodyKind, BodyKind.json, old)
+
+    def testPageBody(self):
+        '''
+        Test lane page body uses registered codecs and stack ordering
+        '''
+        console.terse("{0}\n".format(self.testPageBody.__doc__))
+
+        kinds = [PackKind.json]
+        if msgpack:
+            kinds.append(PackKind.pack)
+        for pk in kinds:
+            for ordered in (True, False):
+                page = paging.TxPage(data=odict(pk=pk),
+                                     embody=self.data)
+                page.pack()
+                rxPage = paging.RxPage(stack=FakeStack(ordered), packed=page.packed)
+                rxPage.parse()
+                self.assertEqual(rxPage.body.data, self.data)
+                self.assertIs(isinstance(rxPage.body.data, odict), ordered)
+
+    def testLazyBody(self):
+        '''
+        Test lazy body decodes on access and passes bytes through when unmodified
+        '''
+        console.terse("{0}\n".format(self.testLazyBody.__doc__))
+
+        codec = serializing.JsonCodec()
+        packed = codec.dumps(self.data)
+        body = serializing.LazyBody(packed, codec)
+        self.assertFalse(body.decoded)
+        self.assertTrue(body)
+        self.assertEqual(repr(body), 'LazyBody(json 66 bytes)')
+        self.assertIs(serializing.dumps(codec, body), packed)
+        self.assertIs(serializing.dumps(serializing.JsonCodec(ordered=False), body), packed)
+        self.assertFalse(body.decoded)
+
+        self.assertEqual(body['content'], 'Hello')
+        self.assertTrue(body.decoded)
+        self.assertEqual(body, self.data)
+        self.assertEqual(list(body.keys()), ['route', 'content', 'count'])
+        self.assertIs(serializing.dumps(codec, body), packed)
+
+        body['count'] = 4
+        self.assertIs(body.packed, None)
+        self.assertEqual(serializing.dumps(codec, body),
+                         b'{"route":{"src":"alpha","dst":"beta"},"content":"Hello","count":4}')
+        del body['count']
+        self.assertEqual(len(body), 2)
+
+        body = serializing.LazyBody(b'[1, 2]', codec)
+        self.assertRaises(raeting.RaetError, body.get, 'content')
+        body = serializing.LazyBody(b'{bad', codec)
+        self.assertRaises(raeting.RaetError, body.get, 'content')
+
+        page = paging.TxPage(data=odict(pk=PackKind.json), embody=self.data)
+        page.pack()
+        rxPage = paging.RxPage(stack=FakeStack(lazy=True), packed=page.packed)
+        rxPage.parse()
+        body = rxPage.body.data
+        self.assertIsInstance(body, serializing.LazyBody)
+        self.assertFalse(body.decoded)
+        page = paging.TxPage(data=odict(pk=PackKind.json), embody=body)
+        page.pack()
+        self.assertFalse(body.decoded)
+        self.assertTrue(page.packed.endswith(packed))
+
+        if msgpack:  # different format so reserialized
+            packet = packeting.TxPacket(embody=body, data=odict(bk=BodyKind.msgpack))
+            packet.pack()
+            self.assertTrue(body.decoded)
+            rxPacket = packeting.RxPacket(packed=packet.packed)
+            rxPacket.parse()
+            self.assertEqual(rxPacket.body.data, self.data)
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testRegistry',
+             'testJsonCodec',
+             'testMsgpackCodec',
+             'testPacketBody',
+             'testPageBody',
+             'testLazyBody', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testBasic')
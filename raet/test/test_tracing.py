@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for tracing module
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+from ioflo.aid.odicting import odict
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+# Import raet libs
+from raet.abiding import *  # import globals
+from raet import raeting, tracing
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+
+class BasicTestCase(unittest.TestCase):
+    """"""
+
+    def setUp(self):
+        self.events = []
+        self.collector = tracing.Collector(buckets=(0.001, 0.01, 0.05))
+
+    def tearDown(self):
+        pass
+
+    def sink(self, trace, stage, stamp):
+        self.events.append((trace.index, stage, stamp))
+
+    def testSampling(self):
+        '''
+        Test tracer samples fraction of messages and needs a sink
+        '''
+        console.terse("{0}\n".format(self.testSampling.__doc__))
+        tracer = tracing.Tracer(sample=0.25)
+        self.assertIsNone(tracer.start('main', 'tx'))  # no sinks
+        tracer.add(self.sink)
+        traces = [tracer.start('main', 'tx', index=i) for i in range(8)]
+        self.assertEqual([trace.index for trace in traces if trace], [3, 7])
+
+        tracer = tracing.Tracer(sample=0.0, sinks=[self.sink])
+        self.assertFalse(any(tracer.start('main', 'tx') for i in range(100)))
+        tracer = tracing.Tracer(sinks=[self.sink])
+        self.assertTrue(all(tracer.start('main', 'tx') for i in range(100)))
+
+    def testTrace(self):
+        '''
+        Test trace marks fire ordered events until done
+        '''
+        console.terse("{0}\n".format(self.testTrace.__doc__))
+        def broken(trace, stage, stamp):
+            raise ValueError("broken sink")
+        tracer = tracing.Tracer(sinks=[broken, self.sink])
+        trace = tracer.start('main', 'tx')
+        trace.mark('transmit')
+        trace.index = ('main', 'other', 1, 1)
+        trace.mark('message')
+        trace.mark('sent', done=True)
+        trace.mark('acked')  # ignored once done
+        self.assertTrue(trace.done)
+        self.assertFalse(trace.failed)
+        self.assertEqual([(index, stage) for index, stage, stamp in self.events],
+                         [(None, 'transmit'),
+                          (('main', 'other', 1, 1), 'message'),
+                          (('main', 'other', 1, 1), 'sent')])
+        self.assertEqual(list(trace.stamps.values()),
+                         [stamp for index, stage, stamp in self.events])
+
+    def testCollector(self):
+        '''
+        Test collector histograms stage latencies of ended traces
+        '''
+        console.terse("{0}\n".format(self.testCollector.__doc__))
+        tracer = tracing.Tracer(sinks=[self.collector])
+        trace = tracer.start('main', 'rx')
+        trace.mark('received')
+        self.assertFalse(self.collector.histograms)  # only ended traces
+        trace.mark('failed', done=True)
+        self.assertTrue(trace.failed)
+        self.assertEqual(self.collector.failures, odict(rx=1))
+        self.assertFalse(self.collector.histograms)
+
+        for i in range(4):
+            trace = tracing.Trace(tracer, name='main', kind='rx')
+            trace.stamps.update([('received', 1.0), ('complete', 1.005 + i * 0.02)])
+            trace.done = True
+            self.collector(trace, 'complete', trace.stamps['complete'])
+
+        report = self.collector.report()
+        self.assertEqual(list(report.keys()), ['rx:received>complete', 'rx:total'])
+        summary = report['rx:received>complete']
+        self.assertEqual(summary['count'], 4)
+        self.assertEqual(summary['p50'], 0.05)
+        self.assertAlmostEqual(summary['p90'], 0.065)  # max of overflow
+        self.assertAlmostEqual(summary['max'], 0.065)
+        self.assertEqual(report['rx:total']['count'], 4)
+
+        self.collector.clear()
+        self.assertFalse(self.collector.report())
+        self.assertFalse(self.collector.failures)
+
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = [
+                'testSampling',
+                'testTrace',
+                'testCollector',
+            ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    #runAll() #run all unittests
+
+    runSome()#only run some
+
+    #runOne('testSampling')
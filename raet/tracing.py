@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+'''
+tracing.py raet message lifecycle tracing
+
+A stack given a Tracer starts a Trace for a sample of the messages it
+transmits and receives. Each Trace records monotonic stamps, from
+metering.Clock, of the stages the message passes through and is keyed by
+its transaction index once known, the Messenger or Messengent index of a
+road message or the (local yard, remote yard, si, bi) index of a lane book.
+Every stage fires an event on the sinks of the tracer, callables of the form
+sink(trace, stage, stamp).
+
+Transmitted message stages in order:
+    transmit   accepted onto .txMsgs
+    message    taken off .txMsgs and packed, index assigned
+    txes       first packet or page queued on .txes
+    sent       first packet or page sent by the server
+    acked      done ack received from the remote estate, road only
+Received message stages in order:
+    received   first packet or page of message received
+    complete   all segments or pages received and body parsed
+    rx_msgs    body appended to .rxMsgs or handed to its stream
+A road trace ends at acked and a lane trace at sent or rx_msgs. A message
+abandoned before then ends at failed.
+
+Sampling keeps one in every 1 / sample messages so tracing may stay enabled
+in production, the cost of an unsampled message is a single float addition.
+
+Example:
+
+    collector = tracing.Collector()
+    stack = RoadStack(tracer=tracing.Tracer(sample=0.01, sinks=[collector]), ...)
+    ...
+    collector.report()['tx:message>txes']['p99']
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+
+# Import ioflo libs
+from ioflo.aid.odicting import odict
+
+# Import raet libs
+from .abiding import *  # import globals
+from . import raeting
+from . import metering
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+
+class Trace(object):
+    '''
+    Lifecycle stamps of one sampled message
+    .stamps is odict of clock stamps keyed by stage in order reached
+    '''
+    def __init__(self, tracer, name, kind, index=None):
+        '''
+        Setup instance
+
+        tracer is Tracer whose sinks get the events
+        name is name of stack
+        kind is 'tx' for transmitted 'rx' for received message
+        index is transaction index or None until known
+        '''
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.index = index
+        self.stamps = odict()
+        self.done = False
+
+    def mark(self, stage, done=False):
+        '''
+        Stamp stage and fire event unless trace is already done
+        done is True when stage ends the trace
+        '''
+        if self.done:
+            return
+        stamp = metering.Clock()
+        self.stamps[stage] = stamp
+        self.done = done
+        self.tracer.emit(self, stage, stamp)
+
+    @property
+    def failed(self):
+        '''
+        True if trace ended abandoned
+        '''
+        return self.done and 'failed' in self.stamps
+
+
+class Tracer(object):
+    '''
+    Starts sampled Traces and fires their events on sinks
+    '''
+    Sample = 1.0  # fraction of messages traced
+
+    def __init__(self, sample=None, sinks=None):
+        '''
+        Setup instance
+
+        sample is fraction of messages traced 0.0 to 1.0
+        sinks is list of callables sink(trace, stage, stamp)
+        '''
+        self.sample = sample if sample is not None else self.Sample
+        self.sinks = list(sinks) if sinks is not None else []
+        self.accrued = 0.0  # sample fraction accrued since last traced message
+
+    def add(self, sink):
+        '''
+        Add sink callable sink(trace, stage, stamp)
+        '''
+        self.sinks.append(sink)
+
+    def sampled(self):
+        '''
+        Returns True if the next message is traced
+        '''
+        self.accrued += self.sample
+        if self.accrued < 1.0:
+            return False
+        self.accrued -= 1.0
+        return True
+
+    def start(self, name, kind, index=None):
+        '''
+        Returns new Trace for stack name if next message is sampled else None
+        '''
+        if not self.sinks or not self.sampled():
+            return None
+        return Trace(self, name=name, kind=kind, index=index)
+
+    def emit(self, trace, stage, stamp):
+        '''
+        Fire event on every sink
+        '''
+        for sink in self.sinks:
+            try:
+                sink(trace, stage, stamp)
+            except Exception as ex:  # never let a sink break the stack
+                console.terse("Failed trace sink {0}. {1}\n".format(sink, ex))
+
+
+class Collector(object):
+    '''
+    Trace sink that keeps latency histograms of each stage of ended traces
+    keyed by kind and stage pair as in 'tx:message>txes' plus kind total
+    '''
+    def __init__(self, buckets=None):
+        '''
+        Setup instance
+
+        buckets is histogram bucket bounds in seconds
+        '''
+        self.buckets = buckets if buckets is not None else metering.LATENCY_BUCKETS
+        self.histograms = odict()
+        self.failures = odict()  # count of failed traces keyed by kind
+
+    def __call__(self, trace, stage, stamp):
+        if not trace.done:
+            return
+        if trace.failed:
+            self.failures[trace.kind] = self.failures.get(trace.kind, 0) + 1
+            return
+        stages = list(trace.stamps.items())
+        for (prior, start), (stage, end) in zip(stages, stages[1:]):
+            self.observe("{0}:{1}>{2}".format(trace.kind, prior, stage), end - start)
+        self.observe("{0}:total".format(trace.kind), stages[-1][1] - stages[0][1])
+
+    def observe(self, key, value):
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = metering.Histogram(self.buckets, name=key)
+            self.histograms[key] = histogram
+        histogram.observe(value)
+
+    def clear(self):
+        '''
+        Forget all traces
+        '''
+        self.histograms.clear()
+        self.failures.clear()
+
+    def report(self):
+        '''
+        Returns odict of per stage latency summaries, count, mean, max and
+        percentiles, keyed as .histograms
+        '''
+        report = odict()
+        for key, histogram in self.histograms.items():
+            snap = histogram.snapshot()
+            report[key] = odict((field, snap[field])
+                                for field in ('count', 'mean', 'max', 'p50', 'p90', 'p99'))
+        return report
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+'''
+systest.bench package
+micro and macro benchmarks, run each module as a script
+'''
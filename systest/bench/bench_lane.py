@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark LaneStack throughput over uxd datagrams, shared memory rings and
+file descriptor passing of large bodies, and of reliable datagrams
+
+Sends batches of messages between two yards on one host and reports messages
+and megabytes per second for each transport.
+
+    $ python systest/bench/bench_lane.py
+'''
+from __future__ import print_function
+
+import shutil
+import tempfile
+import time
+
+from ioflo.aid.odicting import odict
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting
+from raet.lane import yarding, stacking, passing
+
+Clock = getattr(time, 'monotonic', time.time)
+
+
+def bench(dirpath, size, count, window=64, **kwa):
+    '''
+    Returns duple (msgs per second, MB per second) sending count messages
+    with content of size bytes from one yard to another keeping at most
+    window messages outstanding
+    kwa are LaneStack transport options
+    '''
+    main = stacking.LaneStack(name='main', lanename='bench', sockdirpath=dirpath, **kwa)
+    other = stacking.LaneStack(name='other', lanename='bench', sockdirpath=dirpath, **kwa)
+    main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+    uid = main.remotes.values()[0].uid
+    body = odict(route=odict(src='main', dst='other'), content='x' * size)
+    sent = received = 0
+    start = Clock()
+    while received < count:
+        while sent < count and sent - received < window:
+            main.transmit(body, uid)
+            sent += 1
+        main.serviceAll()
+        other.serviceAll()
+        while other.rxMsgs:
+            other.rxMsgs.popleft()
+            received += 1
+    elapsed = Clock() - start
+    main.server.close()
+    other.server.close()
+    return (count / elapsed, count * size / elapsed / 1e6)
+
+
+def main():
+    console.reinit(verbosity=console.Wordage.mute)
+    transports = [('datagram', dict()),
+                  ('reliable', dict(reliable=True)),
+                  ('ring', dict(ring=True, ringSize=64 * 1024 * 1024))]
+    if passing.Passable:
+        transports.append(('fd', dict(fdThreshold=raeting.UXD_MAX_PACKET_SIZE)))
+    dirpath = tempfile.mkdtemp(prefix='raet', suffix='bench', dir='/dev/shm')
+    try:
+        for size, count in [(100, 20000), (10000, 10000), (1000000, 500)]:
+            for name, kwa in transports:
+                rate, mbps = bench(dirpath, size, count, **kwa)
+                print("{0:>8} byte msgs {1:<9} {2:10.0f} msgs/s {3:8.1f} MB/s".format(
+                        size, name, rate, mbps))
+    finally:
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark hot path log call sites at terse verbosity
+
+Compares eagerly formatted console calls, as raet made before the consoling
+Logger, with lazy formatted Logger calls and calls guarded by .enabled for
+log lines taken from the road packet receive and message transmit paths.
+Reports nanoseconds per call site when the console discards the line.
+
+    $ python systest/bench/bench_logging.py
+'''
+from __future__ import print_function
+
+import time
+
+from ioflo.aid.odicting import odict
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import consoling
+from raet.raeting import TrnsKind, PcktKind
+
+log = consoling.getLogger()
+
+Clock = getattr(time, 'monotonic', time.time)
+
+
+class Packet(object):
+    '''
+    Stand in for received packet with head data and computed index
+    '''
+    def __init__(self):
+        self.data = odict(sh='10.0.0.1', sp=7530, dh='10.0.0.2', dp=7531,
+                          se=2, de=3, tk=TrnsKind.message.value,
+                          pk=PcktKind.message.value, cf=False, bf=False,
+                          si=1, ti=77, sc=4, sn=2, ml=4000)
+
+    @property
+    def index(self):
+        data = self.data
+        return (data['cf'], data['de'], data['se'], data['si'], data['ti'], data['bf'])
+
+
+def eager(name, packet, stamp):
+    console.concise("Messenger {0}. Do Message Segment {1} with {2} in {3} at {4}\n".format(
+            name, packet.data['sn'], 'other', packet.data['ti'], stamp))
+    console.profuse("{0} received packet data\n{1}\n".format(name, packet.data))
+    console.verbose("{0} received packet index: (rf={1[0]}, le={1[1]}, re={1[2]},"
+            " si={1[3]}, ti={1[4]}, bf={1[5]})\n".format(name, packet.index))
+    console.verbose("{0} received trans kind = '{1}' packet kind = '{2}'"
+                    "\n".format(name, TrnsKind(packet.data['tk']), PcktKind(packet.data['pk'])))
+    console.verbose("segment count={0} number={1} tid={2}\n".format(
+            packet.data['sc'], packet.data['sn'], packet.data['ti']))
+
+
+def lazy(name, packet, stamp):
+    log.concise("Messenger {0}. Do Message Segment {1} with {2} in {3} at {4}\n",
+                name, packet.data['sn'], 'other', packet.data['ti'], stamp)
+    log.profuse("{0} received packet data\n{1}\n", name, packet.data)
+    log.verbose("{0} received packet index: (rf={1[0]}, le={1[1]}, re={1[2]},"
+            " si={1[3]}, ti={1[4]}, bf={1[5]})\n", name, packet.index)
+    log.verbose("{0} received trans kind = '{1}' packet kind = '{2}'"
+                "\n", name, TrnsKind(packet.data['tk']), PcktKind(packet.data['pk']))
+    log.verbose("segment count={0} number={1} tid={2}\n",
+                packet.data['sc'], packet.data['sn'], packet.data['ti'])
+
+
+def guarded(name, packet, stamp):
+    log.concise("Messenger {0}. Do Message Segment {1} with {2} in {3} at {4}\n",
+                name, packet.data['sn'], 'other', packet.data['ti'], stamp)
+    if log.enabled(consoling.VERBOSE):
+        log.profuse("{0} received packet data\n{1}\n", name, packet.data)
+        log.verbose("{0} received packet index: (rf={1[0]}, le={1[1]}, re={1[2]},"
+                " si={1[3]}, ti={1[4]}, bf={1[5]})\n", name, packet.index)
+        log.verbose("{0} received trans kind = '{1}' packet kind = '{2}'"
+                    "\n", name, TrnsKind(packet.data['tk']), PcktKind(packet.data['pk']))
+    log.verbose("segment count={0} number={1} tid={2}\n",
+                packet.data['sc'], packet.data['sn'], packet.data['ti'])
+
+
+def bench(func, count):
+    '''
+    Returns nanoseconds per call of func
+    '''
+    packet = Packet()
+    start = Clock()
+    for i in range(count):
+        func('main', packet, 12.5)
+    return (Clock() - start) * 1e9 / count
+
+
+def main(count=100000):
+    console.reinit(verbosity=console.Wordage.terse)
+    for name, func in [('eager', eager), ('lazy', lazy), ('guarded', guarded)]:
+        print("{0:<8} {1:9.0f} nsec per packet".format(name, bench(func, count)))
+
+
+if __name__ == '__main__':
+    main()
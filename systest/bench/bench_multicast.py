@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark lane fan out of one message to many worker yards
+
+Compares queuing a message to every worker with one LaneStack.message per
+yard against a single LaneStack.multicast and reports microseconds per fan
+out. Pages are queued but not sent so only the sender's work is measured.
+
+    $ python systest/bench/bench_multicast.py
+'''
+from __future__ import print_function
+
+import shutil
+import tempfile
+import time
+
+from ioflo.aid.odicting import odict
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet.lane import yarding, stacking
+
+Clock = getattr(time, 'monotonic', time.time)
+
+
+def bench(main, body, count, multi):
+    '''
+    Returns microseconds per fan out of body to all remotes of main
+    '''
+    uids = list(main.remotes.keys())
+    start = Clock()
+    for i in range(count):
+        if multi:
+            main.multicast(body, uids)
+        else:
+            for uid in uids:
+                main.message(body, uid)
+        main.txes.clear()
+    return (Clock() - start) * 1e6 / count
+
+
+def main(count=200):
+    console.reinit(verbosity=console.Wordage.mute)
+    dirpath = tempfile.mkdtemp(prefix='raet', suffix='bench')
+    try:
+        main = stacking.LaneStack(name='manor', lanename='bench', sockdirpath=dirpath)
+        event = odict(tag='salt/job/20170101000000000000/new',
+                      data=odict(jid='20170101000000000000',
+                                 tgt='*',
+                                 fun='state.apply',
+                                 arg=['webserver', 'pillar={"port": 8080}'],
+                                 minions=['minion{0}'.format(i) for i in range(50)]))
+        bodies = [('1KB event', event),
+                  ('200KB event', odict(event, blob='x' * 200000))]
+        workers = 0
+        for n in (4, 8, 16, 32):
+            while workers < n:
+                main.addRemote(yarding.RemoteYard(stack=main,
+                                                  name='worker{0}'.format(workers),
+                                                  dirpath=dirpath,
+                                                  lanename='bench'))
+                workers += 1
+            for name, body in bodies:
+                each = bench(main, body, count, False)
+                multi = bench(main, body, count, True)
+                print("{0:2d} workers {1:<11} per yard {2:9.1f} usec multicast {3:9.1f} usec"
+                      " {4:5.1f}x".format(n, name, each, multi, each / multi))
+        main.server.close()
+    finally:
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    main()
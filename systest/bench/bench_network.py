@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark road messaging over simulated lossy networks
+
+Joins and allows two road stacks on a clean simulating.Network, then turns on
+the impairments of each profile and sends segmented messages from other to
+main. Reports virtual seconds to deliver them all, goodput in message bytes
+per virtual second, segments redone and resends requested, and datagrams
+lost, duplicated, reordered and dropped by a full receive buffer. Without a
+bandwidth limit every segment of a burst arrives at once so the clean
+profile shows the cost of receive buffer overflow. The network is seeded and
+driven by the store virtual clock so a profile gives the same numbers on
+every run.
+
+    $ python systest/bench/bench_network.py
+'''
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+from ioflo.aid.odicting import odict
+from ioflo.base.storing import Store
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting, nacling
+from raet.road import keeping, estating, stacking, simulating
+
+# name, latency, jitter, loss, duplicate, reorder, bandwidth bytes per second
+PROFILES = [('clean', 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+            ('lan', 0.0005, 0.0001, 0.0, 0.0, 0.0, 1.25e8),
+            ('wan', 0.04, 0.005, 0.001, 0.0, 0.001, 1.25e6),
+            ('lossy', 0.04, 0.01, 0.02, 0.01, 0.02, 1.25e6),
+            ('bad', 0.1, 0.05, 0.1, 0.02, 0.05, 2.5e5)]
+
+STEP = 0.001  # virtual seconds advanced each service pass
+
+
+def createStack(store, network, basedirpath, name, ha, main=None):
+    dirpath = os.path.join(basedirpath, 'road', 'keep', name)
+    keeping.clearAllKeep(dirpath)
+    return stacking.RoadStack(store=store,
+                              name=name,
+                              main=main,
+                              auto=raeting.AutoMode.once.value,
+                              ha=ha,
+                              sigkey=nacling.Signer().keyhex,
+                              prikey=nacling.Privateer().keyhex,
+                              dirpath=dirpath,
+                              network=network)
+
+
+def service(store, stacks, done, limit=600.0):
+    '''
+    Service stacks until done() or limit virtual seconds pass
+    '''
+    start = store.stamp
+    while not done() and store.stamp - start < limit:
+        for stack in stacks:
+            stack.serviceAll()
+        store.advanceStamp(STEP)
+
+
+def bench(profile, count, size, seed=1):
+    '''
+    Returns odict of results of sending count messages of size bytes
+    '''
+    name, latency, jitter, loss, duplicate, reorder, bandwidth = profile
+    store = Store(stamp=0.0)
+    network = simulating.Network(store=store, latency=latency, jitter=jitter,
+                                 bandwidth=bandwidth, seed=seed)
+    basedirpath = tempfile.mkdtemp(prefix="raet", suffix="bench")
+    main = createStack(store, network, basedirpath, 'main', ("", raeting.RAET_PORT), True)
+    other = createStack(store, network, basedirpath, 'other', ("", raeting.RAET_TEST_PORT))
+    stacks = [main, other]
+    try:
+        other.addRemote(estating.RemoteEstate(stack=other, fuid=0, sid=0,
+                                              ha=main.local.ha))
+        other.join()
+        service(store, stacks, lambda: not (main.transactions or other.transactions))
+        other.allow()
+        service(store, stacks, lambda: not (main.transactions or other.transactions))
+
+        network.loss, network.duplicate, network.reorder = loss, duplicate, reorder
+        network.stats.clear()
+        for stack in stacks:
+            stack.clearStats()
+        bloat = 'x' * size
+        for i in range(count):
+            other.transmit(odict(index=i, bloat=bloat))
+        start = store.stamp
+        service(store, stacks,
+                lambda: len(main.rxMsgs) >= count and not other.transactions)
+        elapsed = store.stamp - start
+        return odict(profile=name,
+                     received=len(main.rxMsgs),
+                     seconds=elapsed,
+                     goodput=(len(main.rxMsgs) * size / elapsed) if elapsed else 0.0,
+                     redo=other.stats.get('redo_segment', 0),
+                     resend=main.stats.get('message_resend_tx', 0),
+                     lost=network.stats.get('datagram_lost', 0),
+                     dup=network.stats.get('datagram_duplicated', 0),
+                     reorder=network.stats.get('datagram_reordered', 0),
+                     overflow=network.stats.get('datagram_overflow', 0))
+    finally:
+        for stack in stacks:
+            stack.server.close()
+            stack.clearAllDir()
+        shutil.rmtree(basedirpath, ignore_errors=True)
+
+
+def main(count=20, size=20000):
+    console.reinit(verbosity=console.Wordage.mute)
+    print("{0} messages of {1} bytes other to main".format(count, size))
+    print("{0:<6} {1:>4} {2:>9} {3:>12} {4:>6} {5:>6} {6:>6} {7:>5} {8:>7} {9:>8}".format(
+            'net', 'rcvd', 'vsec', 'bytes/vsec', 'redo', 'resend', 'lost', 'dup',
+            'reorder', 'overflow'))
+    for profile in PROFILES:
+        result = bench(profile, count, size)
+        print("{profile:<6} {received:>4} {seconds:9.3f} {goodput:12.0f} {redo:>6} "
+              "{resend:>6} {lost:>6} {dup:>5} {reorder:>7} {overflow:>8}".format(**result))
+
+
+if __name__ == '__main__':
+    main()
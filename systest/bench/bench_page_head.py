@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+'''
+Microbenchmark lane page head pack and parse with text and binary heads
+
+Reports microseconds per head pack, head parse and full small message page
+round trip for each head kind.
+
+    $ python systest/bench/bench_page_head.py
+'''
+from __future__ import print_function
+
+import time
+
+from ioflo.aid.odicting import odict
+
+from raet import raeting, nacling
+from raet.lane import paging
+
+Clock = getattr(time, 'monotonic', time.time)
+
+
+class Stack(object):
+    '''
+    Stand in for LaneStack attributes used by pages
+    '''
+    ordered = True
+    lazy = False
+
+    def __init__(self, hk):
+        self.hk = hk
+
+
+def timeit(func, count):
+    '''
+    Returns microseconds per call of func
+    '''
+    start = Clock()
+    for i in range(count):
+        func()
+    return (Clock() - start) * 1e6 / count
+
+
+def main(count=50000):
+    data = odict(pk=raeting.PackKind.json.value,
+                 sn='manor_worker_12',
+                 dn='manor_master',
+                 si=nacling.uuid(size=18),
+                 bi=123456)
+    body = odict(route=odict(src=['minion', 'manor_worker_12', None],
+                             dst=['master', 'manor_master', 'remote_cmd']),
+                 load=odict(cmd='_return', id='minion', jid='20170101000000000000'))
+    for hk in (raeting.HeadKind.raet, raeting.HeadKind.binary):
+        stack = Stack(hk.value)
+        page = paging.TxPage(stack=stack, data=data, embody=body)
+        page.pack()
+        packed = page.packed
+
+        def pack():
+            page.head.pack()
+
+        rxPage = paging.RxPage(stack=stack, packed=packed)
+
+        def parse():
+            rxPage.head.parse()
+
+        def roundtrip():
+            tx = paging.TxPage(stack=stack, data=data, embody=body)
+            tx.pack()
+            rx = paging.RxPage(stack=stack, packed=tx.packed)
+            rx.head.parse()
+            rx.body.parse()
+
+        print("{0:<7} head {1:3d} bytes pack {2:6.2f} usec parse {3:6.2f} usec "
+              "page round trip {4:6.2f} usec".format(hk.name,
+                                                     len(page.head.packed),
+                                                     timeit(pack, count),
+                                                     timeit(parse, count),
+                                                     timeit(roundtrip, count // 5)))
+
+
+if __name__ == '__main__':
+    main()
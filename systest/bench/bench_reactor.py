@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark selector based Reactor against fixed period polling of stacks
+
+Measures idle cpu time and ping pong round trip latency between two lane
+stacks.
+
+    $ python systest/bench/bench_reactor.py
+'''
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import time
+
+from ioflo.aid.odicting import odict
+from ioflo.base.storing import Store
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import reacting
+from raet.lane import yarding, stacking
+
+Clock = reacting.Clock
+CpuClock = getattr(time, 'process_time', time.clock)
+
+
+def makeStacks(dirpath):
+    '''
+    Returns duple of two connected lane stacks
+    '''
+    store = Store(stamp=0.0)
+    main = stacking.LaneStack(store=store, name='main', uid=1,
+                              lanename='bench', sockdirpath=dirpath)
+    other = stacking.LaneStack(store=store, name='other', uid=1,
+                               lanename='bench', sockdirpath=dirpath)
+    main.addRemote(yarding.RemoteYard(stack=main, ha=other.ha))
+    other.addRemote(yarding.RemoteYard(stack=other, ha=main.ha))
+    return (main, other)
+
+
+def poller(stacks, period):
+    '''
+    Returns service function that services all stacks then sleeps period
+    '''
+    def service():
+        for stack in stacks:
+            stack.store.changeStamp(stack.store.stamp + period)
+            stack.serviceAll()
+        time.sleep(period)
+    return service
+
+
+def reactor(stacks):
+    '''
+    Returns service function that runs one pass of a Reactor
+    '''
+    react = reacting.Reactor(stacks=stacks)
+    def service():
+        react.serviceOnce()
+    service.reactor = react
+    return service
+
+
+def idle(service, duration):
+    '''
+    Returns cpu seconds used per wall second servicing idle stacks
+    '''
+    start = Clock()
+    cpu = CpuClock()
+    while Clock() - start < duration:
+        if hasattr(service, 'reactor'):
+            service.reactor.serviceOnce(timeout=duration - (Clock() - start))
+        else:
+            service()
+    return (CpuClock() - cpu) / (Clock() - start)
+
+
+def pingpong(service, main, other, count):
+    '''
+    Returns mean round trip seconds of count ping pong messages
+    '''
+    total = 0.0
+    for i in range(count):
+        start = Clock()
+        main.transmit(odict(ping=i))
+        while not main.rxMsgs:
+            service()
+            while other.rxMsgs:
+                msg, name = other.rxMsgs.popleft()
+                other.transmit(odict(pong=msg['ping']))
+        main.rxMsgs.popleft()
+        total += Clock() - start
+    return total / count
+
+
+def run(duration=2.0, count=50):
+    results = odict()
+    for name in ['poll 0.1', 'poll 0.01', 'reactor']:
+        dirpath = tempfile.mkdtemp(prefix="raet", suffix="bench", dir='/tmp')
+        main, other = makeStacks(dirpath)
+        if name == 'reactor':
+            service = reactor([main, other])
+        else:
+            service = poller([main, other], period=float(name.split()[1]))
+        cpu = idle(service, duration)
+        rtt = pingpong(service, main, other, count)
+        results[name] = (cpu, rtt)
+        if hasattr(service, 'reactor'):
+            service.reactor.close()
+        main.server.close()
+        other.server.close()
+        shutil.rmtree(dirpath)
+
+    print("{0:>12} {1:>14} {2:>14}".format('service', 'idle cpu %', 'rtt ms'))
+    for name, (cpu, rtt) in results.items():
+        print("{0:>12} {1:>14.3f} {2:>14.3f}".format(name, cpu * 100.0, rtt * 1000.0))
+    return results
+
+
+if __name__ == '__main__':
+    console.reinit(verbosity=console.Wordage.terse)
+    run()
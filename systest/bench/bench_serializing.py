@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark message body decoding with the registered serializer codecs
+
+Decodes typical message bodies with each codec ordered as odict and plain as
+dict and reports microseconds per decode.
+
+    $ python systest/bench/bench_serializing.py
+'''
+from __future__ import print_function
+
+import time
+
+from ioflo.aid.odicting import odict
+
+from raet import serializing
+from raet.raeting import BodyKind
+
+Clock = getattr(time, 'monotonic', time.time)
+
+
+def payloads():
+    '''
+    Returns odict of sample message bodies keyed by name
+    '''
+    small = odict(route=odict(src=['minion', 'manor', None],
+                              dst=['master', None, 'event_fire']),
+                  tag='salt/job/20170101/ret',
+                  data=odict(id='minion', fun='test.ping', retcode=0, ret=True))
+    states = odict()
+    for i in range(100):
+        states['file_|-/etc/app/conf{0}_|-managed'.format(i)] = odict(
+                result=True,
+                changes=odict(),
+                comment='File /etc/app/conf{0} is in the correct state'.format(i),
+                duration=0.512 + i,
+                __run_num__=i)
+    return odict([('small event', small),
+                  ('state return', odict(route=small['route'], ret=states))])
+
+
+def bench(codec, packed, count):
+    '''
+    Returns microseconds per decode of packed with codec
+    '''
+    start = Clock()
+    for i in range(count):
+        codec.loads(packed)
+    return (Clock() - start) * 1e6 / count
+
+
+def main(count=2000):
+    codecs = [('json odict', serializing.JsonCodec()),
+              ('json dict', serializing.JsonCodec(ordered=False))]
+    if serializing.msgpack:
+        codecs.extend([('msgpack odict', serializing.MsgpackCodec()),
+                       ('msgpack dict', serializing.MsgpackCodec(ordered=False)),
+                       ('msgpack bin dict', serializing.MsgpackCodec(binary=True,
+                                                                     ordered=False))])
+    for name, body in payloads().items():
+        print("{0}:".format(name))
+        for label, codec in codecs:
+            packed = codec.dumps(body)
+            usec = bench(codec, packed, count)
+            print("  {0:<18} {1:6d} bytes {2:9.1f} usec/decode".format(label, len(packed), usec))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark negotiated zlib body compression of road messages
+
+Sends realistic payloads between two allowed road stacks over loopback with
+and without compression and reports segments sent and wall time per message.
+
+    $ python systest/bench/bench_zip.py
+'''
+from __future__ import print_function
+
+import base64
+import os
+import shutil
+import tempfile
+import time
+
+from ioflo.aid.odicting import odict
+from ioflo.base.storing import Store
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting
+from raet.road import estating, stacking
+
+Clock = getattr(time, 'monotonic', time.time)
+
+
+def payloads():
+    '''
+    Returns odict of sample message bodies keyed by name
+    '''
+    states = odict()
+    for i in range(300):
+        states['file_|-/etc/app/conf{0}_|-/etc/app/conf{0}_|-managed'.format(i)] = odict(
+                result=True,
+                changes=odict(),
+                comment='File /etc/app/conf{0} is in the correct state'.format(i),
+                name='/etc/app/conf{0}'.format(i),
+                duration=0.512 + i,
+                __run_num__=i)
+    pillar = odict()
+    for i in range(200):
+        pillar['user{0}'.format(i)] = odict(uid=1000 + i,
+                                            shell='/bin/bash',
+                                            groups=['wheel', 'users', 'dev{0}'.format(i % 7)],
+                                            home='/home/user{0}'.format(i))
+    chunk = ''.join('line {0} of a configuration file with some settings = value\n'.format(i)
+                    for i in range(1000))
+    return odict([('state tree', odict(ret=states)),
+                  ('pillar', odict(pillar=pillar)),
+                  ('file chunk', odict(data=chunk)),
+                  ('random file chunk', odict(data=base64.b64encode(os.urandom(48000)).decode('ascii'))),
+                 ])
+
+
+def makeStacks(dirpath, zk):
+    '''
+    Returns duple of joined and allowed road stacks offering compression zk
+    '''
+    store = Store(stamp=0.0)
+    main = stacking.RoadStack(store=store, name='main', main=True, zk=zk,
+                              auto=raeting.AutoMode.once.value,
+                              ha=("127.0.0.1", raeting.RAET_PORT),
+                              dirpath=os.path.join(dirpath, 'main'))
+    other = stacking.RoadStack(store=store, name='other', zk=zk,
+                               auto=raeting.AutoMode.once.value,
+                               ha=("127.0.0.1", raeting.RAET_TEST_PORT),
+                               dirpath=os.path.join(dirpath, 'other'))
+    other.addRemote(estating.RemoteEstate(stack=other, fuid=0, sid=0, ha=main.local.ha))
+    other.join(cascade=True)
+    service([main, other], lambda: other.remotes.values()[0].allowed and
+                                   not (main.transactions or other.transactions))
+    return (main, other)
+
+
+def service(stacks, predicate):
+    '''
+    Service stacks until predicate is true
+    '''
+    while not predicate():
+        for stack in stacks:
+            stack.serviceAll()
+            stack.store.advanceStamp(0.01)
+        time.sleep(0.0001)
+
+
+def transfer(main, other, body, count):
+    '''
+    Returns duple (segments, seconds) per message sending body count times
+    '''
+    segments = other.stats.get('message_segment_tx', 0)
+    start = Clock()
+    for i in range(count):
+        other.transmit(body)
+        service([main, other], lambda: main.rxMsgs)
+        main.rxMsgs.popleft()
+    return ((other.stats['message_segment_tx'] - segments) / float(count),
+            (Clock() - start) / count)
+
+
+def run(count=10):
+    results = odict()
+    for zk in [raeting.ZipKind.nada, raeting.ZipKind.zlib]:
+        dirpath = tempfile.mkdtemp(prefix="raet", suffix="bench", dir='/tmp')
+        main, other = makeStacks(dirpath, zk.value)
+        for name, body in payloads().items():
+            results[(name, zk.name)] = transfer(main, other, body, count)
+        for stack in [main, other]:
+            stack.server.close()
+            stack.clearAllDir()
+        shutil.rmtree(dirpath)
+
+    print("{0:>18} {1:>6} {2:>10} {3:>10}".format('payload', 'zip', 'segments', 'ms'))
+    for (name, zk), (segments, seconds) in results.items():
+        print("{0:>18} {1:>6} {2:>10.1f} {3:>10.3f}".format(name, zk, segments, seconds * 1000.0))
+    return results
+
+
+if __name__ == '__main__':
+    console.reinit(verbosity=console.Wordage.terse)
+    run()